@@ -0,0 +1,32 @@
+"""Índices para paginación keyset de empleados y usuarios
+
+Revision ID: 11a02db72237
+Revises: 2f316ab84345
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '11a02db72237'
+down_revision: Union[str, Sequence[str], None] = '2f316ab84345'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # InnoDB agrega la clave primaria a cada índice secundario, por lo que
+    # (nombre) y (fecha_creacion) cubren el orden (clave, id) de las páginas.
+    op.create_index('idx_empleados_nombre', 'empleados', ['nombre'], unique=False)
+    op.create_index('idx_usuarios_fecha_creacion', 'usuarios', ['fecha_creacion'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_usuarios_fecha_creacion', table_name='usuarios')
+    op.drop_index('idx_empleados_nombre', table_name='empleados')
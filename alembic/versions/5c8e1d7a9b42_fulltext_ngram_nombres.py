@@ -0,0 +1,38 @@
+"""Índices FULLTEXT (parser ngram) sobre nombres de departamentos, proyectos y empleados
+
+Revision ID: 5c8e1d7a9b42
+Revises: 11a02db72237
+Create Date: 2026-10-18 11:02:17.604913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c8e1d7a9b42'
+down_revision: Union[str, Sequence[str], None] = '11a02db72237'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ngram indexa subcadenas de ngram_token_size caracteres, lo que permite
+    # reemplazar LIKE '%x%' (recorrido completo) por MATCH ... AGAINST.
+    # Sin stopwords: ngram descarta todo token que contenga una ('a', 'i'...),
+    # y con la lista por defecto "Maria" o "Ana" no tendrían ningún bigrama.
+    # La lista vigente al crear el índice queda fija para ese índice.
+    op.execute("SET SESSION innodb_ft_enable_stopword = 0")
+    for tabla in ('departamentos', 'proyectos', 'empleados'):
+        op.create_index(f'ft_{tabla}_nombre', tabla, ['nombre'], unique=False,
+                        mysql_prefix='FULLTEXT', mysql_with_parser='ngram')
+    op.execute("SET SESSION innodb_ft_enable_stopword = 1")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for tabla in ('empleados', 'proyectos', 'departamentos'):
+        op.drop_index(f'ft_{tabla}_nombre', table_name=tabla)
@@ -0,0 +1,43 @@
+"""Índices compuestos para las consultas frecuentes de logs_clima
+
+Revision ID: 8d4f0b6e2c17
+Revises: 5c8e1d7a9b42
+Create Date: 2026-10-18 12:20:44.187362
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4f0b6e2c17'
+down_revision: Union[str, Sequence[str], None] = '5c8e1d7a9b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Cada índice termina en fecha_consulta para que ORDER BY fecha_consulta DESC
+    # LIMIT n lea las primeras n entradas del índice sin filesort.
+    op.create_index('idx_logs_clima_fecha', 'logs_clima', ['fecha_consulta'], unique=False)
+    op.create_index('idx_logs_clima_usuario_fecha', 'logs_clima',
+                    ['usuario_id', 'fecha_consulta'], unique=False)
+    op.create_index('idx_logs_clima_proyecto_fecha', 'logs_clima',
+                    ['proyecto_id', 'fecha_consulta'], unique=False)
+    op.create_index('idx_logs_clima_ciudad_pais_fecha', 'logs_clima',
+                    ['ciudad', 'pais', 'fecha_consulta'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # MySQL eliminó los índices implícitos de las claves foráneas al crearse los
+    # compuestos; se recrean antes para poder borrar estos.
+    op.create_index('usuario_id', 'logs_clima', ['usuario_id'], unique=False)
+    op.create_index('proyecto_id', 'logs_clima', ['proyecto_id'], unique=False)
+    op.drop_index('idx_logs_clima_ciudad_pais_fecha', table_name='logs_clima')
+    op.drop_index('idx_logs_clima_proyecto_fecha', table_name='logs_clima')
+    op.drop_index('idx_logs_clima_usuario_fecha', table_name='logs_clima')
+    op.drop_index('idx_logs_clima_fecha', table_name='logs_clima')
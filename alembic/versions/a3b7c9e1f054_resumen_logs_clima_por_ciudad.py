@@ -0,0 +1,45 @@
+"""Tabla de resumen por ciudad de logs_clima
+
+Revision ID: a3b7c9e1f054
+Revises: 8d4f0b6e2c17
+Create Date: 2026-10-18 13:05:12.550871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3b7c9e1f054'
+down_revision: Union[str, Sequence[str], None] = '8d4f0b6e2c17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Los datos existentes se cargan con scripts/reconstruir_resumen_clima.py
+    op.create_table('logs_clima_resumen_ciudad',
+    sa.Column('ciudad', sa.String(length=200), nullable=False),
+    sa.Column('pais', sa.String(length=10), nullable=False),
+    sa.Column('total_consultas', sa.Integer(), nullable=False),
+    sa.Column('suma_aqi', sa.BigInteger(), nullable=False),
+    sa.Column('aqi_minimo', sa.Integer(), nullable=False),
+    sa.Column('aqi_maximo', sa.Integer(), nullable=False),
+    sa.Column('suma_pm2_5', sa.DECIMAL(precision=16, scale=2), nullable=False),
+    sa.Column('consultas_pm2_5', sa.Integer(), nullable=False),
+    sa.Column('suma_pm10', sa.DECIMAL(precision=16, scale=2), nullable=False),
+    sa.Column('consultas_pm10', sa.Integer(), nullable=False),
+    sa.Column('ultima_consulta', sa.TIMESTAMP(), nullable=True),
+    sa.PrimaryKeyConstraint('ciudad', 'pais')
+    )
+    op.create_index('idx_resumen_ciudad_consultas', 'logs_clima_resumen_ciudad',
+                    ['total_consultas'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_resumen_ciudad_consultas', table_name='logs_clima_resumen_ciudad')
+    op.drop_table('logs_clima_resumen_ciudad')
@@ -0,0 +1,39 @@
+"""Caché persistente de Geocoding API por ciudad
+
+Revision ID: b4d8e2f6a913
+Revises: e1f5b3a7c820
+Create Date: 2026-10-18 16:20:41.385027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d8e2f6a913'
+down_revision: Union[str, Sequence[str], None] = 'e1f5b3a7c820'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Las coordenadas ya guardadas en logs_clima se cargan con scripts/precargar_geocodificacion.py
+    op.create_table('geocodificacion_ciudades',
+    sa.Column('ciudad_normalizada', sa.String(length=200), nullable=False),
+    sa.Column('pais', sa.String(length=10), nullable=False),
+    sa.Column('ciudad', sa.String(length=200), nullable=False),
+    sa.Column('latitud', sa.DECIMAL(precision=10, scale=6), nullable=True),
+    sa.Column('longitud', sa.DECIMAL(precision=10, scale=6), nullable=True),
+    sa.Column('encontrada', sa.Boolean(), nullable=False),
+    sa.Column('origen', sa.String(length=20), nullable=False),
+    sa.Column('actualizado', sa.TIMESTAMP(), nullable=False),
+    sa.PrimaryKeyConstraint('ciudad_normalizada', 'pais')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('geocodificacion_ciudades')
@@ -0,0 +1,57 @@
+"""Rollups por hora y por día de logs_clima
+
+Revision ID: c6e2a8d4f391
+Revises: a3b7c9e1f054
+Create Date: 2026-10-18 14:11:36.902457
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6e2a8d4f391'
+down_revision: Union[str, Sequence[str], None] = 'a3b7c9e1f054'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CONTAMINANTES = ('co', 'no2', 'o3', 'so2', 'pm2_5', 'pm10', 'nh3')
+
+
+def _columnas_agregadas():
+    columnas = [
+        sa.Column('ciudad', sa.String(length=200), nullable=False),
+        sa.Column('pais', sa.String(length=10), nullable=False),
+        sa.Column('periodo', sa.DateTime(), nullable=False),
+        sa.Column('lecturas', sa.Integer(), nullable=False),
+        sa.Column('aqi_promedio', sa.DECIMAL(precision=5, scale=2), nullable=False),
+        sa.Column('aqi_minimo', sa.Integer(), nullable=False),
+        sa.Column('aqi_maximo', sa.Integer(), nullable=False),
+    ]
+    for contaminante in CONTAMINANTES:
+        for sufijo in ('promedio', 'minimo', 'maximo'):
+            columnas.append(sa.Column(f'{contaminante}_{sufijo}',
+                                      sa.DECIMAL(precision=10, scale=2), nullable=True))
+    columnas.append(sa.PrimaryKeyConstraint('ciudad', 'pais', 'periodo'))
+    return columnas
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Se llenan con scripts/actualizar_rollups_clima.py o el compactador en segundo plano
+    op.create_table('logs_clima_hora', *_columnas_agregadas())
+    op.create_table('logs_clima_dia', *_columnas_agregadas())
+    op.create_table('logs_clima_rollup_marca',
+    sa.Column('nivel', sa.String(length=10), nullable=False),
+    sa.Column('procesado_hasta', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('nivel')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('logs_clima_rollup_marca')
+    op.drop_table('logs_clima_dia')
+    op.drop_table('logs_clima_hora')
@@ -0,0 +1,43 @@
+"""Reconstruye los índices FULLTEXT ngram de nombres sin lista de stopwords
+
+Revision ID: d7b3f9a1c264
+Revises: b4d8e2f6a913
+Create Date: 2026-10-19 09:14:52.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7b3f9a1c264'
+down_revision: Union[str, Sequence[str], None] = 'b4d8e2f6a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLAS = ('departamentos', 'proyectos', 'empleados')
+
+
+def _reconstruir(stopwords):
+    # InnoDB toma la lista de stopwords al crear el índice: hay que recrearlo
+    op.execute(f"SET SESSION innodb_ft_enable_stopword = {1 if stopwords else 0}")
+    for tabla in TABLAS:
+        op.drop_index(f'ft_{tabla}_nombre', table_name=tabla)
+        op.create_index(f'ft_{tabla}_nombre', tabla, ['nombre'], unique=False,
+                        mysql_prefix='FULLTEXT', mysql_with_parser='ngram')
+    op.execute("SET SESSION innodb_ft_enable_stopword = 1")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Con la lista por defecto, ngram descarta los bigramas que contienen 'a'
+    # o 'i' y MATCH no encuentra nombres como "Maria", "Ana" o "Sofía".
+    # Las bases que ya aplicaron 5c8e1d7a9b42 tienen ese índice.
+    _reconstruir(stopwords=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _reconstruir(stopwords=True)
@@ -0,0 +1,80 @@
+"""Particionar logs_clima por mes (RANGE sobre fecha_consulta)
+
+Revision ID: e1f5b3a7c820
+Revises: c6e2a8d4f391
+Create Date: 2026-10-18 15:02:48.116093
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f5b3a7c820'
+down_revision: Union[str, Sequence[str], None] = 'c6e2a8d4f391'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MESES_FUTUROS = 3
+
+
+def _sumar_meses(mes, cantidad):
+    indice = mes.year * 12 + mes.month - 1 + cantidad
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+
+    # 1. La columna de partición debe ser NOT NULL para formar parte de la clave primaria
+    op.execute("UPDATE logs_clima SET fecha_consulta = COALESCE(created_at, NOW()) "
+               "WHERE fecha_consulta IS NULL")
+
+    # 2. InnoDB no admite claves foráneas en tablas particionadas. Los índices
+    #    (usuario_id, fecha_consulta) y (proyecto_id, fecha_consulta) se conservan.
+    for fk in sa.inspect(bind).get_foreign_keys('logs_clima'):
+        op.drop_constraint(fk['name'], 'logs_clima', type_='foreignkey')
+
+    # 3. Toda clave única debe incluir la columna de partición
+    op.execute("""
+        ALTER TABLE logs_clima
+            MODIFY fecha_consulta TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            DROP PRIMARY KEY,
+            ADD PRIMARY KEY (id, fecha_consulta)
+    """)
+
+    # 4. Una partición por mes desde la primera lectura hasta MESES_FUTUROS adelante
+    primera = bind.execute(sa.text("SELECT MIN(fecha_consulta) FROM logs_clima")).scalar()
+    hoy = date.today()
+    mes = date(primera.year, primera.month, 1) if primera else date(hoy.year, hoy.month, 1)
+    ultimo = _sumar_meses(date(hoy.year, hoy.month, 1), MESES_FUTUROS)
+
+    particiones = []
+    while mes <= ultimo:
+        limite = _sumar_meses(mes, 1)
+        particiones.append(f"PARTITION p{mes:%Y%m} VALUES LESS THAN "
+                           f"(UNIX_TIMESTAMP('{limite:%Y-%m-%d} 00:00:00'))")
+        mes = limite
+    particiones.append("PARTITION p_futuro VALUES LESS THAN MAXVALUE")
+
+    op.execute(
+        "ALTER TABLE logs_clima PARTITION BY RANGE (UNIX_TIMESTAMP(fecha_consulta)) (\n    "
+        + ",\n    ".join(particiones) + "\n)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE logs_clima REMOVE PARTITIONING")
+    op.execute("""
+        ALTER TABLE logs_clima
+            DROP PRIMARY KEY,
+            ADD PRIMARY KEY (id),
+            MODIFY fecha_consulta TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP
+    """)
+    op.create_foreign_key(None, 'logs_clima', 'usuarios', ['usuario_id'], ['id'])
+    op.create_foreign_key(None, 'logs_clima', 'proyectos', ['proyecto_id'], ['id'])
@@ -0,0 +1,33 @@
+"""Días de logs_clima con lecturas tardías por consolidar en los rollups
+
+Revision ID: f2c8a4d6b193
+Revises: d7b3f9a1c264
+Create Date: 2026-10-18 19:42:08.517306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c8a4d6b193'
+down_revision: Union[str, Sequence[str], None] = 'd7b3f9a1c264'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # LogClimaRepo.crear_muchos registra aquí los días de lecturas anteriores a la hora en curso
+    op.create_table('logs_clima_rollup_pendiente',
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('cambios', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('dia')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('logs_clima_rollup_pendiente')
@@ -0,0 +1,313 @@
+"""
+Análisis vectorizado del historial de calidad del aire con NumPy.
+
+`LogClimaFrame` guarda las lecturas de logs_clima por columnas en arreglos
+contiguos en lugar de una lista de dicts: contaminantes en float32 (NaN si
+faltan), AQI en uint8, fecha en datetime64[s] y la ubicación como un código
+entero por (ciudad, país) con el diccionario en `ciudades`. Son ~41 bytes por
+lectura (10 millones caben en ~410 MB) y filtros y agregados se calculan sin
+recorrer filas en Python.
+
+Ejemplo:
+    frame = LogClimaFrame.desde_repo(desde=datetime(2026, 1, 1))
+    santiago = frame.filtrar(ciudad="Santiago", pais="CL")
+    santiago.remuestrear('dia', metricas=('aqi', 'pm2_5'))
+    # -> [{'periodo': datetime(...), 'lecturas': 24, 'aqi_promedio': 2.1, ...}, ...]
+
+NumPy es opcional: el resto de la aplicación funciona sin instalarlo y el
+error aparece recién al usar esta clase.
+"""
+from datetime import timedelta
+from operator import itemgetter
+
+from persistencia.repositorios import LogClimaRepo
+from persistencia.rollups import METRICAS
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dependencia opcional
+    np = None
+
+CONTAMINANTES = METRICAS[1:]
+# Filas que se convierten a arreglos de una vez durante la carga
+TAMANO_BLOQUE_FRAME = 65536
+
+_SEGUNDOS = {'hora': 3600, 'dia': 86400}
+
+
+def _requerir_numpy():
+    if np is None:
+        raise RuntimeError("LogClimaFrame requiere NumPy: pip install numpy")
+
+
+def _a_python(arreglo):
+    """Lista de valores Python con None en lugar de NaN"""
+    return [None if v != v else v for v in arreglo.tolist()]
+
+
+def _segmentos(clave):
+    """
+    Agrupa por `clave` en segmentos contiguos: (orden, claves únicas, inicio
+    de cada segmento). `orden` es None si la clave ya viene ordenada, como
+    las fechas que entrega el repositorio, y así se evita ordenar.
+    """
+    orden = None
+    if len(clave) > 1 and not (clave[1:] >= clave[:-1]).all():
+        orden = np.argsort(clave, kind='stable')
+        clave = clave[orden]
+    if not len(clave):
+        return orden, clave, np.empty(0, np.intp)
+    inicios = np.flatnonzero(np.concatenate(([True], clave[1:] != clave[:-1])))
+    return orden, clave[inicios], inicios
+
+
+class _Columnas:
+    """Arreglos de la carga; crecen al doble (realloc) hasta recibir todas las filas"""
+
+    def __init__(self, capacidad):
+        capacidad = max(capacidad, 1)
+        self.filas = 0
+        self.arreglos = {
+            'codigo': np.empty(capacidad, np.int32),
+            'fecha': np.empty(capacidad, 'datetime64[s]'),
+            'aqi': np.empty(capacidad, np.uint8),
+        }
+        for nombre in CONTAMINANTES:
+            self.arreglos[nombre] = np.empty(capacidad, np.float32)
+
+    def agregar(self, bloque):
+        n = len(bloque['codigo'])
+        fin = self.filas + n
+        capacidad = len(self.arreglos['codigo'])
+        if fin > capacidad:
+            self._redimensionar(max(fin, capacidad * 2))
+        for nombre, valores in bloque.items():
+            self.arreglos[nombre][self.filas:fin] = valores
+        self.filas = fin
+
+    def _redimensionar(self, capacidad):
+        for arreglo in self.arreglos.values():
+            # Los arreglos no se comparten durante la carga: se redimensionan en el lugar
+            arreglo.resize(capacidad, refcheck=False)
+
+    def terminar(self):
+        self._redimensionar(self.filas)
+        return self.arreglos
+
+
+class LogClimaFrame:
+    """Lecturas de calidad del aire en columnas NumPy, con filtros y agregados vectorizados"""
+
+    def __init__(self, ciudades, codigo, fecha, aqi, contaminantes):
+        """
+        Args:
+            ciudades: Lista de (ciudad, pais); la posición es el código
+            codigo: Código de ciudad por lectura (int32)
+            fecha: Fecha de cada lectura (datetime64[s])
+            aqi: AQI de cada lectura (uint8)
+            contaminantes: Dict nombre -> arreglo float32 (NaN = sin dato)
+        """
+        _requerir_numpy()
+        self.ciudades = list(ciudades)
+        self.codigo = codigo
+        self.fecha = fecha
+        self.aqi = aqi
+        self.contaminantes = contaminantes
+
+    @classmethod
+    def desde_repo(cls, repo=None, desde=None, hasta=None, tamano_bloque=None, capacidad=None):
+        """
+        Carga las lecturas de [desde, hasta) en streaming desde LogClimaRepo,
+        sin materializar la lista de dicts.
+
+        Args:
+            capacidad: Filas esperadas (opcional); evita redimensionar durante la carga
+        """
+        repo = repo or LogClimaRepo()
+        filas = repo.iterar_mediciones(desde, hasta, tamano_bloque=tamano_bloque)
+        return cls.desde_filas(filas, capacidad=capacidad)
+
+    @classmethod
+    def desde_filas(cls, filas, tamano_bloque=TAMANO_BLOQUE_FRAME, capacidad=None):
+        """Construye el frame desde un iterable de dicts con las columnas de logs_clima"""
+        _requerir_numpy()
+        codigos = {}
+        columnas = _Columnas(capacidad or tamano_bloque)
+        bloque = []
+        for fila in filas:
+            bloque.append(fila)
+            if len(bloque) == tamano_bloque:
+                columnas.agregar(cls._convertir(bloque, codigos))
+                bloque = []
+        if bloque:
+            columnas.agregar(cls._convertir(bloque, codigos))
+        arreglos = columnas.terminar()
+        return cls(
+            list(codigos), arreglos.pop('codigo'), arreglos.pop('fecha'), arreglos.pop('aqi'), arreglos
+        )
+
+    @staticmethod
+    def _convertir(filas, codigos):
+        ubicacion, medidas = itemgetter('ciudad', 'pais'), itemgetter(*METRICAS)
+        valores = np.array([medidas(f) for f in filas], np.float32)
+        bloque = {
+            'codigo': np.fromiter((codigos.setdefault(ubicacion(f), len(codigos)) for f in filas),
+                                  np.int32, len(filas)),
+            'fecha': np.array([f['fecha_consulta'] for f in filas], 'datetime64[s]'),
+            'aqi': valores[:, 0].astype(np.uint8),
+        }
+        for i, nombre in enumerate(CONTAMINANTES, start=1):
+            bloque[nombre] = valores[:, i]
+        return bloque
+
+    def __len__(self):
+        return len(self.codigo)
+
+    def __repr__(self):
+        return (f"LogClimaFrame(lecturas={len(self)}, ciudades={len(self.ciudades)}, "
+                f"memoria={self.memoria() / 2**20:.1f} MB)")
+
+    def memoria(self):
+        """Bytes ocupados por las columnas"""
+        return (self.codigo.nbytes + self.fecha.nbytes + self.aqi.nbytes
+                + sum(a.nbytes for a in self.contaminantes.values()))
+
+    def columna(self, nombre):
+        """Arreglo de 'aqi', 'fecha' o un contaminante"""
+        if nombre == 'aqi':
+            return self.aqi
+        if nombre == 'fecha':
+            return self.fecha
+        if nombre not in self.contaminantes:
+            raise ValueError(f"Columna desconocida: {nombre}")
+        return self.contaminantes[nombre]
+
+    def filtrar(self, ciudad=None, pais=None, desde=None, hasta=None, aqi_minimo=None, aqi_maximo=None,
+                mascara=None):
+        """
+        Nuevo frame con las lecturas que cumplen todas las condiciones dadas.
+
+        Args:
+            ciudad, pais: Ubicación (sin distinguir mayúsculas, como la colación de MySQL)
+            desde, hasta: Rango [desde, hasta) de fecha_consulta
+            aqi_minimo, aqi_maximo: Rango cerrado de AQI
+            mascara: Arreglo booleano adicional (p. ej. frame.columna('pm2_5') > 25)
+        """
+        seleccion = np.ones(len(self), bool) if mascara is None else np.asarray(mascara, bool)
+        if ciudad is not None or pais is not None:
+            codigos = [
+                i for i, (c, p) in enumerate(self.ciudades)
+                if (ciudad is None or c.lower() == ciudad.lower()) and (pais is None or p.lower() == pais.lower())
+            ]
+            seleccion = seleccion & np.isin(self.codigo, codigos)
+        if desde is not None:
+            seleccion = seleccion & (self.fecha >= np.datetime64(desde, 's'))
+        if hasta is not None:
+            seleccion = seleccion & (self.fecha < np.datetime64(hasta, 's'))
+        if aqi_minimo is not None:
+            seleccion = seleccion & (self.aqi >= aqi_minimo)
+        if aqi_maximo is not None:
+            seleccion = seleccion & (self.aqi <= aqi_maximo)
+        return LogClimaFrame(
+            self.ciudades, self.codigo[seleccion], self.fecha[seleccion], self.aqi[seleccion],
+            {nombre: valores[seleccion] for nombre, valores in self.contaminantes.items()}
+        )
+
+    def por_ciudad(self, metricas=METRICAS):
+        """
+        Agregados por ciudad, de más a menos lecturas.
+
+        Returns:
+            Filas con ciudad, pais, lecturas y <metrica>_promedio/_minimo/_maximo
+        """
+        orden, codigos, inicios = _segmentos(self.codigo)
+        filas = [
+            {'ciudad': ciudad, 'pais': pais, **valores}
+            for (ciudad, pais), valores in zip((self.ciudades[c] for c in codigos.tolist()),
+                                               self._agregar(orden, inicios, metricas))
+        ]
+        filas.sort(key=lambda f: (-f['lecturas'], f['ciudad']))
+        return filas
+
+    def remuestrear(self, resolucion='dia', metricas=METRICAS, por_ciudad=False):
+        """
+        Serie agregada por período.
+
+        Args:
+            resolucion: 'hora', 'dia', 'semana' (desde el lunes), 'mes' o un timedelta
+            metricas: Columnas a agregar
+            por_ciudad: Una serie por ciudad en lugar de una global
+
+        Returns:
+            Filas ordenadas por período con periodo (datetime), lecturas y
+            <metrica>_promedio/_minimo/_maximo (más ciudad y pais si por_ciudad)
+        """
+        periodos = self._periodos(resolucion)
+        if por_ciudad:
+            # Una clave entera por (período, ciudad); el orden queda por período
+            total_ciudades = max(len(self.ciudades), 1)
+            orden, claves, inicios = _segmentos(periodos * total_ciudades + self.codigo)
+            periodos, codigos = np.divmod(claves, total_ciudades)
+        else:
+            orden, periodos, inicios = _segmentos(periodos)
+
+        filas = []
+        agregados = self._agregar(orden, inicios, metricas)
+        for i, (periodo, valores) in enumerate(zip(periodos.astype('datetime64[s]').tolist(), agregados)):
+            fila = {'periodo': periodo}
+            if por_ciudad:
+                fila['ciudad'], fila['pais'] = self.ciudades[codigos[i]]
+            fila.update(valores)
+            filas.append(fila)
+        return filas
+
+    def _periodos(self, resolucion):
+        """Inicio del período de cada lectura, en segundos desde 1970"""
+        segundos = self.fecha.astype(np.int64)
+        if isinstance(resolucion, timedelta):
+            paso = int(resolucion.total_seconds())
+            if paso <= 0:
+                raise ValueError(f"Resolución inválida: {resolucion}")
+            return segundos - segundos % paso
+        if resolucion in _SEGUNDOS:
+            return segundos - segundos % _SEGUNDOS[resolucion]
+        if resolucion == 'semana':
+            dias = segundos // 86400
+            # El 1970-01-01 fue jueves: +3 días alinea las semanas al lunes
+            return (dias - (dias + 3) % 7) * 86400
+        if resolucion == 'mes':
+            return self.fecha.astype('datetime64[M]').astype('datetime64[s]').astype(np.int64)
+        raise ValueError(f"Resolución inválida: {resolucion}")
+
+    def _agregar(self, orden, inicios, metricas):
+        """
+        Lista (una por segmento) de dicts con lecturas y promedio/mínimo/máximo
+        de cada métrica; los NaN no cuentan
+        """
+        if not len(inicios):
+            return []
+        lecturas = np.diff(np.append(inicios, len(self)))
+        columnas = {'lecturas': lecturas.tolist()}
+        for metrica in metricas:
+            valores = self.columna(metrica)
+            if orden is not None:
+                valores = valores[orden]
+            if valores.dtype.kind == 'f':
+                validos = ~np.isnan(valores)
+                cantidad = np.add.reduceat(validos, inicios, dtype=np.int64)
+                suma = np.add.reduceat(np.where(validos, valores, 0), inicios, dtype=np.float64)
+                # fmin/fmax ignoran NaN; un segmento sin datos queda en NaN
+                minimo = np.fmin.reduceat(valores, inicios)
+                maximo = np.fmax.reduceat(valores, inicios)
+            else:
+                cantidad = lecturas
+                suma = np.add.reduceat(valores, inicios, dtype=np.float64)
+                minimo = np.minimum.reduceat(valores, inicios)
+                maximo = np.maximum.reduceat(valores, inicios)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                promedio = suma / cantidad
+            promedio[cantidad == 0] = np.nan
+            columnas[f"{metrica}_promedio"] = _a_python(promedio)
+            columnas[f"{metrica}_minimo"] = _a_python(minimo)
+            columnas[f"{metrica}_maximo"] = _a_python(maximo)
+        return [dict(zip(columnas, valores)) for valores in zip(*columnas.values())]
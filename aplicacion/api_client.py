@@ -1,11 +1,50 @@
 """
 Cliente para APIs públicas relacionadas con datos ambientales.
 Integrado para enriquecer proyectos con información ecológica.
+
+Cada cliente mantiene una `requests.Session` con un pool de conexiones
+keep-alive (`API_POOL_CONEXIONES` por host) y respuestas comprimidas con gzip:
+las consultas siguientes reutilizan la conexión TCP en vez de abrir una nueva.
+Conviene crear un cliente y reutilizarlo (los servicios guardan el suyo).
+
+Con `cache_coordenadas` (ver `persistencia.geocodificacion`) la geocodificación
+se consulta primero en la caché y solo va a la API si la ciudad no está; con
+`cache_calidad_aire` (ver `aplicacion.cache_calidad_aire`) lo mismo ocurre con
+la calidad del aire de una celda mientras su medición siga vigente. Con
+`limite_tasa` (ver `aplicacion.limite_tasa`) cada petición HTTP toma antes una
+ficha, lo que mantiene a los lotes concurrentes dentro del límite por minuto y
+de la cuota diaria de la API.
+
+Peticiones idénticas simultáneas (misma URL y parámetros, p. ej. varios
+usuarios consultando la misma ciudad) comparten una sola petición HTTP: la
+primera va a la red y las demás esperan su respuesta (o su error).
+
+Los métodos `obtener_*` imprimen el error y retornan None; `geocodificar` y
+`consultar_calidad_aire` lanzan la excepción (lotes que informan el error de
+cada ciudad). En ambos casos la cuota agotada (cuota diaria o HTTP 429) no se
+imprime: se lanza `CuotaAgotada`, con la hora de `reinicio` si se conoce.
 """
 import os
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Optional, Dict, Any
 
+from aplicacion.limite_tasa import CuotaAgotada
+
+POOL_CONEXIONES_DEFECTO = int(os.getenv('API_POOL_CONEXIONES', '10'))
+
+
+class _Vuelo:
+    """Petición en curso que comparten las llamadas idénticas simultáneas"""
+    
+    __slots__ = ('listo', 'datos', 'error')
+    
+    def __init__(self):
+        self.listo = threading.Event()
+        self.datos = None
+        self.error = None
+
 
 class EcoAPIClient:
     """
@@ -15,13 +54,20 @@ class EcoAPIClient:
     
     BASE_URL = "http://api.openweathermap.org/data/2.5"
     
-    def __init__(self, api_key: Optional[str] = None, timeout: int = 10):
+    def __init__(self, api_key: Optional[str] = None, timeout: int = 10,
+                 pool_conexiones: int = POOL_CONEXIONES_DEFECTO, base_url: Optional[str] = None,
+                 cache_coordenadas=None, cache_calidad_aire=None, limite_tasa=None):
         """
         Inicializa el cliente de API.
         
         Args:
             api_key: Clave de API de OpenWeatherMap. Si no se provee, busca en variable de entorno API_KEY
             timeout: Timeout en segundos para las peticiones HTTP
+            pool_conexiones: Conexiones keep-alive que se conservan por host
+            base_url: URL base de la API (por defecto BASE_URL)
+            cache_coordenadas: Caché de geocodificación con obtener/guardar (opcional)
+            cache_calidad_aire: Caché de respuestas de calidad del aire por celda (opcional)
+            limite_tasa: LimiteTasa compartido por las peticiones HTTP (opcional)
         """
         self.api_key = api_key or os.getenv("API_KEY")
         self.timeout = timeout
@@ -30,6 +76,107 @@ class EcoAPIClient:
             raise ValueError(
                 "API_KEY no configurada. Debe proporcionar api_key o definir variable de entorno API_KEY"
             )
+        if base_url:
+            self.BASE_URL = base_url.rstrip('/')
+        self.sesion = self._crear_sesion(pool_conexiones)
+        self.cache_coordenadas = cache_coordenadas
+        self.cache_calidad_aire = cache_calidad_aire
+        self.limite_tasa = limite_tasa
+        self._vuelos = {}
+        self._vuelos_lock = threading.Lock()
+        self.peticiones = 0
+        self.coalescidas = 0
+    
+    @staticmethod
+    def _crear_sesion(pool_conexiones):
+        """Session con pool keep-alive por host; sin bloquear si el pool se agota"""
+        sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=pool_conexiones, pool_maxsize=pool_conexiones)
+        sesion.mount('http://', adaptador)
+        sesion.mount('https://', adaptador)
+        sesion.headers.update({'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+        return sesion
+    
+    def cerrar(self):
+        """Cierra las conexiones del pool"""
+        self.sesion.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.cerrar()
+    
+    def _get_json(self, url, params):
+        """
+        GET por la sesión; si ya hay una petición idéntica en curso, espera y
+        comparte su resultado en vez de hacer otra. Lanza los errores HTTP
+        """
+        clave = (url, tuple(sorted(params.items())))
+        with self._vuelos_lock:
+            vuelo = self._vuelos.get(clave)
+            if vuelo is None:
+                vuelo = self._vuelos[clave] = _Vuelo()
+                lider = True
+            else:
+                self.coalescidas += 1
+                lider = False
+        
+        if not lider:
+            vuelo.listo.wait()
+            if vuelo.error is not None:
+                raise vuelo.error
+            return vuelo.datos
+        
+        try:
+            vuelo.datos = self._pedir(url, params)
+            return vuelo.datos
+        except Exception as e:
+            vuelo.error = e
+            raise
+        finally:
+            with self._vuelos_lock:
+                del self._vuelos[clave]
+            vuelo.listo.set()
+    
+    def _pedir(self, url, params):
+        """Una petición HTTP, tras tomar una ficha del límite si lo hay"""
+        if self.limite_tasa is not None:
+            self.limite_tasa.adquirir()
+        with self._vuelos_lock:
+            self.peticiones += 1
+        response = self.sesion.get(url, params=params, timeout=self.timeout)
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code == 429:
+                raise CuotaAgotada("La API rechazó la petición por límite de llamadas (HTTP 429)") from e
+            raise
+        return response.json()
+    
+    def consultar_calidad_aire(self, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+        """
+        Como `obtener_calidad_aire`, pero lanza las excepciones de `requests`
+        en vez de imprimirlas (para quien necesita saber por qué falló)
+        
+        Raises:
+            CuotaAgotada: Si la cuota de la API está agotada
+        """
+        cache = self.cache_calidad_aire
+        if cache is not None:
+            en_cache = cache.obtener(lat, lon)
+            if en_cache is not None:
+                return en_cache
+        
+        data = self._get_json(f"{self.BASE_URL}/air_pollution", {
+            'lat': lat,
+            'lon': lon,
+            'appid': self.api_key
+        })
+        datos = self.parsear_calidad_aire(data)
+        if cache is not None and datos:
+            cache.guardar(lat, lon, datos, data['list'][0].get('dt'))
+        return datos
     
     def obtener_calidad_aire(self, lat: float, lon: float) -> Optional[Dict[str, Any]]:
         """
@@ -41,6 +188,9 @@ class EcoAPIClient:
             
         Returns:
             Diccionario con información de calidad del aire o None si hay error
+        
+        Raises:
+            CuotaAgotada: Si la cuota de la API está agotada (no se imprime)
             
         Ejemplo de respuesta:
             {
@@ -56,37 +206,10 @@ class EcoAPIClient:
             }
         """
         try:
-            url = f"{self.BASE_URL}/air_pollution"
-            params = {
-                'lat': lat,
-                'lon': lon,
-                'appid': self.api_key
-            }
-            
-            response = requests.get(url, params=params, timeout=self.timeout)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            # Parsear la respuesta
-            if 'list' in data and len(data['list']) > 0:
-                componentes = data['list'][0]['components']
-                aqi = data['list'][0]['main']['aqi']
-                
-                return {
-                    'aqi': aqi,
-                    'co': componentes.get('co'),
-                    'no': componentes.get('no'),
-                    'no2': componentes.get('no2'),
-                    'o3': componentes.get('o3'),
-                    'so2': componentes.get('so2'),
-                    'pm2_5': componentes.get('pm2_5'),
-                    'pm10': componentes.get('pm10'),
-                    'nh3': componentes.get('nh3')
-                }
-            
-            return None
+            return self.consultar_calidad_aire(lat, lon)
             
+        except CuotaAgotada:
+            raise
         except requests.exceptions.Timeout:
             print(f"Error: Timeout al consultar API (>{self.timeout}s)")
             return None
@@ -100,6 +223,33 @@ class EcoAPIClient:
             print(f"Error inesperado al consultar API: {str(e)}")
             return None
     
+    def geocodificar(self, ciudad: str, pais: str = "CL") -> Optional[Dict[str, float]]:
+        """
+        Como `obtener_coordenadas_ciudad`, pero sin imprimir: retorna None si
+        la ciudad no existe y lanza las excepciones de `requests`
+        
+        Raises:
+            CuotaAgotada: Si la cuota de la API está agotada
+        """
+        cache = self.cache_coordenadas
+        if cache is not None:
+            en_cache = cache.obtener(ciudad, pais)
+            if en_cache is cache.NO_ENCONTRADA:
+                return None
+            if en_cache is not None:
+                return en_cache
+        
+        data = self._get_json(f"{self.BASE_URL.replace('data/2.5', 'geo/1.0')}/direct", {
+            'q': f"{ciudad},{pais}",
+            'limit': 1,
+            'appid': self.api_key
+        })
+        coords = self.parsear_coordenadas(data)
+        if cache is not None:
+            # Solo respuestas de la API: un error de red no marca la ciudad como inexistente
+            cache.guardar(ciudad, pais, coords)
+        return coords
+    
     def obtener_coordenadas_ciudad(self, ciudad: str, pais: str = "CL") -> Optional[Dict[str, float]]:
         """
         Obtiene las coordenadas geográficas de una ciudad usando Geocoding API.
@@ -110,29 +260,18 @@ class EcoAPIClient:
             
         Returns:
             Diccionario con 'lat' y 'lon' o None si no se encuentra
+        
+        Raises:
+            CuotaAgotada: Si la cuota de la API está agotada (no se imprime)
         """
         try:
-            url = f"{self.BASE_URL.replace('data/2.5', 'geo/1.0')}/direct"
-            params = {
-                'q': f"{ciudad},{pais}",
-                'limit': 1,
-                'appid': self.api_key
-            }
-            
-            response = requests.get(url, params=params, timeout=self.timeout)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if data and len(data) > 0:
-                return {
-                    'lat': data[0]['lat'],
-                    'lon': data[0]['lon']
-                }
-            
-            print(f"No se encontraron coordenadas para '{ciudad}, {pais}'")
-            return None
+            coords = self.geocodificar(ciudad, pais)
+            if coords is None:
+                print(f"No se encontraron coordenadas para '{ciudad}, {pais}'")
+            return coords
             
+        except CuotaAgotada:
+            raise
         except Exception as e:
             print(f"Error al obtener coordenadas: {str(e)}")
             return None
@@ -147,6 +286,9 @@ class EcoAPIClient:
             
         Returns:
             Diccionario con información de calidad del aire o None si hay error
+        
+        Raises:
+            CuotaAgotada: Si la cuota de la API está agotada (no se imprime)
         """
         coords = self.obtener_coordenadas_ciudad(ciudad, pais)
         
@@ -155,6 +297,37 @@ class EcoAPIClient:
         
         return self.obtener_calidad_aire(coords['lat'], coords['lon'])
     
+    @staticmethod
+    def parsear_calidad_aire(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Extrae AQI y contaminantes de la respuesta de Air Pollution API (None si viene vacía)"""
+        if 'list' in data and len(data['list']) > 0:
+            componentes = data['list'][0]['components']
+            aqi = data['list'][0]['main']['aqi']
+            
+            return {
+                'aqi': aqi,
+                'co': componentes.get('co'),
+                'no': componentes.get('no'),
+                'no2': componentes.get('no2'),
+                'o3': componentes.get('o3'),
+                'so2': componentes.get('so2'),
+                'pm2_5': componentes.get('pm2_5'),
+                'pm10': componentes.get('pm10'),
+                'nh3': componentes.get('nh3')
+            }
+        
+        return None
+    
+    @staticmethod
+    def parsear_coordenadas(data) -> Optional[Dict[str, float]]:
+        """Extrae lat/lon del primer resultado de Geocoding API (None si no hay resultados)"""
+        if data and len(data) > 0:
+            return {
+                'lat': data[0]['lat'],
+                'lon': data[0]['lon']
+            }
+        return None
+    
     @staticmethod
     def interpretar_aqi(aqi: int) -> str:
         """
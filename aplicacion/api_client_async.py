@@ -0,0 +1,205 @@
+"""
+Cliente asíncrono (aiohttp) de las APIs ambientales.
+
+Mismas respuestas que `EcoAPIClient`, pero como corrutinas: una
+geocodificación lenta ya no detiene al resto de las consultas en curso.
+Reutiliza una sesión HTTP (conexiones keep-alive) cuyo conector limita las
+peticiones simultáneas para no saturar la API; el resto espera su turno.
+
+Recibe las mismas `cache_coordenadas`, `cache_calidad_aire` y `limite_tasa`
+que el cliente síncrono: los servicios le pasan las instancias globales, así
+que las peticiones de ambos clientes cuentan para el mismo límite por minuto
+y la misma cuota diaria, y comparten las respuestas guardadas. Las cachés y
+el límite son síncronos (pueden leer la base o esperar una ficha): se llaman
+en el executor por defecto del loop para no detener las demás corrutinas.
+Peticiones idénticas simultáneas comparten una sola petición HTTP.
+
+Como `geocodificar` y `consultar_calidad_aire` del cliente síncrono, no
+imprime nada: lanza las excepciones de aiohttp (o `asyncio.TimeoutError`), y
+`CuotaAgotada` con la cuota agotada o ante un HTTP 429; quien llama decide
+cómo informarlas (los servicios, con `UI` o en el resultado de cada ciudad
+de un lote).
+
+aiohttp es opcional: la aplicación síncrona funciona sin instalarlo.
+"""
+import asyncio
+import functools
+import os
+from typing import Optional, Dict, Any
+
+from aplicacion.api_client import EcoAPIClient
+from aplicacion.limite_tasa import CuotaAgotada
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - dependencia opcional
+    aiohttp = None
+
+PETICIONES_SIMULTANEAS_DEFECTO = int(os.getenv('API_ASYNC_CONCURRENCIA', '20'))
+
+
+class AsyncEcoAPIClient:
+    """
+    Uso (con las cachés y el límite globales, como en los servicios):
+        async with ProyectoService.crear_cliente_api_async() as client:
+            datos = await client.consultar_calidad_aire_ciudad("Santiago", "CL")
+    """
+
+    BASE_URL = EcoAPIClient.BASE_URL
+
+    def __init__(self, api_key: Optional[str] = None, timeout: int = 10,
+                 max_concurrentes: int = PETICIONES_SIMULTANEAS_DEFECTO,
+                 cache_coordenadas=None, cache_calidad_aire=None, limite_tasa=None):
+        """
+        Args:
+            api_key: Clave de API de OpenWeatherMap (por defecto variable API_KEY)
+            timeout: Timeout en segundos de conexión y de lectura
+            max_concurrentes: Peticiones HTTP en curso como máximo
+            cache_coordenadas: Caché de geocodificación con obtener/guardar (opcional)
+            cache_calidad_aire: Caché de respuestas de calidad del aire por celda (opcional)
+            limite_tasa: LimiteTasa compartido por las peticiones HTTP (opcional)
+        """
+        if aiohttp is None:
+            raise RuntimeError("El cliente asíncrono requiere aiohttp: pip install aiohttp")
+        self.api_key = api_key or os.getenv("API_KEY")
+        self.timeout = timeout
+        self.max_concurrentes = max_concurrentes
+
+        if not self.api_key:
+            raise ValueError(
+                "API_KEY no configurada. Debe proporcionar api_key o definir variable de entorno API_KEY"
+            )
+        self.cache_coordenadas = cache_coordenadas
+        self.cache_calidad_aire = cache_calidad_aire
+        self.limite_tasa = limite_tasa
+        self._sesion = None
+        self._vuelos = {}
+        self.peticiones = 0
+        self.coalescidas = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.cerrar()
+
+    def _obtener_sesion(self):
+        # Se crea dentro del loop en ejecución (aiohttp la ata a ese loop)
+        if self._sesion is None or self._sesion.closed:
+            self._sesion = aiohttp.ClientSession(
+                # Sin límite total: una petición puede esperar su turno en el
+                # conector; el timeout aplica a la conexión y a la lectura
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=self.timeout,
+                                              sock_read=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.max_concurrentes),
+            )
+        return self._sesion
+
+    async def cerrar(self):
+        """Cierra la sesión HTTP y sus conexiones"""
+        if self._sesion is not None and not self._sesion.closed:
+            await self._sesion.close()
+        self._sesion = None
+
+    @staticmethod
+    async def _en_hilo(funcion, *args):
+        """Llamada síncrona (caché o límite) en el executor por defecto del loop"""
+        return await asyncio.get_event_loop().run_in_executor(None, functools.partial(funcion, *args))
+
+    async def _get_json(self, url, params):
+        """
+        GET por la sesión; si ya hay una petición idéntica en curso, espera y
+        comparte su resultado en vez de hacer otra. Lanza los errores HTTP
+        """
+        clave = (url, tuple(sorted(params.items())))
+        vuelo = self._vuelos.get(clave)
+        if vuelo is not None:
+            self.coalescidas += 1
+            # shield: cancelar a quien espera no cancela la petición compartida
+            return await asyncio.shield(vuelo)
+
+        vuelo = self._vuelos[clave] = asyncio.get_event_loop().create_future()
+        # Sin nadie esperando, el error no se informa como "never retrieved"
+        vuelo.add_done_callback(lambda f: f.cancelled() or f.exception())
+        try:
+            datos = await self._pedir(url, params)
+            vuelo.set_result(datos)
+            return datos
+        except asyncio.CancelledError:
+            vuelo.cancel()
+            raise
+        except Exception as e:
+            vuelo.set_exception(e)
+            raise
+        finally:
+            del self._vuelos[clave]
+
+    async def _pedir(self, url, params):
+        """Una petición HTTP, tras tomar una ficha del límite si lo hay"""
+        if self.limite_tasa is not None:
+            await self._en_hilo(self.limite_tasa.adquirir)
+        self.peticiones += 1
+        async with self._obtener_sesion().get(url, params=params) as response:
+            if response.status == 429:
+                raise CuotaAgotada("La API rechazó la petición por límite de llamadas (HTTP 429)")
+            response.raise_for_status()
+            return await response.json()
+
+    async def consultar_calidad_aire(self, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+        """
+        Calidad del aire para unas coordenadas (ver EcoAPIClient.consultar_calidad_aire)
+
+        Raises:
+            CuotaAgotada: Si la cuota de la API está agotada
+        """
+        cache = self.cache_calidad_aire
+        if cache is not None:
+            en_cache = await self._en_hilo(cache.obtener, lat, lon)
+            if en_cache is not None:
+                return en_cache
+
+        data = await self._get_json(
+            f"{self.BASE_URL}/air_pollution",
+            {'lat': str(lat), 'lon': str(lon), 'appid': self.api_key}
+        )
+        datos = EcoAPIClient.parsear_calidad_aire(data)
+        if cache is not None and datos:
+            await self._en_hilo(cache.guardar, lat, lon, datos, data['list'][0].get('dt'))
+        return datos
+
+    async def geocodificar(self, ciudad: str, pais: str = "CL") -> Optional[Dict[str, float]]:
+        """
+        Coordenadas de una ciudad con Geocoding API; None si no se encuentra
+
+        Raises:
+            CuotaAgotada: Si la cuota de la API está agotada
+        """
+        cache = self.cache_coordenadas
+        if cache is not None:
+            en_cache = await self._en_hilo(cache.obtener, ciudad, pais)
+            if en_cache is cache.NO_ENCONTRADA:
+                return None
+            if en_cache is not None:
+                return en_cache
+
+        data = await self._get_json(
+            f"{self.BASE_URL.replace('data/2.5', 'geo/1.0')}/direct",
+            {'q': f"{ciudad},{pais}", 'limit': '1', 'appid': self.api_key}
+        )
+        coords = EcoAPIClient.parsear_coordenadas(data)
+        if cache is not None:
+            # Solo respuestas de la API: un error de red no marca la ciudad como inexistente
+            await self._en_hilo(cache.guardar, ciudad, pais, coords)
+        return coords
+
+    async def consultar_calidad_aire_ciudad(self, ciudad: str, pais: str = "CL") -> Optional[Dict[str, Any]]:
+        """Calidad del aire de una ciudad (geocoding + air pollution); None si la ciudad no existe"""
+        coords = await self.geocodificar(ciudad, pais)
+
+        if not coords:
+            return None
+
+        return await self.consultar_calidad_aire(coords['lat'], coords['lon'])
+
+    interpretar_aqi = staticmethod(EcoAPIClient.interpretar_aqi)
+    formato_reporte_calidad_aire = staticmethod(EcoAPIClient.formato_reporte_calidad_aire)
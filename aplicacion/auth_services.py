@@ -3,6 +3,9 @@ from persistencia.auth_repositorios import UsuarioRepo, RolRepo
 from dominio.auth_models import Usuario, Rol
 from dominio.security import PasswordHasher
 from presentacion.ui_helpers import UI
+from aplicacion.busqueda import indice_global
+from persistencia.auditoria import auditoria
+from persistencia.unit_of_work import UnitOfWork, al_confirmar
 
 
 class AuthService:
@@ -53,6 +56,7 @@ class UsuarioService:
     def __init__(self):
         self.usuario_repo = UsuarioRepo()
         self.rol_repo = RolRepo()
+        self.indice = indice_global
     
     def crear_usuario(self, usuario: Usuario, contrasena_plana: str):
         """
@@ -61,6 +65,9 @@ class UsuarioService:
         Args:
             usuario: Instancia de Usuario (sin salt ni hash aún)
             contrasena_plana: Contraseña en texto plano
+
+        Returns:
+            True si el usuario fue creado
         """
         try:
             # Generar salt y hashear contraseña
@@ -72,14 +79,27 @@ class UsuarioService:
             usuario.contrasena_cifrada = contrasena_hash
             
             self.usuario_repo.crear(usuario)
-            UI.print_success(f"Usuario '{usuario.nombre_usuario}' creado exitosamente")
+            al_confirmar(lambda: self.indice.agregar('usuario', usuario.id, usuario.nombre_usuario))
+            auditoria.registrar('crear', 'usuarios', usuario.id, nuevos=usuario)
+            # Dentro de una UnitOfWork el usuario existe recién tras el commit
+            al_confirmar(lambda: UI.print_success(f"Usuario '{usuario.nombre_usuario}' creado exitosamente"))
+            return True
         except Exception as e:
             UI.print_error(f"Error creando usuario: {e}")
+            return False
     
     def listar_usuarios(self):
         """Lista todos los usuarios (sin contraseñas)"""
         return self.usuario_repo.listar_todos()
     
+    def listar_usuarios_pagina(self, tamano=20, token=None):
+        """Página de usuarios (sin contraseñas): {'filas', 'siguiente'}"""
+        return self.usuario_repo.listar_pagina(tamano, token)
+    
+    def iterar_usuarios(self):
+        """Recorre todos los usuarios (sin contraseñas) sin cargarlos completos en memoria"""
+        return self.usuario_repo.iterar_todos()
+    
     def cambiar_contrasena(self, usuario_id: str, contrasena_nueva: str):
         """
         Cambia la contraseña de un usuario (sin verificar la actual).
@@ -89,17 +109,20 @@ class UsuarioService:
             contrasena_nueva: Nueva contraseña en texto plano
         """
         try:
-            usuario_data = self.usuario_repo.obtener_por_id(usuario_id)
+            # Hash antes de abrir la transacción: no retiene la conexión mientras calcula
+            nuevo_salt = PasswordHasher.generate_salt()
+            nuevo_hash = PasswordHasher.hash_password(contrasena_nueva, nuevo_salt)
+            
+            # Lectura y cambio en la misma transacción del primario
+            with UnitOfWork():
+                usuario_data = self.usuario_repo.obtener_por_id(usuario_id)
+                if usuario_data:
+                    self.usuario_repo.cambiar_contrasena(usuario_id, nuevo_hash, nuevo_salt)
+                    auditoria.registrar('cambiar_contrasena', 'usuarios', usuario_id)
             
             if not usuario_data:
                 UI.print_error("Usuario no encontrado")
                 return False
-            
-            # Generar nuevo salt y hash
-            nuevo_salt = PasswordHasher.generate_salt()
-            nuevo_hash = PasswordHasher.hash_password(contrasena_nueva, nuevo_salt)
-            
-            self.usuario_repo.cambiar_contrasena(usuario_id, nuevo_hash, nuevo_salt)
             UI.print_success("Contraseña cambiada exitosamente")
             return True
         except Exception as e:
@@ -109,7 +132,12 @@ class UsuarioService:
     def activar_desactivar_usuario(self, usuario_id: str, activo: bool):
         """Activa o desactiva un usuario"""
         try:
-            self.usuario_repo.actualizar_estado(usuario_id, activo)
+            with UnitOfWork():
+                anteriores = self.usuario_repo.obtener_por_id(usuario_id) if auditoria.activa else None
+                self.usuario_repo.actualizar_estado(usuario_id, activo)
+                auditoria.registrar('activar' if activo else 'desactivar', 'usuarios', usuario_id,
+                                    {'activo': anteriores['activo']} if anteriores else None,
+                                    {'activo': activo})
             estado = "activado" if activo else "desactivado"
             UI.print_success(f"Usuario {estado}")
         except Exception as e:
@@ -134,6 +162,10 @@ class RolService:
         """Lista todos los roles activos"""
         return self.rol_repo.listar_todos()
     
+    def listar_roles_pagina(self, tamano=20, token=None):
+        """Página de roles activos: {'filas', 'siguiente'}"""
+        return self.rol_repo.listar_pagina(tamano, token)
+    
     def obtener_rol(self, rol_id: str):
         """Obtiene un rol por su ID"""
         return self.rol_repo.obtener_por_id(rol_id)
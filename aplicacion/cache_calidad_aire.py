@@ -0,0 +1,210 @@
+"""
+Caché LRU con vencimiento de las respuestas de Air Pollution API.
+
+OpenWeatherMap actualiza la calidad del aire más o menos cada hora, así que
+consultas repetidas por las mismas coordenadas (o muy cercanas) pueden
+responderse sin ir a la red. La clave es la celda de una grilla: latitud y
+longitud redondeadas a `paso` grados (0,05° ≈ 5,5 km), de modo que dos puntos
+de la misma celda comparten la respuesta.
+
+La vigencia se mide desde el `dt` de la respuesta (momento de la medición),
+no desde la consulta: una entrada vence en `dt + ttl`. Si la API entrega una
+medición ya antigua, se guarda al menos `ttl_minimo` segundos para no
+consultarla en cada llamada.
+
+El nivel en memoria guarda hasta `capacidad` celdas y desaloja la usada hace
+más tiempo. Con `ruta_disco` se agrega un segundo nivel en un archivo SQLite
+local que sobrevive a reinicios; un acierto en disco vuelve a la memoria.
+
+Configuración (.env):
+    CALIDAD_AIRE_CACHE              1 (0 desactiva la caché)
+    CALIDAD_AIRE_CELDA_GRADOS       Tamaño de la celda de la grilla (0.05)
+    CALIDAD_AIRE_TTL_S              Vigencia desde el dt de la medición (3600)
+    CALIDAD_AIRE_TTL_MINIMO_S       Vigencia mínima desde la consulta (300)
+    CALIDAD_AIRE_CACHE_MAX          Celdas en memoria (1024)
+    CALIDAD_AIRE_CACHE_DISCO        Archivo SQLite del nivel en disco (vacío = sin disco)
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheCalidadAire:
+    """Caché LRU + TTL por celda de grilla, con nivel en disco opcional"""
+
+    def __init__(self, paso=0.05, ttl=3600, ttl_minimo=300, capacidad=1024, ruta_disco=None, activa=True):
+        """
+        Args:
+            paso: Grados de latitud/longitud por celda
+            ttl: Segundos de vigencia desde el dt de la medición
+            ttl_minimo: Segundos de vigencia mínima desde que se guarda
+            capacidad: Celdas en memoria antes de desalojar la menos usada
+            ruta_disco: Archivo SQLite para el nivel persistente (None = sin disco)
+        """
+        if paso <= 0 or capacidad < 1:
+            raise ValueError("El paso de la grilla debe ser positivo y la capacidad al menos 1")
+        self.activa = activa
+        self.paso = paso
+        self.ttl = ttl
+        self.ttl_minimo = ttl_minimo
+        self.capacidad = capacidad
+        self.ruta_disco = ruta_disco
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self._disco = None
+        self.aciertos = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self.vencidos = 0
+        self.desalojos = 0
+        self.errores_disco = 0
+
+    def celda(self, lat, lon):
+        """Clave de la grilla para unas coordenadas"""
+        return round(lat / self.paso), round(lon / self.paso)
+
+    def obtener(self, lat, lon):
+        """Datos vigentes de la celda (copia) o None si hay que consultar la API"""
+        if not self.activa:
+            return None
+        clave = self.celda(lat, lon)
+        ahora = time.time()
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                if entrada[1] > ahora:
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                    return dict(entrada[0])
+                del self._entradas[clave]
+                self.vencidos += 1
+
+        entrada = self._leer_disco(clave, ahora)
+        with self._lock:
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self.aciertos_disco += 1
+            self._poner(clave, entrada)
+        return dict(entrada[0])
+
+    def guardar(self, lat, lon, datos, dt=None):
+        """
+        Guarda la respuesta de la celda.
+
+        Args:
+            datos: Respuesta ya parseada (dict de EcoAPIClient.parsear_calidad_aire)
+            dt: Segundos epoch de la medición (campo `dt` de la API); None = ahora
+        """
+        if not self.activa or not datos:
+            return
+        ahora = time.time()
+        expira = max((dt or ahora) + self.ttl, ahora + self.ttl_minimo)
+        clave = self.celda(lat, lon)
+        entrada = (dict(datos), expira)
+        with self._lock:
+            self._poner(clave, entrada)
+        self._escribir_disco(clave, entrada)
+
+    def _poner(self, clave, entrada):
+        self._entradas[clave] = entrada
+        self._entradas.move_to_end(clave)
+        while len(self._entradas) > self.capacidad:
+            self._entradas.popitem(last=False)
+            self.desalojos += 1
+
+    # --- Nivel en disco ------------------------------------------------------
+
+    def _conexion_disco(self):
+        if self._disco is None:
+            conn = sqlite3.connect(self.ruta_disco, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS calidad_aire "
+                         "(lat INTEGER, lon INTEGER, datos TEXT NOT NULL, expira REAL NOT NULL, "
+                         "PRIMARY KEY (lat, lon))")
+            conn.execute("DELETE FROM calidad_aire WHERE expira <= ?", (time.time(),))
+            self._disco = conn
+        return self._disco
+
+    def _leer_disco(self, clave, ahora):
+        if not self.ruta_disco:
+            return None
+        try:
+            with self._lock:
+                fila = self._conexion_disco().execute(
+                    "SELECT datos, expira FROM calidad_aire WHERE lat = ? AND lon = ? AND expira > ?",
+                    (*clave, ahora)
+                ).fetchone()
+        except sqlite3.Error:
+            self._contar_error_disco()
+            return None
+        return None if fila is None else (json.loads(fila[0]), fila[1])
+
+    def _escribir_disco(self, clave, entrada):
+        if not self.ruta_disco:
+            return
+        try:
+            with self._lock:
+                self._conexion_disco().execute(
+                    "INSERT OR REPLACE INTO calidad_aire (lat, lon, datos, expira) VALUES (?, ?, ?, ?)",
+                    (*clave, json.dumps(entrada[0]), entrada[1])
+                )
+        except sqlite3.Error:
+            self._contar_error_disco()
+
+    def _contar_error_disco(self):
+        with self._lock:
+            self.errores_disco += 1
+
+    def purgar_disco(self):
+        """Borra del disco las entradas vencidas; retorna cuántas borró"""
+        if not self.ruta_disco:
+            return 0
+        with self._lock:
+            return self._conexion_disco().execute(
+                "DELETE FROM calidad_aire WHERE expira <= ?", (time.time(),)
+            ).rowcount
+
+    def vaciar(self):
+        """Olvida todas las entradas (memoria y disco)"""
+        with self._lock:
+            self._entradas.clear()
+            if self.ruta_disco:
+                self._conexion_disco().execute("DELETE FROM calidad_aire")
+
+    def cerrar(self):
+        with self._lock:
+            if self._disco is not None:
+                self._disco.close()
+                self._disco = None
+
+    def estado(self):
+        with self._lock:
+            consultas = self.aciertos + self.aciertos_disco + self.fallos
+            return {
+                'activa': self.activa,
+                'celda_grados': self.paso,
+                'en_memoria': len(self._entradas),
+                'capacidad': self.capacidad,
+                'disco': self.ruta_disco,
+                'aciertos': self.aciertos,
+                'aciertos_disco': self.aciertos_disco,
+                'fallos': self.fallos,
+                'vencidos': self.vencidos,
+                'desalojos': self.desalojos,
+                'errores_disco': self.errores_disco,
+                'tasa_aciertos': (self.aciertos + self.aciertos_disco) / consultas if consultas else 0.0,
+            }
+
+
+cache_calidad_aire = CacheCalidadAire(
+    paso=float(os.getenv('CALIDAD_AIRE_CELDA_GRADOS', '0.05')),
+    ttl=float(os.getenv('CALIDAD_AIRE_TTL_S', '3600')),
+    ttl_minimo=float(os.getenv('CALIDAD_AIRE_TTL_MINIMO_S', '300')),
+    capacidad=int(os.getenv('CALIDAD_AIRE_CACHE_MAX', '1024')),
+    ruta_disco=os.getenv('CALIDAD_AIRE_CACHE_DISCO') or None,
+    activa=os.getenv('CALIDAD_AIRE_CACHE', '1') == '1',
+)
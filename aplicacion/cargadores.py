@@ -0,0 +1,83 @@
+"""
+Carga por lotes de entidades relacionadas, para no consultar una vez por fila (N+1).
+
+Un `Cargador` dura lo que una petición (una página, un listado, una
+exportación): junta los ids que referencian las filas de un resultado, los
+resuelve con un `obtener_por_ids` por tipo de entidad y guarda cada entidad en
+un mapa de identidad. Dentro de la misma petición un id no se vuelve a
+consultar, tampoco si no existe. Las entidades no se refrescan: para datos
+actuales se usa un cargador nuevo.
+
+Ejemplo:
+    cargador = Cargador()
+    pagina = EmpleadoRepo().listar_pagina(50)
+    cargador.adjuntar(pagina['filas'], 'departamento_id', 'departamento')
+    # -> cada fila trae 'departamento' (dict o None); 1 consulta para los 50
+"""
+from persistencia.repositorios import DepartamentoRepo, ProyectoRepo, EmpleadoRepo
+from persistencia.auth_repositorios import UsuarioRepo, RolRepo
+
+
+def _repositorios():
+    return {
+        'departamento': DepartamentoRepo(),
+        'proyecto': ProyectoRepo(),
+        'empleado': EmpleadoRepo(),
+        'usuario': UsuarioRepo(),
+        'rol': RolRepo(),
+    }
+
+
+class Cargador:
+    """Cargador por lotes con mapa de identidad por tipo de entidad"""
+
+    def __init__(self, repositorios=None):
+        """
+        Args:
+            repositorios: Dict tipo -> repositorio con obtener_por_ids
+                          (por defecto departamento, proyecto, empleado, usuario y rol)
+        """
+        self.repositorios = repositorios or _repositorios()
+        self._mapa = {tipo: {} for tipo in self.repositorios}
+        self.consultas = 0
+
+    def cargar(self, tipo, ids):
+        """
+        Entidades de `tipo` para los ids dados: {id: fila o None}.
+        Solo se consultan los ids que aún no están en el mapa de identidad.
+        """
+        ids = [i for i in ids if i is not None]
+        mapa = self._mapa[tipo]
+        faltantes = [i for i in dict.fromkeys(ids) if i not in mapa]
+        if faltantes:
+            encontradas = self.repositorios[tipo].obtener_por_ids(faltantes)
+            self.consultas += 1
+            for id_ in faltantes:
+                mapa[id_] = encontradas.get(id_)
+        return {i: mapa[i] for i in ids}
+
+    def obtener(self, tipo, id_):
+        """Una entidad (o None), desde el mapa si ya se cargó"""
+        if id_ is None:
+            return None
+        return self.cargar(tipo, [id_])[id_]
+
+    def adjuntar(self, filas, campo, tipo, destino=None):
+        """
+        Agrega a cada fila la entidad referenciada por `fila[campo]` en
+        `fila[destino]` (por defecto el nombre del tipo), con una sola carga
+        para todas las filas.
+
+        Returns:
+            Las mismas filas
+        """
+        filas = filas if isinstance(filas, list) else list(filas)
+        entidades = self.cargar(tipo, (f.get(campo) for f in filas))
+        destino = destino or tipo
+        for fila in filas:
+            fila[destino] = entidades.get(fila.get(campo))
+        return filas
+
+    def en_mapa(self, tipo):
+        """Cantidad de entidades de `tipo` en el mapa de identidad"""
+        return len(self._mapa[tipo])
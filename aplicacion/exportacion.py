@@ -0,0 +1,29 @@
+"""Exportación de listados a CSV sin cargar todas las filas en memoria"""
+import csv
+
+
+def exportar_csv(filas, ruta: str, columnas=None) -> int:
+    """
+    Escribe en `ruta` las filas (dicts) a medida que llegan.
+
+    Args:
+        filas: Iterable de diccionarios (por ejemplo un generador iterar_*)
+        ruta: Archivo CSV de destino
+        columnas: Orden de columnas; por defecto las claves de la primera fila
+
+    Returns:
+        Cantidad de filas escritas
+    """
+    total = 0
+    with open(ruta, 'w', newline='', encoding='utf-8') as archivo:
+        escritor = None
+        for fila in filas:
+            if escritor is None:
+                escritor = csv.DictWriter(archivo, fieldnames=columnas or list(fila.keys()),
+                                          extrasaction='ignore')
+                escritor.writeheader()
+            escritor.writerow(fila)
+            total += 1
+        if escritor is None and columnas:
+            csv.writer(archivo).writerow(columnas)
+    return total
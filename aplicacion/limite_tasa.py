@@ -0,0 +1,183 @@
+"""
+Límite de peticiones a la API (cubeta de fichas) compartido entre hilos.
+
+Por minuto: la cubeta admite hasta `rafaga` peticiones seguidas y se repone a
+razón de `por_minuto / 60` fichas por segundo; sin fichas, `adquirir()` espera
+la siguiente. Así un lote de consultas concurrentes no supera el límite de la
+API (60 por minuto en el plan gratuito de OpenWeatherMap).
+
+Por día: al llegar a `por_dia` peticiones, `adquirir()` no espera sino que
+lanza `CuotaAgotada` hasta la medianoche UTC (1.000 por día en el plan
+gratuito). Con `ruta_cuota` el conteo del día se guarda en un archivo JSON
+tras cada petición, de modo que un reinicio no lo pone en cero.
+
+Configuración (.env):
+    API_PETICIONES_POR_MINUTO       Límite de peticiones por minuto (60; 0 = sin límite)
+    API_RAFAGA                      Peticiones seguidas antes de espaciar (= límite por minuto)
+    API_PETICIONES_POR_DIA          Cuota diaria (1000; 0 = sin cuota)
+    API_CUOTA_ARCHIVO               Archivo con el conteo del día (cuota_api.json)
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+
+class CuotaAgotada(Exception):
+    """La API no admite más peticiones hasta `reinicio` (cuota diaria o HTTP 429)"""
+
+    def __init__(self, mensaje, reinicio=None):
+        super().__init__(mensaje)
+        self.reinicio = reinicio
+
+
+def _hoy():
+    return datetime.now(timezone.utc).date()
+
+
+def _proxima_medianoche():
+    hoy = _hoy()
+    return datetime(hoy.year, hoy.month, hoy.day, tzinfo=timezone.utc) + timedelta(days=1)
+
+
+class LimiteTasa:
+    """Cubeta de fichas por minuto y cuota diaria persistente (cualquiera de las dos opcional)"""
+
+    def __init__(self, por_minuto=None, rafaga=None, por_dia=None, ruta_cuota=None):
+        """
+        Args:
+            por_minuto: Peticiones por minuto (None = sin límite por minuto)
+            rafaga: Peticiones seguidas antes de espaciar (por defecto por_minuto)
+            por_dia: Peticiones por día UTC (None = sin cuota diaria)
+            ruta_cuota: Archivo JSON donde se guarda el conteo del día (None = solo memoria)
+        """
+        if not (por_minuto or por_dia) or (por_minuto or 0) < 0 or (por_dia or 0) < 0:
+            raise ValueError("Debe indicar un límite por minuto o por día, y ser positivo")
+        self.por_minuto = por_minuto or None
+        self.rafaga = (rafaga or por_minuto) if por_minuto else None
+        self._por_segundo = por_minuto / 60 if por_minuto else None
+        self._fichas = float(self.rafaga or 0)
+        self._ultimo = time.monotonic()
+        self.por_dia = por_dia or None
+        self.ruta_cuota = ruta_cuota
+        self._dia, self._usadas_hoy = self._leer_cuota()
+        self._lock = threading.Lock()
+        self.adquiridas = 0
+        self.esperas = 0
+        self.segundos_espera = 0.0
+        self.rechazadas = 0
+        self.errores_cuota = 0
+
+    def _reponer(self, ahora):
+        self._fichas = min(self.rafaga, self._fichas + (ahora - self._ultimo) * self._por_segundo)
+        self._ultimo = ahora
+
+    def adquirir(self):
+        """
+        Toma una ficha, esperando si hace falta; retorna los segundos esperados.
+
+        Raises:
+            CuotaAgotada: Si ya se usó la cuota del día (no se espera al día siguiente)
+        """
+        inicio = time.monotonic()
+        espero = False
+        while True:
+            with self._lock:
+                self._verificar_cuota()
+                ahora = time.monotonic()
+                if self.por_minuto:
+                    self._reponer(ahora)
+                if not self.por_minuto or self._fichas >= 1:
+                    if self.por_minuto:
+                        self._fichas -= 1
+                    self._contar_dia()
+                    self.adquiridas += 1
+                    if not espero:
+                        return 0.0
+                    self.esperas += 1
+                    self.segundos_espera += ahora - inicio
+                    return ahora - inicio
+                falta = (1 - self._fichas) / self._por_segundo
+            espero = True
+            time.sleep(falta)
+
+    # --- Cuota diaria --------------------------------------------------------
+
+    def _cambiar_dia(self):
+        if self._dia != _hoy():
+            self._dia, self._usadas_hoy = _hoy(), 0
+
+    def _verificar_cuota(self):
+        self._cambiar_dia()
+        if self.por_dia and self._usadas_hoy >= self.por_dia:
+            self.rechazadas += 1
+            reinicio = _proxima_medianoche()
+            raise CuotaAgotada(
+                f"Cuota diaria de la API agotada ({self.por_dia} peticiones); "
+                f"se restablece el {reinicio:%Y-%m-%d %H:%M} UTC",
+                reinicio
+            )
+
+    def _contar_dia(self):
+        self._usadas_hoy += 1
+        if self.ruta_cuota:
+            temporal = f"{self.ruta_cuota}.tmp"
+            try:
+                with open(temporal, 'w', encoding='utf-8') as archivo:
+                    json.dump({'dia': self._dia.isoformat(), 'usadas': self._usadas_hoy}, archivo)
+                os.replace(temporal, self.ruta_cuota)
+            except OSError:
+                self.errores_cuota += 1
+
+    def _leer_cuota(self):
+        """(día, usadas) guardados; un archivo de otro día o ilegible cuenta desde cero"""
+        hoy = _hoy()
+        if not self.ruta_cuota or not os.path.exists(self.ruta_cuota):
+            return hoy, 0
+        try:
+            with open(self.ruta_cuota, encoding='utf-8') as archivo:
+                guardado = json.load(archivo)
+            if guardado.get('dia') == hoy.isoformat():
+                return hoy, int(guardado.get('usadas', 0))
+        except (OSError, ValueError, AttributeError):
+            pass
+        return hoy, 0
+
+    def disponibles_hoy(self):
+        """Peticiones que quedan hoy (None si no hay cuota diaria)"""
+        with self._lock:
+            self._cambiar_dia()
+            return max(0, self.por_dia - self._usadas_hoy) if self.por_dia else None
+
+    def estado(self):
+        disponibles = self.disponibles_hoy()
+        with self._lock:
+            if self.por_minuto:
+                self._reponer(time.monotonic())
+            return {
+                'por_minuto': self.por_minuto,
+                'rafaga': self.rafaga,
+                'fichas': self._fichas if self.por_minuto else None,
+                'por_dia': self.por_dia,
+                'usadas_hoy': self._usadas_hoy,
+                'disponibles_hoy': disponibles,
+                'adquiridas': self.adquiridas,
+                'esperas': self.esperas,
+                'segundos_espera': self.segundos_espera,
+                'rechazadas': self.rechazadas,
+                'errores_cuota': self.errores_cuota,
+            }
+
+
+def _limite_desde_entorno():
+    por_minuto = max(0, int(os.getenv('API_PETICIONES_POR_MINUTO', '60')))
+    por_dia = max(0, int(os.getenv('API_PETICIONES_POR_DIA', '1000')))
+    if not (por_minuto or por_dia):
+        return None
+    return LimiteTasa(por_minuto, int(os.getenv('API_RAFAGA', '0')) or None, por_dia,
+                      os.getenv('API_CUOTA_ARCHIVO', 'cuota_api.json') or None)
+
+
+# Compartido por los clientes de los servicios (None = sin límite)
+limite_api = _limite_desde_entorno()
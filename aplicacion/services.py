@@ -1,40 +1,86 @@
 from persistencia.repositorios import DepartamentoRepo, ProyectoRepo, EmpleadoRepo, LogClimaRepo
+from persistencia.repositorios_async import AsyncProyectoRepo, AsyncLogClimaRepo
 from aplicacion.api_client import EcoAPIClient
+from aplicacion.api_client_async import AsyncEcoAPIClient, PETICIONES_SIMULTANEAS_DEFECTO
+from aplicacion.cache_calidad_aire import cache_calidad_aire
+from aplicacion.limite_tasa import limite_api, CuotaAgotada
+from aplicacion.exportacion import exportar_csv
+from aplicacion.busqueda import indice_global
+from aplicacion.cargadores import Cargador
 from presentacion.ui_helpers import UI
+from persistencia.unit_of_work import UnitOfWork, al_confirmar
+from persistencia.lotes import trocear
+from persistencia.db import Database
+from persistencia.instrumentacion import metricas
+from persistencia.auditoria import auditoria
+from persistencia.geocodificacion import cache_geocodificacion
 from dominio.models import LogClima
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
 import uuid
 
 
 class DepartamentoService:
     def __init__(self):
         self.repo = DepartamentoRepo()
+        self.indice = indice_global
 
     def crear(self, departamento):
         try:
             self.repo.crear(departamento)
+            al_confirmar(lambda: self.indice.agregar('departamento', departamento.id, departamento.nombre))
+            auditoria.registrar('crear', 'departamentos', departamento.id, nuevos=departamento)
             UI.print_success("Departamento creado")
+            return True
         except Exception as e:
             UI.print_error(f"Error creando departamento: {e}")
+            return False
 
     def listar_todos(self):
         return self.repo.listar_todos()
 
+    def iterar_todos(self):
+        """Recorre todos los registros sin cargarlos completos en memoria"""
+        return self.repo.iterar_todos()
+
     def obtener_por_id(self, id_):
         return self.repo.obtener_por_id(id_)
 
     def buscar_por_nombre(self, nombre):
         return self.repo.buscar_por_nombre(nombre)
 
+    def listar_pagina(self, tamano=20, token=None):
+        """Página de registros: {'filas', 'siguiente'} (token para la página siguiente)"""
+        return self.repo.listar_pagina(tamano, token)
+
+    def buscar_por_nombre_pagina(self, nombre, tamano=20, token=None):
+        """Página de resultados de búsqueda: {'filas', 'siguiente'}"""
+        return self.repo.buscar_por_nombre_pagina(nombre, tamano, token)
+
+    def buscar_texto(self, termino, modo='frase', limite=50):
+        """Búsqueda por nombre ordenada por relevancia (modos: frase, natural, prefijo)"""
+        return self.repo.buscar_texto(termino, modo, limite)
+
     def modificar(self, id_, cambios: dict):
         try:
-            self.repo.actualizar(id_, cambios)
+            # Imagen previa y cambio en la misma transacción del primario (no en una réplica atrasada)
+            with UnitOfWork():
+                anteriores = self.repo.obtener_por_id(id_) if auditoria.activa else None
+                self.repo.actualizar(id_, cambios)
+                al_confirmar(lambda: self.indice.actualizar('departamento', id_, cambios.get('nombre')))
+                auditoria.registrar('modificar', 'departamentos', id_, anteriores, cambios)
             UI.print_success("Departamento actualizado")
         except Exception as e:
             UI.print_error(f"Error actualizando departamento: {e}")
 
     def eliminar(self, id_):
         try:
-            self.repo.eliminar(id_)
+            with UnitOfWork():
+                anteriores = self.repo.obtener_por_id(id_) if auditoria.activa else None
+                self.repo.eliminar(id_)
+                al_confirmar(lambda: self.indice.eliminar('departamento', id_))
+                auditoria.registrar('eliminar', 'departamentos', id_, anteriores)
             UI.print_success("Departamento eliminado")
         except Exception as e:
             UI.print_error(f"Error eliminando departamento: {e}")
@@ -43,44 +89,105 @@ class DepartamentoService:
 class ProyectoService:
     def __init__(self):
         self.repo = ProyectoRepo()
+        self.indice = indice_global
         self.log_clima_repo = LogClimaRepo()
+        self.repo_async = AsyncProyectoRepo()
+        self.log_clima_repo_async = AsyncLogClimaRepo()
+        self._cliente_api = None
+
+    @property
+    def cliente_api(self):
+        """EcoAPIClient del servicio: se crea en la primera consulta y reutiliza sus conexiones"""
+        if self._cliente_api is None:
+            self._cliente_api = EcoAPIClient(cache_coordenadas=cache_geocodificacion,
+                                             cache_calidad_aire=cache_calidad_aire,
+                                             limite_tasa=limite_api)
+        return self._cliente_api
+
+    @staticmethod
+    def crear_cliente_api_async():
+        """
+        AsyncEcoAPIClient con las mismas cachés y límite que `cliente_api`:
+        sus peticiones cuentan para la misma cuota diaria
+        """
+        return AsyncEcoAPIClient(cache_coordenadas=cache_geocodificacion,
+                                 cache_calidad_aire=cache_calidad_aire,
+                                 limite_tasa=limite_api)
 
     def crear(self, proyecto):
         try:
             self.repo.crear(proyecto)
+            al_confirmar(lambda: self.indice.agregar('proyecto', proyecto.id, proyecto.nombre))
+            auditoria.registrar('crear', 'proyectos', proyecto.id, nuevos=proyecto)
             UI.print_success("Proyecto creado")
+            return True
         except Exception as e:
             UI.print_error(f"Error creando proyecto: {e}")
+            return False
 
     def listar_todos(self):
         return self.repo.listar_todos()
 
+    def iterar_todos(self):
+        """Recorre todos los registros sin cargarlos completos en memoria"""
+        return self.repo.iterar_todos()
+
     def obtener_por_id(self, id_):
         return self.repo.obtener_por_id(id_)
 
     def buscar_por_nombre(self, nombre):
         return self.repo.buscar_por_nombre(nombre)
 
+    def listar_pagina(self, tamano=20, token=None):
+        """Página de registros: {'filas', 'siguiente'} (token para la página siguiente)"""
+        return self.repo.listar_pagina(tamano, token)
+
+    def buscar_por_nombre_pagina(self, nombre, tamano=20, token=None):
+        """Página de resultados de búsqueda: {'filas', 'siguiente'}"""
+        return self.repo.buscar_por_nombre_pagina(nombre, tamano, token)
+
+    def buscar_texto(self, termino, modo='frase', limite=50):
+        """Búsqueda por nombre ordenada por relevancia (modos: frase, natural, prefijo)"""
+        return self.repo.buscar_texto(termino, modo, limite)
+
     def modificar(self, id_, cambios: dict):
         try:
-            self.repo.actualizar(id_, cambios)
+            with UnitOfWork():
+                anteriores = self.repo.obtener_por_id(id_) if auditoria.activa else None
+                self.repo.actualizar(id_, cambios)
+                al_confirmar(lambda: self.indice.actualizar('proyecto', id_, cambios.get('nombre')))
+                auditoria.registrar('modificar', 'proyectos', id_, anteriores, cambios)
             UI.print_success("Proyecto actualizado")
         except Exception as e:
             UI.print_error(f"Error actualizando proyecto: {e}")
 
     def eliminar(self, id_):
         try:
-            self.repo.eliminar(id_)
+            with UnitOfWork():
+                anteriores = self.repo.obtener_por_id(id_) if auditoria.activa else None
+                self.repo.eliminar(id_)
+                al_confirmar(lambda: self.indice.eliminar('proyecto', id_))
+                auditoria.registrar('eliminar', 'proyectos', id_, anteriores)
             UI.print_success("Proyecto eliminado")
         except Exception as e:
             UI.print_error(f"Error eliminando proyecto: {e}")
 
+    def exportar_csv(self, ruta: str):
+        """Exporta todos los proyectos a CSV en streaming; retorna filas escritas o None"""
+        try:
+            total = exportar_csv(self.repo.iterar_todos(), ruta)
+            UI.print_success(f"{total} proyectos exportados a {ruta}")
+            return total
+        except Exception as e:
+            UI.print_error(f"Error exportando proyectos: {e}")
+            return None
+
     def obtener_calidad_aire_por_ciudad(self, ciudad: str, pais: str = "CL", 
                                         usuario_id: str = None, proyecto_id: str = None,
                                         guardar_log: bool = True):
         """
         Obtiene datos de calidad del aire para una ciudad y opcionalmente guarda el log.
-        Usa `aplicacion.api_client.EcoAPIClient`.
+        Usa el `EcoAPIClient` del servicio (reutiliza sus conexiones entre consultas).
         
         Args:
             ciudad: Nombre de la ciudad
@@ -91,9 +198,12 @@ class ProyectoService:
         
         Returns:
             Diccionario con datos de calidad del aire o None si hay error
+        
+        Raises:
+            CuotaAgotada: Si la cuota de la API está agotada (con la hora de reinicio)
         """
         try:
-            client = EcoAPIClient()
+            client = self.cliente_api
             
             # Obtener coordenadas primero
             coords = client.obtener_coordenadas_ciudad(ciudad, pais)
@@ -106,23 +216,7 @@ class ProyectoService:
             if datos and guardar_log:
                 # Guardar log en la base de datos
                 try:
-                    log = LogClima(
-                        id=str(uuid.uuid4()),
-                        ciudad=ciudad,
-                        pais=pais,
-                        aqi=datos.get('aqi'),
-                        co=datos.get('co'),
-                        no2=datos.get('no2'),
-                        o3=datos.get('o3'),
-                        so2=datos.get('so2'),
-                        pm2_5=datos.get('pm2_5'),
-                        pm10=datos.get('pm10'),
-                        nh3=datos.get('nh3'),
-                        latitud=coords['lat'],
-                        longitud=coords['lon'],
-                        usuario_id=usuario_id,
-                        proyecto_id=proyecto_id
-                    )
+                    log = self._crear_log_clima(ciudad, pais, datos, coords, usuario_id, proyecto_id)
                     self.log_clima_repo.crear(log)
                 except Exception as e:
                     # Si falla guardar el log, no afecta la consulta
@@ -130,6 +224,8 @@ class ProyectoService:
             
             return datos
             
+        except CuotaAgotada:
+            raise
         except ValueError as e:
             # API_KEY no configurada
             UI.print_error(f"Configuración faltante para API: {e}")
@@ -138,6 +234,235 @@ class ProyectoService:
             UI.print_error(f"Error obteniendo calidad del aire: {e}")
             return None
     
+    def obtener_calidad_aire_lote(self, ciudades, usuario_id: str = None, proyecto_id: str = None,
+                                  guardar_log: bool = True, max_hilos: int = None):
+        """
+        Consulta muchas ciudades con un pool de hilos y guarda todos los logs en lote.
+        
+        Cada hilo geocodifica su ciudad y consulta la calidad del aire con el
+        `EcoAPIClient` del servicio (sesión, cachés y límite de peticiones
+        compartidos); los logs obtenidos se insertan con un único crear_muchos.
+        Un fallo en una ciudad no detiene las demás: queda en su 'error'. Con
+        la cuota agotada las ciudades restantes fallan de inmediato (sin ir a
+        la red) con el mensaje de `CuotaAgotada`; las que están en caché responden.
+        
+        Args:
+            ciudades: Iterable de tuplas (ciudad, pais)
+            max_hilos: Consultas simultáneas (por defecto API_LOTE_HILOS, 8)
+        
+        Returns:
+            Lista de dicts {'ciudad', 'pais', 'datos', 'error'} en el orden
+            recibido (datos es None y error el motivo para las que fallaron)
+        """
+        ciudades = list(ciudades)
+        try:
+            client = self.cliente_api
+        except ValueError as e:
+            UI.print_error(f"Configuración faltante para API: {e}")
+            return []
+        
+        def consultar(ciudad_pais):
+            ciudad, pais = ciudad_pais
+            try:
+                coords = client.geocodificar(ciudad, pais)
+                if not coords:
+                    return None, None, "Ciudad no encontrada"
+                datos = client.consultar_calidad_aire(coords['lat'], coords['lon'])
+                if not datos:
+                    return coords, None, "Sin datos de calidad del aire"
+                return coords, datos, None
+            except Exception as e:
+                return None, None, str(e) or type(e).__name__
+        
+        max_hilos = max_hilos or int(os.getenv('API_LOTE_HILOS', '8'))
+        with ThreadPoolExecutor(max_workers=max(1, min(max_hilos, len(ciudades) or 1))) as pool:
+            respuestas = list(pool.map(consultar, ciudades))
+        
+        resultados, logs = [], []
+        for (ciudad, pais), (coords, datos, error) in zip(ciudades, respuestas):
+            resultados.append({'ciudad': ciudad, 'pais': pais, 'datos': datos, 'error': error})
+            if datos and guardar_log:
+                try:
+                    logs.append(self._crear_log_clima(ciudad, pais, datos, coords, usuario_id, proyecto_id))
+                except ValueError as e:
+                    UI.print_warning(f"Advertencia: log de '{ciudad}, {pais}' inválido ({e})")
+        
+        if logs:
+            try:
+                self.log_clima_repo.crear_muchos(logs)
+            except Exception as e:
+                UI.print_warning(f"Advertencia: No se pudieron guardar los logs ({e})")
+        return resultados
+    
+    @staticmethod
+    def _crear_log_clima(ciudad, pais, datos, coords, usuario_id=None, proyecto_id=None):
+        return LogClima(
+            id=str(uuid.uuid4()),
+            ciudad=ciudad,
+            pais=pais,
+            aqi=datos.get('aqi'),
+            co=datos.get('co'),
+            no2=datos.get('no2'),
+            o3=datos.get('o3'),
+            so2=datos.get('so2'),
+            pm2_5=datos.get('pm2_5'),
+            pm10=datos.get('pm10'),
+            nh3=datos.get('nh3'),
+            latitud=coords['lat'],
+            longitud=coords['lon'],
+            usuario_id=usuario_id,
+            proyecto_id=proyecto_id
+        )
+    
+    # --- Variantes asíncronas (aiomysql + aiohttp) para procesos de ingesta ---
+    
+    async def crear_async(self, proyecto):
+        try:
+            await self.repo_async.crear(proyecto)
+            # La conexión asíncrona ya confirmó: no hay unidad de trabajo que esperar
+            self.indice.agregar('proyecto', proyecto.id, proyecto.nombre)
+            auditoria.registrar('crear', 'proyectos', proyecto.id, nuevos=proyecto)
+            return True
+        except Exception as e:
+            UI.print_error(f"Error creando proyecto: {e}")
+            return False
+    
+    async def obtener_por_id_async(self, id_):
+        return await self.repo_async.obtener_por_id(id_)
+    
+    async def listar_todos_async(self):
+        return await self.repo_async.listar_todos()
+    
+    async def listar_logs_clima_async(self, limit=50):
+        """Obtiene los logs de clima más recientes"""
+        try:
+            return await self.log_clima_repo_async.listar_todos(limit)
+        except Exception as e:
+            UI.print_error(f"Error obteniendo logs: {e}")
+            return []
+    
+    async def obtener_calidad_aire_por_ciudad_async(self, ciudad: str, pais: str = "CL",
+                                                    usuario_id: str = None, proyecto_id: str = None,
+                                                    guardar_log: bool = True, client=None):
+        """
+        Versión asíncrona de obtener_calidad_aire_por_ciudad.
+        
+        Args:
+            client: AsyncEcoAPIClient compartido entre llamadas (recomendado para
+                reutilizar conexiones); si no se indica se crea uno para esta
+                consulta con `crear_cliente_api_async`
+        
+        Returns:
+            Diccionario con datos de calidad del aire o None si hay error
+        
+        Raises:
+            CuotaAgotada: Si la cuota de la API está agotada (con la hora de reinicio)
+        """
+        propio = client is None
+        try:
+            client = client or self.crear_cliente_api_async()
+            coords = await client.geocodificar(ciudad, pais)
+            if not coords:
+                UI.print_warning(f"No se encontraron coordenadas para '{ciudad}, {pais}'")
+                return None
+            
+            datos = await client.consultar_calidad_aire(coords['lat'], coords['lon'])
+            
+            if datos and guardar_log:
+                try:
+                    log = self._crear_log_clima(ciudad, pais, datos, coords, usuario_id, proyecto_id)
+                    await self.log_clima_repo_async.crear(log)
+                except Exception as e:
+                    UI.print_warning(f"Advertencia: No se pudo guardar el log ({e})")
+            
+            return datos
+            
+        except CuotaAgotada:
+            raise
+        except ValueError as e:
+            UI.print_error(f"Configuración faltante para API: {e}")
+            return None
+        except asyncio.TimeoutError:
+            UI.print_error("Error obteniendo calidad del aire: timeout al consultar la API")
+            return None
+        except Exception as e:
+            UI.print_error(f"Error obteniendo calidad del aire: {str(e) or type(e).__name__}")
+            return None
+        finally:
+            if propio and client is not None:
+                await client.cerrar()
+    
+    async def ingerir_calidad_aire_async(self, ciudades, usuario_id: str = None,
+                                         proyecto_id: str = None, client=None, max_concurrentes: int = None):
+        """
+        Consulta muchas ciudades en paralelo y guarda todos los logs en lote.
+        
+        Las consultas avanzan a la vez en el mismo event loop, con a lo sumo
+        `max_concurrentes` ciudades en curso (un semáforo: con miles de
+        ciudades no se crean miles de peticiones pendientes a la vez); los
+        registros obtenidos se insertan con un único crear_muchos. Un fallo en
+        una ciudad no detiene las demás: queda en su 'error'. Como en
+        `obtener_calidad_aire_lote`, las peticiones pasan por el límite y las
+        cachés compartidos: con la cuota agotada las ciudades restantes fallan
+        con el mensaje de `CuotaAgotada` y las que están en caché responden.
+        
+        Args:
+            ciudades: Iterable de tuplas (ciudad, pais)
+            client: AsyncEcoAPIClient compartido (por defecto `crear_cliente_api_async`)
+            max_concurrentes: Ciudades en curso a la vez (por defecto API_ASYNC_CONCURRENCIA, 20)
+        
+        Returns:
+            Lista de dicts {'ciudad', 'pais', 'datos', 'error'} en el orden
+            recibido (datos es None y error el motivo para las que fallaron)
+        """
+        ciudades = list(ciudades)
+        propio = client is None
+        if propio:
+            try:
+                client = self.crear_cliente_api_async()
+            except ValueError as e:
+                UI.print_error(f"Configuración faltante para API: {e}")
+                return []
+        
+        semaforo = asyncio.Semaphore(max(1, max_concurrentes or PETICIONES_SIMULTANEAS_DEFECTO))
+        
+        async def consultar(ciudad, pais):
+            async with semaforo:
+                try:
+                    coords = await client.geocodificar(ciudad, pais)
+                    if not coords:
+                        return None, None, "Ciudad no encontrada"
+                    datos = await client.consultar_calidad_aire(coords['lat'], coords['lon'])
+                    if not datos:
+                        return coords, None, "Sin datos de calidad del aire"
+                    return coords, datos, None
+                except asyncio.TimeoutError:
+                    return None, None, "Timeout al consultar la API"
+                except Exception as e:
+                    return None, None, str(e) or type(e).__name__
+        
+        try:
+            respuestas = await asyncio.gather(*(consultar(c, p) for c, p in ciudades))
+        finally:
+            if propio:
+                await client.cerrar()
+        
+        resultados, logs = [], []
+        for (ciudad, pais), (coords, datos, error) in zip(ciudades, respuestas):
+            resultados.append({'ciudad': ciudad, 'pais': pais, 'datos': datos, 'error': error})
+            if datos:
+                try:
+                    logs.append(self._crear_log_clima(ciudad, pais, datos, coords, usuario_id, proyecto_id))
+                except ValueError as e:
+                    UI.print_warning(f"Advertencia: log de '{ciudad}, {pais}' inválido ({e})")
+        
+        if logs:
+            try:
+                await self.log_clima_repo_async.crear_muchos(logs)
+            except Exception as e:
+                UI.print_warning(f"Advertencia: No se pudieron guardar los logs ({e})")
+        return resultados
+    
     def listar_logs_clima(self, limit=50):
         """Obtiene todos los logs de clima guardados"""
         try:
@@ -146,21 +471,67 @@ class ProyectoService:
             UI.print_error(f"Error obteniendo logs: {e}")
             return []
     
-    def listar_logs_por_ciudad(self, ciudad: str, limit=50):
-        """Obtiene logs filtrados por ciudad"""
+    def listar_logs_clima_pagina(self, tamano=20, token=None):
+        """Página del historial de clima, más reciente primero: {'filas', 'siguiente'}"""
+        try:
+            return self.log_clima_repo.listar_pagina(tamano, token)
+        except Exception as e:
+            UI.print_error(f"Error obteniendo logs: {e}")
+            return {'filas': [], 'siguiente': None}
+    
+    def listar_logs_clima_pagina_con_relaciones(self, tamano=20, token=None, cargador=None):
+        """
+        Página del historial con el proyecto y el usuario de cada registro
+        ('proyecto' y 'usuario', o None): una consulta por tipo para toda la página
+        """
+        pagina = self.listar_logs_clima_pagina(tamano, token)
+        cargador = cargador or Cargador()
+        try:
+            cargador.adjuntar(pagina['filas'], 'proyecto_id', 'proyecto')
+            cargador.adjuntar(pagina['filas'], 'usuario_id', 'usuario')
+        except Exception as e:
+            UI.print_warning(f"Advertencia: No se pudieron cargar proyectos y usuarios ({e})")
+        return pagina
+    
+    def listar_logs_por_ciudad(self, ciudad: str, limit=50, pais: str = None):
+        """Obtiene logs de una ciudad (nombre exacto, sin distinguir mayúsculas)"""
         try:
-            return self.log_clima_repo.listar_por_ciudad(ciudad, limit)
+            return self.log_clima_repo.listar_por_ciudad(ciudad, limit, pais)
         except Exception as e:
             UI.print_error(f"Error obteniendo logs: {e}")
             return []
     
-    def obtener_estadisticas_ciudad(self, ciudad: str):
-        """Obtiene estadísticas agregadas de una ciudad"""
+    def listar_logs_por_ciudad_pagina(self, ciudad: str, tamano=20, token=None, pais: str = None):
+        """Página de logs de una ciudad, más reciente primero: {'filas', 'siguiente'}"""
         try:
-            return self.log_clima_repo.obtener_estadisticas_por_ciudad(ciudad)
+            return self.log_clima_repo.listar_por_ciudad_pagina(ciudad, tamano, token, pais)
+        except Exception as e:
+            UI.print_error(f"Error obteniendo logs: {e}")
+            return {'filas': [], 'siguiente': None}
+    
+    def listar_logs_por_proyecto(self, proyecto_id: str, limit=50):
+        """Obtiene los logs asociados a un proyecto, más reciente primero"""
+        try:
+            return self.log_clima_repo.listar_por_proyecto(proyecto_id, limit)
+        except Exception as e:
+            UI.print_error(f"Error obteniendo logs: {e}")
+            return []
+    
+    def obtener_estadisticas_ciudad(self, ciudad: str, pais: str = None):
+        """Estadísticas agregadas por (ciudad, pais) de las ciudades que empiezan por `ciudad`"""
+        try:
+            return self.log_clima_repo.obtener_estadisticas_por_ciudad(ciudad, pais)
         except Exception as e:
             UI.print_error(f"Error obteniendo estadísticas: {e}")
-            return None
+            return []
+    
+    def serie_calidad_aire(self, ciudad: str, pais: str, desde, hasta=None, resolucion='hora'):
+        """Serie temporal de una ciudad desde los rollups ('cruda', 'hora', 'dia' o timedelta)"""
+        try:
+            return self.log_clima_repo.serie_temporal(ciudad, pais, desde, hasta, resolucion)
+        except Exception as e:
+            UI.print_error(f"Error obteniendo serie temporal: {e}")
+            return []
     
     def listar_ciudades_consultadas(self):
         """Obtiene lista de ciudades únicas consultadas"""
@@ -169,38 +540,225 @@ class ProyectoService:
         except Exception as e:
             UI.print_error(f"Error obteniendo ciudades: {e}")
             return []
+    
+    def iterar_ciudades_consultadas(self):
+        """Recorre las ciudades consultadas sin cargarlas completas en memoria"""
+        return self.log_clima_repo.iterar_ciudades_consultadas()
+    
+    def exportar_logs_clima_csv(self, ruta: str):
+        """Exporta todo el historial de clima a CSV en streaming; retorna filas escritas o None"""
+        try:
+            total = exportar_csv(self.log_clima_repo.iterar_todos(), ruta)
+            UI.print_success(f"{total} registros de clima exportados a {ruta}")
+            return total
+        except Exception as e:
+            UI.print_error(f"Error exportando logs de clima: {e}")
+            return None
 
 
 class EmpleadoService:
     def __init__(self):
         self.repo = EmpleadoRepo()
+        self.indice = indice_global
 
     def crear(self, empleado):
         try:
             self.repo.crear(empleado)
-            UI.print_success("Empleado creado")
+            al_confirmar(lambda: self.indice.agregar('empleado', empleado.id, empleado.nombre, empleado.email))
+            auditoria.registrar('crear', 'empleados', empleado.id, nuevos=empleado)
+            al_confirmar(lambda: UI.print_success("Empleado creado"))
+            return True
         except Exception as e:
             UI.print_error(f"Error creando empleado: {e}")
+            return False
+
+    def crear_con_usuario(self, empleado, usuario, contrasena_plana: str, usuario_service):
+        """
+        Crea el usuario y el empleado asociado en una sola transacción.
+
+        Si cualquiera de los dos falla se revierten ambos, evitando usuarios huérfanos
+        (también cuando el fallo ocurre antes de llegar a la base, p. ej. al
+        hashear la contraseña: el servicio lo informa retornando False).
+
+        Args:
+            empleado: Instancia de Empleado vinculada a usuario.id
+            usuario: Instancia de Usuario (sin salt ni hash aún)
+            contrasena_plana: Contraseña inicial en texto plano
+            usuario_service: UsuarioService que crea el usuario
+
+        Returns:
+            True si ambos quedaron guardados
+        """
+        with UnitOfWork() as uow:
+            if not (usuario_service.crear_usuario(usuario, contrasena_plana) and self.crear(empleado)):
+                uow.rollback()
+
+        if uow.revertida:
+            UI.print_warning("Operación revertida: no se guardó el usuario ni el empleado")
+            return False
+        return True
 
     def listar_todos(self):
         return self.repo.listar_todos()
 
+    def iterar_todos(self):
+        """Recorre todos los registros sin cargarlos completos en memoria"""
+        return self.repo.iterar_todos()
+
     def obtener_por_id(self, id_):
         return self.repo.obtener_por_id(id_)
 
     def buscar_por_nombre(self, nombre):
         return self.repo.buscar_por_nombre(nombre)
 
+    def listar_pagina(self, tamano=20, token=None):
+        """Página de registros: {'filas', 'siguiente'} (token para la página siguiente)"""
+        return self.repo.listar_pagina(tamano, token)
+
+    def listar_pagina_con_departamento(self, tamano=20, token=None, cargador=None):
+        """Página de empleados con su 'departamento' (dict o None), en una consulta por página"""
+        pagina = self.repo.listar_pagina(tamano, token)
+        (cargador or Cargador()).adjuntar(pagina['filas'], 'departamento_id', 'departamento')
+        return pagina
+
+    def iterar_con_departamento(self, tamano_bloque=200):
+        """
+        Recorre todos los empleados con su 'departamento', resolviendo los
+        departamentos por bloques de `tamano_bloque` empleados (cada
+        departamento se consulta una sola vez en todo el recorrido)
+        """
+        cargador = Cargador()
+        for bloque in trocear(self.repo.iterar_todos(), tamano_bloque):
+            yield from cargador.adjuntar(bloque, 'departamento_id', 'departamento')
+
+    def buscar_por_nombre_pagina(self, nombre, tamano=20, token=None):
+        """Página de resultados de búsqueda: {'filas', 'siguiente'}"""
+        return self.repo.buscar_por_nombre_pagina(nombre, tamano, token)
+
+    def buscar_texto(self, termino, modo='frase', limite=50):
+        """Búsqueda por nombre ordenada por relevancia (modos: frase, natural, prefijo)"""
+        return self.repo.buscar_texto(termino, modo, limite)
+
     def modificar(self, id_, cambios: dict):
         try:
-            self.repo.actualizar(id_, cambios)
+            with UnitOfWork():
+                anteriores = self.repo.obtener_por_id(id_) if auditoria.activa else None
+                self.repo.actualizar(id_, cambios)
+                al_confirmar(lambda: self.indice.actualizar('empleado', id_, cambios.get('nombre'), cambios.get('email')))
+                auditoria.registrar('modificar', 'empleados', id_, anteriores, cambios)
             UI.print_success("Empleado actualizado")
         except Exception as e:
             UI.print_error(f"Error actualizando empleado: {e}")
 
     def eliminar(self, id_):
         try:
-            self.repo.eliminar(id_)
+            with UnitOfWork():
+                anteriores = self.repo.obtener_por_id(id_) if auditoria.activa else None
+                self.repo.eliminar(id_)
+                al_confirmar(lambda: self.indice.eliminar('empleado', id_))
+                auditoria.registrar('eliminar', 'empleados', id_, anteriores)
             UI.print_success("Empleado eliminado")
         except Exception as e:
             UI.print_error(f"Error eliminando empleado: {e}")
+
+    def exportar_csv(self, ruta: str):
+        """Exporta todos los empleados a CSV en streaming; retorna filas escritas o None"""
+        try:
+            total = exportar_csv(self.repo.iterar_todos(), ruta)
+            UI.print_success(f"{total} empleados exportados a {ruta}")
+            return total
+        except Exception as e:
+            UI.print_error(f"Error exportando empleados: {e}")
+            return None
+
+
+class BusquedaService:
+    """Búsqueda global sobre el índice de trigramas en memoria"""
+
+    def __init__(self, indice=None):
+        self.indice = indice or indice_global
+
+    def buscar(self, consulta: str, tipos=None, limite=20):
+        """Resultados ordenados por similitud: [{'tipo', 'id', 'nombre', 'detalle', 'puntaje'}]"""
+        try:
+            return self.indice.buscar(consulta, tipos, limite)
+        except Exception as e:
+            UI.print_error(f"Error en búsqueda global: {e}")
+            return []
+
+    def recargar(self):
+        """Descarta el índice para que la próxima búsqueda lo reconstruya desde la base"""
+        self.indice.invalidar()
+
+    def estadisticas(self):
+        return self.indice.estadisticas()
+
+
+class DiagnosticoService:
+    """Métricas de consultas SQL y del pool de conexiones (administradores)"""
+
+    def __init__(self):
+        self.metricas = metricas
+
+    @property
+    def activa(self):
+        return self.metricas.activa
+
+    def activar(self, umbral_lenta_ms=None):
+        self.metricas.activar(umbral_lenta_ms)
+        UI.print_success(f"Instrumentación activada (consulta lenta ≥ {self.metricas.umbral_lenta_ms:g} ms)")
+
+    def desactivar(self):
+        self.metricas.desactivar()
+        UI.print_success("Instrumentación desactivada")
+
+    def sentencias(self, orden='total', limite=10):
+        """Sentencias con más tiempo acumulado (o por p95, llamadas, filas)"""
+        return self.metricas.sentencias(orden, limite)
+
+    def consultas_lentas(self):
+        return self.metricas.lentas()
+
+    def adquisicion_conexion(self):
+        return self.metricas.adquisicion()
+
+    def estado_pool(self):
+        return Database.pool_stats()
+
+    def estado_replicas(self):
+        """Estado de las réplicas de lectura (None si no hay DB_REPLICAS)"""
+        return Database.replicas_stats()
+
+    def estado_auditoria(self):
+        """Cola de auditoría: encolados, escritos, descartados, lotes, política"""
+        return auditoria.estado()
+
+    def estado_geocodificacion(self):
+        """Aciertos y fallos de la caché de coordenadas"""
+        return cache_geocodificacion.estado()
+
+    def estado_cache_calidad_aire(self):
+        """Aciertos, fallos, vencidos y desalojos de la caché de calidad del aire"""
+        return cache_calidad_aire.estado()
+
+    def estado_limite_api(self):
+        """Fichas, cuota del día, peticiones y esperas del límite de la API (None si no hay límite)"""
+        return limite_api.estado() if limite_api is not None else None
+
+    def estado_escritura_diferida(self):
+        """Buffer diferido de logs_clima (None si no está activo o aún no se usó)"""
+        return LogClimaRepo.estado_escritura_diferida()
+
+    def reiniciar(self):
+        self.metricas.reiniciar()
+        UI.print_success("Métricas reiniciadas")
+
+    def exportar_json(self, ruta: str):
+        """Vuelca todas las métricas a un archivo JSON; retorna la ruta o None"""
+        try:
+            self.metricas.volcar_json(ruta)
+            UI.print_success(f"Métricas exportadas a {ruta}")
+            return ruta
+        except Exception as e:
+            UI.print_error(f"Error exportando métricas: {e}")
+            return None
@@ -1,7 +1,9 @@
-"""Modelos de dominio para autenticación"""
+"""Modelos de dominio para autenticación (con __slots__ y `from_row`, como dominio.models)"""
 
 
 class Usuario:
+    __slots__ = ('id', '_nombre_usuario', 'contrasena_cifrada', 'salt', 'rol_id', 'activo')
+
     def __init__(self, id: str, nombre_usuario: str, contrasena_cifrada: str, 
                  salt: str, rol_id: str, activo: bool = True):
         self.id = id
@@ -24,8 +26,22 @@ class Usuario:
     def __repr__(self):
         return f"Usuario(id={self.id}, nombre_usuario={self.nombre_usuario}, rol={self.rol_id})"
 
+    @classmethod
+    def from_row(cls, fila):
+        """Instancia desde una fila de la base de datos, sin validar (los listados no traen contraseña)"""
+        obj = cls.__new__(cls)
+        obj.id = fila['id']
+        obj._nombre_usuario = fila['nombre_usuario']
+        obj.contrasena_cifrada = fila.get('contrasena_cifrada')
+        obj.salt = fila.get('salt')
+        obj.rol_id = fila.get('rol_id')
+        obj.activo = bool(fila.get('activo', True))
+        return obj
+
 
 class Rol:
+    __slots__ = ('id', '_nombre', 'descripcion', 'nivel_permisos', 'activo')
+
     def __init__(self, id: str, nombre: str, descripcion: str = None, 
                  nivel_permisos: int = 1, activo: bool = True):
         self.id = id
@@ -46,3 +62,14 @@ class Rol:
     
     def __repr__(self):
         return f"Rol(id={self.id}, nombre={self.nombre}, nivel_permisos={self.nivel_permisos})"
+
+    @classmethod
+    def from_row(cls, fila):
+        """Instancia desde una fila de la base de datos, sin validar"""
+        obj = cls.__new__(cls)
+        obj.id = fila['id']
+        obj._nombre = fila['nombre']
+        obj.descripcion = fila.get('descripcion')
+        obj.nivel_permisos = fila.get('nivel_permisos')
+        obj.activo = bool(fila.get('activo', True))
+        return obj
@@ -1,4 +1,16 @@
+"""
+Modelos de dominio.
+
+Usan `__slots__` (sin `__dict__` por instancia) y validan en el constructor y
+en los setters. `from_row` es el camino de hidratación confiable: crea la
+instancia desde una fila leída de la base de datos sin volver a validar, ya
+que esos datos se validaron al guardarse.
+"""
+
+
 class Departamento:
+    __slots__ = ('id', '_nombre', 'descripcion')
+
     def __init__(self, id: str, nombre: str, descripcion: str = None):
         self.id = id
         self.nombre = nombre
@@ -17,8 +29,19 @@ class Departamento:
     def __repr__(self):
         return f"Departamento(id={self.id}, nombre={self.nombre})"
 
+    @classmethod
+    def from_row(cls, fila):
+        """Instancia desde una fila de la base de datos, sin validar"""
+        obj = cls.__new__(cls)
+        obj.id = fila['id']
+        obj._nombre = fila['nombre']
+        obj.descripcion = fila.get('descripcion')
+        return obj
+
 
 class Proyecto:
+    __slots__ = ('id', '_nombre', 'descripcion', 'fecha_inicio', 'fecha_fin')
+
     def __init__(self, id: str, nombre: str, descripcion: str = None, fecha_inicio: str = None, fecha_fin: str = None):
         self.id = id
         self.nombre = nombre
@@ -39,8 +62,21 @@ class Proyecto:
     def __repr__(self):
         return f"Proyecto(id={self.id}, nombre={self.nombre})"
 
+    @classmethod
+    def from_row(cls, fila):
+        """Instancia desde una fila de la base de datos, sin validar"""
+        obj = cls.__new__(cls)
+        obj.id = fila['id']
+        obj._nombre = fila['nombre']
+        obj.descripcion = fila.get('descripcion')
+        obj.fecha_inicio = fila.get('fecha_inicio')
+        obj.fecha_fin = fila.get('fecha_fin')
+        return obj
+
 
 class Empleado:
+    __slots__ = ('id', 'usuario_id', '_nombre', '_email', 'fecha_inicio_contrato', 'salario', 'departamento_id')
+
     def __init__(self, id: str, usuario_id: str, nombre: str, email: str, fecha_inicio_contrato: str, salario=None, departamento_id: str = None):
         self.id = id
         self.usuario_id = usuario_id
@@ -73,9 +109,29 @@ class Empleado:
     def __repr__(self):
         return f"Empleado(id={self.id}, nombre={self.nombre}, email={self.email})"
 
+    @classmethod
+    def from_row(cls, fila):
+        """Instancia desde una fila de la base de datos, sin validar"""
+        obj = cls.__new__(cls)
+        obj.id = fila['id']
+        obj.usuario_id = fila.get('usuario_id')
+        obj._nombre = fila['nombre']
+        obj._email = fila.get('email')
+        obj.fecha_inicio_contrato = fila.get('fecha_inicio_contrato')
+        obj.salario = fila.get('salario')
+        obj.departamento_id = fila.get('departamento_id')
+        return obj
+
 
 class LogClima:
-    """Modelo de dominio para registrar consultas de calidad del aire"""
+    """
+    Modelo de dominio para registrar consultas de calidad del aire.
+
+    `fecha_consulta` la asigna el repositorio al guardar; llega con `from_row`.
+    """
+
+    __slots__ = ('id', '_ciudad', 'pais', '_aqi', 'co', 'no2', 'o3', 'so2', 'pm2_5', 'pm10',
+                 'nh3', 'usuario_id', 'proyecto_id', 'latitud', 'longitud', 'fecha_consulta')
     
     def __init__(self, id: str, ciudad: str, pais: str, aqi: int, 
                  co: float = None, no2: float = None, o3: float = None, 
@@ -97,6 +153,7 @@ class LogClima:
         self.proyecto_id = proyecto_id
         self.latitud = latitud
         self.longitud = longitud
+        self.fecha_consulta = None
     
     @property
     def ciudad(self):
@@ -120,3 +177,25 @@ class LogClima:
     
     def __repr__(self):
         return f"LogClima(ciudad={self.ciudad}, pais={self.pais}, aqi={self.aqi})"
+
+    @classmethod
+    def from_row(cls, fila):
+        """Instancia desde una fila de la base de datos, sin validar"""
+        obj = cls.__new__(cls)
+        obj.id = fila['id']
+        obj._ciudad = fila['ciudad']
+        obj.pais = fila['pais']
+        obj._aqi = fila['aqi']
+        obj.co = fila.get('co')
+        obj.no2 = fila.get('no2')
+        obj.o3 = fila.get('o3')
+        obj.so2 = fila.get('so2')
+        obj.pm2_5 = fila.get('pm2_5')
+        obj.pm10 = fila.get('pm10')
+        obj.nh3 = fila.get('nh3')
+        obj.usuario_id = fila.get('usuario_id')
+        obj.proyecto_id = fila.get('proyecto_id')
+        obj.latitud = fila.get('latitud')
+        obj.longitud = fila.get('longitud')
+        obj.fecha_consulta = fila.get('fecha_consulta')
+        return obj
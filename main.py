@@ -1,7 +1,11 @@
-from aplicacion.services import DepartamentoService, ProyectoService, EmpleadoService
+from aplicacion.services import DepartamentoService, ProyectoService, EmpleadoService, BusquedaService, DiagnosticoService
 from aplicacion.auth_services import AuthService, UsuarioService, RolService
 from presentacion.menus import MainMenu
 from presentacion.auth_menus import LoginMenu
+from persistencia.rollups import CompactadorRollups
+from persistencia.auditoria import auditoria
+from persistencia.repositorios import LogClimaRepo
+import os
 
 
 def main():
@@ -17,11 +21,20 @@ def main():
     if not usuario_actual:
         # Si el login falla, terminar aplicación
         return
+
+    # Los cambios de esta sesión se auditan a nombre del usuario autenticado
+    auditoria.establecer_usuario(usuario_actual['id'])
+    
+    # Rollups de logs_clima en segundo plano (opcional)
+    if float(os.getenv('LOGS_CLIMA_ROLLUP_INTERVALO', '0')) > 0:
+        CompactadorRollups().start()
     
     # Servicios de la aplicación
     servicio_dept = DepartamentoService()
     servicio_proj = ProyectoService()
     servicio_emp = EmpleadoService()
+    servicio_busqueda = BusquedaService()
+    servicio_diagnostico = DiagnosticoService()
     
     # Menú principal con usuario autenticado
     menu = MainMenu(
@@ -30,10 +43,16 @@ def main():
         servicio_emp,
         usuario_service,
         rol_service,
-        usuario_actual
+        usuario_actual,
+        servicio_busqueda,
+        servicio_diagnostico
     )
     menu.ejecutar()
 
+    # Escribe los eventos de auditoría y las lecturas de clima aún en cola antes de salir
+    auditoria.detener()
+    LogClimaRepo.detener_escritura_diferida()
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,252 @@
+"""
+Acceso asíncrono a MySQL con aiomysql, para procesos que mantienen muchas
+consultas en curso sobre un mismo event loop (ingesta, integraciones).
+
+Es paralelo a `Database`: mismas variables de entorno, conexiones con
+DictCursor, commit al salir del bloque y rollback ante errores. El pool de
+aiomysql está atado al event loop que lo crea, por lo que se recrea si se usa
+desde otro loop (p. ej. sucesivas llamadas a `asyncio.run`). Para no dejar
+conexiones abiertas, una tarea guardiana cierra el pool dentro de su loop
+cuando `asyncio.run` cancela las tareas pendientes al terminar; si el loop
+anterior sigue vivo al crear el nuevo pool, el viejo se cierra en ese loop.
+
+aiomysql es opcional: la aplicación síncrona funciona sin instalarlo y el
+error aparece recién al usar esta capa.
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+
+from .instrumentacion import metricas
+from .lotes import trocear, _sql_por_ids, _ids_unicos, TAMANO_LOTE_DEFECTO, TAMANO_LOTE_IDS
+from .paginacion import _armar_consulta, _armar_pagina, TAMANO_PAGINA_DEFECTO
+
+try:
+    import aiomysql
+except ImportError:  # pragma: no cover - dependencia opcional
+    aiomysql = None
+
+load_dotenv()
+
+TAMANO_BLOQUE_STREAMING = int(os.getenv('DB_STREAM_CHUNK', '500'))
+
+
+if aiomysql is not None:
+    class CursorAsyncInstrumentado(aiomysql.DictCursor):
+        """
+        DictCursor de aiomysql que registra cada sentencia en `metricas` cuando
+        la instrumentación está activa; apagada, solo comprueba `metricas.activa`.
+        """
+
+        _en_lote = False
+
+        async def execute(self, query, args=None):
+            if self._en_lote or not metricas.activa:
+                return await super().execute(query, args)
+            inicio = time.perf_counter()
+            try:
+                return await super().execute(query, args)
+            finally:
+                metricas.registrar(query, time.perf_counter() - inicio, self.rowcount, args)
+
+        async def executemany(self, query, args):
+            # Igual que PyMySQL, aiomysql implementa executemany con execute
+            args = list(args or ())
+            if not args or not metricas.activa:
+                return await super().executemany(query, args)
+            self._en_lote = True
+            inicio = time.perf_counter()
+            try:
+                return await super().executemany(query, args)
+            finally:
+                self._en_lote = False
+                metricas.registrar(query, time.perf_counter() - inicio, self.rowcount,
+                                   args[0], lote=len(args))
+
+
+class AsyncDatabase:
+    _pool = None
+    _loop = None
+    _lock = None
+    _guardia = None
+
+    @classmethod
+    async def pool(cls):
+        """Pool de aiomysql del event loop actual, creado la primera vez"""
+        if aiomysql is None:
+            raise RuntimeError("La capa asíncrona requiere aiomysql: pip install aiomysql")
+        loop = asyncio.get_running_loop()
+        if cls._loop is not loop:
+            # El pool y el lock anteriores pertenecen a otro loop (ya cerrado o ajeno)
+            anterior, loop_anterior = cls._pool, cls._loop
+            cls._pool, cls._loop, cls._lock, cls._guardia = None, loop, asyncio.Lock(), None
+            if anterior is not None:
+                cls._cerrar_de_otro_loop(anterior, loop_anterior)
+        if cls._pool is None:
+            async with cls._lock:
+                if cls._pool is None:
+                    cls._pool = await aiomysql.create_pool(
+                        host=os.getenv('DB_HOST', '127.0.0.1'),
+                        user=os.getenv('DB_USER', 'ecotech_user'),
+                        password=os.getenv('DB_PASSWORD', 'ecotech_pass'),
+                        db=os.getenv('DB_NAME', 'ecotech_management'),
+                        port=int(os.getenv('DB_PORT', '3306')),
+                        minsize=int(os.getenv('DB_ASYNC_POOL_MIN', '1')),
+                        maxsize=int(os.getenv('DB_ASYNC_POOL_MAX', '50')),
+                        pool_recycle=int(float(os.getenv('DB_POOL_MAX_LIFETIME', '1800'))),
+                        cursorclass=CursorAsyncInstrumentado,
+                        autocommit=False,
+                    )
+                    cls._guardia = loop.create_task(cls._cerrar_al_terminar(cls._pool))
+        return cls._pool
+
+    @classmethod
+    async def _cerrar_al_terminar(cls, pool):
+        """Espera a ser cancelada (fin de `asyncio.run`) y cierra el pool si sigue siendo el actual"""
+        try:
+            await asyncio.get_running_loop().create_future()
+        except asyncio.CancelledError:
+            if cls._pool is pool:
+                cls._pool = None
+                pool.terminate()
+                await pool.wait_closed()
+            raise
+
+    @staticmethod
+    def _cerrar_de_otro_loop(pool, loop):
+        """
+        Cierra un pool creado en `loop` que su guardiana no alcanzó a cerrar:
+        si ese loop sigue corriendo (otro hilo) se cierra allí; si se detuvo
+        sin cancelar sus tareas, se terminan las conexiones en uso.
+        """
+        if loop is not None and loop.is_running():
+            async def cerrar():
+                pool.close()
+                await pool.wait_closed()
+            asyncio.run_coroutine_threadsafe(cerrar(), loop)
+            return
+        try:
+            pool.terminate()
+        except RuntimeError:
+            # Loop cerrado: el transporte no puede agendar su cierre
+            pass
+
+    @classmethod
+    @asynccontextmanager
+    async def connection(cls):
+        """
+        Entrega una conexión del pool como una transacción.
+
+        Hace commit al salir sin errores y rollback si ocurre una excepción;
+        si el rollback falla la conexión se cierra en vez de volver al pool.
+        Cuando el pool está agotado la tarea espera sin bloquear el loop.
+        """
+        pool = await cls.pool()
+        inicio = time.perf_counter()
+        conn = await pool.acquire()
+        if metricas.activa:
+            metricas.registrar_adquisicion(time.perf_counter() - inicio)
+        try:
+            yield conn
+            await conn.commit()
+        except BaseException:
+            try:
+                await conn.rollback()
+            except Exception:
+                conn.close()
+            raise
+        finally:
+            pool.release(conn)
+
+    @classmethod
+    async def iterar(cls, sql, params=None, tamano_bloque=None):
+        """
+        Generador asíncrono con cursor no bufferizado (SSDictCursor): entrega las
+        filas una a una trayéndolas en bloques de `tamano_bloque`.
+        """
+        tamano_bloque = tamano_bloque or TAMANO_BLOQUE_STREAMING
+        async with cls.connection() as conn:
+            async with conn.cursor(aiomysql.SSDictCursor) as cur:
+                await cur.execute(sql, params)
+                while True:
+                    filas = await cur.fetchmany(tamano_bloque)
+                    if not filas:
+                        break
+                    for fila in filas:
+                        yield fila
+
+    @classmethod
+    def pool_stats(cls):
+        """Conexiones abiertas, libres y máximo del pool asíncrono"""
+        if cls._pool is None:
+            return None
+        return {
+            'size': cls._pool.size,
+            'free': cls._pool.freesize,
+            'max_size': cls._pool.maxsize,
+        }
+
+    @classmethod
+    async def close_pool(cls):
+        """Cierra el pool del loop actual; se recreará si se vuelve a usar"""
+        if cls._pool is not None:
+            pool, guardia = cls._pool, cls._guardia
+            cls._pool = cls._guardia = None
+            if guardia is not None:
+                guardia.cancel()
+            pool.close()
+            await pool.wait_closed()
+
+
+async def insertar_en_lotes(sql, filas, tamano_lote=TAMANO_LOTE_DEFECTO, conn=None):
+    """
+    Versión asíncrona de `persistencia.lotes.insertar_en_lotes`.
+
+    Con `conn` se usa esa conexión (sin commit) para combinar varias
+    inserciones en una transacción.
+    """
+    if conn is None:
+        async with AsyncDatabase.connection() as conn:
+            return await insertar_en_lotes(sql, filas, tamano_lote, conn)
+
+    resultados = []
+    async with conn.cursor() as cur:
+        for numero, lote in enumerate(trocear(filas, tamano_lote), 1):
+            inicio = time.perf_counter()
+            await cur.executemany(sql, lote)
+            resultados.append({
+                'lote': numero,
+                'filas': len(lote),
+                'segundos': time.perf_counter() - inicio,
+            })
+    return resultados
+
+
+async def consultar_pagina(select, orden, descendente=False, tamano=TAMANO_PAGINA_DEFECTO,
+                           token=None, condiciones=(), params=()):
+    """Versión asíncrona de `persistencia.paginacion.consultar_pagina`"""
+    sql, params, tamano = _armar_consulta(select, orden, descendente, tamano, token, condiciones, params)
+    async with AsyncDatabase.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(sql, params)
+            filas = list(await cur.fetchall())
+    return _armar_pagina(filas, orden, tamano)
+
+
+async def consultar_por_ids(select, ids, columna='id', tamano_lote=TAMANO_LOTE_IDS):
+    """Versión asíncrona de `persistencia.lotes.consultar_por_ids`"""
+    pendientes = _ids_unicos(ids)
+    resultado = {}
+    if not pendientes:
+        return resultado
+    clave = columna.split('.')[-1]
+    async with AsyncDatabase.connection() as conn:
+        async with conn.cursor() as cur:
+            for lote in trocear(pendientes, tamano_lote):
+                await cur.execute(_sql_por_ids(select, columna, len(lote)), tuple(lote))
+                for fila in await cur.fetchall():
+                    resultado[fila[clave]] = fila
+    return resultado
@@ -0,0 +1,150 @@
+"""
+Auditoría de cambios en logs_auditoria, escrita en segundo plano.
+
+Los servicios llaman a `auditoria.registrar(...)` después de cada alta,
+modificación o baja: el evento se encola y un `EscritorLotes` lo inserta junto
+con otros en un INSERT multi-fila, sin sumar una escritura sincrónica a la
+operación. Dentro de una UnitOfWork el evento se encola recién al confirmar;
+si la unidad se revierte, no queda registro.
+
+El usuario (y la IP) del evento salen de `auditoria.como(...)` en el contexto
+actual o, en la aplicación de consola, de `auditoria.establecer_usuario(...)`
+tras el login. Sin usuario el evento se omite (usuario_id es obligatorio) y se
+cuenta en `sin_usuario`.
+
+Configuración (.env):
+    AUDITORIA_ACTIVA        1 (0 desactiva el registro)
+    AUDITORIA_LOTE          Eventos por INSERT (200)
+    AUDITORIA_INTERVALO_MS  Espera máxima de un evento en la cola (500)
+    AUDITORIA_CAPACIDAD     Eventos que caben en la cola (10000)
+    AUDITORIA_POLITICA      'descartar' o 'bloquear' con la cola llena
+    AUDITORIA_ESPERA_MS     Espera máxima al encolar con 'bloquear' (1000)
+"""
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from .escritor_lotes import EscritorLotes
+from .unit_of_work import UnitOfWork
+
+SQL_AUDITORIA = """
+INSERT INTO logs_auditoria (
+    id, usuario_id, accion, tabla_afectada, registro_id,
+    datos_anteriores, datos_nuevos, fecha_evento, ip_address
+) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+# Nunca se copian a logs_auditoria
+CAMPOS_OCULTOS = frozenset({'contrasena_cifrada', 'salt'})
+
+_actor = ContextVar('actor_auditoria', default=None)
+
+
+def _como_dict(datos):
+    """dict (o modelo de dominio con __slots__) sin los campos ocultos"""
+    if datos is None:
+        return None
+    if not isinstance(datos, dict):
+        datos = {campo.lstrip('_'): getattr(datos, campo) for campo in datos.__slots__}
+    return {clave: valor for clave, valor in datos.items() if clave not in CAMPOS_OCULTOS}
+
+
+def _json(datos):
+    datos = _como_dict(datos)
+    return None if datos is None else json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class Auditoria:
+    """Registro de eventos de auditoría con escritura por lotes en segundo plano"""
+
+    def __init__(self, activa=True):
+        self.activa = activa
+        self.sin_usuario = 0
+        self._usuario_defecto = None
+        self._escritor = None
+        self._lock = threading.Lock()
+
+    def establecer_usuario(self, usuario_id, ip=None):
+        """Usuario por defecto de los eventos (la sesión de la aplicación de consola)"""
+        self._usuario_defecto = (usuario_id, ip) if usuario_id else None
+
+    @contextmanager
+    def como(self, usuario_id, ip=None):
+        """Atribuye a `usuario_id` los eventos registrados dentro del bloque"""
+        token = _actor.set((usuario_id, ip))
+        try:
+            yield
+        finally:
+            _actor.reset(token)
+
+    def registrar(self, accion, tabla, registro_id=None, anteriores=None, nuevos=None):
+        """
+        Encola un evento de auditoría.
+
+        Args:
+            accion: 'crear', 'modificar', 'eliminar', ...
+            tabla: Tabla afectada
+            registro_id: Id del registro afectado
+            anteriores, nuevos: dict o modelo de dominio (se guardan como JSON)
+
+        Returns:
+            False si el evento se omitió (inactiva, sin usuario o cola llena)
+        """
+        if not self.activa:
+            return False
+        actor = _actor.get() or self._usuario_defecto
+        if actor is None:
+            self.sin_usuario += 1
+            return False
+        usuario_id, ip = actor
+        fila = (str(uuid.uuid4()), usuario_id, accion, tabla, registro_id,
+                _json(anteriores), _json(nuevos), datetime.now(), ip)
+
+        unidad = UnitOfWork.actual()
+        if unidad is not None:
+            unidad.al_confirmar(lambda: self.escritor().encolar(fila))
+            return True
+        return self.escritor().encolar(fila)
+
+    def escritor(self):
+        """EscritorLotes de la auditoría (se crea y arranca con el primer evento)"""
+        if self._escritor is None:
+            with self._lock:
+                if self._escritor is None:
+                    escritor = EscritorLotes(
+                        SQL_AUDITORIA,
+                        nombre='auditoria',
+                        tamano_lote=int(os.getenv('AUDITORIA_LOTE', '200')),
+                        intervalo=float(os.getenv('AUDITORIA_INTERVALO_MS', '500')) / 1000,
+                        capacidad=int(os.getenv('AUDITORIA_CAPACIDAD', '10000')),
+                        politica=os.getenv('AUDITORIA_POLITICA', 'descartar'),
+                        espera_maxima=float(os.getenv('AUDITORIA_ESPERA_MS', '1000')) / 1000,
+                    )
+                    escritor.start()
+                    self._escritor = escritor
+        return self._escritor
+
+    def vaciar(self, timeout=5.0):
+        """Escribe ya los eventos encolados; retorna True si no quedó nada pendiente"""
+        return self._escritor is None or self._escritor.vaciar(timeout)
+
+    def detener(self):
+        """Escribe lo pendiente y detiene el hilo (el próximo evento crea otro)"""
+        with self._lock:
+            escritor, self._escritor = self._escritor, None
+        if escritor is not None:
+            escritor.detener()
+
+    def estado(self):
+        """Métricas de la cola y del escritor, o solo las de registro si aún no hubo eventos"""
+        estado = {'activa': self.activa, 'sin_usuario': self.sin_usuario}
+        if self._escritor is not None:
+            estado.update(self._escritor.estado())
+        return estado
+
+
+auditoria = Auditoria(activa=os.getenv('AUDITORIA_ACTIVA', '1') == '1')
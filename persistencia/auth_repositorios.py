@@ -1,21 +1,43 @@
-"""Repositorios para autenticación y gestión de usuarios"""
+"""
+Repositorios para autenticación y gestión de usuarios.
+
+Las búsquedas de un usuario o rol (login, cambio de contraseña, permisos)
+leen del primario con `Database.connection(escritura=False)`: una réplica
+atrasada aceptaría la contraseña anterior o a un usuario recién desactivado.
+Los listados y las páginas siguen yendo a las réplicas.
+"""
+from datetime import datetime
+
 from persistencia.db import Database
+from persistencia.hidratacion import Hidratacion
+from persistencia.lotes import insertar_en_lotes, consultar_por_ids, TAMANO_LOTE_DEFECTO
+from persistencia.paginacion import consultar_pagina, TAMANO_PAGINA_DEFECTO
+from dominio.auth_models import Usuario, Rol
+
 
+class UsuarioRepo(Hidratacion):
+    modelo = Usuario
 
-class UsuarioRepo:
     def crear(self, usuario):
         """Crea un nuevo usuario en la base de datos"""
         sql = """INSERT INTO usuarios (id, nombre_usuario, contrasena_cifrada, salt, rol_id, 
                  fecha_creacion, activo) VALUES (%s, %s, %s, %s, %s, NOW(), %s)"""
-        conn = Database.get_connection()
-        try:
+        with Database.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, (usuario.id, usuario.nombre_usuario, 
                                  usuario.contrasena_cifrada, usuario.salt, 
                                  usuario.rol_id, usuario.activo))
-            conn.commit()
-        finally:
-            conn.close()
+
+    def crear_muchos(self, usuarios, tamano_lote=TAMANO_LOTE_DEFECTO):
+        """Inserta varios usuarios en lotes; retorna tiempos y filas por lote"""
+        sql = """INSERT INTO usuarios (id, nombre_usuario, contrasena_cifrada, salt, rol_id, 
+                 fecha_creacion, activo) VALUES (%s, %s, %s, %s, %s, %s, %s)"""
+        ahora = datetime.now()
+        filas = (
+            (u.id, u.nombre_usuario, u.contrasena_cifrada, u.salt, u.rol_id, ahora, u.activo)
+            for u in usuarios
+        )
+        return insertar_en_lotes(sql, filas, tamano_lote)
     
     def obtener_por_nombre_usuario(self, nombre_usuario):
         """Obtiene un usuario por su nombre de usuario con información del rol"""
@@ -24,104 +46,112 @@ class UsuarioRepo:
                  FROM usuarios u
                  JOIN roles r ON u.rol_id = r.id
                  WHERE u.nombre_usuario = %s"""
-        conn = Database.get_connection()
-        try:
+        with Database.connection(escritura=False) as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, (nombre_usuario,))
                 return cur.fetchone()
-        finally:
-            conn.close()
     
     def obtener_por_id(self, id_):
         """Obtiene un usuario por su ID"""
         sql = """SELECT id, nombre_usuario, contrasena_cifrada, salt, rol_id, activo 
                  FROM usuarios WHERE id = %s"""
-        conn = Database.get_connection()
-        try:
+        with Database.connection(escritura=False) as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, (id_,))
-                return cur.fetchone()
-        finally:
-            conn.close()
+                return self._una(cur.fetchone())
+    
+    def obtener_por_ids(self, ids):
+        """Varios usuarios (sin contraseñas) en una consulta por bloque de ids: {id: fila}"""
+        return self._por_ids(consultar_por_ids("SELECT id, nombre_usuario, rol_id, activo FROM usuarios", ids))
     
     def listar_todos(self):
         """Lista todos los usuarios (sin contraseñas)"""
         sql = """SELECT id, nombre_usuario, rol_id, activo, fecha_creacion 
                  FROM usuarios ORDER BY fecha_creacion DESC"""
-        conn = Database.get_connection()
-        try:
+        with Database.lectura() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql)
-                return cur.fetchall()
-        finally:
-            conn.close()
+                return self._todas(cur.fetchall())
+    
+    def listar_pagina(self, tamano=TAMANO_PAGINA_DEFECTO, token=None):
+        """Página de usuarios (sin contraseñas), más reciente primero: {'filas', 'siguiente'}"""
+        return self._pagina(consultar_pagina(
+            "SELECT id, nombre_usuario, rol_id, activo, fecha_creacion FROM usuarios",
+            ('fecha_creacion', 'id'), descendente=True, tamano=tamano, token=token
+        ))
+    
+    def iterar_todos(self, tamano_bloque=None):
+        """Generador de todos los usuarios (sin contraseñas) con memoria constante"""
+        sql = """SELECT id, nombre_usuario, rol_id, activo, fecha_creacion 
+                 FROM usuarios ORDER BY fecha_creacion DESC"""
+        return self._iterar(Database.iterar(sql, tamano_bloque=tamano_bloque))
     
     def actualizar_ultimo_login(self, id_):
         """Actualiza la fecha del último login"""
         sql = "UPDATE usuarios SET ultimo_login = NOW() WHERE id = %s"
-        conn = Database.get_connection()
-        try:
+        with Database.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, (id_,))
-            conn.commit()
-        finally:
-            conn.close()
     
     def cambiar_contrasena(self, id_, nueva_contrasena_cifrada, nuevo_salt):
         """Cambia la contraseña de un usuario"""
         sql = "UPDATE usuarios SET contrasena_cifrada = %s, salt = %s WHERE id = %s"
-        conn = Database.get_connection()
-        try:
+        with Database.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, (nueva_contrasena_cifrada, nuevo_salt, id_))
-            conn.commit()
-        finally:
-            conn.close()
     
     def actualizar_estado(self, id_, activo):
         """Activa o desactiva un usuario"""
         sql = "UPDATE usuarios SET activo = %s WHERE id = %s"
-        conn = Database.get_connection()
-        try:
+        with Database.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, (activo, id_))
-            conn.commit()
-        finally:
-            conn.close()
 
 
-class RolRepo:
+class RolRepo(Hidratacion):
+    modelo = Rol
+
     def crear(self, rol):
         """Crea un nuevo rol"""
         sql = """INSERT INTO roles (id, nombre, descripcion, nivel_permisos, created_at, activo) 
                  VALUES (%s, %s, %s, %s, NOW(), %s)"""
-        conn = Database.get_connection()
-        try:
+        with Database.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, (rol.id, rol.nombre, rol.descripcion, 
                                  rol.nivel_permisos, rol.activo))
-            conn.commit()
-        finally:
-            conn.close()
+
+    def crear_muchos(self, roles, tamano_lote=TAMANO_LOTE_DEFECTO):
+        """Inserta varios roles en lotes; retorna tiempos y filas por lote"""
+        sql = """INSERT INTO roles (id, nombre, descripcion, nivel_permisos, created_at, activo) 
+                 VALUES (%s, %s, %s, %s, %s, %s)"""
+        ahora = datetime.now()
+        filas = ((r.id, r.nombre, r.descripcion, r.nivel_permisos, ahora, r.activo) for r in roles)
+        return insertar_en_lotes(sql, filas, tamano_lote)
     
     def listar_todos(self):
         """Lista todos los roles"""
         sql = "SELECT id, nombre, descripcion, nivel_permisos FROM roles WHERE activo = TRUE"
-        conn = Database.get_connection()
-        try:
+        with Database.lectura() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql)
-                return cur.fetchall()
-        finally:
-            conn.close()
+                return self._todas(cur.fetchall())
+    
+    def listar_pagina(self, tamano=TAMANO_PAGINA_DEFECTO, token=None):
+        """Página de roles activos ordenados por nombre: {'filas', 'siguiente'}"""
+        return self._pagina(consultar_pagina(
+            "SELECT id, nombre, descripcion, nivel_permisos FROM roles",
+            ('nombre', 'id'), tamano=tamano, token=token,
+            condiciones=("activo = TRUE",)
+        ))
     
     def obtener_por_id(self, id_):
         """Obtiene un rol por su ID"""
         sql = "SELECT id, nombre, descripcion, nivel_permisos FROM roles WHERE id = %s"
-        conn = Database.get_connection()
-        try:
+        with Database.connection(escritura=False) as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, (id_,))
-                return cur.fetchone()
-        finally:
-            conn.close()
+                return self._una(cur.fetchone())
+
+    def obtener_por_ids(self, ids):
+        """Varios roles en una consulta por bloque de ids: {id: fila}"""
+        return self._por_ids(consultar_por_ids("SELECT id, nombre, descripcion, nivel_permisos FROM roles", ids))
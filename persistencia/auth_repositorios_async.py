@@ -0,0 +1,117 @@
+"""Repositorios asíncronos (aiomysql) de usuarios y roles, con los mismos métodos que `auth_repositorios`"""
+from datetime import datetime
+
+from persistencia.async_db import AsyncDatabase, insertar_en_lotes, consultar_pagina, consultar_por_ids
+from persistencia.lotes import TAMANO_LOTE_DEFECTO
+from persistencia.paginacion import TAMANO_PAGINA_DEFECTO
+from persistencia.repositorios_async import _todas, _una, _ejecutar
+
+
+class AsyncUsuarioRepo:
+    # Sin contraseñas: solo obtener_por_id y obtener_por_nombre_usuario las traen
+    _COLUMNAS = "id, nombre_usuario, rol_id, activo, fecha_creacion"
+
+    async def crear(self, usuario):
+        """Crea un nuevo usuario en la base de datos"""
+        sql = """INSERT INTO usuarios (id, nombre_usuario, contrasena_cifrada, salt, rol_id,
+                 fecha_creacion, activo) VALUES (%s, %s, %s, %s, %s, NOW(), %s)"""
+        await _ejecutar(sql, (usuario.id, usuario.nombre_usuario, usuario.contrasena_cifrada,
+                              usuario.salt, usuario.rol_id, usuario.activo))
+
+    async def crear_muchos(self, usuarios, tamano_lote=TAMANO_LOTE_DEFECTO):
+        """Inserta varios usuarios en lotes; retorna tiempos y filas por lote"""
+        sql = """INSERT INTO usuarios (id, nombre_usuario, contrasena_cifrada, salt, rol_id,
+                 fecha_creacion, activo) VALUES (%s, %s, %s, %s, %s, %s, %s)"""
+        ahora = datetime.now()
+        filas = (
+            (u.id, u.nombre_usuario, u.contrasena_cifrada, u.salt, u.rol_id, ahora, u.activo)
+            for u in usuarios
+        )
+        return await insertar_en_lotes(sql, filas, tamano_lote)
+
+    async def obtener_por_nombre_usuario(self, nombre_usuario):
+        """Obtiene un usuario por su nombre de usuario con información del rol"""
+        sql = """SELECT u.id, u.nombre_usuario, u.contrasena_cifrada, u.salt,
+                        u.rol_id, u.activo, r.nivel_permisos, r.nombre as nombre_rol
+                 FROM usuarios u
+                 JOIN roles r ON u.rol_id = r.id
+                 WHERE u.nombre_usuario = %s"""
+        return await _una(sql, (nombre_usuario,))
+
+    async def obtener_por_id(self, id_):
+        """Obtiene un usuario por su ID"""
+        sql = """SELECT id, nombre_usuario, contrasena_cifrada, salt, rol_id, activo
+                 FROM usuarios WHERE id = %s"""
+        return await _una(sql, (id_,))
+
+    async def obtener_por_ids(self, ids):
+        """Varios usuarios (sin contraseñas) en una consulta por bloque de ids: {id: fila}"""
+        return await consultar_por_ids("SELECT id, nombre_usuario, rol_id, activo FROM usuarios", ids)
+
+    async def listar_todos(self):
+        """Lista todos los usuarios (sin contraseñas)"""
+        return await _todas(f"SELECT {self._COLUMNAS} FROM usuarios ORDER BY fecha_creacion DESC")
+
+    async def listar_pagina(self, tamano=TAMANO_PAGINA_DEFECTO, token=None):
+        """Página de usuarios (sin contraseñas), más reciente primero: {'filas', 'siguiente'}"""
+        return await consultar_pagina(
+            f"SELECT {self._COLUMNAS} FROM usuarios",
+            ('fecha_creacion', 'id'), descendente=True, tamano=tamano, token=token
+        )
+
+    async def iterar_todos(self, tamano_bloque=None):
+        """Generador asíncrono de todos los usuarios (sin contraseñas) con memoria constante"""
+        sql = f"SELECT {self._COLUMNAS} FROM usuarios ORDER BY fecha_creacion DESC"
+        async for fila in AsyncDatabase.iterar(sql, tamano_bloque=tamano_bloque):
+            yield fila
+
+    async def actualizar_ultimo_login(self, id_):
+        """Actualiza la fecha del último login"""
+        await _ejecutar("UPDATE usuarios SET ultimo_login = NOW() WHERE id = %s", (id_,))
+
+    async def cambiar_contrasena(self, id_, nueva_contrasena_cifrada, nuevo_salt):
+        """Cambia la contraseña de un usuario"""
+        await _ejecutar("UPDATE usuarios SET contrasena_cifrada = %s, salt = %s WHERE id = %s",
+                        (nueva_contrasena_cifrada, nuevo_salt, id_))
+
+    async def actualizar_estado(self, id_, activo):
+        """Activa o desactiva un usuario"""
+        await _ejecutar("UPDATE usuarios SET activo = %s WHERE id = %s", (activo, id_))
+
+
+class AsyncRolRepo:
+    _COLUMNAS = "id, nombre, descripcion, nivel_permisos"
+
+    async def crear(self, rol):
+        """Crea un nuevo rol"""
+        sql = """INSERT INTO roles (id, nombre, descripcion, nivel_permisos, created_at, activo)
+                 VALUES (%s, %s, %s, %s, NOW(), %s)"""
+        await _ejecutar(sql, (rol.id, rol.nombre, rol.descripcion, rol.nivel_permisos, rol.activo))
+
+    async def crear_muchos(self, roles, tamano_lote=TAMANO_LOTE_DEFECTO):
+        """Inserta varios roles en lotes; retorna tiempos y filas por lote"""
+        sql = """INSERT INTO roles (id, nombre, descripcion, nivel_permisos, created_at, activo)
+                 VALUES (%s, %s, %s, %s, %s, %s)"""
+        ahora = datetime.now()
+        filas = ((r.id, r.nombre, r.descripcion, r.nivel_permisos, ahora, r.activo) for r in roles)
+        return await insertar_en_lotes(sql, filas, tamano_lote)
+
+    async def listar_todos(self):
+        """Lista todos los roles"""
+        return await _todas(f"SELECT {self._COLUMNAS} FROM roles WHERE activo = TRUE")
+
+    async def listar_pagina(self, tamano=TAMANO_PAGINA_DEFECTO, token=None):
+        """Página de roles activos ordenados por nombre: {'filas', 'siguiente'}"""
+        return await consultar_pagina(
+            f"SELECT {self._COLUMNAS} FROM roles",
+            ('nombre', 'id'), tamano=tamano, token=token,
+            condiciones=("activo = TRUE",)
+        )
+
+    async def obtener_por_id(self, id_):
+        """Obtiene un rol por su ID"""
+        return await _una(f"SELECT {self._COLUMNAS} FROM roles WHERE id = %s", (id_,))
+
+    async def obtener_por_ids(self, ids):
+        """Varios roles en una consulta por bloque de ids: {id: fila}"""
+        return await consultar_por_ids(f"SELECT {self._COLUMNAS} FROM roles", ids)
@@ -1,27 +1,344 @@
 import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 import pymysql
-from pymysql.cursors import DictCursor
+from pymysql.cursors import DictCursor, SSDictCursor
 from dotenv import load_dotenv
 
+from .pool import ConnectionPool
+from .instrumentacion import metricas, CursorInstrumentado, SSCursorInstrumentado
+from .replicas import Replica, ConjuntoReplicas, parsear_dsn
+
 # Cargar variables de entorno desde .env
 load_dotenv()
 
+# Filas que se traen del servidor por cada fetchmany en consultas en streaming
+TAMANO_BLOQUE_STREAMING = int(os.getenv('DB_STREAM_CHUNK', '500'))
+
+# Unidad de trabajo activa en el contexto actual (ver persistencia.unit_of_work)
+_unidad_actual = ContextVar('unidad_de_trabajo', default=None)
+# Instante (time.monotonic) hasta el cual las lecturas del contexto van al primario
+_primario_hasta = ContextVar('lecturas_en_primario_hasta', default=0.0)
+
+
+class BackendMySQL:
+    """
+    Conexiones PyMySQL al servidor configurado en DB_HOST/DB_PORT (backend por
+    defecto). Los parámetros indicados (p. ej. los de una réplica) reemplazan
+    a los de las variables de entorno.
+    """
+
+    nombre = 'mysql'
+    fulltext = True
+
+    def __init__(self, **parametros):
+        self.parametros = parametros
+
+    def conectar(self):
+        parametros = {
+            'host': os.getenv('DB_HOST', '127.0.0.1'),
+            'user': os.getenv('DB_USER', 'ecotech_user'),
+            'password': os.getenv('DB_PASSWORD', 'ecotech_pass'),
+            'database': os.getenv('DB_NAME', 'ecotech_management'),
+            'port': int(os.getenv('DB_PORT', '3306')),
+        }
+        parametros.update(self.parametros)
+        return pymysql.connect(cursorclass=DictCursor, autocommit=False, **parametros)
+
+    def preparar(self, conn, instrumentar):
+        """Asigna cursores instrumentados o los DictCursor normales"""
+        conn.cursorclass = CursorInstrumentado if instrumentar else DictCursor
+
+    def cursor_stream(self, instrumentar):
+        return SSCursorInstrumentado if instrumentar else SSDictCursor
+
+
+def crear_backend(nombre=None):
+    """Backend según DB_BACKEND: 'mysql' (por defecto) o 'sqlite'"""
+    nombre = (nombre or os.getenv('DB_BACKEND', 'mysql')).lower()
+    if nombre == 'mysql':
+        return BackendMySQL()
+    if nombre == 'sqlite':
+        from .sqlite_backend import BackendSQLite
+        return BackendSQLite()
+    raise ValueError(f"DB_BACKEND desconocido: {nombre} (use 'mysql' o 'sqlite')")
+
+
+def crear_pool(factory):
+    """Pool con la configuración DB_POOL_* (primario y cada réplica)"""
+    return ConnectionPool(
+        factory,
+        min_size=int(os.getenv('DB_POOL_MIN', '1')),
+        max_size=int(os.getenv('DB_POOL_MAX', '10')),
+        idle_timeout=float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300')),
+        max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+        wait_timeout=float(os.getenv('DB_POOL_WAIT_TIMEOUT', '10')),
+        ping_after=float(os.getenv('DB_POOL_PING_AFTER', '1')),
+    )
+
+
+def crear_replicas(dsns=None, estrategia=None, max_retraso=None):
+    """
+    Réplicas de lectura según DB_REPLICAS (o `dsns`); None si no hay ninguna.
+    Solo aplica al backend MySQL.
+    """
+    if dsns is None:
+        dsns = [d for d in os.getenv('DB_REPLICAS', '').split(',') if d.strip()]
+    if not dsns:
+        return None
+    replicas = []
+    for dsn in dsns:
+        parametros = parsear_dsn(dsn)
+        backend = BackendMySQL(**parametros)
+        nombre = f"{parametros['host']}:{parametros.get('port', os.getenv('DB_PORT', '3306'))}"
+        replicas.append(Replica(nombre, backend, crear_pool(backend.conectar)))
+    return ConjuntoReplicas(
+        replicas,
+        estrategia=estrategia or os.getenv('DB_REPLICA_ESTRATEGIA', 'round_robin'),
+        max_retraso=float(max_retraso if max_retraso is not None else os.getenv('DB_REPLICA_MAX_LAG', '5')),
+    )
+
 
 class Database:
+    _pool = None
+    _pool_lock = threading.Lock()
+    _backend = None
+    _replicas = None
+    _replicas_iniciadas = False
+
+    @classmethod
+    def backend(cls):
+        """Backend activo, elegido con DB_BACKEND la primera vez que se usa"""
+        if cls._backend is None:
+            with cls._pool_lock:
+                if cls._backend is None:
+                    cls._backend = crear_backend()
+        return cls._backend
+
+    @classmethod
+    def usar_backend(cls, backend):
+        """Cambia el backend (p. ej. BackendSQLite(':memory:') en pruebas) y cierra el pool actual"""
+        cls.close_pool()
+        cls._backend = backend
+
+    @classmethod
+    def replicas(cls):
+        """Réplicas de lectura (DB_REPLICAS), o None si no hay o el backend no es MySQL"""
+        if not cls._replicas_iniciadas:
+            backend = cls.backend()
+            with cls._pool_lock:
+                if not cls._replicas_iniciadas:
+                    if backend.nombre == 'mysql':
+                        cls._replicas = crear_replicas()
+                        if cls._replicas is not None:
+                            cls._replicas.iniciar_verificador(
+                                float(os.getenv('DB_REPLICA_CHECK_INTERVAL', '5')))
+                    cls._replicas_iniciadas = True
+        return cls._replicas
+
+    @classmethod
+    def usar_replicas(cls, replicas, intervalo_verificacion=None):
+        """
+        Reemplaza las réplicas (un ConjuntoReplicas de `crear_replicas`, o None
+        para leer solo del primario). Sin intervalo no se lanza el verificador:
+        llame a `replicas.verificar_todas()` cuando corresponda.
+        """
+        with cls._pool_lock:
+            if cls._replicas is not None:
+                cls._replicas.cerrar()
+            cls._replicas = replicas
+            cls._replicas_iniciadas = True
+        if replicas is not None and intervalo_verificacion:
+            replicas.iniciar_verificador(intervalo_verificacion)
+
+    @classmethod
+    def marcar_escritura(cls):
+        """
+        Tras confirmar una escritura, las lecturas del mismo contexto van al
+        primario durante DB_REPLICA_MAX_LAG segundos (leer lo propio escrito
+        aunque la réplica aún no lo tenga)
+        """
+        if cls._replicas is not None:
+            _primario_hasta.set(time.monotonic() + cls._replicas.max_retraso)
+
+    @classmethod
+    @contextmanager
+    def primario(cls):
+        """Las lecturas dentro del bloque van al primario (datos recién escritos por otros)"""
+        token = _primario_hasta.set(float('inf'))
+        try:
+            yield
+        finally:
+            _primario_hasta.reset(token)
+
+    @classmethod
+    def get_connection(cls):
+        """Abre una conexión nueva (sin pool). Los repositorios usan Database.connection()"""
+        return cls.backend().conectar()
+
+    @classmethod
+    def pool(cls):
+        """Pool compartido, creado la primera vez que se necesita"""
+        if cls._pool is None:
+            with cls._pool_lock:
+                if cls._pool is None:
+                    cls._pool = crear_pool(cls.get_connection)
+        return cls._pool
+
+    @classmethod
+    def adquirir(cls):
+        """
+        Toma una conexión del pool. Con la instrumentación activa mide la espera
+        y el backend le asigna cursores instrumentados; si no, los normales.
+        """
+        return cls._tomar(cls.pool(), cls.backend())
+
     @staticmethod
-    def get_connection():
-        host = os.getenv('DB_HOST', '127.0.0.1')
-        user = os.getenv('DB_USER', 'ecotech_user')
-        password = os.getenv('DB_PASSWORD', 'ecotech_pass')
-        db = os.getenv('DB_NAME', 'ecotech_management')
-        port = int(os.getenv('DB_PORT', '3306'))
-        conn = pymysql.connect(
-            host=host, 
-            user=user, 
-            password=password, 
-            database=db, 
-            port=port, 
-            cursorclass=DictCursor, 
-            autocommit=False
-        )
+    def _tomar(pool, backend):
+        if not metricas.activa:
+            conn = pool.acquire()
+            backend.preparar(conn, False)
+            return conn
+        inicio = time.perf_counter()
+        conn = pool.acquire()
+        metricas.registrar_adquisicion(time.perf_counter() - inicio)
+        backend.preparar(conn, True)
         return conn
+
+    @classmethod
+    @contextmanager
+    def connection(cls, escritura=True):
+        """
+        Entrega una conexión del pool como una transacción.
+
+        Hace commit al salir sin errores y rollback si ocurre una excepción.
+        Si el rollback falla la conexión se descarta en vez de volver al pool.
+        Tras el commit marca una escritura propia (ver `marcar_escritura`);
+        las consultas que deben leer el primario sin escribir pasan
+        `escritura=False` para no desviar al primario las lecturas siguientes.
+
+        Dentro de una UnitOfWork se entrega su conexión y no se hace commit:
+        la unidad decide al cerrar. Un error la marca para rollback.
+        """
+        unidad = _unidad_actual.get()
+        if unidad is not None:
+            try:
+                yield unidad.conn
+            except GeneratorExit:
+                raise
+            except BaseException:
+                unidad.rollback_only = True
+                raise
+            return
+
+        pool = cls.pool()
+        conn = cls.adquirir()
+        discard = False
+        try:
+            yield conn
+            conn.commit()
+            if escritura:
+                cls.marcar_escritura()
+        except BaseException:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+            raise
+        finally:
+            pool.release(conn, discard=discard)
+
+    @classmethod
+    @contextmanager
+    def lectura(cls):
+        """
+        Conexión para consultas de solo lectura (la usan los métodos de lectura
+        de los repositorios).
+
+        Con réplicas configuradas (DB_REPLICAS) se toma de una réplica sana y
+        al día; si no hay ninguna, o dentro de una UnitOfWork, o poco después
+        de una escritura en el mismo contexto (ver `marcar_escritura`), se usa
+        el primario igual que `connection()`. Si la réplica elegida no entrega
+        conexión, queda marcada como caída y se lee del primario.
+        """
+        replica = None
+        conn = None
+        if (cls._replicas is not None or not cls._replicas_iniciadas) and _unidad_actual.get() is None:
+            replicas = cls.replicas()
+            if replicas is not None and time.monotonic() >= _primario_hasta.get():
+                replica = replicas.elegir()
+        if replica is not None:
+            try:
+                conn = cls._tomar(replica.pool, replica.backend)
+            except Exception as e:
+                replica.marcar_caida(e)
+
+        if conn is None:
+            with cls.connection(escritura=False) as conn:
+                yield conn
+            return
+
+        replica.lecturas += 1
+        discard = False
+        try:
+            yield conn
+            # Cierra la transacción implícita de la lectura (y su snapshot)
+            conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+                replica.marcar_caida(RuntimeError("Conexión perdida durante una lectura"))
+            raise
+        finally:
+            replica.pool.release(conn, discard=discard)
+
+    @classmethod
+    def iterar(cls, sql, params=None, tamano_bloque=None):
+        """
+        Ejecuta una consulta con cursor no bufferizado (SSDictCursor) y entrega
+        las filas una a una, trayéndolas del servidor en bloques de `tamano_bloque`.
+
+        La memoria usada no depende del tamaño del resultado. La conexión queda
+        ocupada hasta que se consume o se cierra el generador, por lo que dentro
+        de una UnitOfWork no deben ejecutarse otras consultas mientras se itera.
+        """
+        tamano_bloque = tamano_bloque or TAMANO_BLOQUE_STREAMING
+        with cls.lectura() as conn:
+            with conn.cursor(cls.backend().cursor_stream(metricas.activa)) as cur:
+                cur.execute(sql, params)
+                while True:
+                    filas = cur.fetchmany(tamano_bloque)
+                    if not filas:
+                        break
+                    yield from filas
+
+    @classmethod
+    def pool_stats(cls):
+        """Estadísticas del pool (en uso, inactivas, esperas, tiempo de espera)"""
+        if cls._pool is None:
+            return None
+        return cls._pool.stats()
+
+    @classmethod
+    def replicas_stats(cls):
+        """Estado de cada réplica (sana, retraso, latencia, lecturas), o None sin réplicas"""
+        if cls._replicas is None:
+            return None
+        return cls._replicas.estado()
+
+    @classmethod
+    def close_pool(cls):
+        """Cierra el pool compartido y los de las réplicas; se recrearán si se vuelven a usar"""
+        with cls._pool_lock:
+            if cls._pool is not None:
+                cls._pool.close()
+                cls._pool = None
+            if cls._replicas is not None:
+                cls._replicas.cerrar()
+                cls._replicas = None
+            cls._replicas_iniciadas = False
@@ -0,0 +1,184 @@
+"""
+Escritura en segundo plano por lotes (INSERT multi-fila) desde una cola acotada.
+
+Quien produce las filas solo las encola; un hilo las inserta con
+`insertar_en_lotes` cada `intervalo` segundos o apenas hay `tamano_lote`
+filas esperando, lo que ocurra primero. Así una operación no paga un INSERT
+sincrónico por cada fila que genera (auditoría, eventos, contadores).
+
+Si la cola se llena, la política decide:
+    'descartar'  La fila nueva se descarta y se cuenta (quien produce nunca espera)
+    'bloquear'   Quien produce espera hasta `espera_maxima` segundos a que haya
+                 lugar (contrapresión); si no lo hay, la fila se descarta
+
+`detener()` escribe lo pendiente antes de terminar; se llama también al salir
+del intérprete.
+"""
+import atexit
+import queue
+import threading
+import time
+
+from .lotes import insertar_en_lotes
+
+POLITICAS = ('descartar', 'bloquear')
+
+
+class EscritorLotes(threading.Thread):
+    """Hilo que vacía una cola acotada de filas con INSERT por lotes"""
+
+    def __init__(self, sql, nombre='escritor-lotes', tamano_lote=200, intervalo=0.5, capacidad=10000,
+                 politica='descartar', espera_maxima=1.0):
+        """
+        Args:
+            sql: INSERT ... VALUES (%s, ...) con solo marcadores en VALUES
+            tamano_lote: Filas por INSERT; también dispara la escritura anticipada
+            intervalo: Segundos máximos que una fila espera en la cola
+            capacidad: Filas que caben en la cola
+            politica: 'descartar' o 'bloquear' cuando la cola está llena
+            espera_maxima: Segundos que espera quien encola con 'bloquear'
+        """
+        if politica not in POLITICAS:
+            raise ValueError(f"Política desconocida: {politica} (use {', '.join(POLITICAS)})")
+        super().__init__(name=nombre, daemon=True)
+        self.sql = sql
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo
+        self.capacidad = capacidad
+        self.politica = politica
+        self.espera_maxima = espera_maxima
+        self._cola = queue.Queue(capacidad)
+        # Escritura anticipada con un lote completo o con la cola llena
+        self._umbral = min(tamano_lote, capacidad)
+        self._hay_lote = threading.Event()
+        self._detener = threading.Event()
+        self._lock = threading.Lock()
+        self._detenido = False
+        self._encolados = 0
+        self._escritos = 0
+        self._descartados = 0
+        self._fallidos = 0
+        self._lotes = 0
+        self._segundos_escritura = 0.0
+        self._espera_total = 0.0
+        self._max_en_cola = 0
+        self._ultimo_error = None
+
+    def start(self):
+        super().start()
+        atexit.register(self.detener)
+
+    def encolar(self, fila):
+        """Agrega una fila a la cola; retorna False si se descartó"""
+        if self._detenido:
+            self._contar(descartados=1)
+            return False
+        inicio = time.perf_counter()
+        try:
+            if self.politica == 'bloquear':
+                if self._cola.full():
+                    # Contrapresión: el escritor no espera al intervalo para hacer lugar
+                    self._hay_lote.set()
+                self._cola.put(fila, timeout=self.espera_maxima)
+            else:
+                self._cola.put_nowait(fila)
+        except queue.Full:
+            self._contar(descartados=1, espera=time.perf_counter() - inicio)
+            return False
+        en_cola = self._cola.qsize()
+        with self._lock:
+            self._encolados += 1
+            self._espera_total += time.perf_counter() - inicio
+            self._max_en_cola = max(self._max_en_cola, en_cola)
+        if en_cola >= self._umbral:
+            self._hay_lote.set()
+        return True
+
+    def run(self):
+        while not self._detener.is_set():
+            self._hay_lote.wait(self.intervalo)
+            self._hay_lote.clear()
+            self._vaciar()
+        self._vaciar()
+
+    def _vaciar(self):
+        """Escribe lotes hasta dejar la cola vacía"""
+        while True:
+            lote = []
+            try:
+                while len(lote) < self.tamano_lote:
+                    lote.append(self._cola.get_nowait())
+            except queue.Empty:
+                pass
+            if not lote:
+                return
+            self._escribir(lote)
+            for _ in lote:
+                self._cola.task_done()
+
+    def _escribir(self, lote):
+        inicio = time.perf_counter()
+        try:
+            insertar_en_lotes(self.sql, lote, self.tamano_lote)
+        except Exception as e:
+            with self._lock:
+                self._fallidos += len(lote)
+                self._ultimo_error = str(e) or type(e).__name__
+            return
+        with self._lock:
+            self._escritos += len(lote)
+            self._lotes += 1
+            self._segundos_escritura += time.perf_counter() - inicio
+
+    def _contar(self, descartados=0, espera=0.0):
+        with self._lock:
+            self._descartados += descartados
+            self._espera_total += espera
+
+    def vaciar(self, timeout=5.0):
+        """
+        Pide escribir ya lo encolado y espera hasta `timeout` segundos a que
+        termine; retorna True si no quedó nada pendiente
+        """
+        limite = time.monotonic() + timeout
+        self._hay_lote.set()
+        while self.pendientes() and time.monotonic() < limite:
+            time.sleep(0.005)
+        return not self.pendientes()
+
+    def pendientes(self):
+        """Filas encoladas que aún no se escriben (o fallan)"""
+        return self._cola.unfinished_tasks
+
+    def detener(self, timeout=10.0):
+        """Deja de aceptar filas, escribe lo pendiente y termina el hilo"""
+        if self._detenido:
+            return
+        self._detenido = True
+        self._detener.set()
+        self._hay_lote.set()
+        if self.is_alive():
+            self.join(timeout)
+        else:
+            self._vaciar()
+
+    def estado(self):
+        with self._lock:
+            return {
+                'hilo': self.name,
+                'activo': self.is_alive(),
+                'politica': self.politica,
+                'capacidad': self.capacidad,
+                'en_cola': self._cola.qsize(),
+                'max_en_cola': self._max_en_cola,
+                'encolados': self._encolados,
+                'escritos': self._escritos,
+                'descartados': self._descartados,
+                'fallidos': self._fallidos,
+                'lotes': self._lotes,
+                'filas_por_lote': self._escritos / self._lotes if self._lotes else 0.0,
+                'escritura_ms_promedio': self._segundos_escritura / self._lotes * 1000 if self._lotes else 0.0,
+                'espera_encolar_ms_promedio': (self._espera_total / (self._encolados + self._descartados) * 1000
+                                               if self._encolados + self._descartados else 0.0),
+                'ultimo_error': self._ultimo_error,
+            }
@@ -0,0 +1,303 @@
+"""
+Escritura diferida (write-behind) de logs_clima con spool local.
+
+`LogClimaRepo.crear` en modo diferido no abre conexión ni hace commit: agrega
+la lectura a un buffer en memoria y, como línea JSON, al archivo de spool; un
+hilo la escribe junto con las demás usando `crear_muchos` (INSERT multi-fila y
+resumen por ciudad en una sola transacción) cada `intervalo` segundos o apenas
+hay `tamano_lote` lecturas esperando.
+
+Para escribir un lote, el spool activo se renombra a un segmento
+(`<ruta>.<marca>`) y se abre uno nuevo; el segmento se borra cuando el lote
+queda confirmado. Si la escritura falla, el segmento queda en disco y se
+reintenta en la próxima vuelta. Los errores de conexión se reintentan sin
+límite; un segmento que falla `max_intentos` veces por otra causa (datos que la
+base rechaza) se agrega a `<ruta>.fallido` para revisarlo a mano y deja de
+bloquear a `vaciar()` y `detener()`. Al crear el buffer se retoman los segmentos y
+el spool que haya dejado un proceso anterior (caída, corte de luz): antes de
+insertarlos se descartan los ids que ya estén en la base, por si la caída
+ocurrió entre el commit y el borrado del segmento. Una última línea truncada
+se ignora y se cuenta.
+
+Con `fsync=True` cada lectura llega al disco antes de retornar (sobrevive a
+un corte de energía); con `False` basta con que el proceso alcance a escribir
+en el sistema operativo (sobrevive a la caída del proceso).
+
+Cada proceso necesita su propia ruta de spool.
+"""
+import atexit
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from pymysql.err import InterfaceError, OperationalError
+
+from dominio.models import LogClima
+
+_CAMPOS = ('id', 'ciudad', 'pais', 'aqi', 'co', 'no2', 'o3', 'so2', 'pm2_5', 'pm10', 'nh3',
+           'usuario_id', 'proyecto_id', 'latitud', 'longitud', 'fecha_consulta')
+
+
+SUFIJO_FALLIDOS = '.fallido'
+
+# Códigos de MySQL de conexión perdida, demasiadas conexiones, espera de bloqueo y deadlock
+_CODIGOS_TRANSITORIOS = {1040, 1205, 1213, 2002, 2003, 2006, 2013}
+
+
+def _transitorio(error):
+    """Errores de conexión o de bloqueo: el segmento se reintenta sin contar el intento"""
+    if isinstance(error, (OSError, InterfaceError)):
+        return True
+    if isinstance(error, OperationalError):
+        return bool(error.args) and error.args[0] in _CODIGOS_TRANSITORIOS
+    return isinstance(error, sqlite3.OperationalError) and 'locked' in str(error)
+
+
+def _serializar(log):
+    datos = {campo: getattr(log, campo) for campo in _CAMPOS}
+    datos['fecha_consulta'] = log.fecha_consulta.isoformat()
+    return json.dumps(datos, ensure_ascii=False) + '\n'
+
+
+def _leer_segmento(ruta):
+    """Lecturas de un segmento y cantidad de líneas ilegibles (escritura interrumpida)"""
+    logs, invalidas = [], 0
+    with open(ruta, encoding='utf-8') as archivo:
+        for linea in archivo:
+            try:
+                datos = json.loads(linea)
+            except ValueError:
+                invalidas += 1
+                continue
+            log = LogClima.from_row(datos)
+            log.fecha_consulta = datetime.fromisoformat(datos['fecha_consulta'])
+            logs.append(log)
+    return logs, invalidas
+
+
+class BufferLogsClima(threading.Thread):
+    """Hilo que escribe por lotes las lecturas de clima guardadas en el spool"""
+
+    def __init__(self, repo, ruta='logs_clima.spool', tamano_lote=500, intervalo=1.0, fsync=True,
+                 max_intentos=5):
+        """
+        Args:
+            repo: LogClimaRepo en modo directo (crear_muchos, obtener_por_ids)
+            ruta: Archivo de spool; los segmentos usan la misma ruta con sufijo
+            tamano_lote: Lecturas que disparan la escritura anticipada
+            intervalo: Segundos máximos que una lectura espera en el buffer
+            fsync: Forzar cada lectura al disco antes de retornar
+            max_intentos: Fallos no transitorios antes de apartar un segmento
+                en `<ruta>.fallido`
+        """
+        super().__init__(name='logs-clima-diferido', daemon=True)
+        self.repo = repo
+        self.ruta = os.path.abspath(ruta)
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo
+        self.fsync = fsync
+        self.max_intentos = max_intentos
+        self.ruta_fallidos = self.ruta + SUFIJO_FALLIDOS
+        self._intentos = {}
+        self._buffer = []
+        self._en_vuelo = 0
+        self._secuencia = 0
+        self._lock = threading.Lock()
+        self._escribiendo = threading.Lock()
+        self._hay_lote = threading.Event()
+        self._detener = threading.Event()
+        self._detenido = False
+        self._agregados = 0
+        self._escritos = 0
+        self._recuperados = 0
+        self._duplicados = 0
+        self._lineas_invalidas = 0
+        self._errores = 0
+        self._segmentos_fallidos = 0
+        self._lecturas_fallidas = 0
+        self._lotes = 0
+        self._segundos_escritura = 0.0
+        self._segundos_agregar = 0.0
+        self._ultimo_error = None
+
+        directorio = os.path.dirname(self.ruta)
+        os.makedirs(directorio, exist_ok=True)
+        # Lo que dejó un proceso anterior se reintenta como cualquier segmento fallido
+        if os.path.exists(self.ruta) and os.path.getsize(self.ruta):
+            os.replace(self.ruta, self._nuevo_segmento())
+        self._reintentos = sorted(s for s in glob.glob(glob.escape(self.ruta) + '.*')
+                                  if s != self.ruta_fallidos)
+        self._spool = open(self.ruta, 'a', encoding='utf-8')
+
+    def start(self):
+        super().start()
+        atexit.register(self.detener)
+
+    def agregar(self, log):
+        """Guarda la lectura en el spool y el buffer; la escritura en la base queda para el hilo"""
+        if self._detenido:
+            raise RuntimeError("La escritura diferida de logs_clima está detenida")
+        inicio = time.perf_counter()
+        if log.fecha_consulta is None:
+            log.fecha_consulta = datetime.now()
+        linea = _serializar(log)
+        with self._lock:
+            self._spool.write(linea)
+            self._spool.flush()
+            if self.fsync:
+                os.fsync(self._spool.fileno())
+            self._buffer.append(log)
+            self._agregados += 1
+            self._segundos_agregar += time.perf_counter() - inicio
+            lleno = len(self._buffer) >= self.tamano_lote
+        if lleno:
+            self._hay_lote.set()
+
+    def run(self):
+        while not self._detener.is_set():
+            self._hay_lote.wait(self.intervalo)
+            self._hay_lote.clear()
+            self._vaciar()
+        self._vaciar()
+
+    def _vaciar(self):
+        """Reintenta los segmentos pendientes y escribe el buffer actual"""
+        with self._escribiendo:
+            for segmento in list(self._reintentos):
+                try:
+                    logs, invalidas = _leer_segmento(segmento)
+                    # Del primario: una réplica atrasada aún no tendría lo confirmado antes de la caída
+                    existentes = self.repo.obtener_por_ids([l.id for l in logs], primario=True) if logs else {}
+                    nuevos = [l for l in logs if l.id not in existentes]
+                    if nuevos:
+                        self._escribir(nuevos)
+                except Exception as e:
+                    # Se reintenta en la próxima vuelta; no frena al resto
+                    self._fallo(e, segmento)
+                    continue
+                os.remove(segmento)
+                self._reintentos.remove(segmento)
+                self._intentos.pop(segmento, None)
+                with self._lock:
+                    self._recuperados += len(nuevos)
+                    self._duplicados += len(logs) - len(nuevos)
+                    self._lineas_invalidas += invalidas
+
+            with self._lock:
+                if not self._buffer:
+                    return
+                lote, self._buffer = self._buffer, []
+                self._en_vuelo = len(lote)
+                segmento = self._nuevo_segmento()
+                self._spool.close()
+                os.replace(self.ruta, segmento)
+                self._spool = open(self.ruta, 'a', encoding='utf-8')
+            try:
+                self._escribir(lote)
+            except Exception as e:
+                self._reintentos.append(segmento)
+                self._fallo(e, segmento)
+            else:
+                os.remove(segmento)
+            finally:
+                with self._lock:
+                    self._en_vuelo = 0
+
+    def _escribir(self, lote):
+        inicio = time.perf_counter()
+        self.repo.crear_muchos(lote, self.tamano_lote)
+        with self._lock:
+            self._escritos += len(lote)
+            self._lotes += 1
+            self._segundos_escritura += time.perf_counter() - inicio
+
+    def _fallo(self, error, segmento):
+        with self._lock:
+            self._errores += 1
+            self._ultimo_error = str(error) or type(error).__name__
+        if _transitorio(error):
+            return
+        self._intentos[segmento] = self._intentos.get(segmento, 0) + 1
+        if self._intentos[segmento] >= self.max_intentos:
+            self._apartar(segmento)
+
+    def _apartar(self, segmento):
+        """Agrega el segmento a `<ruta>.fallido` y lo quita de los reintentos"""
+        with open(segmento, encoding='utf-8') as archivo:
+            contenido = archivo.read()
+        if contenido and not contenido.endswith('\n'):
+            contenido += '\n'
+        with open(self.ruta_fallidos, 'a', encoding='utf-8') as fallidos:
+            fallidos.write(contenido)
+            fallidos.flush()
+            os.fsync(fallidos.fileno())
+        os.remove(segmento)
+        self._reintentos.remove(segmento)
+        self._intentos.pop(segmento, None)
+        with self._lock:
+            self._segmentos_fallidos += 1
+            self._lecturas_fallidas += contenido.count('\n')
+
+    def _nuevo_segmento(self):
+        self._secuencia += 1
+        return f"{self.ruta}.{time.time_ns()}-{self._secuencia}"
+
+    def vaciar(self, timeout=5.0):
+        """
+        Pide escribir ya lo pendiente y espera hasta `timeout` segundos;
+        retorna True si no quedó nada sin escribir
+        """
+        limite = time.monotonic() + timeout
+        self._hay_lote.set()
+        if not self.is_alive():
+            self._vaciar()
+        while self.pendientes() and time.monotonic() < limite:
+            time.sleep(0.005)
+        return not self.pendientes()
+
+    def pendientes(self):
+        """Lecturas en el buffer o escribiéndose, más los segmentos por reintentar"""
+        with self._lock:
+            return len(self._buffer) + self._en_vuelo + len(self._reintentos)
+
+    def detener(self, timeout=10.0):
+        """Deja de aceptar lecturas, escribe lo pendiente y termina el hilo"""
+        if self._detenido:
+            return
+        self._detenido = True
+        self._detener.set()
+        self._hay_lote.set()
+        if self.is_alive():
+            self.join(timeout)
+        else:
+            self._vaciar()
+        with self._lock:
+            self._spool.close()
+
+    def estado(self):
+        with self._lock:
+            return {
+                'hilo': self.name,
+                'activo': self.is_alive(),
+                'spool': self.ruta,
+                'fsync': self.fsync,
+                'en_buffer': len(self._buffer),
+                'segmentos_pendientes': len(self._reintentos),
+                'agregados': self._agregados,
+                'escritos': self._escritos,
+                'recuperados': self._recuperados,
+                'duplicados_omitidos': self._duplicados,
+                'lineas_invalidas': self._lineas_invalidas,
+                'errores': self._errores,
+                'segmentos_fallidos': self._segmentos_fallidos,
+                'lecturas_fallidas': self._lecturas_fallidas,
+                'lotes': self._lotes,
+                'filas_por_lote': self._escritos / self._lotes if self._lotes else 0.0,
+                'escritura_ms_promedio': self._segundos_escritura / self._lotes * 1000 if self._lotes else 0.0,
+                'agregar_ms_promedio': self._segundos_agregar / self._agregados * 1000 if self._agregados else 0.0,
+                'ultimo_error': self._ultimo_error,
+            }
@@ -0,0 +1,222 @@
+"""
+Caché persistente de coordenadas de ciudades (Geocoding API).
+
+Las coordenadas de una ciudad no cambian: `EcoAPIClient.obtener_coordenadas_ciudad`
+consulta esta caché antes de gastar una petición (y una unidad de la cuota
+diaria) en `geo/1.0/direct`. La clave es (ciudad, país) normalizados: sin
+espacios sobrantes, sin tildes y sin distinguir mayúsculas, de modo que
+"Bogotá, co" y "bogota, CO" comparten entrada.
+
+Dos niveles: un dict en memoria del proceso y la tabla
+geocodificacion_ciudades (sobrevive a reinicios y se comparte entre procesos).
+Las ciudades que la API no encuentra también se guardan (caché negativa) y se
+vuelven a consultar tras `GEOCODIFICACION_TTL_NEGATIVO_DIAS`. Un error de la
+base nunca impide la consulta: la caché se salta y se cuenta el error.
+
+`precargar_desde_logs_clima()` llena la tabla con las coordenadas que ya
+guardan los registros de logs_clima (scripts/precargar_geocodificacion.py).
+
+Configuración (.env):
+    GEOCODIFICACION_CACHE               1 (0 desactiva la caché)
+    GEOCODIFICACION_TTL_NEGATIVO_DIAS   Días que se recuerda una ciudad no encontrada (7)
+"""
+import os
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+
+from .db import Database
+from .lotes import insertar_en_lotes
+
+# Marca de ciudad no encontrada (distinta de None, que significa "no está en caché")
+NO_ENCONTRADA = object()
+
+
+def normalizar(ciudad, pais):
+    """Clave de caché: ciudad sin tildes, en minúsculas y con espacios simples; país en mayúsculas"""
+    sin_tildes = ''.join(c for c in unicodedata.normalize('NFKD', ciudad) if not unicodedata.combining(c))
+    return ' '.join(sin_tildes.casefold().split()), pais.strip().upper()
+
+
+class GeocodificacionRepo:
+    """Repositorio de la tabla geocodificacion_ciudades"""
+
+    def obtener(self, ciudad_normalizada, pais):
+        sql = """
+        SELECT ciudad, latitud, longitud, encontrada, actualizado
+        FROM geocodificacion_ciudades
+        WHERE ciudad_normalizada = %s AND pais = %s
+        """
+        with Database.lectura() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (ciudad_normalizada, pais))
+                return cur.fetchone()
+
+    def guardar(self, ciudad_normalizada, pais, ciudad, coords, origen='api'):
+        """Inserta o reemplaza la entrada; `coords` None la marca como no encontrada"""
+        sql = """
+        INSERT INTO geocodificacion_ciudades (
+            ciudad_normalizada, pais, ciudad, latitud, longitud, encontrada, origen, actualizado
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            ciudad = VALUES(ciudad), latitud = VALUES(latitud), longitud = VALUES(longitud),
+            encontrada = VALUES(encontrada), origen = VALUES(origen), actualizado = VALUES(actualizado)
+        """
+        with Database.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (
+                    ciudad_normalizada, pais, ciudad,
+                    coords['lat'] if coords else None, coords['lon'] if coords else None,
+                    coords is not None, origen, datetime.now()
+                ))
+
+    def precargar_desde_logs_clima(self):
+        """
+        Agrega las ciudades con coordenadas en logs_clima que aún no están en
+        la tabla (no reemplaza entradas existentes); retorna cuántas agregó
+        """
+        sql = """
+        SELECT ciudad, pais, MAX(latitud) AS latitud, MAX(longitud) AS longitud
+        FROM logs_clima
+        WHERE latitud IS NOT NULL AND longitud IS NOT NULL
+        GROUP BY ciudad, pais
+        """
+        with Database.lectura() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql)
+                filas = cur.fetchall()
+
+        with Database.connection(escritura=False) as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT ciudad_normalizada, pais FROM geocodificacion_ciudades")
+                existentes = {(f['ciudad_normalizada'], f['pais']) for f in cur.fetchall()}
+
+        ahora = datetime.now()
+        nuevas = {}
+        for fila in filas:
+            clave = normalizar(fila['ciudad'], fila['pais'])
+            if clave not in existentes and clave not in nuevas:
+                nuevas[clave] = (*clave, fila['ciudad'], fila['latitud'], fila['longitud'], True, 'logs_clima', ahora)
+        # Si la aplicación guarda la misma ciudad mientras tanto, se conserva la suya
+        insertar_en_lotes("""
+        INSERT INTO geocodificacion_ciudades (
+            ciudad_normalizada, pais, ciudad, latitud, longitud, encontrada, origen, actualizado
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE ciudad_normalizada = ciudad_normalizada
+        """, nuevas.values())
+        return len(nuevas)
+
+    def contar(self):
+        """Entradas encontradas y no encontradas"""
+        sql = """
+        SELECT COUNT(*) AS total, COALESCE(SUM(encontrada), 0) AS encontradas
+        FROM geocodificacion_ciudades
+        """
+        with Database.lectura() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql)
+                fila = cur.fetchone()
+        return {'encontradas': int(fila['encontradas']), 'no_encontradas': fila['total'] - int(fila['encontradas'])}
+
+
+class CacheGeocodificacion:
+    """Caché de coordenadas en memoria y en geocodificacion_ciudades"""
+
+    NO_ENCONTRADA = NO_ENCONTRADA
+
+    def __init__(self, activa=True, ttl_negativo=timedelta(days=7), repo=None):
+        self.activa = activa
+        self.ttl_negativo = ttl_negativo
+        self.repo = repo or GeocodificacionRepo()
+        self._memoria = {}
+        self._lock = threading.Lock()
+        self.aciertos_memoria = 0
+        self.aciertos_bd = 0
+        self.fallos = 0
+        self.errores = 0
+
+    def obtener(self, ciudad, pais):
+        """
+        Coordenadas {'lat', 'lon'} de la ciudad, `NO_ENCONTRADA` si la API ya
+        respondió que no existe (y no venció el TTL negativo), o None si hay
+        que consultar la API
+        """
+        if not self.activa:
+            return None
+        clave = normalizar(ciudad, pais)
+        with self._lock:
+            entrada = self._memoria.get(clave)
+        if entrada is not None and self._vigente(entrada):
+            self._contar('aciertos_memoria')
+            return self._valor(entrada)
+
+        try:
+            fila = self.repo.obtener(*clave)
+        except Exception:
+            self._contar('errores')
+            return None
+        if fila is None:
+            self._contar('fallos')
+            return None
+        coords = {'lat': float(fila['latitud']), 'lon': float(fila['longitud'])} if fila['encontrada'] else None
+        entrada = (coords, fila['actualizado'])
+        if not self._vigente(entrada):
+            self._contar('fallos')
+            return None
+        with self._lock:
+            self._memoria[clave] = entrada
+        self._contar('aciertos_bd')
+        return self._valor(entrada)
+
+    def guardar(self, ciudad, pais, coords):
+        """Registra la respuesta de la API; `coords` None significa ciudad no encontrada"""
+        if not self.activa:
+            return
+        clave = normalizar(ciudad, pais)
+        with self._lock:
+            self._memoria[clave] = (dict(coords) if coords else None, datetime.now())
+        try:
+            self.repo.guardar(*clave, ciudad, coords)
+        except Exception:
+            self._contar('errores')
+
+    def precargar_desde_logs_clima(self):
+        """Carga en la tabla las coordenadas ya guardadas en logs_clima; retorna cuántas agregó"""
+        return self.repo.precargar_desde_logs_clima()
+
+    def olvidar(self):
+        """Vacía el nivel en memoria (la tabla se conserva)"""
+        with self._lock:
+            self._memoria.clear()
+
+    def _vigente(self, entrada):
+        coords, actualizado = entrada
+        return coords is not None or datetime.now() - actualizado < self.ttl_negativo
+
+    @staticmethod
+    def _valor(entrada):
+        coords = entrada[0]
+        return NO_ENCONTRADA if coords is None else dict(coords)
+
+    def _contar(self, contador):
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+    def estado(self):
+        with self._lock:
+            consultas = self.aciertos_memoria + self.aciertos_bd + self.fallos
+            return {
+                'activa': self.activa,
+                'en_memoria': len(self._memoria),
+                'aciertos_memoria': self.aciertos_memoria,
+                'aciertos_bd': self.aciertos_bd,
+                'fallos': self.fallos,
+                'errores': self.errores,
+                'tasa_aciertos': (self.aciertos_memoria + self.aciertos_bd) / consultas if consultas else 0.0,
+            }
+
+
+cache_geocodificacion = CacheGeocodificacion(
+    activa=os.getenv('GEOCODIFICACION_CACHE', '1') == '1',
+    ttl_negativo=timedelta(days=float(os.getenv('GEOCODIFICACION_TTL_NEGATIVO_DIAS', '7'))),
+)
@@ -0,0 +1,45 @@
+"""
+Retorno opcional de modelos de dominio en los repositorios.
+
+Por defecto los repositorios retornan las filas como dict (lo que entrega el
+cursor). Con `tipado=True` las lecturas por entidad (listar, iterar, obtener,
+paginar) retornan instancias del modelo construidas con `from_row`, que no
+revalida: las filas ya pasaron por las validaciones al escribirse. Búsquedas,
+estadísticas y agregados siguen retornando dict.
+"""
+
+
+class Hidratacion:
+    """Mixin de repositorio: convierte filas en `modelo` si el repositorio es tipado"""
+
+    modelo = None
+
+    def __init__(self, tipado=False):
+        self.tipado = tipado
+
+    def _una(self, fila):
+        if not self.tipado or fila is None:
+            return fila
+        return self.modelo.from_row(fila)
+
+    def _todas(self, filas):
+        if not self.tipado:
+            return filas
+        from_row = self.modelo.from_row
+        return [from_row(f) for f in filas]
+
+    def _iterar(self, filas):
+        if not self.tipado:
+            return filas
+        return map(self.modelo.from_row, filas)
+
+    def _pagina(self, pagina):
+        if self.tipado:
+            pagina['filas'] = self._todas(pagina['filas'])
+        return pagina
+
+    def _por_ids(self, filas):
+        if not self.tipado:
+            return filas
+        from_row = self.modelo.from_row
+        return {id_: from_row(f) for id_, f in filas.items()}
@@ -0,0 +1,289 @@
+"""
+Instrumentación de consultas: latencias por sentencia y registro de consultas lentas.
+
+Desactivada por defecto. Con DB_INSTRUMENTAR=1 (o `metricas.activar()`) las
+conexiones entregadas por Database usan cursores que miden cada execute; con
+la instrumentación apagada se usan los cursores normales de PyMySQL y el único
+costo es una comprobación de `metricas.activa` al tomar la conexión del pool.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from dotenv import load_dotenv
+from pymysql.cursors import DictCursor, SSDictCursor
+
+load_dotenv()
+
+# Latencias recientes que se conservan por sentencia para calcular percentiles
+MUESTRAS_POR_SENTENCIA = 2048
+# Consultas lentas que se conservan en memoria
+MAX_CONSULTAS_LENTAS = 200
+
+
+def _plantilla(sql):
+    """Normaliza espacios: las sentencias ya son plantillas con marcadores %s"""
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', 'replace')
+    return ' '.join(sql.split())
+
+
+def _forma(params):
+    """Describe los parámetros por tipo, sin exponer sus valores"""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {k: type(v).__name__ for k, v in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [type(v).__name__ for v in params]
+    return type(params).__name__
+
+
+def _percentil(ordenadas, p):
+    if not ordenadas:
+        return 0.0
+    indice = min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))
+    return ordenadas[indice]
+
+
+class _Sentencia:
+    __slots__ = ('llamadas', 'total', 'maximo', 'filas', 'muestras')
+
+    def __init__(self):
+        self.llamadas = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.filas = 0
+        self.muestras = deque(maxlen=MUESTRAS_POR_SENTENCIA)
+
+
+class MetricasConsultas:
+    """Acumula métricas por plantilla SQL (thread-safe)"""
+
+    def __init__(self, activa=False, umbral_lenta_ms=200.0, archivo_lentas=None):
+        self.activa = activa
+        self.umbral_lenta_ms = umbral_lenta_ms
+        self.archivo_lentas = archivo_lentas
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def activar(self, umbral_lenta_ms=None):
+        if umbral_lenta_ms is not None:
+            self.umbral_lenta_ms = umbral_lenta_ms
+        self.activa = True
+
+    def desactivar(self):
+        self.activa = False
+
+    def reiniciar(self):
+        with self._lock:
+            self._sentencias = {}
+            self._lentas = deque(maxlen=MAX_CONSULTAS_LENTAS)
+            self._adquisiciones = 0
+            self._adquisicion_total = 0.0
+            self._adquisicion_maxima = 0.0
+            self._desde = datetime.now()
+
+    def registrar(self, sql, segundos, filas, params=None, lote=None):
+        """Registra una ejecución; si supera el umbral la agrega al log de lentas"""
+        plantilla = _plantilla(sql)
+        with self._lock:
+            datos = self._sentencias.get(plantilla)
+            if datos is None:
+                datos = self._sentencias[plantilla] = _Sentencia()
+            datos.llamadas += 1
+            datos.total += segundos
+            datos.maximo = max(datos.maximo, segundos)
+            datos.filas += max(filas or 0, 0)
+            datos.muestras.append(segundos)
+
+        ms = segundos * 1000
+        if ms >= self.umbral_lenta_ms:
+            lenta = {
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                'ms': round(ms, 2),
+                'sql': plantilla,
+                'parametros': _forma(params),
+                'filas': filas,
+            }
+            if lote is not None:
+                lenta['lote'] = lote
+            with self._lock:
+                self._lentas.append(lenta)
+            if self.archivo_lentas:
+                try:
+                    with open(self.archivo_lentas, 'a', encoding='utf-8') as archivo:
+                        archivo.write(json.dumps(lenta, ensure_ascii=False) + '\n')
+                except OSError:
+                    pass
+
+    def sumar_filas(self, sql, filas):
+        """Agrega filas leídas después del execute (cursores en streaming)"""
+        with self._lock:
+            datos = self._sentencias.get(_plantilla(sql))
+            if datos is not None:
+                datos.filas += filas
+
+    def registrar_adquisicion(self, segundos):
+        """Tiempo de espera para obtener una conexión del pool"""
+        with self._lock:
+            self._adquisiciones += 1
+            self._adquisicion_total += segundos
+            self._adquisicion_maxima = max(self._adquisicion_maxima, segundos)
+
+    def sentencias(self, orden='total', limite=None):
+        """
+        Resumen por plantilla SQL ordenado por `orden` (total, p95, llamadas, filas).
+
+        Returns:
+            Lista de dicts con sql, llamadas, total_ms, promedio_ms, p50_ms,
+            p95_ms, p99_ms, max_ms y filas
+        """
+        with self._lock:
+            copia = [(sql, d.llamadas, d.total, d.maximo, d.filas, sorted(d.muestras))
+                     for sql, d in self._sentencias.items()]
+
+        resumen = []
+        for sql, llamadas, total, maximo, filas, muestras in copia:
+            resumen.append({
+                'sql': sql,
+                'llamadas': llamadas,
+                'total_ms': round(total * 1000, 3),
+                'promedio_ms': round(total / llamadas * 1000, 3),
+                'p50_ms': round(_percentil(muestras, 50) * 1000, 3),
+                'p95_ms': round(_percentil(muestras, 95) * 1000, 3),
+                'p99_ms': round(_percentil(muestras, 99) * 1000, 3),
+                'max_ms': round(maximo * 1000, 3),
+                'filas': filas,
+            })
+        clave = {'total': 'total_ms', 'p95': 'p95_ms'}.get(orden, orden)
+        resumen.sort(key=lambda r: r[clave], reverse=True)
+        return resumen[:limite] if limite else resumen
+
+    def lentas(self):
+        """Consultas que superaron el umbral (las más recientes al final)"""
+        with self._lock:
+            return list(self._lentas)
+
+    def adquisicion(self):
+        """Tiempo de adquisición de conexiones del pool"""
+        with self._lock:
+            n = self._adquisiciones
+            return {
+                'adquisiciones': n,
+                'total_ms': round(self._adquisicion_total * 1000, 3),
+                'promedio_ms': round(self._adquisicion_total / n * 1000, 3) if n else 0.0,
+                'max_ms': round(self._adquisicion_maxima * 1000, 3),
+            }
+
+    def resumen(self):
+        return {
+            'desde': self._desde.isoformat(timespec='seconds'),
+            'hasta': datetime.now().isoformat(timespec='seconds'),
+            'activa': self.activa,
+            'umbral_lenta_ms': self.umbral_lenta_ms,
+            'adquisicion_conexion': self.adquisicion(),
+            'sentencias': self.sentencias(),
+            'consultas_lentas': self.lentas(),
+        }
+
+    def volcar_json(self, ruta):
+        """Escribe el resumen completo en `ruta`"""
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(self.resumen(), archivo, ensure_ascii=False, indent=2)
+        return ruta
+
+
+metricas = MetricasConsultas(
+    activa=os.getenv('DB_INSTRUMENTAR', '0') == '1',
+    umbral_lenta_ms=float(os.getenv('DB_SLOW_QUERY_MS', '200')),
+    archivo_lentas=os.getenv('DB_SLOW_QUERY_LOG') or None,
+)
+
+
+def _volcar_al_salir():
+    ruta = os.getenv('DB_METRICAS_JSON')
+    if ruta and metricas.activa and metricas.sentencias():
+        try:
+            metricas.volcar_json(ruta)
+        except OSError:
+            pass
+
+
+atexit.register(_volcar_al_salir)
+
+
+class _Medicion:
+    """Mezcla común: mide execute/executemany y publica en `metricas`"""
+
+    _en_lote = False
+
+    def execute(self, query, args=None):
+        if self._en_lote:
+            return super().execute(query, args)
+        inicio = time.perf_counter()
+        try:
+            return super().execute(query, args)
+        finally:
+            metricas.registrar(query, time.perf_counter() - inicio, self._filas_medidas(), args)
+
+    def executemany(self, query, args):
+        # PyMySQL implementa executemany llamando a execute; se mide solo el total
+        args = list(args or ())
+        if not args:
+            return super().executemany(query, args)
+        self._en_lote = True
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(query, args)
+        finally:
+            self._en_lote = False
+            metricas.registrar(query, time.perf_counter() - inicio, self.rowcount,
+                               args[0] if args else None, lote=len(args))
+
+    def _filas_medidas(self):
+        return self.rowcount
+
+
+class CursorInstrumentado(_Medicion, DictCursor):
+    """DictCursor que registra cada sentencia en `metricas`"""
+
+
+class SSCursorInstrumentado(_Medicion, SSDictCursor):
+    """
+    SSDictCursor instrumentado. La latencia es la del execute (hasta la primera
+    fila); las filas se suman a medida que se leen y se publican al cerrar.
+    """
+
+    _sql_medido = None
+    _filas_leidas = 0
+
+    def execute(self, query, args=None):
+        self._sql_medido = query
+        self._filas_leidas = 0
+        return super().execute(query, args)
+
+    def _filas_medidas(self):
+        # rowcount no se conoce hasta consumir el resultado
+        return 0
+
+    def fetchone(self):
+        fila = super().fetchone()
+        if fila is not None:
+            self._filas_leidas += 1
+        return fila
+
+    def fetchmany(self, size=None):
+        filas = super().fetchmany(size)
+        self._filas_leidas += len(filas)
+        return filas
+
+    def close(self):
+        if self._sql_medido is not None and self._filas_leidas:
+            metricas.sumar_filas(self._sql_medido, self._filas_leidas)
+            self._sql_medido = None
+        super().close()
@@ -0,0 +1,91 @@
+"""Utilidades para operaciones por lotes: inserciones con executemany y lecturas por ids"""
+import time
+from itertools import islice
+
+from .db import Database
+
+TAMANO_LOTE_DEFECTO = 1000
+# Ids por sentencia en las lecturas por lote (WHERE id IN (...))
+TAMANO_LOTE_IDS = 500
+
+
+def trocear(iterable, tamano):
+    """Divide un iterable en listas de hasta `tamano` elementos"""
+    if tamano < 1:
+        raise ValueError("El tamaño de lote debe ser al menos 1")
+    iterador = iter(iterable)
+    while True:
+        lote = list(islice(iterador, tamano))
+        if not lote:
+            return
+        yield lote
+
+
+def insertar_en_lotes(sql, filas, tamano_lote=TAMANO_LOTE_DEFECTO):
+    """
+    Inserta filas en lotes dentro de una única transacción.
+
+    PyMySQL reescribe `executemany` como un INSERT multi-fila solo si la
+    cláusula VALUES contiene únicamente marcadores `%s` (sin NOW(), TRUE, etc.),
+    por eso las sentencias masivas reciben todos los valores como parámetros.
+
+    Args:
+        sql: Sentencia INSERT ... VALUES (%s, ...)
+        filas: Iterable de tuplas de parámetros
+        tamano_lote: Filas por llamada a executemany
+
+    Returns:
+        Lista con un dict por lote: {'lote', 'filas', 'segundos'}
+    """
+    resultados = []
+    with Database.connection() as conn:
+        with conn.cursor() as cur:
+            for numero, lote in enumerate(trocear(filas, tamano_lote), 1):
+                inicio = time.perf_counter()
+                cur.executemany(sql, lote)
+                resultados.append({
+                    'lote': numero,
+                    'filas': len(lote),
+                    'segundos': time.perf_counter() - inicio,
+                })
+    return resultados
+
+
+def _sql_por_ids(select, columna, cantidad):
+    return f"{select} WHERE {columna} IN ({', '.join(['%s'] * cantidad)})"
+
+
+def _ids_unicos(ids):
+    """Ids sin None ni repetidos, en el orden original"""
+    return list(dict.fromkeys(i for i in ids if i is not None))
+
+
+def consultar_por_ids(select, ids, columna='id', tamano_lote=TAMANO_LOTE_IDS, primario=False):
+    """
+    Obtiene varias filas por id con `WHERE columna IN (...)`, en bloques de
+    `tamano_lote` ids y todas en la misma conexión de lectura.
+
+    Args:
+        select: SELECT ... FROM tabla, sin WHERE; debe incluir `columna`
+        ids: Iterable de ids (se ignoran None y repetidos)
+        columna: Columna por la que se busca (p. ej. 'u.id' en un JOIN)
+        tamano_lote: Ids por sentencia
+        primario: Leer del primario aunque haya réplicas (comprobar qué
+            filas ya existen antes de insertarlas)
+
+    Returns:
+        Dict {id: fila} solo con los ids encontrados
+    """
+    pendientes = _ids_unicos(ids)
+    resultado = {}
+    if not pendientes:
+        return resultado
+    clave = columna.split('.')[-1]
+    conexion = Database.connection(escritura=False) if primario else Database.lectura()
+    with conexion as conn:
+        with conn.cursor() as cur:
+            for lote in trocear(pendientes, tamano_lote):
+                cur.execute(_sql_por_ids(select, columna, len(lote)), tuple(lote))
+                for fila in cur.fetchall():
+                    resultado[fila[clave]] = fila
+    return resultado
@@ -1,5 +1,5 @@
 """Modelos SQLAlchemy para migraciones con Alembic"""
-from sqlalchemy import Column, String, Text, Integer, DECIMAL, Date, TIMESTAMP, Boolean, ForeignKey, JSON, func
+from sqlalchemy import Column, String, Text, Integer, BigInteger, DECIMAL, Date, DateTime, TIMESTAMP, Boolean, ForeignKey, JSON, Index, func
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -47,6 +47,10 @@ class Usuario(Base):
     ultimo_login = Column(TIMESTAMP, nullable=True)
     activo = Column(Boolean, default=True)
 
+    __table_args__ = (
+        Index('idx_usuarios_fecha_creacion', 'fecha_creacion'),
+    )
+
 
 class Departamento(Base):
     __tablename__ = 'departamentos'
@@ -58,6 +62,10 @@ class Departamento(Base):
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
     activo = Column(Boolean, default=True)
 
+    __table_args__ = (
+        Index('ft_departamentos_nombre', 'nombre', mysql_prefix='FULLTEXT', mysql_with_parser='ngram'),
+    )
+
 
 class Empleado(Base):
     __tablename__ = 'empleados'
@@ -74,6 +82,11 @@ class Empleado(Base):
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
     updated_at = Column(TIMESTAMP, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
 
+    __table_args__ = (
+        Index('idx_empleados_nombre', 'nombre'),
+        Index('ft_empleados_nombre', 'nombre', mysql_prefix='FULLTEXT', mysql_with_parser='ngram'),
+    )
+
 
 class Proyecto(Base):
     __tablename__ = 'proyectos'
@@ -86,6 +99,10 @@ class Proyecto(Base):
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
     activo = Column(Boolean, default=True)
 
+    __table_args__ = (
+        Index('ft_proyectos_nombre', 'nombre', mysql_prefix='FULLTEXT', mysql_with_parser='ngram'),
+    )
+
 
 class EmpleadoProyecto(Base):
     __tablename__ = 'empleado_proyecto'
@@ -149,7 +166,14 @@ class AdministradorRH(Base):
 
 
 class LogClima(Base):
-    """Modelo SQLAlchemy para registrar consultas de calidad del aire"""
+    """
+    Modelo SQLAlchemy para registrar consultas de calidad del aire.
+
+    La tabla está particionada por mes sobre fecha_consulta (migración
+    e1f5b3a7c820, mantenimiento en persistencia/particiones.py): la clave
+    primaria incluye fecha_consulta y usuario_id/proyecto_id no tienen clave
+    foránea porque InnoDB no las admite en tablas particionadas.
+    """
     __tablename__ = 'logs_clima'
     
     id = Column(String(50), primary_key=True)
@@ -165,7 +189,113 @@ class LogClima(Base):
     nh3 = Column(DECIMAL(10, 2), nullable=True)
     latitud = Column(DECIMAL(10, 6), nullable=True)
     longitud = Column(DECIMAL(10, 6), nullable=True)
-    usuario_id = Column(String(50), ForeignKey('usuarios.id'), nullable=True)
-    proyecto_id = Column(String(50), ForeignKey('proyectos.id'), nullable=True)
-    fecha_consulta = Column(TIMESTAMP, server_default=func.current_timestamp())
+    usuario_id = Column(String(50), nullable=True)
+    proyecto_id = Column(String(50), nullable=True)
+    fecha_consulta = Column(TIMESTAMP, primary_key=True, nullable=False,
+                            server_default=func.current_timestamp())
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+
+    __table_args__ = (
+        Index('idx_logs_clima_fecha', 'fecha_consulta'),
+        Index('idx_logs_clima_usuario_fecha', 'usuario_id', 'fecha_consulta'),
+        Index('idx_logs_clima_proyecto_fecha', 'proyecto_id', 'fecha_consulta'),
+        Index('idx_logs_clima_ciudad_pais_fecha', 'ciudad', 'pais', 'fecha_consulta'),
+    )
+
+
+class LogClimaResumenCiudad(Base):
+    """Acumulados por ciudad de logs_clima, actualizados en cada inserción"""
+    __tablename__ = 'logs_clima_resumen_ciudad'
+
+    ciudad = Column(String(200), primary_key=True)
+    pais = Column(String(10), primary_key=True)
+    total_consultas = Column(Integer, nullable=False, default=0)
+    suma_aqi = Column(BigInteger, nullable=False, default=0)
+    aqi_minimo = Column(Integer, nullable=False)
+    aqi_maximo = Column(Integer, nullable=False)
+    suma_pm2_5 = Column(DECIMAL(16, 2), nullable=False, default=0)
+    consultas_pm2_5 = Column(Integer, nullable=False, default=0)
+    suma_pm10 = Column(DECIMAL(16, 2), nullable=False, default=0)
+    consultas_pm10 = Column(Integer, nullable=False, default=0)
+    ultima_consulta = Column(TIMESTAMP, nullable=True)
+
+    __table_args__ = (
+        Index('idx_resumen_ciudad_consultas', 'total_consultas'),
+    )
+
+
+class _AgregadoClima:
+    """Columnas comunes de los rollups de logs_clima (promedio/mínimo/máximo por métrica)"""
+    ciudad = Column(String(200), primary_key=True)
+    pais = Column(String(10), primary_key=True)
+    periodo = Column(DateTime, primary_key=True)
+    lecturas = Column(Integer, nullable=False)
+    aqi_promedio = Column(DECIMAL(5, 2), nullable=False)
+    aqi_minimo = Column(Integer, nullable=False)
+    aqi_maximo = Column(Integer, nullable=False)
+    co_promedio = Column(DECIMAL(10, 2))
+    co_minimo = Column(DECIMAL(10, 2))
+    co_maximo = Column(DECIMAL(10, 2))
+    no2_promedio = Column(DECIMAL(10, 2))
+    no2_minimo = Column(DECIMAL(10, 2))
+    no2_maximo = Column(DECIMAL(10, 2))
+    o3_promedio = Column(DECIMAL(10, 2))
+    o3_minimo = Column(DECIMAL(10, 2))
+    o3_maximo = Column(DECIMAL(10, 2))
+    so2_promedio = Column(DECIMAL(10, 2))
+    so2_minimo = Column(DECIMAL(10, 2))
+    so2_maximo = Column(DECIMAL(10, 2))
+    pm2_5_promedio = Column(DECIMAL(10, 2))
+    pm2_5_minimo = Column(DECIMAL(10, 2))
+    pm2_5_maximo = Column(DECIMAL(10, 2))
+    pm10_promedio = Column(DECIMAL(10, 2))
+    pm10_minimo = Column(DECIMAL(10, 2))
+    pm10_maximo = Column(DECIMAL(10, 2))
+    nh3_promedio = Column(DECIMAL(10, 2))
+    nh3_minimo = Column(DECIMAL(10, 2))
+    nh3_maximo = Column(DECIMAL(10, 2))
+
+
+class LogClimaHora(_AgregadoClima, Base):
+    __tablename__ = 'logs_clima_hora'
+
+
+class LogClimaDia(_AgregadoClima, Base):
+    __tablename__ = 'logs_clima_dia'
+
+
+class LogClimaRollupMarca(Base):
+    """Marca de agua de cada nivel de rollup: inicio del primer período sin consolidar"""
+    __tablename__ = 'logs_clima_rollup_marca'
+
+    nivel = Column(String(10), primary_key=True)
+    procesado_hasta = Column(DateTime, nullable=False)
+
+
+class LogClimaRollupPendiente(Base):
+    """
+    Días con lecturas insertadas después de su hora (spool recuperado, cargas
+    históricas) que los rollups deben recalcular aunque la marca ya los pasó.
+    `cambios` crece con cada registro para no perder uno que llegue durante el recálculo.
+    """
+    __tablename__ = 'logs_clima_rollup_pendiente'
+
+    dia = Column(Date, primary_key=True)
+    cambios = Column(Integer, nullable=False)
+
+
+class GeocodificacionCiudad(Base):
+    """
+    Caché de Geocoding API por (ciudad, país) normalizados (persistencia/geocodificacion.py).
+    encontrada = False guarda que la API no conoce la ciudad (caché negativa).
+    """
+    __tablename__ = 'geocodificacion_ciudades'
+
+    ciudad_normalizada = Column(String(200), primary_key=True)
+    pais = Column(String(10), primary_key=True)
+    ciudad = Column(String(200), nullable=False)
+    latitud = Column(DECIMAL(10, 6), nullable=True)
+    longitud = Column(DECIMAL(10, 6), nullable=True)
+    encontrada = Column(Boolean, nullable=False)
+    origen = Column(String(20), nullable=False)
+    actualizado = Column(TIMESTAMP, nullable=False)
@@ -0,0 +1,111 @@
+"""Paginación keyset (seek): cada página continúa después de la última (clave, id)"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from .db import Database
+
+TAMANO_PAGINA_DEFECTO = 20
+TAMANO_PAGINA_MAXIMO = 500
+
+
+def _serializar(valor):
+    if isinstance(valor, datetime):
+        return {'dt': valor.isoformat()}
+    if isinstance(valor, date):
+        return {'d': valor.isoformat()}
+    if isinstance(valor, Decimal):
+        return {'dec': str(valor)}
+    return valor
+
+
+def _deserializar(valor):
+    if isinstance(valor, dict):
+        if 'dt' in valor:
+            return datetime.fromisoformat(valor['dt'])
+        if 'd' in valor:
+            return date.fromisoformat(valor['d'])
+        if 'dec' in valor:
+            return Decimal(valor['dec'])
+    return valor
+
+
+def codificar_token(valores):
+    """Convierte los valores de orden de la última fila en un token opaco"""
+    datos = json.dumps([_serializar(v) for v in valores], separators=(',', ':'))
+    return base64.urlsafe_b64encode(datos.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_token(token, cantidad):
+    """Recupera los valores de orden de un token; ValueError si es inválido"""
+    try:
+        relleno = '=' * (-len(token) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(token + relleno).decode('utf-8'))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Token de paginación inválido") from e
+    if not isinstance(valores, list) or len(valores) != cantidad:
+        raise ValueError("Token de paginación inválido")
+    return [_deserializar(v) for v in valores]
+
+
+def consultar_pagina(select, orden, descendente=False, tamano=TAMANO_PAGINA_DEFECTO,
+                     token=None, condiciones=(), params=()):
+    """
+    Ejecuta una consulta paginada por keyset.
+
+    En lugar de OFFSET se filtra con `(clave, id) > (ultima_clave, ultimo_id)`,
+    que con un índice sobre la clave cuesta lo mismo en la página 1 que en la N.
+    Las columnas de orden deben ser NOT NULL y la última debe ser única (id).
+
+    Args:
+        select: "SELECT ... FROM tabla" sin WHERE ni ORDER BY
+        orden: Columnas de orden, p. ej. ('nombre', 'id'); deben venir en el SELECT
+        descendente: True para ordenar de mayor a menor
+        tamano: Filas por página (se limita a TAMANO_PAGINA_MAXIMO)
+        token: Token de continuación retornado por la página anterior
+        condiciones: Filtros SQL adicionales unidos con AND
+        params: Parámetros de los filtros
+
+    Returns:
+        {'filas': [...], 'siguiente': token o None si no hay más páginas}
+    """
+    sql, params, tamano = _armar_consulta(select, orden, descendente, tamano, token, condiciones, params)
+    with Database.lectura() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            filas = list(cur.fetchall())
+    return _armar_pagina(filas, orden, tamano)
+
+
+def _armar_consulta(select, orden, descendente, tamano, token, condiciones, params):
+    """SQL y parámetros de una página (compartido con la versión asíncrona)"""
+    tamano = max(1, min(int(tamano), TAMANO_PAGINA_MAXIMO))
+    condiciones = list(condiciones)
+    params = list(params)
+
+    if token:
+        valores = decodificar_token(token, len(orden))
+        operador = '<' if descendente else '>'
+        marcadores = ', '.join(['%s'] * len(orden))
+        condiciones.append(f"({', '.join(orden)}) {operador} ({marcadores})")
+        params.extend(valores)
+
+    direccion = ' DESC' if descendente else ''
+    sql = select
+    if condiciones:
+        sql += " WHERE " + " AND ".join(condiciones)
+    sql += " ORDER BY " + ", ".join(f"{c}{direccion}" for c in orden)
+    sql += " LIMIT %s"
+    params.append(tamano + 1)
+    return sql, tuple(params), tamano
+
+
+def _armar_pagina(filas, orden, tamano):
+    """Recorta la fila extra y genera el token de la página siguiente"""
+    siguiente = None
+    if len(filas) > tamano:
+        filas = filas[:tamano]
+        ultima = filas[-1]
+        siguiente = codificar_token([ultima[c.split('.')[-1]] for c in orden])
+    return {'filas': filas, 'siguiente': siguiente}
@@ -0,0 +1,168 @@
+"""
+Mantenimiento de las particiones mensuales de logs_clima.
+
+La tabla está particionada con RANGE (UNIX_TIMESTAMP(fecha_consulta)): una
+partición `pAAAAMM` por mes y `p_futuro` (MAXVALUE) como resguardo. Crear un
+mes nuevo divide `p_futuro`; purgar un mes es DROP PARTITION, que elimina el
+archivo de datos sin el bloqueo ni la fragmentación de un DELETE masivo. Tras
+la purga se recalcula el resumen de las ciudades que tenían lecturas en esos
+meses, para que logs_clima_resumen_ciudad siga coincidiendo con logs_clima.
+"""
+import os
+import re
+from datetime import date
+
+from .db import Database
+from .repositorios import LogClimaRepo
+from .rollups import obtener_marca, dias_pendientes
+
+TABLA = 'logs_clima'
+PARTICION_FUTURO = 'p_futuro'
+_PATRON = re.compile(r'^p(\d{4})(\d{2})$')
+
+RETENCION_MESES_DEFECTO = int(os.getenv('LOGS_CLIMA_RETENCION_MESES', '24'))
+MESES_FUTUROS_DEFECTO = int(os.getenv('LOGS_CLIMA_PARTICIONES_FUTURAS', '3'))
+
+
+def sumar_meses(mes, cantidad):
+    """Primer día del mes `cantidad` meses después (o antes) de `mes`"""
+    indice = mes.year * 12 + mes.month - 1 + cantidad
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def nombre_particion(mes):
+    return f"p{mes.year:04d}{mes.month:02d}"
+
+
+def definicion_particion(mes):
+    """Cláusula PARTITION para el mes que comienza en `mes`"""
+    limite = sumar_meses(mes, 1)
+    return (f"PARTITION {nombre_particion(mes)} VALUES LESS THAN "
+            f"(UNIX_TIMESTAMP('{limite:%Y-%m-%d} 00:00:00'))")
+
+
+def listar_particiones():
+    """
+    Particiones actuales de logs_clima, en orden.
+
+    Returns:
+        Lista de dicts {'nombre', 'mes' (date o None para p_futuro), 'filas'}
+        (filas es la estimación de information_schema). Vacía en backends
+        sin particionado (SQLite).
+    """
+    if Database.backend().nombre != 'mysql':
+        return []
+    sql = """
+    SELECT PARTITION_NAME AS nombre, TABLE_ROWS AS filas
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+    ORDER BY PARTITION_ORDINAL_POSITION
+    """
+    with Database.connection(escritura=False) as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, (TABLA,))
+            filas = cur.fetchall()
+
+    particiones = []
+    for fila in filas:
+        coincidencia = _PATRON.match(fila['nombre'])
+        mes = date(int(coincidencia.group(1)), int(coincidencia.group(2)), 1) if coincidencia else None
+        particiones.append({'nombre': fila['nombre'], 'mes': mes, 'filas': fila['filas']})
+    return particiones
+
+
+def crear_particiones_futuras(meses=MESES_FUTUROS_DEFECTO, hoy=None, simular=False):
+    """
+    Asegura particiones desde el mes actual hasta `meses` meses adelante.
+
+    Returns:
+        Nombres de las particiones creadas (o que se crearían si simular=True)
+    """
+    hoy = hoy or date.today()
+    particiones = listar_particiones()
+    if not particiones:
+        raise RuntimeError("logs_clima no está particionada; ejecute: alembic upgrade head")
+
+    existentes = {p['mes'] for p in particiones if p['mes']}
+    ultimo = max(existentes) if existentes else None
+    actual = date(hoy.year, hoy.month, 1)
+
+    nuevos = []
+    for i in range(meses + 1):
+        mes = sumar_meses(actual, i)
+        # Solo se puede dividir p_futuro: los meses anteriores al último existente ya están cubiertos
+        if mes not in existentes and (ultimo is None or mes > ultimo):
+            nuevos.append(mes)
+    if not nuevos or simular:
+        return [nombre_particion(m) for m in nuevos]
+
+    definiciones = ',\n        '.join(definicion_particion(m) for m in nuevos)
+    sql = f"""
+    ALTER TABLE {TABLA} REORGANIZE PARTITION {PARTICION_FUTURO} INTO (
+        {definiciones},
+        PARTITION {PARTICION_FUTURO} VALUES LESS THAN MAXVALUE
+    )
+    """
+    with Database.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql)
+    return [nombre_particion(m) for m in nuevos]
+
+
+def purgar_particiones(retencion_meses=RETENCION_MESES_DEFECTO, hoy=None,
+                       exigir_rollup=True, simular=False):
+    """
+    Elimina las particiones de meses completos fuera de la retención.
+
+    Con `exigir_rollup` solo se elimina un mes si el rollup diario ya lo
+    consolidó (su marca es posterior al fin del mes) y no le quedan días con
+    lecturas tardías por recalcular, de modo que las series históricas se
+    conservan en logs_clima_dia.
+
+    Returns:
+        {'eliminadas': [...], 'pendientes_rollup': [...],
+         'ciudades_recalculadas': cantidad de filas del resumen recalculadas}
+    """
+    hoy = hoy or date.today()
+    corte = sumar_meses(date(hoy.year, hoy.month, 1), -retencion_meses)
+    marca = obtener_marca('dia') if exigir_rollup else None
+    tardios = {date(d.year, d.month, 1) for d in dias_pendientes()} if exigir_rollup else set()
+
+    eliminadas, pendientes, meses = [], [], []
+    for particion in listar_particiones():
+        mes = particion['mes']
+        if mes is None or mes >= corte:
+            continue
+        fin = sumar_meses(mes, 1)
+        if exigir_rollup and (marca is None or marca.date() < fin or mes in tardios):
+            pendientes.append(particion['nombre'])
+        else:
+            eliminadas.append(particion['nombre'])
+            meses.append(mes)
+
+    ciudades = []
+    if eliminadas and not simular:
+        ciudades = _ciudades_en_meses(meses)
+        _eliminar_particiones(eliminadas)
+        LogClimaRepo().recalcular_resumen(ciudades)
+    return {'eliminadas': eliminadas, 'pendientes_rollup': pendientes, 'ciudades_recalculadas': len(ciudades)}
+
+
+def _ciudades_en_meses(meses):
+    """(ciudad, pais) con lecturas en alguno de los meses (cada rango lee una partición)"""
+    ciudades = set()
+    with Database.lectura() as conn:
+        with conn.cursor() as cur:
+            for mes in meses:
+                cur.execute(
+                    "SELECT DISTINCT ciudad, pais FROM logs_clima WHERE fecha_consulta >= %s AND fecha_consulta < %s",
+                    (mes, sumar_meses(mes, 1))
+                )
+                ciudades.update((f['ciudad'], f['pais']) for f in cur.fetchall())
+    return sorted(ciudades)
+
+
+def _eliminar_particiones(nombres):
+    with Database.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"ALTER TABLE {TABLA} DROP PARTITION {', '.join(nombres)}")
@@ -0,0 +1,250 @@
+"""Pool de conexiones acotado y thread-safe para la capa de persistencia"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolTimeoutError(Exception):
+    """Se lanza cuando no hay conexiones libres dentro del tiempo de espera"""
+
+
+class _Entrada:
+    """Conexión administrada por el pool junto con sus marcas de tiempo"""
+
+    __slots__ = ('conn', 'creada', 'ultimo_uso')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.creada = time.monotonic()
+        self.ultimo_uso = self.creada
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones con tamaño mínimo/máximo.
+
+    - Las conexiones inactivas más allá de `min_size` se cierran tras `idle_timeout`.
+    - Ninguna conexión vive más de `max_lifetime` segundos.
+    - Al entregar una conexión que estuvo inactiva más de `ping_after` segundos
+      se verifica con un ping; si falla se descarta y se crea otra.
+    - Si todas las conexiones están en uso, el llamador espera hasta
+      `wait_timeout` segundos y luego recibe PoolTimeoutError (backpressure).
+    """
+
+    def __init__(self, factory, min_size=1, max_size=10, idle_timeout=300.0,
+                 max_lifetime=1800.0, wait_timeout=10.0, ping_after=1.0):
+        """
+        Args:
+            factory: Función sin argumentos que abre una nueva conexión
+            min_size: Conexiones que se mantienen abiertas aunque estén inactivas
+            max_size: Máximo de conexiones abiertas simultáneamente
+            idle_timeout: Segundos de inactividad antes de cerrar una conexión
+            max_lifetime: Segundos máximos de vida de una conexión
+            wait_timeout: Segundos máximos de espera por una conexión libre
+            ping_after: Inactividad (segundos) a partir de la cual se hace ping al entregar
+        """
+        if max_size < 1:
+            raise ValueError("max_size debe ser al menos 1")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("min_size debe estar entre 0 y max_size")
+
+        self._factory = factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.wait_timeout = wait_timeout
+        self.ping_after = ping_after
+
+        self._cond = threading.Condition(threading.Lock())
+        self._idle = deque()
+        self._en_uso = {}
+        self._total = 0
+        self._cerrado = False
+
+        self._creadas = 0
+        self._descartadas = 0
+        self._esperas = 0
+        self._tiempo_espera = 0.0
+        self._tiempo_espera_max = 0.0
+        self._timeouts = 0
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def acquire(self):
+        """Obtiene una conexión del pool (bloquea hasta wait_timeout)"""
+        limite = None
+        inicio_espera = None
+
+        while True:
+            entrada = None
+            crear = False
+            with self._cond:
+                if self._cerrado:
+                    raise RuntimeError("El pool de conexiones está cerrado")
+
+                self._purgar_inactivas()
+
+                if self._idle:
+                    entrada = self._idle.pop()
+                elif self._total < self.max_size:
+                    self._total += 1
+                    crear = True
+                else:
+                    if inicio_espera is None:
+                        inicio_espera = time.monotonic()
+                        limite = inicio_espera + self.wait_timeout
+                        self._esperas += 1
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        self._timeouts += 1
+                        self._registrar_espera(inicio_espera)
+                        raise PoolTimeoutError(
+                            f"No hay conexiones disponibles tras {self.wait_timeout}s "
+                            f"({self.max_size} en uso)"
+                        )
+                    self._cond.wait(restante)
+                    continue
+
+            if crear:
+                entrada = self._crear_entrada()
+            elif not self._validar(entrada):
+                self._descartar(entrada)
+                continue
+
+            with self._cond:
+                self._en_uso[id(entrada.conn)] = entrada
+                if inicio_espera is not None:
+                    self._registrar_espera(inicio_espera)
+            return entrada.conn
+
+    def release(self, conn, discard=False):
+        """Devuelve una conexión al pool; con discard=True se cierra"""
+        with self._cond:
+            entrada = self._en_uso.pop(id(conn), None)
+        if entrada is None:
+            raise ValueError("La conexión no pertenece a este pool")
+
+        ahora = time.monotonic()
+        if discard or self._cerrado or ahora - entrada.creada >= self.max_lifetime:
+            self._descartar(entrada)
+            return
+
+        entrada.ultimo_uso = ahora
+        with self._cond:
+            self._idle.append(entrada)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager que entrega una conexión y la devuelve al salir"""
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except BaseException:
+            discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def warmup(self):
+        """Abre conexiones hasta alcanzar min_size"""
+        while True:
+            with self._cond:
+                if self._cerrado or self._total >= self.min_size:
+                    return
+                self._total += 1
+            entrada = self._crear_entrada()
+            with self._cond:
+                self._idle.append(entrada)
+                self._cond.notify()
+
+    def stats(self):
+        """Estadísticas del pool en este instante"""
+        with self._cond:
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._total,
+                'in_use': len(self._en_uso),
+                'idle': len(self._idle),
+                'created': self._creadas,
+                'discarded': self._descartadas,
+                'waits': self._esperas,
+                'wait_time_total': self._tiempo_espera,
+                'wait_time_max': self._tiempo_espera_max,
+                'timeouts': self._timeouts,
+            }
+
+    def close(self):
+        """Cierra todas las conexiones inactivas y rechaza nuevas solicitudes"""
+        with self._cond:
+            self._cerrado = True
+            inactivas = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for entrada in inactivas:
+            self._descartar(entrada)
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _crear_entrada(self):
+        try:
+            conn = self._factory()
+        except BaseException:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._creadas += 1
+        return _Entrada(conn)
+
+    def _validar(self, entrada):
+        """Comprueba vida máxima y, si estuvo inactiva, que siga viva"""
+        ahora = time.monotonic()
+        if ahora - entrada.creada >= self.max_lifetime:
+            return False
+        if ahora - entrada.ultimo_uso >= self.ping_after:
+            try:
+                entrada.conn.ping(reconnect=False)
+            except Exception:
+                return False
+        return True
+
+    def _descartar(self, entrada):
+        try:
+            entrada.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._total -= 1
+            self._descartadas += 1
+            self._cond.notify()
+
+    def _purgar_inactivas(self):
+        """Cierra conexiones inactivas vencidas por sobre min_size (requiere el lock)"""
+        ahora = time.monotonic()
+        while self._idle and self._total > self.min_size:
+            entrada = self._idle[0]
+            if ahora - entrada.ultimo_uso < self.idle_timeout:
+                break
+            self._idle.popleft()
+            self._total -= 1
+            self._descartadas += 1
+            try:
+                entrada.conn.close()
+            except Exception:
+                pass
+
+    def _registrar_espera(self, inicio):
+        espera = time.monotonic() - inicio
+        self._tiempo_espera += espera
+        if espera > self._tiempo_espera_max:
+            self._tiempo_espera_max = espera
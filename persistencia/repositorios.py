@@ -1,46 +1,79 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
 from .db import Database
+from .escritura_diferida import BufferLogsClima
+from .hidratacion import Hidratacion
+from .lotes import insertar_en_lotes, consultar_por_ids, TAMANO_LOTE_DEFECTO
+from .paginacion import consultar_pagina, TAMANO_PAGINA_DEFECTO
+from .texto import buscar_texto, condicion_texto
+from .unit_of_work import UnitOfWork, al_confirmar
+from . import rollups
+from dominio.models import Departamento, Proyecto, Empleado, LogClima
 
+class DepartamentoRepo(Hidratacion):
+    modelo = Departamento
 
-class DepartamentoRepo:
     def crear(self, departamento):
         sql = "INSERT INTO departamentos (id, nombre, descripcion, created_at, activo) VALUES (%s, %s, %s, NOW(), TRUE)"
-        conn = Database.get_connection()
-        try:
+        with Database.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, (departamento.id, departamento.nombre, departamento.descripcion))
-            conn.commit()
-        finally:
-            conn.close()
+
+    def crear_muchos(self, departamentos, tamano_lote=TAMANO_LOTE_DEFECTO):
+        """Inserta varios departamentos en lotes; retorna tiempos y filas por lote"""
+        sql = "INSERT INTO departamentos (id, nombre, descripcion, created_at, activo) VALUES (%s, %s, %s, %s, %s)"
+        ahora = datetime.now()
+        filas = ((d.id, d.nombre, d.descripcion, ahora, True) for d in departamentos)
+        return insertar_en_lotes(sql, filas, tamano_lote)
 
     def listar_todos(self):
         sql = "SELECT id, nombre, descripcion FROM departamentos"
-        conn = Database.get_connection()
-        try:
+        with Database.lectura() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql)
-                return cur.fetchall()
-        finally:
-            conn.close()
+                return self._todas(cur.fetchall())
+
+    def iterar_todos(self, tamano_bloque=None):
+        """Generador de todos los departamentos con memoria constante"""
+        sql = "SELECT id, nombre, descripcion FROM departamentos"
+        return self._iterar(Database.iterar(sql, tamano_bloque=tamano_bloque))
 
     def obtener_por_id(self, id_):
         sql = "SELECT id, nombre, descripcion FROM departamentos WHERE id=%s"
-        conn = Database.get_connection()
-        try:
+        with Database.lectura() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, (id_,))
-                return cur.fetchone()
-        finally:
-            conn.close()
+                return self._una(cur.fetchone())
+
+    def obtener_por_ids(self, ids):
+        """Varios departamentos en una consulta por bloque de ids: {id: fila}"""
+        return self._por_ids(consultar_por_ids("SELECT id, nombre, descripcion FROM departamentos", ids))
 
     def buscar_por_nombre(self, nombre):
-        sql = "SELECT id, nombre, descripcion FROM departamentos WHERE nombre LIKE %s"
-        conn = Database.get_connection()
-        try:
-            with conn.cursor() as cur:
-                cur.execute(sql, (f"%{nombre}%",))
-                return cur.fetchall()
-        finally:
-            conn.close()
+        return buscar_texto("id, nombre, descripcion", "departamentos", "nombre", nombre, limite=None)
+
+    def buscar_texto(self, termino, modo='frase', limite=50):
+        """Búsqueda FULLTEXT por nombre ordenada por relevancia (modos: frase, natural, prefijo)"""
+        return buscar_texto("id, nombre, descripcion", "departamentos", "nombre", termino, modo, limite)
+
+    def listar_pagina(self, tamano=TAMANO_PAGINA_DEFECTO, token=None):
+        """Página de departamentos ordenados por nombre: {'filas', 'siguiente'}"""
+        return self._pagina(consultar_pagina(
+            "SELECT id, nombre, descripcion FROM departamentos",
+            ('nombre', 'id'), tamano=tamano, token=token
+        ))
+
+    def buscar_por_nombre_pagina(self, nombre, tamano=TAMANO_PAGINA_DEFECTO, token=None):
+        """Página de departamentos cuyo nombre contiene el texto: {'filas', 'siguiente'}"""
+        condicion, params, _, _ = condicion_texto("nombre", nombre)
+        return consultar_pagina(
+            "SELECT id, nombre, descripcion FROM departamentos",
+            ('nombre', 'id'), tamano=tamano, token=token,
+            condiciones=(condicion,), params=params
+        )
 
     def actualizar(self, id_, cambios: dict):
         campos = []
@@ -50,65 +83,78 @@ class DepartamentoRepo:
             valores.append(v)
         valores.append(id_)
         sql = f"UPDATE departamentos SET {', '.join(campos)} WHERE id=%s"
-        conn = Database.get_connection()
-        try:
+        with Database.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, tuple(valores))
-            conn.commit()
-        finally:
-            conn.close()
 
     def eliminar(self, id_):
         sql = "DELETE FROM departamentos WHERE id=%s"
-        conn = Database.get_connection()
-        try:
+        with Database.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, (id_,))
-            conn.commit()
-        finally:
-            conn.close()
 
 
-class ProyectoRepo:
+class ProyectoRepo(Hidratacion):
+    modelo = Proyecto
+
     def crear(self, proyecto):
         sql = "INSERT INTO proyectos (id, nombre, descripcion, fecha_inicio, fecha_fin, created_at, activo) VALUES (%s,%s,%s,%s,%s,NOW(),TRUE)"
-        conn = Database.get_connection()
-        try:
+        with Database.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, (proyecto.id, proyecto.nombre, proyecto.descripcion, proyecto.fecha_inicio, proyecto.fecha_fin))
-            conn.commit()
-        finally:
-            conn.close()
+
+    def crear_muchos(self, proyectos, tamano_lote=TAMANO_LOTE_DEFECTO):
+        """Inserta varios proyectos en lotes; retorna tiempos y filas por lote"""
+        sql = "INSERT INTO proyectos (id, nombre, descripcion, fecha_inicio, fecha_fin, created_at, activo) VALUES (%s,%s,%s,%s,%s,%s,%s)"
+        ahora = datetime.now()
+        filas = ((p.id, p.nombre, p.descripcion, p.fecha_inicio, p.fecha_fin, ahora, True) for p in proyectos)
+        return insertar_en_lotes(sql, filas, tamano_lote)
 
     def listar_todos(self):
         sql = "SELECT id, nombre, descripcion, fecha_inicio, fecha_fin FROM proyectos"
-        conn = Database.get_connection()
-        try:
+        with Database.lectura() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql)
-                return cur.fetchall()
-        finally:
-            conn.close()
+                return self._todas(cur.fetchall())
+
+    def iterar_todos(self, tamano_bloque=None):
+        """Generador de todos los proyectos con memoria constante"""
+        sql = "SELECT id, nombre, descripcion, fecha_inicio, fecha_fin FROM proyectos"
+        return self._iterar(Database.iterar(sql, tamano_bloque=tamano_bloque))
 
     def obtener_por_id(self, id_):
         sql = "SELECT id, nombre, descripcion, fecha_inicio, fecha_fin FROM proyectos WHERE id=%s"
-        conn = Database.get_connection()
-        try:
+        with Database.lectura() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, (id_,))
-                return cur.fetchone()
-        finally:
-            conn.close()
+                return self._una(cur.fetchone())
+
+    def obtener_por_ids(self, ids):
+        """Varios proyectos en una consulta por bloque de ids: {id: fila}"""
+        return self._por_ids(consultar_por_ids("SELECT id, nombre, descripcion, fecha_inicio, fecha_fin FROM proyectos", ids))
 
     def buscar_por_nombre(self, nombre):
-        sql = "SELECT id, nombre, descripcion FROM proyectos WHERE nombre LIKE %s"
-        conn = Database.get_connection()
-        try:
-            with conn.cursor() as cur:
-                cur.execute(sql, (f"%{nombre}%",))
-                return cur.fetchall()
-        finally:
-            conn.close()
+        return buscar_texto("id, nombre, descripcion", "proyectos", "nombre", nombre, limite=None)
+
+    def buscar_texto(self, termino, modo='frase', limite=50):
+        """Búsqueda FULLTEXT por nombre ordenada por relevancia (modos: frase, natural, prefijo)"""
+        return buscar_texto("id, nombre, descripcion", "proyectos", "nombre", termino, modo, limite)
+
+    def listar_pagina(self, tamano=TAMANO_PAGINA_DEFECTO, token=None):
+        """Página de proyectos ordenados por nombre: {'filas', 'siguiente'}"""
+        return self._pagina(consultar_pagina(
+            "SELECT id, nombre, descripcion, fecha_inicio, fecha_fin FROM proyectos",
+            ('nombre', 'id'), tamano=tamano, token=token
+        ))
+
+    def buscar_por_nombre_pagina(self, nombre, tamano=TAMANO_PAGINA_DEFECTO, token=None):
+        """Página de proyectos cuyo nombre contiene el texto: {'filas', 'siguiente'}"""
+        condicion, params, _, _ = condicion_texto("nombre", nombre)
+        return consultar_pagina(
+            "SELECT id, nombre, descripcion FROM proyectos",
+            ('nombre', 'id'), tamano=tamano, token=token,
+            condiciones=(condicion,), params=params
+        )
 
     def actualizar(self, id_, cambios: dict):
         campos = []
@@ -118,65 +164,84 @@ class ProyectoRepo:
             valores.append(v)
         valores.append(id_)
         sql = f"UPDATE proyectos SET {', '.join(campos)} WHERE id=%s"
-        conn = Database.get_connection()
-        try:
+        with Database.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, tuple(valores))
-            conn.commit()
-        finally:
-            conn.close()
 
     def eliminar(self, id_):
         sql = "DELETE FROM proyectos WHERE id=%s"
-        conn = Database.get_connection()
-        try:
+        with Database.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, (id_,))
-            conn.commit()
-        finally:
-            conn.close()
 
 
-class EmpleadoRepo:
+class EmpleadoRepo(Hidratacion):
+    modelo = Empleado
+
     def crear(self, empleado):
         sql = "INSERT INTO empleados (id, usuario_id, nombre, direccion, telefono, email, fecha_inicio_contrato, salario, departamento_id, created_at) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,NOW())"
-        conn = Database.get_connection()
-        try:
+        with Database.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, (empleado.id, empleado.usuario_id, empleado.nombre, None, None, empleado.email, empleado.fecha_inicio_contrato, empleado.salario, empleado.departamento_id))
-            conn.commit()
-        finally:
-            conn.close()
+
+    def crear_muchos(self, empleados, tamano_lote=TAMANO_LOTE_DEFECTO):
+        """Inserta varios empleados en lotes; retorna tiempos y filas por lote"""
+        sql = "INSERT INTO empleados (id, usuario_id, nombre, direccion, telefono, email, fecha_inicio_contrato, salario, departamento_id, created_at) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)"
+        ahora = datetime.now()
+        filas = (
+            (e.id, e.usuario_id, e.nombre, None, None, e.email, e.fecha_inicio_contrato, e.salario, e.departamento_id, ahora)
+            for e in empleados
+        )
+        return insertar_en_lotes(sql, filas, tamano_lote)
 
     def listar_todos(self):
         sql = "SELECT id, usuario_id, nombre, email, fecha_inicio_contrato, salario, departamento_id FROM empleados"
-        conn = Database.get_connection()
-        try:
+        with Database.lectura() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql)
-                return cur.fetchall()
-        finally:
-            conn.close()
+                return self._todas(cur.fetchall())
+
+    def iterar_todos(self, tamano_bloque=None):
+        """Generador de todos los empleados con memoria constante"""
+        sql = "SELECT id, usuario_id, nombre, email, fecha_inicio_contrato, salario, departamento_id FROM empleados"
+        return self._iterar(Database.iterar(sql, tamano_bloque=tamano_bloque))
 
     def obtener_por_id(self, id_):
         sql = "SELECT id, usuario_id, nombre, email, fecha_inicio_contrato, salario, departamento_id FROM empleados WHERE id=%s"
-        conn = Database.get_connection()
-        try:
+        with Database.lectura() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, (id_,))
-                return cur.fetchone()
-        finally:
-            conn.close()
+                return self._una(cur.fetchone())
+
+    def obtener_por_ids(self, ids):
+        """Varios empleados en una consulta por bloque de ids: {id: fila}"""
+        return self._por_ids(consultar_por_ids(
+            "SELECT id, usuario_id, nombre, email, fecha_inicio_contrato, salario, departamento_id FROM empleados",
+            ids
+        ))
 
     def buscar_por_nombre(self, nombre):
-        sql = "SELECT id, usuario_id, nombre, email FROM empleados WHERE nombre LIKE %s"
-        conn = Database.get_connection()
-        try:
-            with conn.cursor() as cur:
-                cur.execute(sql, (f"%{nombre}%",))
-                return cur.fetchall()
-        finally:
-            conn.close()
+        return buscar_texto("id, usuario_id, nombre, email", "empleados", "nombre", nombre, limite=None)
+
+    def buscar_texto(self, termino, modo='frase', limite=50):
+        """Búsqueda FULLTEXT por nombre ordenada por relevancia (modos: frase, natural, prefijo)"""
+        return buscar_texto("id, usuario_id, nombre, email", "empleados", "nombre", termino, modo, limite)
+
+    def listar_pagina(self, tamano=TAMANO_PAGINA_DEFECTO, token=None):
+        """Página de empleados ordenados por nombre: {'filas', 'siguiente'}"""
+        return self._pagina(consultar_pagina(
+            "SELECT id, usuario_id, nombre, email, fecha_inicio_contrato, salario, departamento_id FROM empleados",
+            ('nombre', 'id'), tamano=tamano, token=token
+        ))
+
+    def buscar_por_nombre_pagina(self, nombre, tamano=TAMANO_PAGINA_DEFECTO, token=None):
+        """Página de empleados cuyo nombre contiene el texto: {'filas', 'siguiente'}"""
+        condicion, params, _, _ = condicion_texto("nombre", nombre)
+        return consultar_pagina(
+            "SELECT id, usuario_id, nombre, email FROM empleados",
+            ('nombre', 'id'), tamano=tamano, token=token,
+            condiciones=(condicion,), params=params
+        )
 
     def actualizar(self, id_, cambios: dict):
         campos = []
@@ -186,30 +251,134 @@ class EmpleadoRepo:
             valores.append(v)
         valores.append(id_)
         sql = f"UPDATE empleados SET {', '.join(campos)} WHERE id=%s"
-        conn = Database.get_connection()
-        try:
+        with Database.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, tuple(valores))
-            conn.commit()
-        finally:
-            conn.close()
 
     def eliminar(self, id_):
         sql = "DELETE FROM empleados WHERE id=%s"
-        conn = Database.get_connection()
-        try:
+        with Database.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, (id_,))
-            conn.commit()
-        finally:
-            conn.close()
 
 
-class LogClimaRepo:
+# Resumen por ciudad mantenido junto con cada inserción en logs_clima.
+# Las sumas y conteos se acumulan; los promedios se calculan al leer.
+_COLUMNAS_RESUMEN = """
+    ciudad, pais, total_consultas, suma_aqi, aqi_minimo, aqi_maximo,
+    suma_pm2_5, consultas_pm2_5, suma_pm10, consultas_pm10, ultima_consulta
+"""
+
+_ACUMULAR_RESUMEN = """
+ON DUPLICATE KEY UPDATE
+    total_consultas = total_consultas + VALUES(total_consultas),
+    suma_aqi = suma_aqi + VALUES(suma_aqi),
+    aqi_minimo = LEAST(aqi_minimo, VALUES(aqi_minimo)),
+    aqi_maximo = GREATEST(aqi_maximo, VALUES(aqi_maximo)),
+    suma_pm2_5 = suma_pm2_5 + VALUES(suma_pm2_5),
+    consultas_pm2_5 = consultas_pm2_5 + VALUES(consultas_pm2_5),
+    suma_pm10 = suma_pm10 + VALUES(suma_pm10),
+    consultas_pm10 = consultas_pm10 + VALUES(consultas_pm10),
+    ultima_consulta = GREATEST(COALESCE(ultima_consulta, VALUES(ultima_consulta)),
+                               COALESCE(VALUES(ultima_consulta), ultima_consulta))
+"""
+
+
+class LogClimaRepo(Hidratacion):
     """Repositorio para gestionar logs de consultas de calidad del aire"""
-    
+
+    modelo = LogClima
+    _buffer = None
+    _lock_buffer = threading.Lock()
+
+    # SQL compartido con AsyncLogClimaRepo
+    _SQL_INSERTAR_MUCHOS = """
+    INSERT INTO logs_clima (
+        id, ciudad, pais, aqi, co, no2, o3, so2, pm2_5, pm10, nh3,
+        latitud, longitud, usuario_id, proyecto_id, fecha_consulta, created_at
+    ) VALUES (
+        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+    )
+    """
+    _SQL_INSERTAR_RESUMEN = (f"INSERT INTO logs_clima_resumen_ciudad ({_COLUMNAS_RESUMEN}) "
+                             f"VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) {_ACUMULAR_RESUMEN}")
+    _SQL_ESTADISTICAS_CIUDAD = """
+    SELECT 
+        ciudad,
+        pais,
+        total_consultas,
+        suma_aqi * 1.0 / total_consultas as aqi_promedio,
+        aqi_maximo,
+        aqi_minimo,
+        suma_pm2_5 * 1.0 / NULLIF(consultas_pm2_5, 0) as pm2_5_promedio,
+        suma_pm10 * 1.0 / NULLIF(consultas_pm10, 0) as pm10_promedio,
+        ultima_consulta
+    FROM logs_clima_resumen_ciudad 
+    WHERE {condiciones}
+    ORDER BY total_consultas DESC, ciudad, pais
+    """
+    _SQL_CIUDADES_CONSULTADAS = """
+    SELECT ciudad, pais, total_consultas as consultas
+    FROM logs_clima_resumen_ciudad 
+    ORDER BY consultas DESC, ciudad ASC
+    """
+
+    def __init__(self, tipado=False, diferido=None):
+        """
+        Args:
+            tipado: Lecturas por entidad como LogClima en vez de dict
+            diferido: `crear` escribe en segundo plano vía spool (por defecto
+                LOGS_CLIMA_ESCRITURA_DIFERIDA=1)
+        """
+        super().__init__(tipado)
+        if diferido is None:
+            diferido = os.getenv('LOGS_CLIMA_ESCRITURA_DIFERIDA', '0') == '1'
+        self.diferido = diferido
+
+    @classmethod
+    def buffer_diferido(cls):
+        """BufferLogsClima compartido por el proceso (se crea, recupera el spool y arranca al primer uso)"""
+        if cls._buffer is None:
+            with cls._lock_buffer:
+                if cls._buffer is None:
+                    buffer = BufferLogsClima(
+                        cls(diferido=False),
+                        ruta=os.getenv('LOGS_CLIMA_SPOOL', 'logs_clima.spool'),
+                        tamano_lote=int(os.getenv('LOGS_CLIMA_LOTE', '500')),
+                        intervalo=float(os.getenv('LOGS_CLIMA_INTERVALO_MS', '1000')) / 1000,
+                        fsync=os.getenv('LOGS_CLIMA_SPOOL_FSYNC', '1') == '1',
+                        max_intentos=int(os.getenv('LOGS_CLIMA_MAX_INTENTOS', '5')),
+                    )
+                    buffer.start()
+                    cls._buffer = buffer
+        return cls._buffer
+
+    @classmethod
+    def detener_escritura_diferida(cls):
+        """Escribe las lecturas pendientes y detiene el hilo (el próximo `crear` diferido crea otro)"""
+        with cls._lock_buffer:
+            buffer, cls._buffer = cls._buffer, None
+        if buffer is not None:
+            buffer.detener()
+
+    @classmethod
+    def estado_escritura_diferida(cls):
+        """Métricas del buffer diferido, o None si aún no se usó"""
+        buffer = cls._buffer
+        return buffer.estado() if buffer is not None else None
+
     def crear(self, log_clima):
-        """Guarda un nuevo registro de consulta de clima en la base de datos"""
+        """
+        Guarda un nuevo registro de consulta de clima en la base de datos.
+
+        En modo diferido lo deja en el spool y retorna sin esperar al INSERT;
+        `fecha_consulta` queda fijada al momento de la llamada. Dentro de una
+        unidad de trabajo la lectura entra al spool recién al confirmarla (si se
+        revierte no se guarda), aunque su INSERT sigue siendo un lote aparte.
+        """
+        if self.diferido:
+            al_confirmar(lambda: self.buffer_diferido().agregar(log_clima))
+            return
         sql = """
         INSERT INTO logs_clima (
             id, ciudad, pais, aqi, co, no2, o3, so2, pm2_5, pm10, nh3,
@@ -218,8 +387,7 @@ class LogClimaRepo:
             %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW()
         )
         """
-        conn = Database.get_connection()
-        try:
+        with Database.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, (
                     log_clima.id,
@@ -238,49 +406,193 @@ class LogClimaRepo:
                     log_clima.usuario_id,
                     log_clima.proyecto_id
                 ))
-            conn.commit()
-        finally:
-            conn.close()
+                cur.execute(
+                    f"INSERT INTO logs_clima_resumen_ciudad ({_COLUMNAS_RESUMEN}) "
+                    f"VALUES (%s, %s, 1, %s, %s, %s, %s, %s, %s, %s, NOW()) {_ACUMULAR_RESUMEN}",
+                    (log_clima.ciudad, log_clima.pais, log_clima.aqi, log_clima.aqi, log_clima.aqi,
+                     log_clima.pm2_5 or 0, int(log_clima.pm2_5 is not None),
+                     log_clima.pm10 or 0, int(log_clima.pm10 is not None))
+                )
+
+    def crear_muchos(self, logs_clima, tamano_lote=TAMANO_LOTE_DEFECTO):
+        """Inserta varios registros de clima en lotes (respeta su fecha_consulta si la traen); retorna tiempos y filas por lote"""
+        ahora = datetime.now()
+        resumen, tardios = {}, set()
+        with UnitOfWork():
+            lotes = insertar_en_lotes(self._SQL_INSERTAR_MUCHOS, self._filas(logs_clima, ahora, resumen, tardios),
+                                      tamano_lote)
+            insertar_en_lotes(self._SQL_INSERTAR_RESUMEN,
+                              ((*clave, *valores, ahora) for clave, valores in resumen.items()), tamano_lote)
+            rollups.registrar_pendientes(tardios)
+        return lotes
+
+    @classmethod
+    def _filas(cls, logs_clima, ahora, resumen, tardios):
+        """
+        Filas del INSERT de `crear_muchos` (sin fecha_consulta se usa `ahora`).
+        Acumula de paso el resumen por ciudad y, en `tardios`, los días de las
+        lecturas de horas pasadas (p. ej. spool recuperado), que quedan por
+        recalcular en los rollups.
+        """
+        hora_actual = rollups.inicio_periodo('hora', ahora)
+        for l in logs_clima:
+            cls._acumular(resumen, l)
+            fecha = l.fecha_consulta or ahora
+            if fecha < hora_actual:
+                tardios.add(fecha.date())
+            yield (l.id, l.ciudad, l.pais, l.aqi, l.co, l.no2, l.o3, l.so2, l.pm2_5, l.pm10, l.nh3,
+                   l.latitud, l.longitud, l.usuario_id, l.proyecto_id, fecha, ahora)
+
+    @staticmethod
+    def _acumular(resumen, log):
+        """Suma un registro al resumen en memoria {(ciudad, pais): [total, suma_aqi, min, max, ...]}"""
+        clave = (log.ciudad, log.pais)
+        pm2_5 = log.pm2_5 is not None
+        pm10 = log.pm10 is not None
+        actual = resumen.get(clave)
+        if actual is None:
+            resumen[clave] = [1, log.aqi, log.aqi, log.aqi,
+                              log.pm2_5 or 0, int(pm2_5), log.pm10 or 0, int(pm10)]
+            return
+        actual[0] += 1
+        actual[1] += log.aqi
+        actual[2] = min(actual[2], log.aqi)
+        actual[3] = max(actual[3], log.aqi)
+        actual[4] += log.pm2_5 or 0
+        actual[5] += int(pm2_5)
+        actual[6] += log.pm10 or 0
+        actual[7] += int(pm10)
     
-    def listar_todos(self, limit=50):
-        """Obtiene todos los registros de clima (limitado por defecto)"""
-        sql = """
+    @staticmethod
+    def _rango_fechas(desde=None, hasta=None):
+        """
+        Predicados sobre fecha_consulta para que MySQL descarte particiones.
+
+        Sin rango no se agrega ninguno: los listados ordenados por fecha con
+        LIMIT solo leen el final del índice de cada partición.
+        """
+        condiciones, params = [], []
+        if desde is not None:
+            condiciones.append("fecha_consulta >= %s")
+            params.append(desde)
+        if hasta is not None:
+            condiciones.append("fecha_consulta < %s")
+            params.append(hasta)
+        return condiciones, params
+
+    def listar_todos(self, limit=50, desde=None, hasta=None):
+        """Obtiene los registros de clima más recientes (limitado por defecto)"""
+        condiciones, params = self._rango_fechas(desde, hasta)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        sql = f"""
         SELECT 
             id, ciudad, pais, aqi, co, no2, o3, so2, pm2_5, pm10, nh3,
             latitud, longitud, usuario_id, proyecto_id, fecha_consulta
         FROM logs_clima 
+        {where}
         ORDER BY fecha_consulta DESC 
         LIMIT %s
         """
-        conn = Database.get_connection()
-        try:
+        with Database.lectura() as conn:
             with conn.cursor() as cur:
-                cur.execute(sql, (limit,))
-                return cur.fetchall()
-        finally:
-            conn.close()
+                cur.execute(sql, (*params, limit))
+                return self._todas(cur.fetchall())
     
-    def listar_por_ciudad(self, ciudad, limit=50):
-        """Obtiene registros filtrados por ciudad"""
-        sql = """
+    def listar_pagina(self, tamano=TAMANO_PAGINA_DEFECTO, token=None, desde=None, hasta=None):
+        """Página del historial de clima, más reciente primero: {'filas', 'siguiente'}"""
+        condiciones, params = self._rango_fechas(desde, hasta)
+        return self._pagina(consultar_pagina(
+            """
+            SELECT 
+                id, ciudad, pais, aqi, co, no2, o3, so2, pm2_5, pm10, nh3,
+                latitud, longitud, usuario_id, proyecto_id, fecha_consulta
+            FROM logs_clima
+            """,
+            ('fecha_consulta', 'id'), descendente=True, tamano=tamano, token=token,
+            condiciones=condiciones, params=params
+        ))
+    
+    def iterar_todos(self, tamano_bloque=None, desde=None, hasta=None):
+        """Generador del historial de clima (más antiguo primero) con memoria constante"""
+        condiciones, params = self._rango_fechas(desde, hasta)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        sql = f"""
         SELECT 
             id, ciudad, pais, aqi, co, no2, o3, so2, pm2_5, pm10, nh3,
             latitud, longitud, usuario_id, proyecto_id, fecha_consulta
         FROM logs_clima 
-        WHERE ciudad LIKE %s
+        {where}
+        ORDER BY fecha_consulta
+        """
+        return self._iterar(Database.iterar(sql, tuple(params) or None, tamano_bloque=tamano_bloque))
+
+    def iterar_mediciones(self, desde=None, hasta=None, tamano_bloque=None):
+        """
+        Generador de lecturas para análisis (más antiguas primero): solo
+        ubicación, fecha, AQI y contaminantes, sin ids ni coordenadas
+        """
+        condiciones, params = self._rango_fechas(desde, hasta)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        sql = f"""
+        SELECT ciudad, pais, fecha_consulta, {', '.join(rollups.METRICAS)}
+        FROM logs_clima
+        {where}
+        ORDER BY fecha_consulta
+        """
+        return Database.iterar(sql, tuple(params) or None, tamano_bloque=tamano_bloque)
+
+    @staticmethod
+    def _filtro_ciudad(ciudad, pais=None):
+        """
+        Prefijo (LIKE 'x%', no '%x%') para aceptar nombres parciales y aun así
+        recorrer solo un rango de idx_logs_clima_ciudad_pais_fecha; la colación
+        *_ci ignora mayúsculas.
+        """
+        if pais:
+            return ["ciudad LIKE %s", "pais = %s"], [f"{ciudad}%", pais]
+        return ["ciudad LIKE %s"], [f"{ciudad}%"]
+
+    def listar_por_ciudad(self, ciudad, limit=50, pais=None, desde=None, hasta=None):
+        """Obtiene registros de una ciudad (opcionalmente de un país)"""
+        condiciones, params = self._filtro_ciudad(ciudad, pais)
+        rango, params_rango = self._rango_fechas(desde, hasta)
+        sql = f"""
+        SELECT 
+            id, ciudad, pais, aqi, co, no2, o3, so2, pm2_5, pm10, nh3,
+            latitud, longitud, usuario_id, proyecto_id, fecha_consulta
+        FROM logs_clima 
+        WHERE {' AND '.join(condiciones + rango)}
         ORDER BY fecha_consulta DESC 
         LIMIT %s
         """
-        conn = Database.get_connection()
-        try:
+        with Database.lectura() as conn:
             with conn.cursor() as cur:
-                cur.execute(sql, (f"%{ciudad}%", limit))
-                return cur.fetchall()
-        finally:
-            conn.close()
+                cur.execute(sql, (*params, *params_rango, limit))
+                return self._todas(cur.fetchall())
     
-    def obtener_por_id(self, id_):
-        """Obtiene un registro específico por su ID"""
+    def listar_por_ciudad_pagina(self, ciudad, tamano=TAMANO_PAGINA_DEFECTO, token=None, pais=None,
+                                 desde=None, hasta=None):
+        """Página de registros de una ciudad, más reciente primero: {'filas', 'siguiente'}"""
+        condiciones, params = self._filtro_ciudad(ciudad, pais)
+        rango, params_rango = self._rango_fechas(desde, hasta)
+        return self._pagina(consultar_pagina(
+            """
+            SELECT 
+                id, ciudad, pais, aqi, co, no2, o3, so2, pm2_5, pm10, nh3,
+                latitud, longitud, usuario_id, proyecto_id, fecha_consulta
+            FROM logs_clima
+            """,
+            ('fecha_consulta', 'id'), descendente=True, tamano=tamano, token=token,
+            condiciones=condiciones + rango, params=params + params_rango
+        ))
+    
+    def obtener_por_id(self, id_, fecha_consulta=None):
+        """
+        Obtiene un registro específico por su ID.
+
+        Con `fecha_consulta` la búsqueda va a una sola partición; sin ella se
+        revisa el índice de cada partición.
+        """
         sql = """
         SELECT 
             id, ciudad, pais, aqi, co, no2, o3, so2, pm2_5, pm10, nh3,
@@ -288,71 +600,216 @@ class LogClimaRepo:
         FROM logs_clima 
         WHERE id=%s
         """
-        conn = Database.get_connection()
-        try:
+        params = [id_]
+        if fecha_consulta is not None:
+            sql += " AND fecha_consulta=%s"
+            params.append(fecha_consulta)
+        with Database.lectura() as conn:
             with conn.cursor() as cur:
-                cur.execute(sql, (id_,))
-                return cur.fetchone()
-        finally:
-            conn.close()
+                cur.execute(sql, tuple(params))
+                return self._una(cur.fetchone())
     
-    def listar_por_usuario(self, usuario_id, limit=50):
+    def obtener_por_ids(self, ids, primario=False):
+        """Varios registros en una consulta por bloque de ids: {id: fila} (del primario si `primario`)"""
+        return self._por_ids(consultar_por_ids(
+            """
+            SELECT
+                id, ciudad, pais, aqi, co, no2, o3, so2, pm2_5, pm10, nh3,
+                latitud, longitud, usuario_id, proyecto_id, fecha_consulta
+            FROM logs_clima
+            """,
+            ids, primario=primario
+        ))
+    
+    def listar_por_usuario(self, usuario_id, limit=50, desde=None, hasta=None):
         """Obtiene registros de un usuario específico"""
-        sql = """
+        rango, params_rango = self._rango_fechas(desde, hasta)
+        sql = f"""
         SELECT 
             id, ciudad, pais, aqi, co, no2, o3, so2, pm2_5, pm10, nh3,
             latitud, longitud, usuario_id, proyecto_id, fecha_consulta
         FROM logs_clima 
-        WHERE usuario_id=%s
+        WHERE {' AND '.join(["usuario_id=%s"] + rango)}
         ORDER BY fecha_consulta DESC 
         LIMIT %s
         """
-        conn = Database.get_connection()
-        try:
+        with Database.lectura() as conn:
             with conn.cursor() as cur:
-                cur.execute(sql, (usuario_id, limit))
-                return cur.fetchall()
-        finally:
-            conn.close()
+                cur.execute(sql, (usuario_id, *params_rango, limit))
+                return self._todas(cur.fetchall())
     
-    def obtener_estadisticas_por_ciudad(self, ciudad):
-        """Obtiene estadísticas agregadas de una ciudad"""
-        sql = """
+    def listar_por_usuario_pagina(self, usuario_id, tamano=TAMANO_PAGINA_DEFECTO, token=None,
+                                  desde=None, hasta=None):
+        """Página de registros de un usuario, más reciente primero: {'filas', 'siguiente'}"""
+        rango, params_rango = self._rango_fechas(desde, hasta)
+        return self._pagina(consultar_pagina(
+            """
+            SELECT 
+                id, ciudad, pais, aqi, co, no2, o3, so2, pm2_5, pm10, nh3,
+                latitud, longitud, usuario_id, proyecto_id, fecha_consulta
+            FROM logs_clima
+            """,
+            ('fecha_consulta', 'id'), descendente=True, tamano=tamano, token=token,
+            condiciones=["usuario_id=%s"] + rango, params=[usuario_id] + params_rango
+        ))
+    
+    def listar_por_proyecto(self, proyecto_id, limit=50, desde=None, hasta=None):
+        """Obtiene los registros asociados a un proyecto, más reciente primero"""
+        rango, params_rango = self._rango_fechas(desde, hasta)
+        sql = f"""
         SELECT 
-            ciudad,
-            pais,
-            COUNT(*) as total_consultas,
-            AVG(aqi) as aqi_promedio,
-            MAX(aqi) as aqi_maximo,
-            MIN(aqi) as aqi_minimo,
-            AVG(pm2_5) as pm2_5_promedio,
-            AVG(pm10) as pm10_promedio,
-            MAX(fecha_consulta) as ultima_consulta
+            id, ciudad, pais, aqi, co, no2, o3, so2, pm2_5, pm10, nh3,
+            latitud, longitud, usuario_id, proyecto_id, fecha_consulta
         FROM logs_clima 
-        WHERE ciudad LIKE %s
-        GROUP BY ciudad, pais
+        WHERE {' AND '.join(["proyecto_id=%s"] + rango)}
+        ORDER BY fecha_consulta DESC 
+        LIMIT %s
+        """
+        with Database.lectura() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (proyecto_id, *params_rango, limit))
+                return self._todas(cur.fetchall())
+    
+    def obtener_estadisticas_por_ciudad(self, ciudad, pais=None):
+        """
+        Estadísticas agregadas de las ciudades que empiezan por `ciudad`: una
+        fila por (ciudad, pais), la más consultada primero
         """
-        conn = Database.get_connection()
-        try:
+        condiciones, params = self._filtro_ciudad(ciudad, pais)
+        sql = self._SQL_ESTADISTICAS_CIUDAD.format(condiciones=' AND '.join(condiciones))
+        with Database.lectura() as conn:
             with conn.cursor() as cur:
-                cur.execute(sql, (f"%{ciudad}%",))
-                return cur.fetchone()
-        finally:
-            conn.close()
+                cur.execute(sql, tuple(params))
+                return cur.fetchall()
     
     def listar_ciudades_consultadas(self):
         """Obtiene lista de ciudades únicas consultadas"""
-        sql = """
-        SELECT DISTINCT ciudad, pais, COUNT(*) as consultas
-        FROM logs_clima 
-        GROUP BY ciudad, pais
-        ORDER BY consultas DESC, ciudad ASC
+        with Database.lectura() as conn:
+            with conn.cursor() as cur:
+                cur.execute(self._SQL_CIUDADES_CONSULTADAS)
+                return cur.fetchall()
+    
+    def iterar_ciudades_consultadas(self, tamano_bloque=None):
+        """Generador de ciudades únicas consultadas con memoria constante"""
+        return Database.iterar(self._SQL_CIUDADES_CONSULTADAS, tamano_bloque=tamano_bloque)
+
+    RESOLUCIONES = {
+        'cruda': timedelta(0),
+        'hora': timedelta(hours=1),
+        'dia': timedelta(days=1),
+    }
+
+    def serie_temporal(self, ciudad, pais, desde, hasta=None, resolucion='hora'):
+        """
+        Serie de calidad del aire de una ciudad entre `desde` y `hasta`.
+
+        Usa el rollup más grueso cuyo período no supera `resolucion` (días para
+        resoluciones de un día o más, horas desde una hora) y cae a las lecturas
+        crudas si se pide menos de una hora.
+
+        Args:
+            ciudad, pais: Ubicación
+            desde, hasta: Rango [desde, hasta) como datetime (hasta = ahora)
+            resolucion: 'cruda', 'hora', 'dia' o un timedelta
+
+        Returns:
+            Filas con periodo, lecturas y <metrica>_promedio/_minimo/_maximo
+            para aqi y cada contaminante
+        """
+        if not isinstance(resolucion, timedelta):
+            if resolucion not in self.RESOLUCIONES:
+                raise ValueError(f"Resolución inválida: {resolucion}")
+            resolucion = self.RESOLUCIONES[resolucion]
+        hasta = hasta or datetime.now()
+
+        nivel = rollups.elegir_nivel(resolucion)
+        if nivel is not None:
+            return rollups.consultar_serie(nivel, ciudad, pais, desde, hasta)
+
+        valores = ', '.join(
+            f"{m} AS {m}_promedio, {m} AS {m}_minimo, {m} AS {m}_maximo" for m in rollups.METRICAS
+        )
+        sql = f"""
+        SELECT fecha_consulta AS periodo, 1 AS lecturas, {valores}
+        FROM logs_clima
+        WHERE ciudad = %s AND pais = %s AND fecha_consulta >= %s AND fecha_consulta < %s
+        ORDER BY fecha_consulta
         """
-        conn = Database.get_connection()
-        try:
+        with Database.lectura() as conn:
             with conn.cursor() as cur:
-                cur.execute(sql)
+                cur.execute(sql, (ciudad, pais, desde, hasta))
                 return cur.fetchall()
-        finally:
-            conn.close()
 
+    def reconstruir_resumen(self, tamano_bloque=5000):
+        """
+        Recalcula logs_clima_resumen_ciudad desde logs_clima por rangos de id.
+
+        Cada bloque se agrega en SQL y se suma al resumen en su propia
+        transacción, sin bloquear la tabla completa. Debe ejecutarse sin
+        inserciones concurrentes (las filas nuevas se contarían dos veces).
+
+        Returns:
+            Lista con un dict por bloque: {'bloque', 'filas', 'segundos'}
+        """
+        with Database.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM logs_clima_resumen_ciudad")
+
+        sql_limite = """
+        SELECT MAX(id) AS hasta, COUNT(*) AS filas
+        FROM (SELECT id FROM logs_clima WHERE id > %s ORDER BY id LIMIT %s) AS bloque
+        """
+        sql_acumular = f"""
+        INSERT INTO logs_clima_resumen_ciudad ({_COLUMNAS_RESUMEN})
+        SELECT
+            ciudad, pais, COUNT(*), SUM(aqi), MIN(aqi), MAX(aqi),
+            COALESCE(SUM(pm2_5), 0), COUNT(pm2_5), COALESCE(SUM(pm10), 0), COUNT(pm10),
+            MAX(fecha_consulta)
+        FROM logs_clima
+        WHERE id > %s AND id <= %s
+        GROUP BY ciudad, pais
+        {_ACUMULAR_RESUMEN}
+        """
+        resultados = []
+        desde = ''
+        while True:
+            inicio = time.perf_counter()
+            with Database.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(sql_limite, (desde, tamano_bloque))
+                    limite = cur.fetchone()
+                    if not limite['filas']:
+                        break
+                    cur.execute(sql_acumular, (desde, limite['hasta']))
+            resultados.append({
+                'bloque': len(resultados) + 1,
+                'filas': limite['filas'],
+                'segundos': time.perf_counter() - inicio,
+            })
+            desde = limite['hasta']
+        return resultados
+
+    def recalcular_resumen(self, ciudades):
+        """
+        Recalcula desde logs_clima las filas del resumen de `ciudades`
+        [(ciudad, pais)] en una transacción; las que ya no tienen lecturas se
+        eliminan. Se usa tras purgar particiones (min/max no se pueden restar).
+        """
+        ciudades = list(ciudades)
+        if not ciudades:
+            return
+        sql_recalcular = f"""
+        INSERT INTO logs_clima_resumen_ciudad ({_COLUMNAS_RESUMEN})
+        SELECT
+            ciudad, pais, COUNT(*), SUM(aqi), MIN(aqi), MAX(aqi),
+            COALESCE(SUM(pm2_5), 0), COUNT(pm2_5), COALESCE(SUM(pm10), 0), COUNT(pm10),
+            MAX(fecha_consulta)
+        FROM logs_clima
+        WHERE ciudad = %s AND pais = %s
+        GROUP BY ciudad, pais
+        """
+        with Database.connection() as conn:
+            with conn.cursor() as cur:
+                cur.executemany("DELETE FROM logs_clima_resumen_ciudad WHERE ciudad = %s AND pais = %s", ciudades)
+                for clave in ciudades:
+                    cur.execute(sql_recalcular, clave)
@@ -0,0 +1,291 @@
+"""
+Repositorios asíncronos (aiomysql) con los mismos nombres de método que sus
+equivalentes síncronos de `persistencia.repositorios`.
+
+Cubren departamentos, proyectos, empleados y logs de clima; usuarios y roles
+están en `persistencia.auth_repositorios_async`. Cada llamada toma su propia
+conexión del pool, por lo que se pueden lanzar cientos en paralelo con
+`asyncio.gather`; el pool (DB_ASYNC_POOL_MAX) limita cuántas llegan a MySQL a
+la vez y el resto espera sin bloquear el loop.
+"""
+from datetime import datetime
+
+from .async_db import AsyncDatabase, insertar_en_lotes, consultar_pagina, consultar_por_ids
+from .lotes import TAMANO_LOTE_DEFECTO
+from .paginacion import TAMANO_PAGINA_DEFECTO
+from .repositorios import LogClimaRepo
+from .rollups import SQL_REGISTRAR_PENDIENTE
+
+
+async def _todas(sql, params=None):
+    async with AsyncDatabase.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(sql, params)
+            return await cur.fetchall()
+
+
+async def _una(sql, params=None):
+    async with AsyncDatabase.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(sql, params)
+            return await cur.fetchone()
+
+
+async def _ejecutar(sql, params=None):
+    async with AsyncDatabase.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(sql, params)
+            return cur.rowcount
+
+
+async def _actualizar(tabla, id_, cambios):
+    campos = []
+    valores = []
+    for k, v in cambios.items():
+        campos.append(f"{k}=%s")
+        valores.append(v)
+    valores.append(id_)
+    return await _ejecutar(f"UPDATE {tabla} SET {', '.join(campos)} WHERE id=%s", tuple(valores))
+
+
+class AsyncDepartamentoRepo:
+    _COLUMNAS = "id, nombre, descripcion"
+
+    async def crear(self, departamento):
+        sql = "INSERT INTO departamentos (id, nombre, descripcion, created_at, activo) VALUES (%s, %s, %s, NOW(), TRUE)"
+        await _ejecutar(sql, (departamento.id, departamento.nombre, departamento.descripcion))
+
+    async def crear_muchos(self, departamentos, tamano_lote=TAMANO_LOTE_DEFECTO):
+        """Inserta varios departamentos en lotes; retorna tiempos y filas por lote"""
+        sql = "INSERT INTO departamentos (id, nombre, descripcion, created_at, activo) VALUES (%s, %s, %s, %s, %s)"
+        ahora = datetime.now()
+        filas = ((d.id, d.nombre, d.descripcion, ahora, True) for d in departamentos)
+        return await insertar_en_lotes(sql, filas, tamano_lote)
+
+    async def listar_todos(self):
+        return await _todas(f"SELECT {self._COLUMNAS} FROM departamentos")
+
+    async def iterar_todos(self, tamano_bloque=None):
+        """Generador asíncrono de todos los departamentos con memoria constante"""
+        async for fila in AsyncDatabase.iterar(f"SELECT {self._COLUMNAS} FROM departamentos",
+                                               tamano_bloque=tamano_bloque):
+            yield fila
+
+    async def obtener_por_id(self, id_):
+        return await _una(f"SELECT {self._COLUMNAS} FROM departamentos WHERE id=%s", (id_,))
+
+    async def obtener_por_ids(self, ids):
+        """Varios departamentos en una consulta por bloque de ids: {id: fila}"""
+        return await consultar_por_ids(f"SELECT {self._COLUMNAS} FROM departamentos", ids)
+
+    async def listar_pagina(self, tamano=TAMANO_PAGINA_DEFECTO, token=None):
+        """Página de departamentos ordenados por nombre: {'filas', 'siguiente'}"""
+        return await consultar_pagina(
+            f"SELECT {self._COLUMNAS} FROM departamentos",
+            ('nombre', 'id'), tamano=tamano, token=token
+        )
+
+    async def actualizar(self, id_, cambios: dict):
+        await _actualizar("departamentos", id_, cambios)
+
+    async def eliminar(self, id_):
+        await _ejecutar("DELETE FROM departamentos WHERE id=%s", (id_,))
+
+
+class AsyncProyectoRepo:
+    _COLUMNAS = "id, nombre, descripcion, fecha_inicio, fecha_fin"
+
+    async def crear(self, proyecto):
+        sql = "INSERT INTO proyectos (id, nombre, descripcion, fecha_inicio, fecha_fin, created_at, activo) VALUES (%s,%s,%s,%s,%s,NOW(),TRUE)"
+        await _ejecutar(sql, (proyecto.id, proyecto.nombre, proyecto.descripcion, proyecto.fecha_inicio, proyecto.fecha_fin))
+
+    async def crear_muchos(self, proyectos, tamano_lote=TAMANO_LOTE_DEFECTO):
+        """Inserta varios proyectos en lotes; retorna tiempos y filas por lote"""
+        sql = "INSERT INTO proyectos (id, nombre, descripcion, fecha_inicio, fecha_fin, created_at, activo) VALUES (%s,%s,%s,%s,%s,%s,%s)"
+        ahora = datetime.now()
+        filas = ((p.id, p.nombre, p.descripcion, p.fecha_inicio, p.fecha_fin, ahora, True) for p in proyectos)
+        return await insertar_en_lotes(sql, filas, tamano_lote)
+
+    async def listar_todos(self):
+        return await _todas(f"SELECT {self._COLUMNAS} FROM proyectos")
+
+    async def iterar_todos(self, tamano_bloque=None):
+        """Generador asíncrono de todos los proyectos con memoria constante"""
+        async for fila in AsyncDatabase.iterar(f"SELECT {self._COLUMNAS} FROM proyectos",
+                                               tamano_bloque=tamano_bloque):
+            yield fila
+
+    async def obtener_por_id(self, id_):
+        return await _una(f"SELECT {self._COLUMNAS} FROM proyectos WHERE id=%s", (id_,))
+
+    async def obtener_por_ids(self, ids):
+        """Varios proyectos en una consulta por bloque de ids: {id: fila}"""
+        return await consultar_por_ids(f"SELECT {self._COLUMNAS} FROM proyectos", ids)
+
+    async def listar_pagina(self, tamano=TAMANO_PAGINA_DEFECTO, token=None):
+        """Página de proyectos ordenados por nombre: {'filas', 'siguiente'}"""
+        return await consultar_pagina(
+            f"SELECT {self._COLUMNAS} FROM proyectos",
+            ('nombre', 'id'), tamano=tamano, token=token
+        )
+
+    async def actualizar(self, id_, cambios: dict):
+        await _actualizar("proyectos", id_, cambios)
+
+    async def eliminar(self, id_):
+        await _ejecutar("DELETE FROM proyectos WHERE id=%s", (id_,))
+
+
+class AsyncEmpleadoRepo:
+    _COLUMNAS = "id, usuario_id, nombre, email, fecha_inicio_contrato, salario, departamento_id"
+
+    async def crear(self, empleado):
+        sql = "INSERT INTO empleados (id, usuario_id, nombre, direccion, telefono, email, fecha_inicio_contrato, salario, departamento_id, created_at) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,NOW())"
+        await _ejecutar(sql, (empleado.id, empleado.usuario_id, empleado.nombre, None, None, empleado.email,
+                              empleado.fecha_inicio_contrato, empleado.salario, empleado.departamento_id))
+
+    async def crear_muchos(self, empleados, tamano_lote=TAMANO_LOTE_DEFECTO):
+        """Inserta varios empleados en lotes; retorna tiempos y filas por lote"""
+        sql = "INSERT INTO empleados (id, usuario_id, nombre, direccion, telefono, email, fecha_inicio_contrato, salario, departamento_id, created_at) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)"
+        ahora = datetime.now()
+        filas = (
+            (e.id, e.usuario_id, e.nombre, None, None, e.email, e.fecha_inicio_contrato, e.salario, e.departamento_id, ahora)
+            for e in empleados
+        )
+        return await insertar_en_lotes(sql, filas, tamano_lote)
+
+    async def listar_todos(self):
+        return await _todas(f"SELECT {self._COLUMNAS} FROM empleados")
+
+    async def iterar_todos(self, tamano_bloque=None):
+        """Generador asíncrono de todos los empleados con memoria constante"""
+        async for fila in AsyncDatabase.iterar(f"SELECT {self._COLUMNAS} FROM empleados",
+                                               tamano_bloque=tamano_bloque):
+            yield fila
+
+    async def obtener_por_id(self, id_):
+        return await _una(f"SELECT {self._COLUMNAS} FROM empleados WHERE id=%s", (id_,))
+
+    async def obtener_por_ids(self, ids):
+        """Varios empleados en una consulta por bloque de ids: {id: fila}"""
+        return await consultar_por_ids(f"SELECT {self._COLUMNAS} FROM empleados", ids)
+
+    async def listar_pagina(self, tamano=TAMANO_PAGINA_DEFECTO, token=None):
+        """Página de empleados ordenados por nombre: {'filas', 'siguiente'}"""
+        return await consultar_pagina(
+            f"SELECT {self._COLUMNAS} FROM empleados",
+            ('nombre', 'id'), tamano=tamano, token=token
+        )
+
+    async def actualizar(self, id_, cambios: dict):
+        await _actualizar("empleados", id_, cambios)
+
+    async def eliminar(self, id_):
+        await _ejecutar("DELETE FROM empleados WHERE id=%s", (id_,))
+
+
+class AsyncLogClimaRepo:
+    """Versión asíncrona de LogClimaRepo (mantiene el resumen por ciudad igual que la síncrona)"""
+
+    _COLUMNAS = """
+        id, ciudad, pais, aqi, co, no2, o3, so2, pm2_5, pm10, nh3,
+        latitud, longitud, usuario_id, proyecto_id, fecha_consulta
+    """
+
+    async def crear(self, log_clima):
+        """Guarda un registro y actualiza el resumen de su ciudad en la misma transacción"""
+        await self.crear_muchos([log_clima])
+
+    async def crear_muchos(self, logs_clima, tamano_lote=TAMANO_LOTE_DEFECTO):
+        """
+        Inserta varios registros de clima en lotes (respeta su fecha_consulta si
+        la traen); el resumen por ciudad y los días tardíos de los rollups se
+        actualizan en la misma transacción. Retorna tiempos y filas por lote
+        """
+        ahora = datetime.now()
+        resumen, tardios = {}, set()
+        async with AsyncDatabase.connection() as conn:
+            lotes = await insertar_en_lotes(LogClimaRepo._SQL_INSERTAR_MUCHOS,
+                                            LogClimaRepo._filas(logs_clima, ahora, resumen, tardios),
+                                            tamano_lote, conn)
+            await insertar_en_lotes(
+                LogClimaRepo._SQL_INSERTAR_RESUMEN,
+                ((*clave, *valores, ahora) for clave, valores in resumen.items()),
+                tamano_lote, conn
+            )
+            if tardios:
+                async with conn.cursor() as cur:
+                    await cur.executemany(SQL_REGISTRAR_PENDIENTE, [(dia,) for dia in sorted(tardios)])
+        return lotes
+
+    async def listar_todos(self, limit=50, desde=None, hasta=None):
+        """Obtiene los registros de clima más recientes (limitado por defecto)"""
+        condiciones, params = LogClimaRepo._rango_fechas(desde, hasta)
+        return await self._listar(condiciones, params, limit)
+
+    async def listar_pagina(self, tamano=TAMANO_PAGINA_DEFECTO, token=None, desde=None, hasta=None):
+        """Página del historial de clima, más reciente primero: {'filas', 'siguiente'}"""
+        condiciones, params = LogClimaRepo._rango_fechas(desde, hasta)
+        return await consultar_pagina(
+            f"SELECT {self._COLUMNAS} FROM logs_clima",
+            ('fecha_consulta', 'id'), descendente=True, tamano=tamano, token=token,
+            condiciones=condiciones, params=params
+        )
+
+    async def iterar_todos(self, tamano_bloque=None, desde=None, hasta=None):
+        """Generador asíncrono del historial (más antiguo primero) con memoria constante"""
+        condiciones, params = LogClimaRepo._rango_fechas(desde, hasta)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        sql = f"SELECT {self._COLUMNAS} FROM logs_clima {where} ORDER BY fecha_consulta"
+        async for fila in AsyncDatabase.iterar(sql, tuple(params) or None, tamano_bloque=tamano_bloque):
+            yield fila
+
+    async def listar_por_ciudad(self, ciudad, limit=50, pais=None, desde=None, hasta=None):
+        """Obtiene registros de una ciudad (opcionalmente de un país)"""
+        condiciones, params = LogClimaRepo._filtro_ciudad(ciudad, pais)
+        rango, params_rango = LogClimaRepo._rango_fechas(desde, hasta)
+        return await self._listar(condiciones + rango, params + params_rango, limit)
+
+    async def listar_por_usuario(self, usuario_id, limit=50, desde=None, hasta=None):
+        """Obtiene registros de un usuario específico"""
+        rango, params_rango = LogClimaRepo._rango_fechas(desde, hasta)
+        return await self._listar(["usuario_id=%s"] + rango, [usuario_id] + params_rango, limit)
+
+    async def listar_por_proyecto(self, proyecto_id, limit=50, desde=None, hasta=None):
+        """Obtiene los registros asociados a un proyecto, más reciente primero"""
+        rango, params_rango = LogClimaRepo._rango_fechas(desde, hasta)
+        return await self._listar(["proyecto_id=%s"] + rango, [proyecto_id] + params_rango, limit)
+
+    async def _listar(self, condiciones, params, limit):
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        sql = f"""
+        SELECT {self._COLUMNAS}
+        FROM logs_clima
+        {where}
+        ORDER BY fecha_consulta DESC
+        LIMIT %s
+        """
+        return await _todas(sql, (*params, limit))
+
+    async def obtener_por_id(self, id_, fecha_consulta=None):
+        """Obtiene un registro por su ID (con fecha_consulta se consulta una sola partición)"""
+        sql = f"SELECT {self._COLUMNAS} FROM logs_clima WHERE id=%s"
+        params = [id_]
+        if fecha_consulta is not None:
+            sql += " AND fecha_consulta=%s"
+            params.append(fecha_consulta)
+        return await _una(sql, tuple(params))
+
+    async def obtener_por_ids(self, ids):
+        """Varios registros en una consulta por bloque de ids: {id: fila}"""
+        return await consultar_por_ids(f"SELECT {self._COLUMNAS} FROM logs_clima", ids)
+
+    async def obtener_estadisticas_por_ciudad(self, ciudad, pais=None):
+        """Estadísticas por (ciudad, pais) de las ciudades que empiezan por `ciudad` (desde el resumen)"""
+        condiciones, params = LogClimaRepo._filtro_ciudad(ciudad, pais)
+        sql = LogClimaRepo._SQL_ESTADISTICAS_CIUDAD.format(condiciones=' AND '.join(condiciones))
+        return await _todas(sql, tuple(params))
+
+    async def listar_ciudades_consultadas(self):
+        """Obtiene lista de ciudades únicas consultadas"""
+        return await _todas(LogClimaRepo._SQL_CIUDADES_CONSULTADAS)
@@ -0,0 +1,273 @@
+"""
+Rollups de logs_clima: agregados por hora y por día para cada (ciudad, pais).
+
+Cada nivel guarda una marca de agua (`logs_clima_rollup_marca`) con el inicio
+del último período procesado. Una pasada recalcula desde la marca hasta ahora
+los períodos completos a partir de las lecturas crudas y los escribe con
+`INSERT ... ON DUPLICATE KEY UPDATE` (reemplazando los valores), por lo que
+repetirla no cambia el resultado. El período en curso se vuelve a calcular en
+la pasada siguiente.
+
+Las lecturas que llegan después de su hora (spool recuperado tras una caída,
+cargas históricas) caen detrás de la marca: `LogClimaRepo.crear_muchos`
+registra sus días en `logs_clima_rollup_pendiente` en la misma transacción, y
+cada pasada recalcula esos días completos en todos los niveles antes de avanzar.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from .db import Database
+
+METRICAS = ('aqi', 'co', 'no2', 'o3', 'so2', 'pm2_5', 'pm10', 'nh3')
+
+# Niveles de menor a mayor granularidad:
+# nombre -> (tabla, duración del período, expresión SQL del inicio del período, ventana por transacción)
+NIVELES = {
+    'hora': ('logs_clima_hora', timedelta(hours=1),
+             "TIMESTAMP(DATE(fecha_consulta), MAKETIME(HOUR(fecha_consulta), 0, 0))",
+             timedelta(days=1)),
+    'dia': ('logs_clima_dia', timedelta(days=1),
+            "TIMESTAMP(DATE(fecha_consulta))",
+            timedelta(days=31)),
+}
+
+COLUMNAS_AGREGADAS = tuple(
+    f"{m}_{sufijo}" for m in METRICAS for sufijo in ('promedio', 'minimo', 'maximo')
+)
+
+
+def inicio_periodo(nivel, momento):
+    """Inicio del período de `nivel` que contiene `momento`"""
+    if nivel == 'hora':
+        return momento.replace(minute=0, second=0, microsecond=0)
+    return momento.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _select_agregado(nivel):
+    """SELECT que agrega lecturas crudas por período; parámetros: desde, hasta (+ filtros)"""
+    _, _, expresion, _ = NIVELES[nivel]
+    agregados = ',\n            '.join(
+        f"AVG({m}) AS {m}_promedio, MIN({m}) AS {m}_minimo, MAX({m}) AS {m}_maximo"
+        for m in METRICAS
+    )
+    return f"""
+        SELECT
+            ciudad, pais, {expresion} AS periodo, COUNT(*) AS lecturas,
+            {agregados}
+        FROM logs_clima
+        WHERE fecha_consulta >= %s AND fecha_consulta < %s{{filtro}}
+        GROUP BY ciudad, pais, periodo
+    """
+
+
+def _sql_rollup(nivel):
+    tabla = NIVELES[nivel][0]
+    columnas = ('ciudad', 'pais', 'periodo', 'lecturas') + COLUMNAS_AGREGADAS
+    reemplazos = ',\n            '.join(
+        f"{c} = VALUES({c})" for c in columnas[3:]
+    )
+    return (
+        f"INSERT INTO {tabla} ({', '.join(columnas)})"
+        f"{_select_agregado(nivel).format(filtro='')}"
+        f"ON DUPLICATE KEY UPDATE\n            {reemplazos}"
+    )
+
+
+def obtener_marca(nivel):
+    """Inicio del primer período aún no consolidado de `nivel`, o None"""
+    with Database.connection(escritura=False) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT procesado_hasta FROM logs_clima_rollup_marca WHERE nivel = %s", (nivel,))
+            fila = cur.fetchone()
+            return fila['procesado_hasta'] if fila else None
+
+
+def _primera_lectura():
+    with Database.connection(escritura=False) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT MIN(fecha_consulta) AS primera FROM logs_clima")
+            return cur.fetchone()['primera']
+
+
+# Un parámetro por día; también lo usa la inserción asíncrona en su transacción
+SQL_REGISTRAR_PENDIENTE = ("INSERT INTO logs_clima_rollup_pendiente (dia, cambios) VALUES (%s, 1) "
+                           "ON DUPLICATE KEY UPDATE cambios = cambios + 1")
+
+
+def registrar_pendientes(dias):
+    """Marca `dias` para recalcular; dentro de una UnitOfWork se confirma junto con las lecturas"""
+    if not dias:
+        return
+    with Database.connection() as conn:
+        with conn.cursor() as cur:
+            cur.executemany(SQL_REGISTRAR_PENDIENTE, [(dia,) for dia in sorted(dias)])
+
+
+def dias_pendientes():
+    """Días con lecturas tardías aún sin recalcular, en orden"""
+    with Database.connection(escritura=False) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT dia FROM logs_clima_rollup_pendiente ORDER BY dia")
+            return [fila['dia'] for fila in cur.fetchall()]
+
+
+def recalcular_pendientes():
+    """
+    Recalcula en todos los niveles cada día con lecturas tardías.
+
+    Cada día va en su propia transacción y se borra de los pendientes solo si
+    su contador no cambió mientras tanto: una lectura tardía que llegue durante
+    el recálculo deja el día pendiente para la pasada siguiente.
+
+    Returns:
+        Días recalculados
+    """
+    recalculados = []
+    for dia in dias_pendientes():
+        desde = datetime(dia.year, dia.month, dia.day)
+        with Database.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT cambios FROM logs_clima_rollup_pendiente WHERE dia = %s", (dia,))
+                fila = cur.fetchone()
+                if fila is None:
+                    continue
+                for nivel in NIVELES:
+                    cur.execute(_sql_rollup(nivel), (desde, desde + timedelta(days=1)))
+                cur.execute("DELETE FROM logs_clima_rollup_pendiente WHERE dia = %s AND cambios = %s",
+                            (dia, fila['cambios']))
+        recalculados.append(dia)
+    return recalculados
+
+
+def actualizar_nivel(nivel, hasta=None):
+    """
+    Consolida `nivel` desde su marca hasta `hasta` (por defecto, ahora).
+
+    Trabaja en ventanas (un día para horas, 31 días para días), cada una en su
+    propia transacción junto con el avance de la marca, de modo que una
+    interrupción retoma donde quedó.
+
+    Returns:
+        Lista con un dict por ventana: {'desde', 'hasta', 'filas', 'segundos'}
+        (filas afectadas según MySQL: 1 por período nuevo, 2 por recalculado)
+    """
+    _, _, _, ventana = NIVELES[nivel]
+    hasta = hasta or datetime.now()
+    fin_completo = inicio_periodo(nivel, hasta)
+
+    desde = obtener_marca(nivel)
+    if desde is None:
+        primera = _primera_lectura()
+        if primera is None:
+            return []
+        desde = inicio_periodo(nivel, primera)
+
+    sql = _sql_rollup(nivel)
+    resultados = []
+    while desde < hasta:
+        tramo_hasta = min(desde + ventana, hasta)
+        inicio = time.perf_counter()
+        with Database.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (desde, tramo_hasta))
+                filas = cur.rowcount
+                # La marca no pasa del período en curso, que seguirá recibiendo lecturas
+                marca = min(tramo_hasta, fin_completo)
+                cur.execute(
+                    "INSERT INTO logs_clima_rollup_marca (nivel, procesado_hasta) VALUES (%s, %s) "
+                    "ON DUPLICATE KEY UPDATE procesado_hasta = VALUES(procesado_hasta)",
+                    (nivel, marca)
+                )
+        resultados.append({
+            'desde': desde,
+            'hasta': tramo_hasta,
+            'filas': filas,
+            'segundos': time.perf_counter() - inicio,
+        })
+        desde = tramo_hasta
+    return resultados
+
+
+def actualizar_rollups(hasta=None):
+    """Recalcula los días con lecturas tardías y consolida todos los niveles; retorna {nivel: [ventanas]}"""
+    recalcular_pendientes()
+    return {nivel: actualizar_nivel(nivel, hasta) for nivel in NIVELES}
+
+
+def elegir_nivel(resolucion):
+    """
+    Nivel más grueso cuyo período no supera `resolucion` (timedelta).
+
+    Returns:
+        'dia', 'hora' o None si la resolución pedida es menor a una hora
+    """
+    elegido = None
+    for nivel, (_, duracion, _, _) in NIVELES.items():
+        if duracion <= resolucion:
+            elegido = nivel
+    return elegido
+
+
+def consultar_serie(nivel, ciudad, pais, desde, hasta):
+    """
+    Serie agregada de `nivel` para [desde, hasta).
+
+    Lo ya consolidado se lee de la tabla de rollup; el tramo posterior a la
+    marca se agrega al vuelo desde logs_clima con la misma expresión. Los días
+    con lecturas tardías reflejan esas lecturas desde la pasada siguiente.
+    """
+    tabla = NIVELES[nivel][0]
+    columnas = ', '.join(('periodo', 'lecturas') + COLUMNAS_AGREGADAS)
+    marca = obtener_marca(nivel) or desde
+    corte = max(desde, min(hasta, marca))
+
+    filtro = " AND ciudad = %s AND pais = %s"
+    filas = []
+    with Database.lectura() as conn:
+        with conn.cursor() as cur:
+            if corte > desde:
+                cur.execute(
+                    f"SELECT {columnas} FROM {tabla} "
+                    "WHERE ciudad = %s AND pais = %s AND periodo >= %s AND periodo < %s "
+                    "ORDER BY periodo",
+                    (ciudad, pais, inicio_periodo(nivel, desde), corte)
+                )
+                filas.extend(cur.fetchall())
+            if hasta > corte:
+                select = _select_agregado(nivel).format(filtro=filtro)
+                cur.execute(
+                    f"SELECT {columnas} FROM ({select}) AS al_vuelo ORDER BY periodo",
+                    (corte, hasta, ciudad, pais)
+                )
+                filas.extend(cur.fetchall())
+    return filas
+
+
+class CompactadorRollups(threading.Thread):
+    """
+    Hilo en segundo plano que ejecuta `actualizar_rollups()` cada `intervalo`
+    segundos. Los errores se guardan en `ultimo_error` y no detienen el hilo.
+    """
+
+    def __init__(self, intervalo=None):
+        super().__init__(name='compactador-rollups', daemon=True)
+        self.intervalo = intervalo or float(os.getenv('LOGS_CLIMA_ROLLUP_INTERVALO', '300'))
+        self.ultimo_error = None
+        self.ultima_ejecucion = None
+        self._detener = threading.Event()
+
+    def run(self):
+        while not self._detener.is_set():
+            try:
+                actualizar_rollups()
+                self.ultima_ejecucion = datetime.now()
+                self.ultimo_error = None
+            except Exception as e:
+                self.ultimo_error = e
+            self._detener.wait(self.intervalo)
+
+    def detener(self, timeout=5.0):
+        self._detener.set()
+        self.join(timeout)
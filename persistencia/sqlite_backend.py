@@ -0,0 +1,283 @@
+"""
+Backend SQLite embebido para `Database` (DB_BACKEND=sqlite).
+
+Pensado para despliegues de un solo usuario (notebooks en terreno) y para
+ejecutar las pruebas sin MySQL. Las conexiones imitan la interfaz de PyMySQL
+que usan los repositorios (cursores con filas como dict, execute/executemany,
+commit/rollback, ping), por lo que el SQL de los repositorios no cambia:
+
+- El paramstyle `%s` de PyMySQL se traduce a `?` (solo si hay parámetros,
+  igual que PyMySQL, que únicamente interpola en ese caso).
+- `ON DUPLICATE KEY UPDATE ... VALUES(col)` se traduce al upsert de SQLite
+  (`ON CONFLICT DO UPDATE SET ... excluded.col`).
+- Las funciones de MySQL usadas por los repositorios (NOW, LEAST, GREATEST,
+  HOUR, MAKETIME, TIMESTAMP, UNIX_TIMESTAMP) se registran en cada conexión.
+- FULLTEXT no existe: `persistencia.texto` usa LIKE con este backend.
+
+El esquema se crea (si falta) a partir de `persistencia.models_sqlalchemy`;
+las migraciones de Alembic siguen siendo solo para MySQL.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+from .instrumentacion import metricas
+
+_FORMATO_FECHA_HORA = '%Y-%m-%d %H:%M:%S'
+# Base de datos en memoria compartida por las conexiones del pool (pruebas)
+_URI_MEMORIA = 'file:ecotech_memoria?mode=memory&cache=shared'
+
+
+# --- Conversión de tipos (registro global del módulo sqlite3) ---------------
+
+def _a_fecha_hora(valor):
+    return datetime.fromisoformat(valor.decode())
+
+
+def _a_fecha(valor):
+    return date.fromisoformat(valor.decode()[:10])
+
+
+# Con microsegundos si los tiene (como PyMySQL): '10:00:00' < '10:00:00.5' al comparar texto
+sqlite3.register_adapter(datetime, lambda v: v.isoformat(' '))
+sqlite3.register_adapter(date, lambda v: v.isoformat())
+sqlite3.register_adapter(Decimal, str)
+# Con PARSE_DECLTYPES se aplican según el tipo declarado de la columna
+sqlite3.register_converter('TIMESTAMP', _a_fecha_hora)
+sqlite3.register_converter('DATETIME', _a_fecha_hora)
+sqlite3.register_converter('DATE', _a_fecha)
+sqlite3.register_converter('DECIMAL', lambda v: Decimal(v.decode()))
+
+# Las expresiones (MIN(fecha), TIMESTAMP(...)) no tienen tipo declarado y
+# llegan como texto; se convierten a datetime como lo haría PyMySQL
+_RE_FECHA_HORA = re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(\.\d{1,6})?\Z')
+
+
+def _convertir(valor):
+    if (isinstance(valor, str) and len(valor) >= 19 and valor[4] == '-'
+            and valor[10] == ' ' and _RE_FECHA_HORA.match(valor)):
+        return datetime.fromisoformat(valor)
+    return valor
+
+
+# --- Traducción de SQL -------------------------------------------------------
+
+_RE_DUPLICADO = re.compile(r'ON\s+DUPLICATE\s+KEY\s+UPDATE', re.IGNORECASE)
+_RE_VALUES_COLUMNA = re.compile(r'VALUES\s*\(\s*(\w+)\s*\)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=512)
+def traducir(sql, con_parametros=True):
+    """Traduce una sentencia escrita para PyMySQL/MySQL al dialecto de SQLite"""
+    coincidencia = _RE_DUPLICADO.search(sql)
+    if coincidencia:
+        actualizacion = _RE_VALUES_COLUMNA.sub(r'excluded.\1', sql[coincidencia.end():])
+        sql = sql[:coincidencia.start()] + 'ON CONFLICT DO UPDATE SET' + actualizacion
+    if con_parametros:
+        sql = sql.replace('%%', '\0').replace('%s', '?').replace('\0', '%')
+    return sql
+
+
+# --- Funciones de MySQL ------------------------------------------------------
+
+def _now():
+    return datetime.now().strftime(_FORMATO_FECHA_HORA)
+
+
+def _least(*valores):
+    return None if any(v is None for v in valores) else min(valores)
+
+
+def _greatest(*valores):
+    return None if any(v is None for v in valores) else max(valores)
+
+
+def _hour(valor):
+    return None if valor is None else int(str(valor)[11:13] or 0)
+
+
+def _maketime(hora, minuto, segundo):
+    return f"{int(hora):02d}:{int(minuto):02d}:{int(segundo):02d}"
+
+
+def _timestamp(fecha, hora=None):
+    if fecha is None:
+        return None
+    return f"{str(fecha)[:10]} {hora or '00:00:00'}"
+
+
+def _unix_timestamp(valor=None):
+    momento = datetime.now() if valor is None else datetime.fromisoformat(str(valor))
+    return int(momento.timestamp())
+
+
+def _registrar_funciones(conn):
+    conn.create_function('NOW', 0, _now)
+    conn.create_function('LEAST', -1, _least, deterministic=True)
+    conn.create_function('GREATEST', -1, _greatest, deterministic=True)
+    conn.create_function('HOUR', 1, _hour, deterministic=True)
+    conn.create_function('MAKETIME', 3, _maketime, deterministic=True)
+    conn.create_function('TIMESTAMP', 1, _timestamp, deterministic=True)
+    conn.create_function('TIMESTAMP', 2, _timestamp, deterministic=True)
+    conn.create_function('UNIX_TIMESTAMP', 0, _unix_timestamp)
+    conn.create_function('UNIX_TIMESTAMP', 1, _unix_timestamp)
+
+
+# --- Conexión y cursor con la interfaz de PyMySQL ----------------------------
+
+class CursorSQLite:
+    """Cursor con filas como dict; mide cada sentencia si `metricas` está activa"""
+
+    def __init__(self, conn):
+        self._cur = conn.cursor()
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    @property
+    def lastrowid(self):
+        return self._cur.lastrowid
+
+    def execute(self, query, args=None):
+        inicio = time.perf_counter() if metricas.activa else None
+        sql = traducir(query, args is not None)
+        if args is None:
+            self._cur.execute(sql)
+        else:
+            self._cur.execute(sql, tuple(args))
+        self.rowcount = self._cur.rowcount
+        if inicio is not None:
+            metricas.registrar(query, time.perf_counter() - inicio, self.rowcount, args)
+        return self.rowcount
+
+    def executemany(self, query, args):
+        args = [tuple(fila) for fila in args or ()]
+        if not args:
+            return 0
+        inicio = time.perf_counter() if metricas.activa else None
+        self._cur.executemany(traducir(query), args)
+        self.rowcount = self._cur.rowcount
+        if inicio is not None:
+            metricas.registrar(query, time.perf_counter() - inicio, self.rowcount,
+                               args[0], lote=len(args))
+        return self.rowcount
+
+    def _como_dict(self, fila):
+        columnas = [c[0] for c in self._cur.description]
+        return {c: _convertir(v) for c, v in zip(columnas, fila)}
+
+    def fetchone(self):
+        fila = self._cur.fetchone()
+        return None if fila is None else self._como_dict(fila)
+
+    def fetchmany(self, size=None):
+        filas = self._cur.fetchmany(size or self._cur.arraysize)
+        return [self._como_dict(f) for f in filas]
+
+    def fetchall(self):
+        return [self._como_dict(f) for f in self._cur.fetchall()]
+
+    def close(self):
+        self._cur.close()
+
+
+class ConexionSQLite:
+    """Envoltorio de sqlite3.Connection con la interfaz de PyMySQL que usan Database y el pool"""
+
+    cursorclass = None  # Database.adquirir la asigna en MySQL; aquí no se usa
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, cursorclass=None):
+        # Los cursores de sqlite3 ya leen bajo demanda: no hay variante en streaming
+        return CursorSQLite(self._conn)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect=False):
+        self._conn.execute('SELECT 1')
+
+    def close(self):
+        self._conn.close()
+
+
+class BackendSQLite:
+    """
+    Conexiones a un archivo SQLite en modo WAL con pragmas para lecturas locales
+    rápidas. `ruta=':memory:'` usa una base en memoria compartida por el pool.
+    """
+
+    nombre = 'sqlite'
+    fulltext = False
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta or os.getenv('DB_SQLITE_PATH', 'ecotech.db')
+        self.mmap_bytes = int(os.getenv('DB_SQLITE_MMAP_MB', '256')) * 1024 * 1024
+        self.cache_kib = int(os.getenv('DB_SQLITE_CACHE_MB', '64')) * 1024
+        self.busy_timeout = float(os.getenv('DB_SQLITE_BUSY_TIMEOUT', '5'))
+        self._esquema_listo = False
+        self._lock = threading.Lock()
+
+    def conectar(self):
+        memoria = self.ruta == ':memory:'
+        conn = sqlite3.connect(
+            _URI_MEMORIA if memoria else self.ruta,
+            uri=memoria,
+            timeout=self.busy_timeout,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            # El pool entrega la conexión a un hilo a la vez
+            check_same_thread=False,
+        )
+        if not memoria:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'PRAGMA mmap_size={self.mmap_bytes}')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size=-{self.cache_kib}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA foreign_keys=ON')
+        _registrar_funciones(conn)
+        if not self._esquema_listo:
+            with self._lock:
+                if not self._esquema_listo:
+                    crear_esquema(conn)
+                    self._esquema_listo = True
+        return ConexionSQLite(conn)
+
+    def preparar(self, conn, instrumentar):
+        """Las conexiones SQLite miden por sí mismas según `metricas.activa`"""
+
+    def cursor_stream(self, instrumentar):
+        return None
+
+
+def crear_esquema(conn):
+    """Crea las tablas e índices de models_sqlalchemy que aún no existan"""
+    from sqlalchemy.dialects import sqlite as dialecto_sqlite
+    from sqlalchemy.schema import CreateIndex, CreateTable
+    from .models_sqlalchemy import Base
+
+    dialecto = dialecto_sqlite.dialect()
+    # SQLite admite referencias a tablas que aún no existen: no hace falta ordenarlas
+    for tabla in Base.metadata.tables.values():
+        conn.execute(str(CreateTable(tabla, if_not_exists=True).compile(dialect=dialecto)))
+        for indice in tabla.indexes:
+            conn.execute(str(CreateIndex(indice, if_not_exists=True).compile(dialect=dialecto)))
+    conn.commit()
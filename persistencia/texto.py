@@ -0,0 +1,87 @@
+"""Búsqueda de texto sobre índices FULLTEXT con parser ngram"""
+import os
+
+from .db import Database
+
+# Debe coincidir con la variable ngram_token_size del servidor MySQL
+NGRAM_TOKEN_SIZE = int(os.getenv('DB_NGRAM_TOKEN_SIZE', '2'))
+
+MODOS = ('frase', 'natural', 'prefijo')
+
+
+def _limpiar(termino):
+    """Quita comillas y espacios sobrantes (dentro de una frase no hay otros operadores)"""
+    return ' '.join(termino.replace('"', ' ').split())
+
+
+def usa_fulltext(termino):
+    """True si el backend tiene FULLTEXT y el término es lo bastante largo para el índice ngram"""
+    return Database.backend().fulltext and len(_limpiar(termino)) >= NGRAM_TOKEN_SIZE
+
+
+def condicion_texto(columna, termino, modo='frase'):
+    """
+    Construye el filtro y la expresión de relevancia para buscar en `columna`.
+
+    Modos:
+        frase: el texto aparece en cualquier parte (equivale a LIKE '%x%')
+        natural: coincidencia difusa por n-gramas, ordenada por relevancia
+        prefijo: alguna palabra comienza con el texto
+
+    Los términos más cortos que NGRAM_TOKEN_SIZE no existen en el índice y se
+    resuelven con LIKE, igual que todos los términos en backends sin FULLTEXT
+    (SQLite).
+
+    Returns:
+        (condicion_sql, params_condicion, relevancia_sql, params_relevancia)
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo de búsqueda inválido: {modo}")
+
+    limpio = _limpiar(termino)
+    if not usa_fulltext(limpio):
+        if modo == 'prefijo':
+            condicion = f"({columna} LIKE %s OR {columna} LIKE %s)"
+            return condicion, (f"{limpio}%", f"% {limpio}%"), "0", ()
+        return f"{columna} LIKE %s", (f"%{limpio}%",), "0", ()
+
+    if modo == 'natural':
+        match = f"MATCH({columna}) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+        return match, (limpio,), match, (limpio,)
+
+    match = f"MATCH({columna}) AGAINST (%s IN BOOLEAN MODE)"
+    frase = f'"{limpio}"'
+    if modo == 'prefijo':
+        # El índice acota los candidatos; LIKE exige que sea inicio de palabra
+        condicion = f"{match} AND ({columna} LIKE %s OR {columna} LIKE %s)"
+        return condicion, (frase, f"{limpio}%", f"% {limpio}%"), match, (frase,)
+    return match, (frase,), match, (frase,)
+
+
+def buscar_texto(columnas, tabla, columna, termino, modo='frase', limite=50):
+    """
+    Busca filas de `tabla` por `columna` ordenadas por relevancia.
+
+    Args:
+        columnas: Columnas a seleccionar, p. ej. "id, nombre, descripcion"
+        tabla: Tabla con índice FULLTEXT (ngram) sobre `columna`
+        columna: Columna de texto indexada
+        termino: Texto buscado
+        modo: 'frase', 'natural' o 'prefijo'
+        limite: Máximo de filas (None = sin límite)
+
+    Returns:
+        Lista de filas con la clave adicional 'relevancia'
+    """
+    condicion, params, relevancia, params_relevancia = condicion_texto(columna, termino, modo)
+    sql = (f"SELECT {columnas}, {relevancia} AS relevancia FROM {tabla} "
+           f"WHERE {condicion} ORDER BY relevancia DESC, {columna}")
+    parametros = list(params_relevancia) + list(params)
+    if limite is not None:
+        sql += " LIMIT %s"
+        parametros.append(limite)
+
+    with Database.lectura() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, tuple(parametros))
+            return cur.fetchall()
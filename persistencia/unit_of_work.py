@@ -0,0 +1,134 @@
+"""Unidad de trabajo: varias operaciones de repositorio en una sola transacción"""
+from .db import Database, _unidad_actual
+
+
+class UnitOfWork:
+    """
+    Agrupa llamadas a repositorios (de uno o varios servicios) en una conexión
+    y un único commit.
+
+    Mientras la unidad está activa, todo `Database.connection()` del mismo
+    contexto (hilo o tarea) reutiliza su conexión. Al salir hace commit, o
+    rollback si hubo una excepción o si algún repositorio falló aunque el
+    servicio haya capturado el error (`rollback_only`).
+
+    Ejemplo:
+        with UnitOfWork() as uow:
+            usuario_repo.crear(usuario)
+            empleado_repo.crear(empleado)
+        if uow.revertida:
+            ...
+
+    Para lotes grandes, `uow.commit()` confirma lo acumulado y continúa en la
+    misma conexión, permitiendo agrupar miles de escrituras por commit.
+
+    Las unidades anidadas se unen a la transacción externa.
+
+    Las lecturas dentro de la unidad (también `Database.lectura()`) usan su
+    conexión al primario, por lo que ven lo escrito aunque no esté confirmado.
+
+    `al_confirmar(funcion)` difiere efectos secundarios (auditoría, índices)
+    hasta el commit; si la unidad se revierte no se ejecutan.
+    """
+
+    def __init__(self):
+        self.conn = None
+        self.rollback_only = False
+        self.revertida = False
+        self._externa = None
+        self._token = None
+        self._al_confirmar = []
+
+    @staticmethod
+    def actual():
+        """Unidad de trabajo activa en el contexto actual, o None"""
+        return _unidad_actual.get()
+
+    def __enter__(self):
+        externa = _unidad_actual.get()
+        if externa is not None:
+            self._externa = externa
+            self.conn = externa.conn
+            return self
+
+        self.conn = Database.adquirir()
+        self._token = _unidad_actual.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._externa is not None:
+            if exc_type is not None or self.rollback_only:
+                self._externa.rollback_only = True
+            self.revertida = self._externa.rollback_only
+            return False
+
+        _unidad_actual.reset(self._token)
+        discard = False
+        try:
+            if exc_type is None and not self.rollback_only:
+                self.conn.commit()
+                Database.marcar_escritura()
+            else:
+                self._revertir()
+        except BaseException:
+            discard = True
+            self._revertir()
+            raise
+        finally:
+            try:
+                Database.pool().release(self.conn, discard=discard)
+            finally:
+                self.conn = None
+        if not self.revertida:
+            self._confirmada()
+        return False
+
+    def commit(self):
+        """Confirma lo acumulado hasta ahora y sigue en la misma conexión"""
+        if self._externa is not None:
+            return
+        if self.rollback_only:
+            raise RuntimeError("La unidad de trabajo está marcada para rollback")
+        self.conn.commit()
+        Database.marcar_escritura()
+        self._confirmada()
+
+    def al_confirmar(self, funcion):
+        """Ejecuta `funcion()` después del commit; se descarta si la unidad se revierte"""
+        if self._externa is not None:
+            self._externa.al_confirmar(funcion)
+        else:
+            self._al_confirmar.append(funcion)
+
+    def _confirmada(self):
+        funciones, self._al_confirmar = self._al_confirmar, []
+        for funcion in funciones:
+            funcion()
+
+    def rollback(self):
+        """Descarta lo acumulado; la unidad termina revertida"""
+        if self._externa is not None:
+            self._externa.rollback_only = True
+            return
+        self.rollback_only = True
+        self._revertir()
+
+    def _revertir(self):
+        self.revertida = True
+        self._al_confirmar = []
+        try:
+            self.conn.rollback()
+        except Exception:
+            pass
+
+
+def al_confirmar(funcion):
+    """
+    Ejecuta `funcion()` tras el commit de la unidad activa (se descarta si se
+    revierte), o enseguida si no hay unidad: la escritura ya está confirmada.
+    """
+    unidad = UnitOfWork.actual()
+    if unidad is not None:
+        unidad.al_confirmar(funcion)
+    else:
+        funcion()
@@ -144,33 +144,30 @@ class UsuariosMenu(MenuBase):
     def _listar_usuarios(self):
         """Lista todos los usuarios"""
         UI.print_section("Usuarios del Sistema", Icons.VIEW)
-        usuarios = self.usuario_service.listar_usuarios()
-        
-        if not usuarios:
-            UI.print_warning("No hay usuarios registrados")
-            return
         
         # Obtener todos los roles para mostrar nombres
         roles = self.rol_service.listar_roles()
         roles_dict = {r['id']: r['nombre'] for r in roles}
         
         headers = ["#", "Usuario", "Rol", "Estado", "Fecha Creación"]
-        rows = []
         
-        for idx, u in enumerate(usuarios, 1):
-            estado_icon = f"{Colors.GREEN}●{Colors.RESET}" if u['activo'] else f"{Colors.RED}●{Colors.RESET}"
-            estado_texto = f"{estado_icon} {'Activo' if u['activo'] else 'Inactivo'}"
-            rol_nombre = roles_dict.get(u['rol_id'], 'Desconocido')
-            
-            rows.append([
-                str(idx),
-                u['nombre_usuario'],
-                rol_nombre,
-                estado_texto,
-                str(u['fecha_creacion'])[:10]
-            ])
-        
-        UI.print_table(headers, rows)
+        def filas():
+            for idx, u in enumerate(self.usuario_service.iterar_usuarios(), 1):
+                estado_icon = f"{Colors.GREEN}●{Colors.RESET}" if u['activo'] else f"{Colors.RED}●{Colors.RESET}"
+                estado_texto = f"{estado_icon} {'Activo' if u['activo'] else 'Inactivo'}"
+                rol_nombre = roles_dict.get(u['rol_id'], 'Desconocido')
+                
+                yield [
+                    str(idx),
+                    u['nombre_usuario'],
+                    rol_nombre,
+                    estado_texto,
+                    str(u['fecha_creacion'])[:10]
+                ]
+        
+        # Cada fila se imprime al llegar del cursor, sin reunir el listado en memoria
+        if not UI.print_table_stream(headers, filas(), [6, 20, 20, 20, 14]):
+            UI.print_warning("No hay usuarios registrados")
     
     def _cambiar_contrasena(self):
         """Cambia la contraseña de un usuario seleccionado"""
@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
 
+from .ui_helpers import UI
+
 
 class MenuBase(ABC):
     """Clase abstracta base para menús."""
@@ -13,6 +15,32 @@ class MenuBase(ABC):
         except (KeyboardInterrupt, EOFError):
             return ""
 
+    def mostrar_paginado(self, obtener_pagina, mostrar_fila, mensaje_vacio="No se encontraron resultados"):
+        """
+        Muestra resultados página a página, preguntando antes de pedir la siguiente.
+
+        Args:
+            obtener_pagina: Función token -> {'filas', 'siguiente'}
+            mostrar_fila: Función (numero, fila) que imprime una fila
+            mensaje_vacio: Advertencia si no hay filas
+
+        Returns:
+            Cantidad de filas mostradas
+        """
+        token = None
+        total = 0
+        while True:
+            pagina = obtener_pagina(token)
+            for fila in pagina['filas']:
+                total += 1
+                mostrar_fila(total, fila)
+            token = pagina['siguiente']
+            if not token or not UI.confirm("¿Ver más resultados?"):
+                break
+        if total == 0:
+            UI.print_warning(mensaje_vacio)
+        return total
+
     @abstractmethod
     def mostrar(self):
         pass
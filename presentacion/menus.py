@@ -1,9 +1,17 @@
 from .menu_base import MenuBase
 from .ui_helpers import UI, Colors, Icons
 from dominio.models import Departamento, Proyecto, Empleado
+from aplicacion.limite_tasa import CuotaAgotada
 import uuid
 
 
+def _avisar_cuota_agotada(e):
+    """Mensaje de CuotaAgotada y, si se conoce, desde cuándo se puede volver a consultar"""
+    UI.print_warning(str(e))
+    if e.reinicio is not None:
+        UI.print_info(f"Podrá volver a consultar desde el {e.reinicio:%Y-%m-%d %H:%M} UTC")
+
+
 class DepartamentosMenu(MenuBase):
     def mostrar(self):
         UI.print_section("Gestión de Departamentos", Icons.DEPARTMENT)
@@ -26,16 +34,17 @@ class DepartamentosMenu(MenuBase):
                 dept = Departamento(id=str(uuid.uuid4()), nombre=nombre, descripcion=descripcion)
                 self.servicio.crear(dept)
             elif opcion == '2':
-                departamentos = self.servicio.listar_todos()
-                if not departamentos:
+                total = 0
+                for d in self.servicio.iterar_todos():
+                    if total == 0:
+                        UI.print_section("Lista de Departamentos", Icons.DEPARTMENT)
+                    total += 1
+                    UI.print_item("Nombre", d.get('nombre', 'N/A'))
+                    UI.print_item("Descripción", d.get('descripcion', 'Sin descripción'))
+                    UI.print_item("ID", d.get('id', 'N/A'), Colors.DIM)
+                    print()
+                if total == 0:
                     UI.print_warning("No hay departamentos registrados")
-                else:
-                    UI.print_section("Lista de Departamentos", Icons.DEPARTMENT)
-                    for d in departamentos:
-                        UI.print_item("Nombre", d.get('nombre', 'N/A'))
-                        UI.print_item("Descripción", d.get('descripcion', 'Sin descripción'))
-                        UI.print_item("ID", d.get('id', 'N/A'), Colors.DIM)
-                        print()
             elif opcion == '3':
                 codigo = UI.input_prompt("Código del departamento", Icons.SEARCH)
                 dept = self.servicio.obtener_por_id(codigo)
@@ -48,15 +57,18 @@ class DepartamentosMenu(MenuBase):
                     UI.print_error("Departamento no encontrado")
             elif opcion == '4':
                 nombre = UI.input_prompt("Nombre a buscar", Icons.SEARCH)
-                departamentos = self.servicio.buscar_por_nombre(nombre)
-                if not departamentos:
-                    UI.print_warning("No se encontraron departamentos")
-                else:
-                    UI.print_section(f"Resultados para: {nombre}", Icons.SEARCH)
-                    for d in departamentos:
-                        UI.print_item("Nombre", d.get('nombre', 'N/A'))
-                        UI.print_item("Descripción", d.get('descripcion', 'N/A'))
-                        print()
+                UI.print_section(f"Resultados para: {nombre}", Icons.SEARCH)
+                
+                def mostrar_departamento(_, d):
+                    UI.print_item("Nombre", d.get('nombre', 'N/A'))
+                    UI.print_item("Descripción", d.get('descripcion', 'N/A'))
+                    print()
+                
+                self.mostrar_paginado(
+                    lambda token: self.servicio.buscar_por_nombre_pagina(nombre, token=token),
+                    mostrar_departamento,
+                    "No se encontraron departamentos"
+                )
             elif opcion == '5':
                 codigo = UI.input_prompt("Código del departamento a modificar", Icons.EDIT)
                 nombre = UI.input_prompt("Nuevo nombre", Icons.DEPARTMENT)
@@ -96,6 +108,9 @@ class ProyectosMenu(MenuBase):
         UI.print_menu_option("9", "Ver logs por ciudad", f"{Icons.SEARCH} {Icons.EARTH}")
         UI.print_menu_option("10", "Ver ciudades consultadas", f"{Icons.CHART} {Icons.EARTH}")
         print()
+        UI.print_menu_option("11", "Exportar proyectos a CSV", Icons.LIST)
+        UI.print_menu_option("12", "Exportar historial de clima a CSV", f"{Icons.LIST} {Icons.CLOUD}")
+        print()
         UI.print_menu_option("0", "Volver", Icons.BACK)
 
     def ejecutar(self):
@@ -106,18 +121,19 @@ class ProyectosMenu(MenuBase):
             if opcion == '1':
                 self._agregar_proyecto()
             elif opcion == '2':
-                proyectos = self.servicio.listar_todos()
-                if not proyectos:
+                total = 0
+                for p in self.servicio.iterar_todos():
+                    if total == 0:
+                        UI.print_section("Lista de Proyectos", Icons.PROJECT)
+                    total += 1
+                    UI.print_item("Nombre", p.get('nombre', 'N/A'), Colors.BRIGHT_CYAN)
+                    UI.print_item("Descripción", p.get('descripcion', 'Sin descripción'))
+                    UI.print_item("Fecha inicio", p.get('fecha_inicio', 'N/A'), Colors.BRIGHT_GREEN)
+                    UI.print_item("Fecha fin", p.get('fecha_fin', 'En curso'), Colors.BRIGHT_YELLOW)
+                    UI.print_item("ID", p.get('id', 'N/A'), Colors.DIM)
+                    print()
+                if total == 0:
                     UI.print_warning("No hay proyectos registrados")
-                else:
-                    UI.print_section("Lista de Proyectos", Icons.PROJECT)
-                    for p in proyectos:
-                        UI.print_item("Nombre", p.get('nombre', 'N/A'), Colors.BRIGHT_CYAN)
-                        UI.print_item("Descripción", p.get('descripcion', 'Sin descripción'))
-                        UI.print_item("Fecha inicio", p.get('fecha_inicio', 'N/A'), Colors.BRIGHT_GREEN)
-                        UI.print_item("Fecha fin", p.get('fecha_fin', 'En curso'), Colors.BRIGHT_YELLOW)
-                        UI.print_item("ID", p.get('id', 'N/A'), Colors.DIM)
-                        print()
             elif opcion == '3':
                 codigo = UI.input_prompt("Código del proyecto", Icons.SEARCH)
                 proyecto = self.servicio.obtener_por_id(codigo)
@@ -131,15 +147,18 @@ class ProyectosMenu(MenuBase):
                     UI.print_error("Proyecto no encontrado")
             elif opcion == '4':
                 nombre = UI.input_prompt("Nombre a buscar", Icons.SEARCH)
-                proyectos = self.servicio.buscar_por_nombre(nombre)
-                if not proyectos:
-                    UI.print_warning("No se encontraron proyectos")
-                else:
-                    UI.print_section(f"Resultados para: {nombre}", Icons.SEARCH)
-                    for p in proyectos:
-                        UI.print_item("Nombre", p.get('nombre', 'N/A'))
-                        UI.print_item("Descripción", p.get('descripcion', 'N/A'))
-                        print()
+                UI.print_section(f"Resultados para: {nombre}", Icons.SEARCH)
+                
+                def mostrar_proyecto(_, p):
+                    UI.print_item("Nombre", p.get('nombre', 'N/A'))
+                    UI.print_item("Descripción", p.get('descripcion', 'N/A'))
+                    print()
+                
+                self.mostrar_paginado(
+                    lambda token: self.servicio.buscar_por_nombre_pagina(nombre, token=token),
+                    mostrar_proyecto,
+                    "No se encontraron proyectos"
+                )
             elif opcion == '5':
                 codigo = UI.input_prompt("Código del proyecto a modificar", Icons.EDIT)
                 nombre = UI.input_prompt("Nuevo nombre", Icons.PROJECT)
@@ -159,6 +178,12 @@ class ProyectosMenu(MenuBase):
                 self._ver_logs_por_ciudad()
             elif opcion == '10':
                 self._ver_ciudades_consultadas()
+            elif opcion == '11':
+                ruta = UI.input_prompt("Archivo de destino [proyectos.csv]", Icons.LIST) or "proyectos.csv"
+                self.servicio.exportar_csv(ruta)
+            elif opcion == '12':
+                ruta = UI.input_prompt("Archivo de destino [logs_clima.csv]", Icons.LIST) or "logs_clima.csv"
+                self.servicio.exportar_logs_clima_csv(ruta)
             elif opcion == '0':
                 break
             else:
@@ -185,11 +210,15 @@ class ProyectosMenu(MenuBase):
             pais = UI.input_prompt("Código de país (ej: CL, AR, PE) [CL]", Icons.EARTH).upper() or "CL"
             
             print(f"\n{Colors.BRIGHT_CYAN}🔍 Consultando calidad del aire en {ciudad}, {pais}...{Colors.RESET}")
-            datos = self.servicio.obtener_calidad_aire_por_ciudad(
-                ciudad, pais,
-                usuario_id=self.usuario_id,
-                guardar_log=True
-            )
+            try:
+                datos = self.servicio.obtener_calidad_aire_por_ciudad(
+                    ciudad, pais,
+                    usuario_id=self.usuario_id,
+                    guardar_log=True
+                )
+            except CuotaAgotada as e:
+                _avisar_cuota_agotada(e)
+                datos = None
             
             if datos:
                 self._mostrar_reporte_calidad_aire(datos, ciudad)
@@ -236,11 +265,16 @@ class ProyectosMenu(MenuBase):
         pais = UI.input_prompt("Código de país (ej: CL, AR, PE) [CL]", Icons.EARTH).upper() or "CL"
         
         print(f"\n{Colors.BRIGHT_CYAN}🔍 Consultando calidad del aire en {ciudad}, {pais}...{Colors.RESET}")
-        datos = self.servicio.obtener_calidad_aire_por_ciudad(
-            ciudad, pais, 
-            usuario_id=self.usuario_id,
-            guardar_log=True
-        )
+        try:
+            datos = self.servicio.obtener_calidad_aire_por_ciudad(
+                ciudad, pais, 
+                usuario_id=self.usuario_id,
+                guardar_log=True
+            )
+        except CuotaAgotada as e:
+            _avisar_cuota_agotada(e)
+            UI.pause()
+            return
         
         if datos:
             self._mostrar_reporte_calidad_aire(datos, ciudad)
@@ -306,18 +340,11 @@ class ProyectosMenu(MenuBase):
         """Muestra historial completo de consultas de clima"""
         UI.print_section("HISTORIAL DE CONSULTAS DE CLIMA", f"{Icons.VIEW} {Icons.CLOUD}")
         
-        logs = self.servicio.listar_logs_clima(limit=50)
-        
-        if not logs:
-            UI.print_warning("No hay registros de consultas de clima")
-            UI.pause()
-            return
-        
         from aplicacion.api_client import EcoAPIClient
         
-        print(f"\n{Colors.BRIGHT_CYAN}Mostrando últimas {len(logs)} consultas:{Colors.RESET}\n")
+        print(f"\n{Colors.BRIGHT_CYAN}Consultas más recientes primero:{Colors.RESET}\n")
         
-        for idx, log in enumerate(logs, 1):
+        def mostrar_log(idx, log):
             ciudad = log.get('ciudad', 'N/A')
             pais = log.get('pais', 'N/A')
             aqi = log.get('aqi', 0)
@@ -335,9 +362,19 @@ class ProyectosMenu(MenuBase):
             print(f"{Colors.BRIGHT_WHITE}{idx}. {ciudad}, {pais}{Colors.RESET}")
             print(f"   AQI: {color}{aqi}/5 - {interpretacion}{Colors.RESET}")
             print(f"   PM2.5: {log.get('pm2_5', 'N/A')} μg/m³ | PM10: {log.get('pm10', 'N/A')} μg/m³")
+            if log.get('proyecto') or log.get('usuario'):
+                proyecto = log['proyecto']['nombre'] if log.get('proyecto') else '-'
+                usuario = log['usuario']['nombre_usuario'] if log.get('usuario') else '-'
+                print(f"   Proyecto: {proyecto} | Usuario: {usuario}")
             print(f"   Fecha: {Colors.DIM}{fecha}{Colors.RESET}")
             print()
         
+        self.mostrar_paginado(
+            lambda token: self.servicio.listar_logs_clima_pagina_con_relaciones(token=token),
+            mostrar_log,
+            "No hay registros de consultas de clima"
+        )
+        
         UI.pause()
     
     def _ver_logs_por_ciudad(self):
@@ -349,19 +386,13 @@ class ProyectosMenu(MenuBase):
             UI.print_error("Debe ingresar una ciudad")
             UI.pause()
             return
-        
-        logs = self.servicio.listar_logs_por_ciudad(ciudad, limit=50)
-        
-        if not logs:
-            UI.print_warning(f"No se encontraron consultas para '{ciudad}'")
-            UI.pause()
-            return
+        pais = UI.input_prompt("Código de país (opcional, ej: CL)").upper() or None
         
         from aplicacion.api_client import EcoAPIClient
         
-        print(f"\n{Colors.BRIGHT_CYAN}Resultados para '{ciudad}': {len(logs)} consultas{Colors.RESET}\n")
+        print(f"\n{Colors.BRIGHT_CYAN}Resultados para '{ciudad}':{Colors.RESET}\n")
         
-        for idx, log in enumerate(logs, 1):
+        def mostrar_log(idx, log):
             aqi = log.get('aqi', 0)
             fecha = log.get('fecha_consulta', 'N/A')
             interpretacion = EcoAPIClient.interpretar_aqi(aqi)
@@ -381,16 +412,24 @@ class ProyectosMenu(MenuBase):
             print(f"   Fecha: {Colors.DIM}{fecha}{Colors.RESET}")
             print()
         
-        # Mostrar estadísticas si hay datos
-        stats = self.servicio.obtener_estadisticas_ciudad(ciudad)
-        if stats:
-            UI.print_section(f"ESTADÍSTICAS - {ciudad.upper()}", Icons.CHART)
+        total = self.mostrar_paginado(
+            lambda token: self.servicio.listar_logs_por_ciudad_pagina(ciudad, token=token, pais=pais),
+            mostrar_log,
+            f"No se encontraron consultas para '{ciudad}'"
+        )
+        if not total:
+            UI.pause()
+            return
+        
+        # Mostrar estadísticas de cada ciudad encontrada (un nombre parcial puede abarcar varias)
+        for stats in self.servicio.obtener_estadisticas_ciudad(ciudad, pais):
+            UI.print_section(f"ESTADÍSTICAS - {stats['ciudad'].upper()}, {stats['pais']}", Icons.CHART)
             UI.print_item("Total de consultas", stats.get('total_consultas', 'N/A'))
-            UI.print_item("AQI promedio", f"{stats.get('aqi_promedio', 0):.1f}/5")
+            UI.print_item("AQI promedio", f"{stats.get('aqi_promedio') or 0:.1f}/5")
             UI.print_item("AQI máximo", f"{stats.get('aqi_maximo', 'N/A')}/5")
             UI.print_item("AQI mínimo", f"{stats.get('aqi_minimo', 'N/A')}/5")
-            UI.print_item("PM2.5 promedio", f"{stats.get('pm2_5_promedio', 0):.2f} μg/m³")
-            UI.print_item("PM10 promedio", f"{stats.get('pm10_promedio', 0):.2f} μg/m³")
+            UI.print_item("PM2.5 promedio", f"{stats.get('pm2_5_promedio') or 0:.2f} μg/m³")
+            UI.print_item("PM10 promedio", f"{stats.get('pm10_promedio') or 0:.2f} μg/m³")
             UI.print_item("Última consulta", stats.get('ultima_consulta', 'N/A'))
         
         UI.pause()
@@ -399,27 +438,31 @@ class ProyectosMenu(MenuBase):
         """Muestra lista de ciudades únicas consultadas"""
         UI.print_section("CIUDADES CONSULTADAS", f"{Icons.CHART} {Icons.EARTH}")
         
-        ciudades = self.servicio.listar_ciudades_consultadas()
-        
-        if not ciudades:
-            UI.print_warning("No hay ciudades consultadas")
-            UI.pause()
-            return
+        headers = ["#", "Ciudad", "País", "Consultas"]
         
-        print(f"\n{Colors.BRIGHT_CYAN}Total de ciudades consultadas: {len(ciudades)}{Colors.RESET}\n")
+        mostradas = [0]
         
-        headers = ["#", "Ciudad", "País", "Consultas"]
-        rows = []
+        def filas():
+            for idx, ciudad in enumerate(self.servicio.iterar_ciudades_consultadas(), 1):
+                mostradas[0] = idx
+                yield [
+                    str(idx),
+                    ciudad.get('ciudad', 'N/A'),
+                    ciudad.get('pais', 'N/A'),
+                    str(ciudad.get('consultas', 0))
+                ]
         
-        for idx, ciudad in enumerate(ciudades, 1):
-            rows.append([
-                str(idx),
-                ciudad.get('ciudad', 'N/A'),
-                ciudad.get('pais', 'N/A'),
-                str(ciudad.get('consultas', 0))
-            ])
+        # Cada fila se imprime al llegar del cursor, sin reunir el listado en memoria
+        try:
+            UI.print_table_stream(headers, filas(), [6, 30, 6, 10])
+        except Exception as e:
+            UI.print_error(f"Error obteniendo ciudades: {e}")
         
-        UI.print_table(headers, rows)
+        total = mostradas[0]
+        if not total:
+            UI.print_warning("No hay ciudades consultadas")
+        else:
+            print(f"\n{Colors.BRIGHT_CYAN}Total de ciudades consultadas: {total}{Colors.RESET}")
         
         UI.pause()
 
@@ -438,7 +481,8 @@ class EmpleadosMenu(MenuBase):
         UI.print_menu_option("4", "Buscar por nombre", Icons.SEARCH)
         UI.print_menu_option("5", "Modificar", Icons.EDIT)
         UI.print_menu_option("6", "Eliminar", Icons.DELETE)
-        UI.print_menu_option("7", "Volver", Icons.BACK)
+        UI.print_menu_option("7", "Exportar a CSV", Icons.LIST)
+        UI.print_menu_option("8", "Volver", Icons.BACK)
 
     def ejecutar(self):
         while True:
@@ -448,18 +492,20 @@ class EmpleadosMenu(MenuBase):
             if opcion == '1':
                 self._agregar_empleado()
             elif opcion == '2':
-                empleados = self.servicio.listar_todos()
-                if not empleados:
+                total = 0
+                for e in self.servicio.iterar_con_departamento():
+                    if total == 0:
+                        UI.print_section("Lista de Empleados", Icons.EMPLOYEE)
+                    total += 1
+                    UI.print_item("Nombre", e.get('nombre', 'N/A'), Colors.BRIGHT_CYAN)
+                    UI.print_item("Email", e.get('email', 'N/A'), Colors.CYAN)
+                    UI.print_item("Departamento", e['departamento']['nombre'] if e.get('departamento') else 'N/A')
+                    UI.print_item("Salario", f"${e.get('salario', 0):,.2f}" if e.get('salario') else 'N/A', Colors.BRIGHT_GREEN)
+                    UI.print_item("Fecha inicio", e.get('fecha_inicio_contrato', 'N/A'))
+                    UI.print_item("ID", e.get('id', 'N/A'), Colors.DIM)
+                    print()
+                if total == 0:
                     UI.print_warning("No hay empleados registrados")
-                else:
-                    UI.print_section("Lista de Empleados", Icons.EMPLOYEE)
-                    for e in empleados:
-                        UI.print_item("Nombre", e.get('nombre', 'N/A'), Colors.BRIGHT_CYAN)
-                        UI.print_item("Email", e.get('email', 'N/A'), Colors.CYAN)
-                        UI.print_item("Salario", f"${e.get('salario', 0):,.2f}" if e.get('salario') else 'N/A', Colors.BRIGHT_GREEN)
-                        UI.print_item("Fecha inicio", e.get('fecha_inicio_contrato', 'N/A'))
-                        UI.print_item("ID", e.get('id', 'N/A'), Colors.DIM)
-                        print()
             elif opcion == '3':
                 codigo = UI.input_prompt("Código del empleado", Icons.SEARCH)
                 empleado = self.servicio.obtener_por_id(codigo)
@@ -473,15 +519,18 @@ class EmpleadosMenu(MenuBase):
                     UI.print_error("Empleado no encontrado")
             elif opcion == '4':
                 nombre = UI.input_prompt("Nombre a buscar", Icons.SEARCH)
-                empleados = self.servicio.buscar_por_nombre(nombre)
-                if not empleados:
-                    UI.print_warning("No se encontraron empleados")
-                else:
-                    UI.print_section(f"Resultados para: {nombre}", Icons.SEARCH)
-                    for e in empleados:
-                        UI.print_item("Nombre", e.get('nombre', 'N/A'))
-                        UI.print_item("Email", e.get('email', 'N/A'))
-                        print()
+                UI.print_section(f"Resultados para: {nombre}", Icons.SEARCH)
+                
+                def mostrar_empleado(_, e):
+                    UI.print_item("Nombre", e.get('nombre', 'N/A'))
+                    UI.print_item("Email", e.get('email', 'N/A'))
+                    print()
+                
+                self.mostrar_paginado(
+                    lambda token: self.servicio.buscar_por_nombre_pagina(nombre, token=token),
+                    mostrar_empleado,
+                    "No se encontraron empleados"
+                )
             elif opcion == '5':
                 codigo = UI.input_prompt("Código del empleado a modificar", Icons.EDIT)
                 nombre = UI.input_prompt("Nuevo nombre", Icons.EMPLOYEE)
@@ -494,11 +543,14 @@ class EmpleadosMenu(MenuBase):
                 else:
                     UI.print_warning("Operación cancelada")
             elif opcion == '7':
+                ruta = UI.input_prompt("Archivo de destino [empleados.csv]", Icons.LIST) or "empleados.csv"
+                self.servicio.exportar_csv(ruta)
+            elif opcion == '8':
                 break
             else:
                 UI.print_error("Opción inválida")
             
-            if opcion != '7':
+            if opcion != '8':
                 UI.pause()
     
     def _agregar_empleado(self):
@@ -575,7 +627,6 @@ class EmpleadosMenu(MenuBase):
             return
         
         try:
-            # 1. Crear usuario primero
             usuario_id = str(uuid.uuid4())
             usuario = Usuario(
                 id=usuario_id,
@@ -586,9 +637,6 @@ class EmpleadosMenu(MenuBase):
                 activo=True
             )
             
-            self.servicio_usuarios.crear_usuario(usuario, contrasena)
-            
-            # 2. Crear empleado vinculado al usuario
             empleado = Empleado(
                 id=str(uuid.uuid4()),
                 usuario_id=usuario_id,
@@ -599,7 +647,9 @@ class EmpleadosMenu(MenuBase):
                 departamento_id=dept_id
             )
             
-            self.servicio.crear(empleado)
+            # Usuario y empleado se guardan en una misma transacción
+            if not self.servicio.crear_con_usuario(empleado, usuario, contrasena, self.servicio_usuarios):
+                return
             
             UI.print_success(f"Empleado '{nombre_completo}' creado exitosamente")
             print(f"{Colors.CYAN}{Icons.USER} Usuario: {nombre_usuario}{Colors.RESET}")
@@ -611,19 +661,20 @@ class EmpleadosMenu(MenuBase):
             
         except Exception as e:
             UI.print_error(f"Error creando empleado: {e}")
-            # Si falla la creación del empleado, podría quedar el usuario huérfano
-            # En producción, esto debería manejarse con una transacción
 
 
 class MainMenu:
     def __init__(self, servicio_departamentos, servicio_proyectos, servicio_empleados, 
-                 servicio_usuarios, servicio_roles, usuario_actual):
+                 servicio_usuarios, servicio_roles, usuario_actual, servicio_busqueda=None,
+                 servicio_diagnostico=None):
         self.servicio_departamentos = servicio_departamentos
         self.servicio_proyectos = servicio_proyectos
         self.servicio_empleados = servicio_empleados
         self.servicio_usuarios = servicio_usuarios
         self.servicio_roles = servicio_roles
         self.usuario_actual = usuario_actual
+        self.servicio_busqueda = servicio_busqueda
+        self.servicio_diagnostico = servicio_diagnostico
         self.nivel_permisos = usuario_actual.get('nivel_permisos', 0)
         self.nombre_rol = usuario_actual.get('nombre_rol', 'Usuario')
 
@@ -661,6 +712,13 @@ class MainMenu:
             UI.print_menu_option("5", "Gestión de Usuarios", Icons.USER)
             UI.print_menu_option("6", "Gestión de Roles", Icons.ROLE)
             opciones.extend(['5', '6'])
+            if self.servicio_diagnostico:
+                UI.print_menu_option("9", "Métricas de consultas", Icons.SETTINGS)
+                opciones.append('9')
+        
+        if self.nivel_permisos >= 7 and self.servicio_busqueda:
+            UI.print_menu_option("8", "Búsqueda global", Icons.SEARCH)
+            opciones.append('8')
         
         # Opciones comunes
         print()  # Espaciado
@@ -706,6 +764,11 @@ class MainMenu:
                 UsuariosMenu(self.servicio_usuarios, self.servicio_roles, self.usuario_actual).ejecutar()
             elif opcion == '6' and self.nivel_permisos >= 10:
                 RolesMenu(self.servicio_roles).ejecutar()
+            elif opcion == '9' and self.nivel_permisos >= 10 and self.servicio_diagnostico:
+                MetricasMenu(self.servicio_diagnostico).ejecutar()
+            
+            elif opcion == '8' and self.nivel_permisos >= 7 and self.servicio_busqueda:
+                self._busqueda_global()
             
             # Cambiar contraseña (todos los usuarios)
             elif opcion == '7' and self.nivel_permisos >= 3:
@@ -719,6 +782,28 @@ class MainMenu:
                 UI.print_error("No tiene permisos para acceder a esta opción")
                 UI.pause()
     
+    def _busqueda_global(self):
+        """Busca en empleados, proyectos, departamentos (y usuarios si es admin) a la vez"""
+        UI.print_section("Búsqueda Global", Icons.SEARCH)
+        tipos = ['departamento', 'proyecto', 'empleado']
+        if self.nivel_permisos >= 10:
+            tipos.append('usuario')
+        UI.print_info("Escriba parte de un nombre o email (se toleran errores de tipeo). Enter vacío para volver.")
+        
+        while True:
+            consulta = UI.input_prompt("Buscar", icon=Icons.SEARCH)
+            if not consulta:
+                break
+            resultados = self.servicio_busqueda.buscar(consulta, tipos)
+            rows = [
+                [r['tipo'].capitalize(), r['nombre'], r['detalle'] or '', r['id']]
+                for r in resultados
+            ]
+            if rows:
+                UI.print_table(["Tipo", "Nombre", "Detalle", "Código"], rows)
+            else:
+                UI.print_warning("No se encontraron resultados")
+
     def _cambiar_mi_contrasena(self):
         """Permite al usuario cambiar su propia contraseña"""
         import getpass
@@ -776,12 +861,11 @@ class ProyectosMenuSoloLectura(MenuBase):
             self.mostrar()
             opcion = UI.input_prompt("Seleccione una opción")
             if opcion == '1':
-                proyectos = self.servicio.listar_todos()
-                if not proyectos:
+                total = 0
+                for total, p in enumerate(self.servicio.iterar_todos(), 1):
+                    print(f"  {Colors.BRIGHT_BLACK}•{Colors.RESET} {total}. {p}")
+                if total == 0:
                     UI.print_warning("No hay proyectos registrados")
-                else:
-                    for idx, p in enumerate(proyectos, 1):
-                        print(f"  {Colors.BRIGHT_BLACK}•{Colors.RESET} {idx}. {p}")
             elif opcion == '2':
                 codigo = UI.input_prompt("Código")
                 proyecto = self.servicio.obtener_por_id(codigo)
@@ -791,12 +875,11 @@ class ProyectosMenuSoloLectura(MenuBase):
                     UI.print_error("Proyecto no encontrado")
             elif opcion == '3':
                 nombre = UI.input_prompt("Nombre")
-                proyectos = self.servicio.buscar_por_nombre(nombre)
-                if not proyectos:
-                    UI.print_warning("No se encontraron proyectos")
-                else:
-                    for idx, p in enumerate(proyectos, 1):
-                        print(f"  {Colors.BRIGHT_BLACK}•{Colors.RESET} {idx}. {p}")
+                self.mostrar_paginado(
+                    lambda token: self.servicio.buscar_por_nombre_pagina(nombre, token=token),
+                    lambda idx, p: print(f"  {Colors.BRIGHT_BLACK}•{Colors.RESET} {idx}. {p}"),
+                    "No se encontraron proyectos"
+                )
             elif opcion == '4':
                 self._evaluar_calidad_aire()
             elif opcion == '5':
@@ -821,11 +904,15 @@ class ProyectosMenuSoloLectura(MenuBase):
         pais = UI.input_prompt("Código de país (ej: CL, AR, PE) [CL]").upper() or "CL"
         
         print(f"\n{Colors.CYAN}{Icons.SEARCH} Consultando calidad del aire en {ciudad}, {pais}...{Colors.RESET}")
-        datos = self.servicio.obtener_calidad_aire_por_ciudad(
-            ciudad, pais,
-            usuario_id=self.usuario_id,
-            guardar_log=True
-        )
+        try:
+            datos = self.servicio.obtener_calidad_aire_por_ciudad(
+                ciudad, pais,
+                usuario_id=self.usuario_id,
+                guardar_log=True
+            )
+        except CuotaAgotada as e:
+            _avisar_cuota_agotada(e)
+            return
         
         if datos:
             self._mostrar_reporte_calidad_aire(datos, ciudad)
@@ -893,3 +980,136 @@ class ProyectosMenuSoloLectura(MenuBase):
             print(f"  {Colors.BRIGHT_BLACK}•{Colors.RESET} Sugerencia: Buscar ubicación alternativa")
             print(f"  {Colors.BRIGHT_BLACK}•{Colors.RESET} Considerar trabajo remoto si proyecto es crítico")
 
+
+
+class MetricasMenu(MenuBase):
+    """Menú de administración: instrumentación de consultas y estado del pool"""
+
+    def mostrar(self):
+        estado = "activa" if self.servicio.activa else "desactivada"
+        UI.print_section(f"Métricas de Consultas (instrumentación {estado})", Icons.SETTINGS)
+        UI.print_menu_option("1", "Activar / desactivar instrumentación", Icons.SETTINGS)
+        UI.print_menu_option("2", "Sentencias más costosas", Icons.LIST)
+        UI.print_menu_option("3", "Consultas lentas", Icons.WARNING)
+        UI.print_menu_option("4", "Estado del pool, réplicas y auditoría", Icons.VIEW)
+        UI.print_menu_option("5", "Exportar a JSON", Icons.LIST)
+        UI.print_menu_option("6", "Reiniciar métricas", Icons.DELETE)
+        UI.print_menu_option("7", "Volver", Icons.BACK)
+
+    def ejecutar(self):
+        while True:
+            self.mostrar()
+            opcion = UI.input_prompt("Seleccione una opción")
+
+            if opcion == '1':
+                self._alternar()
+            elif opcion == '2':
+                self._ver_sentencias()
+            elif opcion == '3':
+                self._ver_lentas()
+            elif opcion == '4':
+                self._ver_pool()
+            elif opcion == '5':
+                ruta = UI.input_prompt("Archivo de destino (metricas_consultas.json)") or "metricas_consultas.json"
+                self.servicio.exportar_json(ruta)
+            elif opcion == '6':
+                self.servicio.reiniciar()
+            elif opcion == '7':
+                break
+            else:
+                UI.print_error("Opción inválida")
+
+            if opcion != '7':
+                UI.pause()
+
+    def _alternar(self):
+        if self.servicio.activa:
+            self.servicio.desactivar()
+            return
+        umbral = UI.input_prompt("Umbral de consulta lenta en ms (Enter = mantener)")
+        try:
+            self.servicio.activar(float(umbral) if umbral else None)
+        except ValueError:
+            UI.print_error("Debe ingresar un número")
+
+    def _ver_sentencias(self):
+        orden = UI.input_prompt("Ordenar por (total/p95/llamadas/filas)") or 'total'
+        if orden not in ('total', 'p95', 'llamadas', 'filas'):
+            UI.print_error("Orden inválido")
+            return
+        sentencias = self.servicio.sentencias(orden)
+        if not sentencias:
+            UI.print_warning("Sin datos: active la instrumentación y use la aplicación")
+            return
+        rows = [
+            [s['llamadas'], f"{s['total_ms']:.1f}", f"{s['p50_ms']:.1f}", f"{s['p95_ms']:.1f}",
+             f"{s['p99_ms']:.1f}", s['filas'], s['sql'][:60]]
+            for s in sentencias
+        ]
+        UI.print_table(["Llamadas", "Total ms", "p50", "p95", "p99", "Filas", "SQL"], rows)
+
+        adquisicion = self.servicio.adquisicion_conexion()
+        print()
+        UI.print_item("Adquisiciones de conexión", adquisicion['adquisiciones'])
+        UI.print_item("Espera promedio", f"{adquisicion['promedio_ms']:.2f} ms")
+        UI.print_item("Espera máxima", f"{adquisicion['max_ms']:.2f} ms")
+
+    def _ver_lentas(self):
+        lentas = self.servicio.consultas_lentas()
+        if not lentas:
+            UI.print_warning("No hay consultas lentas registradas")
+            return
+        for lenta in lentas[-20:]:
+            print(f"\n{Colors.BRIGHT_YELLOW}{lenta['fecha']}  {lenta['ms']:.1f} ms{Colors.RESET}")
+            print(f"  {lenta['sql']}")
+            print(f"  {Colors.BRIGHT_BLACK}Parámetros: {lenta['parametros']}"
+                  f"{'  Lote: ' + str(lenta['lote']) if 'lote' in lenta else ''}{Colors.RESET}")
+
+    def _ver_pool(self):
+        stats = self.servicio.estado_pool()
+        if not stats:
+            # Las réplicas, la auditoría y las cachés tienen estado propio: se muestran igual
+            UI.print_warning("El pool aún no se ha creado")
+        for clave, valor in (stats or {}).items():
+            UI.print_item(clave, f"{valor:.3f}" if isinstance(valor, float) else valor)
+
+        replicas = self.servicio.estado_replicas()
+        if replicas:
+            print()
+            rows = [
+                [r['replica'], "sí" if r['sana'] else "no",
+                 "-" if r['retraso_s'] is None else f"{r['retraso_s']:g}",
+                 "-" if r['latencia_ms'] is None else f"{r['latencia_ms']:.1f}",
+                 r['lecturas'], (r['error'] or "")[:40]]
+                for r in replicas
+            ]
+            UI.print_table(["Réplica", "Sana", "Retraso s", "Latencia ms", "Lecturas", "Error"], rows)
+
+        print()
+        UI.print_section("Auditoría", Icons.LIST)
+        for clave, valor in self.servicio.estado_auditoria().items():
+            UI.print_item(clave, f"{valor:.3f}" if isinstance(valor, float) else valor)
+
+        print()
+        UI.print_section("Caché de geocodificación", Icons.LIST)
+        for clave, valor in self.servicio.estado_geocodificacion().items():
+            UI.print_item(clave, f"{valor:.3f}" if isinstance(valor, float) else valor)
+
+        print()
+        UI.print_section("Caché de calidad del aire", Icons.LIST)
+        for clave, valor in self.servicio.estado_cache_calidad_aire().items():
+            UI.print_item(clave, f"{valor:.3f}" if isinstance(valor, float) else valor)
+
+        limite = self.servicio.estado_limite_api()
+        if limite:
+            print()
+            UI.print_section("Límite de peticiones a la API", Icons.LIST)
+            for clave, valor in limite.items():
+                UI.print_item(clave, f"{valor:.3f}" if isinstance(valor, float) else valor)
+
+        diferido = self.servicio.estado_escritura_diferida()
+        if diferido:
+            print()
+            UI.print_section("Escritura diferida de logs_clima", Icons.LIST)
+            for clave, valor in diferido.items():
+                UI.print_item(clave, f"{valor:.3f}" if isinstance(valor, float) else valor)
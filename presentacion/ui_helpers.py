@@ -147,6 +147,33 @@ class UI:
             row_line = "  ".join(str(cell).ljust(col_widths[i]) for i, cell in enumerate(row))
             print(row_line)
     
+    @staticmethod
+    def print_table_stream(headers, rows, widths):
+        """
+        Imprime una tabla fila a fila a medida que llegan, sin reunirlas antes
+        (para listados en streaming). Las columnas tienen ancho fijo y las
+        celdas más largas se recortan.
+        
+        Returns:
+            Cantidad de filas impresas (el encabezado solo se imprime si hay alguna)
+        """
+        widths = [max(len(h), w) for h, w in zip(headers, widths)]
+        total = 0
+        for row in rows:
+            if total == 0:
+                header_line = "  ".join(h.ljust(widths[i]) for i, h in enumerate(headers))
+                print(f"\n{Colors.BOLD}{Colors.BRIGHT_CYAN}{header_line}{Colors.RESET}")
+                print(Colors.CYAN + "─" * len(header_line) + Colors.RESET)
+            celdas = []
+            for i, cell in enumerate(row):
+                texto = str(cell)
+                if len(texto) > widths[i]:
+                    texto = texto[:widths[i] - 1] + "…"
+                celdas.append(texto.ljust(widths[i]))
+            print("  ".join(celdas))
+            total += 1
+        return total
+    
     @staticmethod
     def input_prompt(prompt, icon="▶"):
         """Solicita input con formato mejorado"""
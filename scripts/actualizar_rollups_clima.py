@@ -0,0 +1,50 @@
+"""
+Script para consolidar logs_clima en los rollups por hora y por día.
+
+Uso:
+    python scripts/actualizar_rollups_clima.py            # una pasada
+    python scripts/actualizar_rollups_clima.py --reiniciar  # recalcula todo desde la primera lectura
+
+Es idempotente: cada pasada recalcula los días con lecturas tardías, continúa
+desde la marca de agua de cada nivel y recalcula el período en curso. Puede programarse con cron o dejarse al
+compactador en segundo plano (LOGS_CLIMA_ROLLUP_INTERVALO en main.py).
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistencia.db import Database
+from persistencia.rollups import actualizar_rollups, dias_pendientes
+
+
+def main():
+    if '--reiniciar' in sys.argv:
+        with Database.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM logs_clima_rollup_marca")
+                cur.execute("DELETE FROM logs_clima_rollup_pendiente")
+        print("Marcas de agua eliminadas: se recalcula desde la primera lectura\n")
+
+    print("=== Consolidando rollups de logs_clima ===\n")
+    tardios = dias_pendientes()
+    if tardios:
+        print(f"  Días con lecturas tardías por recalcular: {len(tardios)} "
+              f"({tardios[0]:%Y-%m-%d} a {tardios[-1]:%Y-%m-%d})")
+    inicio = time.perf_counter()
+    resultado = actualizar_rollups()
+    total = time.perf_counter() - inicio
+
+    for nivel, ventanas in resultado.items():
+        if not ventanas:
+            print(f"  {nivel}: sin lecturas")
+            continue
+        filas = sum(v['filas'] for v in ventanas)
+        print(f"  {nivel}: {len(ventanas)} ventanas, {filas:,} filas afectadas, "
+              f"hasta {ventanas[-1]['hasta']:%Y-%m-%d %H:%M}")
+
+    print(f"\n✓ Completado en {total:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
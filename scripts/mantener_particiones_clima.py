@@ -0,0 +1,57 @@
+"""
+Script de mantenimiento de las particiones mensuales de logs_clima.
+
+Uso:
+    python scripts/mantener_particiones_clima.py                  # valores de .env
+    python scripts/mantener_particiones_clima.py --retencion 12 --futuras 6
+    python scripts/mantener_particiones_clima.py --simular        # solo informa
+
+Crea las particiones de los próximos meses (dividiendo p_futuro) y elimina con
+DROP PARTITION los meses fuera de la retención. Un mes solo se elimina si el
+rollup diario ya lo consolidó; ejecute antes scripts/actualizar_rollups_clima.py.
+Pensado para cron mensual (o semanal).
+"""
+import sys
+import os
+import argparse
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistencia.particiones import (
+    crear_particiones_futuras, purgar_particiones, listar_particiones,
+    RETENCION_MESES_DEFECTO, MESES_FUTUROS_DEFECTO,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mantenimiento de particiones de logs_clima")
+    parser.add_argument('--retencion', type=int, default=RETENCION_MESES_DEFECTO,
+                        help="meses completos de lecturas crudas a conservar")
+    parser.add_argument('--futuras', type=int, default=MESES_FUTUROS_DEFECTO,
+                        help="meses por adelantado con partición propia")
+    parser.add_argument('--simular', action='store_true',
+                        help="muestra los cambios sin aplicarlos")
+    args = parser.parse_args()
+
+    prefijo = "(simulación) " if args.simular else ""
+    print(f"=== {prefijo}Particiones de logs_clima ===\n")
+
+    creadas = crear_particiones_futuras(args.futuras, simular=args.simular)
+    print(f"Creadas: {', '.join(creadas) if creadas else 'ninguna'}")
+
+    resultado = purgar_particiones(args.retencion, simular=args.simular)
+    eliminadas = resultado['eliminadas']
+    print(f"Eliminadas (retención {args.retencion} meses): "
+          f"{', '.join(eliminadas) if eliminadas else 'ninguna'}")
+    if resultado['ciudades_recalculadas']:
+        print(f"Resumen por ciudad recalculado: {resultado['ciudades_recalculadas']} ciudades")
+    if resultado['pendientes_rollup']:
+        print(f"⚠ Sin consolidar en el rollup diario, se conservan: "
+              f"{', '.join(resultado['pendientes_rollup'])}")
+
+    print("\nParticiones actuales:")
+    for particion in listar_particiones():
+        print(f"  {particion['nombre']:<10} ~{particion['filas'] or 0:,} filas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Script para precargar la caché de geocodificación con las coordenadas de logs_clima.
+
+Uso:
+    python scripts/precargar_geocodificacion.py
+
+Ejecutar después de `alembic upgrade head`: cada ciudad ya consultada queda en
+geocodificacion_ciudades y su próxima consulta no gasta una petición a
+Geocoding API. Las entradas existentes no se reemplazan.
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistencia.geocodificacion import GeocodificacionRepo
+
+
+def main():
+    print("=== Precargando caché de geocodificación desde logs_clima ===\n")
+    repo = GeocodificacionRepo()
+    inicio = time.perf_counter()
+    agregadas = repo.precargar_desde_logs_clima()
+    total = time.perf_counter() - inicio
+
+    conteo = repo.contar()
+    print(f"✓ {agregadas} ciudades agregadas en {total:.2f}s "
+          f"({conteo['encontradas']} con coordenadas y {conteo['no_encontradas']} no encontradas en la caché)")
+
+
+if __name__ == "__main__":
+    main()
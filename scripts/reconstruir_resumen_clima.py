@@ -0,0 +1,34 @@
+"""
+Script para reconstruir logs_clima_resumen_ciudad a partir de logs_clima.
+
+Uso:
+    python scripts/reconstruir_resumen_clima.py [tamano_bloque]
+
+Ejecutar después de `alembic upgrade head` para cargar los datos existentes,
+o si el resumen se desincroniza. Detenga la aplicación mientras se ejecuta.
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistencia.repositorios import LogClimaRepo
+
+
+def main():
+    tamano_bloque = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+
+    print(f"=== Reconstruyendo resumen por ciudad (bloques de {tamano_bloque:,}) ===\n")
+    inicio = time.perf_counter()
+    bloques = LogClimaRepo().reconstruir_resumen(tamano_bloque)
+    total = time.perf_counter() - inicio
+
+    for b in bloques:
+        print(f"  bloque #{b['bloque']}: {b['filas']:,} filas en {b['segundos'] * 1000:.0f} ms")
+
+    ciudades = LogClimaRepo().listar_ciudades_consultadas()
+    print(f"\n✓ {sum(b['filas'] for b in bloques):,} registros, {len(ciudades)} ciudades, {total:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Script para poblar la base con muchos empleados usando inserciones masivas.
+
+Uso:
+    python scripts/seed_empleados.py [cantidad] [tamano_lote]
+
+Requiere haber ejecutado scripts/init_data.py (rol Empleado).
+"""
+import sys
+import os
+import time
+import uuid
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistencia.repositorios import EmpleadoRepo
+from persistencia.auth_repositorios import UsuarioRepo, RolRepo
+from persistencia.unit_of_work import UnitOfWork
+from dominio.models import Empleado
+from dominio.auth_models import Usuario
+from dominio.security import PasswordHasher
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    tamano_lote = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+
+    rol_empleado = next((r for r in RolRepo().listar_todos() if r['nivel_permisos'] == 3), None)
+    if not rol_empleado:
+        print("❌ No existe el rol de Empleado. Ejecute: python scripts/init_data.py")
+        return
+
+    print(f"=== Generando {cantidad:,} usuarios + empleados (lotes de {tamano_lote:,}) ===\n")
+    prefijo = uuid.uuid4().hex[:8]
+    salt = PasswordHasher.generate_salt()
+    contrasena = PasswordHasher.hash_password("cambiar123", salt)
+
+    usuarios = []
+    empleados = []
+    for i in range(cantidad):
+        usuario_id = str(uuid.uuid4())
+        usuarios.append(Usuario(
+            id=usuario_id,
+            nombre_usuario=f"seed_{prefijo}_{i}",
+            contrasena_cifrada=contrasena,
+            salt=salt,
+            rol_id=rol_empleado['id'],
+        ))
+        empleados.append(Empleado(
+            id=str(uuid.uuid4()),
+            usuario_id=usuario_id,
+            nombre=f"Empleado Seed {i}",
+            email=f"seed_{prefijo}_{i}@ecotech.cl",
+            fecha_inicio_contrato="2025-01-01",
+            salario=1000.00,
+        ))
+
+    inicio = time.perf_counter()
+    with UnitOfWork() as uow:
+        lotes_usuarios = UsuarioRepo().crear_muchos(usuarios, tamano_lote)
+        lotes_empleados = EmpleadoRepo().crear_muchos(empleados, tamano_lote)
+    total = time.perf_counter() - inicio
+
+    if uow.revertida:
+        print("✗ La carga se revirtió")
+        return
+
+    for nombre, lotes in (("usuarios", lotes_usuarios), ("empleados", lotes_empleados)):
+        segundos = sum(l['segundos'] for l in lotes)
+        lento = max(lotes, key=lambda l: l['segundos'])
+        print(f"✓ {nombre}: {sum(l['filas'] for l in lotes):,} filas en {len(lotes)} lotes, "
+              f"{segundos:.2f}s (lote más lento #{lento['lote']}: {lento['segundos'] * 1000:.0f} ms)")
+
+    print(f"\nTotal (incluye commit): {total:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
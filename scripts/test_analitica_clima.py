@@ -0,0 +1,207 @@
+"""
+Script de prueba de LogClimaFrame (análisis columnar con NumPy).
+
+Comprueba filtros y agregados contra un cálculo en Python puro, la carga en
+streaming desde LogClimaRepo (SQLite en memoria, no requiere MySQL) y mide
+memoria y tiempo con N lecturas sintéticas (por defecto 10.000.000; se
+cambia con el primer argumento):
+
+    python scripts/test_analitica_clima.py 2000000
+"""
+import sys
+import os
+import random
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistencia.db import Database
+from persistencia.sqlite_backend import BackendSQLite
+from persistencia.repositorios import LogClimaRepo
+from dominio.models import LogClima
+
+try:
+    import numpy as np
+    from aplicacion.analitica_clima import LogClimaFrame, CONTAMINANTES
+except ImportError:
+    np = None
+
+LECTURAS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+CARGA = 200_000
+CIUDADES = [("Santiago", "CL"), ("Valparaíso", "CL"), ("Lima", "PE"), ("Bogotá", "CO"), ("Quito", "EC")]
+INICIO = datetime(2026, 3, 1)
+
+
+def _filas(cantidad, semilla=7):
+    """Lecturas sintéticas cada 7 minutos, con contaminantes faltantes a veces"""
+    azar = random.Random(semilla)
+    for i in range(cantidad):
+        ciudad, pais = CIUDADES[i % len(CIUDADES)]
+        fila = {'ciudad': ciudad, 'pais': pais, 'fecha_consulta': INICIO + timedelta(minutes=7 * i),
+                'aqi': azar.randint(1, 5)}
+        for nombre in CONTAMINANTES:
+            fila[nombre] = None if azar.random() < 0.05 else round(azar.uniform(0, 200), 2)
+        yield fila
+
+
+def _miles(n):
+    return f"{n:,}".replace(',', '.')
+
+
+def _comprobar(descripcion, condicion):
+    print(f"{'✓' if condicion else '✗'} {descripcion}")
+    return condicion
+
+
+def _cerca(a, b):
+    return (a is None and b is None) or (a is not None and b is not None and abs(a - b) < 1e-3 * max(1, abs(b)))
+
+
+def test_agregados():
+    """Test: filtros, por_ciudad y remuestrear frente a Python puro"""
+    print("=" * 60)
+    print("TEST: Filtros y agregados")
+    print("=" * 60)
+
+    filas = list(_filas(20_000))
+    frame = LogClimaFrame.desde_filas(filas, tamano_bloque=3000)
+    ok = _comprobar(f"{len(frame)} lecturas cargadas en bloques de 3000", len(frame) == len(filas))
+
+    # por_ciudad
+    esperado = defaultdict(list)
+    for f in filas:
+        esperado[(f['ciudad'], f['pais'])].append(f)
+    por_ciudad = {(f['ciudad'], f['pais']): f for f in frame.por_ciudad()}
+    ok &= _comprobar("por_ciudad: lecturas, AQI y pm2_5 (sin contar faltantes)", all(
+        por_ciudad[c]['lecturas'] == len(lista)
+        and _cerca(por_ciudad[c]['aqi_promedio'], sum(f['aqi'] for f in lista) / len(lista))
+        and por_ciudad[c]['aqi_maximo'] == max(f['aqi'] for f in lista)
+        and _cerca(por_ciudad[c]['pm2_5_promedio'],
+                   sum(f['pm2_5'] for f in lista if f['pm2_5'] is not None)
+                   / sum(1 for f in lista if f['pm2_5'] is not None))
+        for c, lista in esperado.items()
+    ))
+
+    # filtrar + remuestrear por día
+    desde, hasta = INICIO + timedelta(days=10), INICIO + timedelta(days=40)
+    lima = frame.filtrar(ciudad="lima", pais="pe", desde=desde, hasta=hasta, aqi_minimo=2)
+    seleccion = [f for f in filas if f['ciudad'] == "Lima" and desde <= f['fecha_consulta'] < hasta and f['aqi'] >= 2]
+    por_dia = defaultdict(list)
+    for f in seleccion:
+        por_dia[f['fecha_consulta'].replace(hour=0, minute=0)].append(f['aqi'])
+    serie = lima.remuestrear('dia', metricas=('aqi',))
+    ok &= _comprobar(f"filtrar + remuestrear('dia'): {len(serie)} días de Lima con AQI >= 2", [
+        (s['periodo'], s['lecturas'], s['aqi_minimo']) for s in serie
+    ] == [(d, len(v), min(v)) for d, v in sorted(por_dia.items())])
+
+    semanas = frame.remuestrear('semana', metricas=('aqi',))
+    meses = frame.remuestrear('mes', metricas=('aqi',), por_ciudad=True)
+    ok &= _comprobar("semanas desde el lunes", all(s['periodo'].weekday() == 0 for s in semanas[1:])
+                     and sum(s['lecturas'] for s in semanas) == len(filas))
+    ok &= _comprobar("meses por ciudad", all(m['periodo'].day == 1 for m in meses)
+                     and sum(m['lecturas'] for m in meses) == len(filas)
+                     and len(meses) == len({(m['periodo'], m['ciudad']) for m in meses}))
+    altos = frame.filtrar(mascara=frame.columna('pm2_5') > 150)
+    ok &= _comprobar("máscara vectorizada (pm2_5 > 150)", len(altos) == sum(
+        1 for f in filas if f['pm2_5'] is not None and f['pm2_5'] > 150))
+    return ok
+
+
+def test_desde_repo():
+    """Test: carga en streaming desde LogClimaRepo"""
+    print("\n" + "=" * 60)
+    print("TEST: Carga desde LogClimaRepo")
+    print("=" * 60)
+
+    repo = LogClimaRepo()
+    repo.crear_muchos(LogClima(id=str(uuid.uuid4()), ciudad=c, pais=p, aqi=i % 5 + 1, pm2_5=i % 40)
+                      for i, (c, p) in enumerate(CIUDADES * 200))
+    frame = LogClimaFrame.desde_repo(repo, tamano_bloque=250)
+    ok = _comprobar(f"{frame!r}", len(frame) == len(CIUDADES) * 200)
+    for fila in frame.por_ciudad():
+        estadisticas = next(e for e in repo.obtener_estadisticas_por_ciudad(fila['ciudad'], fila['pais'])
+                            if e['ciudad'] == fila['ciudad'])
+        ok &= _comprobar(
+            f"{fila['ciudad']}: {fila['lecturas']} lecturas, AQI promedio {fila['aqi_promedio']:.2f} (resumen en BD)",
+            fila['lecturas'] == estadisticas['total_consultas']
+            and _cerca(fila['aqi_promedio'], float(estadisticas['aqi_promedio']))
+        )
+    return ok
+
+
+def test_volumen():
+    """Test: memoria y tiempo de carga y agregados para N lecturas"""
+    print("\n" + "=" * 60)
+    print(f"TEST: {_miles(LECTURAS)} lecturas")
+    print("=" * 60)
+
+    # Carga: filas por segundo con CARGA dicts ya generados; el pico de memoria se mide aparte
+    filas = list(_filas(CARGA))
+    inicio = time.perf_counter()
+    LogClimaFrame.desde_filas(filas)
+    t_carga = time.perf_counter() - inicio
+    tracemalloc.start()
+    LogClimaFrame.desde_filas(filas)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del filas
+    print(f"  Carga desde dicts: {_miles(int(CARGA / t_carga))} filas/s; pico {pico / 2**20:.0f} MB"
+          f" para {_miles(CARGA)} filas")
+
+    # Agregados sobre N lecturas generadas directamente en columnas
+    azar = np.random.default_rng(7)
+    segundos = np.datetime64(INICIO, 's') + np.sort(azar.integers(0, 365 * 86400, LECTURAS))
+    contaminantes = {}
+    for nombre in CONTAMINANTES:
+        valores = azar.random(LECTURAS, dtype=np.float32) * 200
+        valores[azar.random(LECTURAS) < 0.05] = np.nan
+        contaminantes[nombre] = valores
+    frame = LogClimaFrame(
+        [(f"Ciudad {i}", "CL") for i in range(50)], azar.integers(0, 50, LECTURAS, dtype=np.int32),
+        segundos, azar.integers(1, 6, LECTURAS, dtype=np.uint8), contaminantes
+    )
+    memoria = frame.memoria()
+    print(f"  Memoria de las columnas: {memoria / 2**20:.0f} MB ({memoria / LECTURAS:.0f} B por lectura)")
+
+    tiempos = {}
+    for nombre, operacion in [
+        ("por_ciudad (8 métricas)", lambda: frame.por_ciudad()),
+        ("remuestrear('dia')", lambda: frame.remuestrear('dia')),
+        ("remuestrear('hora', aqi+pm2_5)", lambda: frame.remuestrear('hora', metricas=('aqi', 'pm2_5'))),
+        ("remuestrear('semana', por_ciudad)", lambda: frame.remuestrear('semana', ('aqi', 'pm2_5'), True)),
+        ("filtrar(ciudad, aqi >= 4)", lambda: frame.filtrar(ciudad="Ciudad 7", aqi_minimo=4)),
+    ]:
+        inicio = time.perf_counter()
+        operacion()
+        tiempos[nombre] = time.perf_counter() - inicio
+        print(f"  {nombre:34s} {tiempos[nombre]:6.2f} s")
+
+    proyectado = LECTURAS / (CARGA / t_carga)
+    print(f"  Carga proyectada de {_miles(LECTURAS)} filas: {proyectado:.1f} s")
+    return _comprobar("Menos de 1 GB y agregados en segundos",
+                      memoria < 2**30 and max(tiempos.values()) < 30)
+
+
+if __name__ == "__main__":
+    print("\n🌱 ECOTECH SOLUTIONS - TEST DE ANALÍTICA COLUMNAR\n")
+
+    if np is None:
+        print("- Omitido: NumPy no está instalado (pip install numpy)")
+        sys.exit(0)
+
+    Database.usar_backend(BackendSQLite(':memory:'))
+    try:
+        ok = all([test_agregados(), test_desde_repo(), test_volumen()])
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        ok = False
+    finally:
+        Database.close_pool()
+
+    print("\n" + "=" * 60)
+    print("TESTS COMPLETADOS" if ok else "TESTS CON FALLAS")
+    print("=" * 60 + "\n")
+    sys.exit(0 if ok else 1)
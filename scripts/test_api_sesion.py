@@ -0,0 +1,184 @@
+"""
+Benchmark de EcoAPIClient con sesión keep-alive frente a una conexión por llamada.
+
+Levanta un servidor HTTP local que imita Geocoding y Air Pollution API (no
+requiere API_KEY real ni internet) y mide la latencia por consulta de
+`obtener_calidad_aire_ciudad`:
+
+    antes    `requests.get` del módulo: un connect TCP por petición
+    después  la `requests.Session` del cliente: la conexión se reutiliza
+
+Además cuenta las conexiones TCP que recibe el servidor, comprueba que las
+respuestas llegan con gzip y que con varios hilos el pool no abre más
+conexiones que su tamaño. El segundo escenario agrega un retardo en cada
+connect (`RTT_MS`, por defecto 5 ms) para aproximar el costo de un
+handshake fuera de localhost:
+
+    python scripts/test_api_sesion.py 500 20
+"""
+import sys
+import os
+import gzip
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from statistics import median
+from urllib.parse import urlparse
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+
+from aplicacion.api_client import EcoAPIClient
+
+CONSULTAS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+RTT_MS = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+HILOS = 4
+
+GEOCODING = [{"name": "Santiago", "lat": -33.4489, "lon": -70.6693, "country": "CL"}]
+AIR_POLLUTION = {"coord": {"lon": -70.6693, "lat": -33.4489}, "list": [{
+    "main": {"aqi": 3},
+    "components": {"co": 250.34, "no": 0.01, "no2": 15.46, "o3": 68.66, "so2": 0.64,
+                   "pm2_5": 8.16, "pm10": 9.43, "nh3": 0.52},
+    "dt": 1767225600,
+}]}
+
+
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+    retardo_connect = 0.0
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _Manejador)
+        self.conexiones = 0
+        self.peticiones = 0
+        self.comprimidas = 0
+        self.lock = threading.Lock()
+
+    def reiniciar(self, retardo_connect=0.0):
+        with self.lock:
+            self.conexiones = self.peticiones = self.comprimidas = 0
+            self.retardo_connect = retardo_connect
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive
+    # Encabezados y cuerpo van en escrituras separadas: sin TCP_NODELAY, Nagle y
+    # el ACK diferido del cliente suman ~40 ms a cada respuesta en una conexión reutilizada
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.conexiones += 1
+        time.sleep(self.server.retardo_connect)
+
+    def do_GET(self):
+        ruta = urlparse(self.path).path
+        if ruta.endswith('/geo/1.0/direct'):
+            cuerpo = GEOCODING
+        elif ruta.endswith('/data/2.5/air_pollution'):
+            cuerpo = AIR_POLLUTION
+        else:
+            self.send_error(404)
+            return
+        datos = json.dumps(cuerpo).encode()
+        comprimida = 'gzip' in self.headers.get('Accept-Encoding', '')
+        if comprimida:
+            datos = gzip.compress(datos)
+        with self.server.lock:
+            self.server.peticiones += 1
+            self.server.comprimidas += comprimida
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if comprimida:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def log_message(self, *args):
+        pass
+
+
+def _comprobar(descripcion, condicion):
+    print(f"{'✓' if condicion else '✗'} {descripcion}")
+    return condicion
+
+
+def _medir(cliente, consultas):
+    """Mediana y total de segundos por consulta (geocoding + air pollution)"""
+    tiempos = []
+    datos = None
+    for _ in range(consultas):
+        inicio = time.perf_counter()
+        datos = cliente.obtener_calidad_aire_ciudad("Santiago", "CL")
+        tiempos.append(time.perf_counter() - inicio)
+    return median(tiempos), sum(tiempos), datos
+
+
+def test_latencia(servidor, base_url, retardo_ms):
+    """Test: conexión por llamada frente a sesión keep-alive"""
+    print("\n" + "=" * 60)
+    print(f"TEST: {CONSULTAS} consultas, retardo de connect {retardo_ms:g} ms")
+    print("=" * 60)
+
+    antes = EcoAPIClient(api_key="prueba", base_url=base_url)
+    antes.sesion = requests   # comportamiento anterior: requests.get del módulo
+    servidor.reiniciar(retardo_ms / 1000)
+    mediana_antes, total_antes, _ = _medir(antes, CONSULTAS)
+    conexiones_antes = servidor.conexiones
+
+    with EcoAPIClient(api_key="prueba", base_url=base_url) as despues:
+        servidor.reiniciar(retardo_ms / 1000)
+        mediana_despues, total_despues, datos = _medir(despues, CONSULTAS)
+        conexiones_despues = servidor.conexiones
+        comprimidas = servidor.comprimidas == servidor.peticiones
+
+    print(f"  Antes:   {mediana_antes * 1000:6.2f} ms por consulta (mediana), {total_antes:5.2f} s en total,"
+          f" {conexiones_antes} conexiones")
+    print(f"  Después: {mediana_despues * 1000:6.2f} ms por consulta (mediana), {total_despues:5.2f} s en total,"
+          f" {conexiones_despues} conexiones")
+    print(f"  Mejora:  {mediana_antes / mediana_despues:.1f}x")
+    ok = _comprobar("Respuesta correcta con gzip", datos['aqi'] == 3 and datos['pm2_5'] == 8.16 and comprimidas)
+    ok &= _comprobar("Antes: 2 conexiones por consulta; después: 1 en total",
+                     conexiones_antes == 2 * CONSULTAS and conexiones_despues == 1)
+    ok &= _comprobar("La sesión reduce la latencia por consulta", mediana_despues < mediana_antes)
+    return ok
+
+
+def test_concurrencia(servidor, base_url):
+    """Test: varios hilos comparten el cliente sin pasar del tamaño del pool"""
+    print("\n" + "=" * 60)
+    print(f"TEST: {HILOS} hilos con un cliente de pool {HILOS}")
+    print("=" * 60)
+
+    servidor.reiniciar()
+    with EcoAPIClient(api_key="prueba", base_url=base_url, pool_conexiones=HILOS) as cliente:
+        with ThreadPoolExecutor(HILOS) as ejecutor:
+            resultados = list(ejecutor.map(lambda _: cliente.obtener_calidad_aire_ciudad("Santiago", "CL"),
+                                           range(CONSULTAS)))
+    return _comprobar(f"{CONSULTAS} consultas sobre {servidor.conexiones} conexiones",
+                      all(r and r['aqi'] == 3 for r in resultados) and servidor.conexiones <= HILOS)
+
+
+if __name__ == "__main__":
+    print("\n🌱 ECOTECH SOLUTIONS - BENCHMARK DE SESIÓN HTTP\n")
+
+    servidor = _Servidor()
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{servidor.server_address[1]}/data/2.5"
+    try:
+        ok = all([test_latencia(servidor, base_url, 0), test_latencia(servidor, base_url, RTT_MS),
+                  test_concurrencia(servidor, base_url)])
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        ok = False
+    finally:
+        servidor.shutdown()
+
+    print("\n" + "=" * 60)
+    print("TESTS COMPLETADOS" if ok else "TESTS CON FALLAS")
+    print("=" * 60 + "\n")
+    sys.exit(0 if ok else 1)
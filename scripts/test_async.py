@@ -0,0 +1,327 @@
+"""
+Script de prueba de la capa asíncrona (requiere MySQL, aiomysql y aiohttp;
+la ingesta desde la API se omite si no hay API_KEY).
+
+Compara N lecturas secuenciales síncronas con las mismas N lanzadas a la vez
+sobre un event loop, y verifica que lo escrito por los repositorios
+asíncronos se lee igual desde los síncronos (incluida la fecha de consulta
+y los días tardíos de los rollups). También comprueba que la ingesta respeta
+su límite de ciudades en curso y que el pool de un `asyncio.run` terminado
+queda cerrado, y que el cliente asíncrono pasa por el límite de peticiones
+compartido (sesión HTTP simulada: requiere aiohttp pero no API_KEY).
+"""
+import sys
+import os
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistencia.async_db import AsyncDatabase
+from persistencia.db import Database
+from persistencia.repositorios import ProyectoRepo, LogClimaRepo
+from persistencia.repositorios_async import AsyncProyectoRepo, AsyncLogClimaRepo, AsyncDepartamentoRepo
+from persistencia.auth_repositorios_async import AsyncUsuarioRepo, AsyncRolRepo
+from persistencia import rollups
+from aplicacion.services import ProyectoService
+from aplicacion.api_client_async import AsyncEcoAPIClient
+from aplicacion.limite_tasa import LimiteTasa, CuotaAgotada
+from dominio.models import Proyecto, LogClima, Departamento
+from dominio.auth_models import Usuario, Rol
+
+CONSULTAS = 200
+CIUDADES = [("Santiago", "CL"), ("Lima", "PE"), ("Quito", "EC"), ("Bogotá", "CO"),
+            ("Buenos Aires", "AR"), ("Montevideo", "UY"), ("Asunción", "PY"), ("La Paz", "BO")]
+
+
+async def test_lecturas_concurrentes():
+    """Test: N lecturas en paralelo tardan menos que N secuenciales"""
+    print("=" * 60)
+    print(f"TEST: {CONSULTAS} lecturas concurrentes")
+    print("=" * 60)
+
+    proyecto = Proyecto(id=str(uuid.uuid4()), nombre=f"Async {uuid.uuid4().hex[:6]}",
+                        descripcion="Prueba capa asíncrona")
+    repo, repo_async = ProyectoRepo(), AsyncProyectoRepo()
+    await repo_async.crear(proyecto)
+    try:
+        inicio = time.perf_counter()
+        for _ in range(CONSULTAS):
+            repo.obtener_por_id(proyecto.id)
+        sincrono = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        filas = await asyncio.gather(*(repo_async.obtener_por_id(proyecto.id) for _ in range(CONSULTAS)))
+        asincrono = time.perf_counter() - inicio
+
+        print(f"  Secuencial síncrono:  {sincrono * 1000:8.1f} ms")
+        print(f"  Concurrente async:    {asincrono * 1000:8.1f} ms  (pool: {AsyncDatabase.pool_stats()})")
+        if all(f and f['nombre'] == proyecto.nombre for f in filas):
+            print("✓ Todas las lecturas retornaron el proyecto")
+            return True
+        print("✗ Alguna lectura no retornó el proyecto")
+        return False
+    finally:
+        await repo_async.eliminar(proyecto.id)
+
+
+async def test_escritura_en_lote():
+    """Test: crear_muchos asíncrono inserta logs y actualiza el resumen por ciudad"""
+    print("\n" + "=" * 60)
+    print("TEST: crear_muchos asíncrono")
+    print("=" * 60)
+
+    ciudad = f"Async{uuid.uuid4().hex[:6]}"
+    logs = [LogClima(id=f"async-{uuid.uuid4()}", ciudad=ciudad, pais="CL", aqi=1 + i % 5)
+            for i in range(500)]
+    await AsyncLogClimaRepo().crear_muchos(logs)
+    try:
+        estadisticas = LogClimaRepo().obtener_estadisticas_por_ciudad(ciudad, "CL")
+        estadisticas = estadisticas[0] if len(estadisticas) == 1 else estadisticas
+        if estadisticas and estadisticas['total_consultas'] == len(logs):
+            print(f"✓ {len(logs)} logs insertados; resumen con {estadisticas['total_consultas']} consultas")
+            return True
+        print(f"✗ Resumen inesperado: {estadisticas}")
+        return False
+    finally:
+        with Database.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM logs_clima WHERE ciudad = %s", (ciudad,))
+                cur.execute("DELETE FROM logs_clima_resumen_ciudad WHERE ciudad = %s", (ciudad,))
+
+
+async def test_fecha_y_dias_tardios():
+    """Test: crear_muchos asíncrono conserva fecha_consulta y registra el día tardío"""
+    print("\n" + "=" * 60)
+    print("TEST: Lecturas atrasadas en crear_muchos asíncrono")
+    print("=" * 60)
+
+    ayer = (datetime.now() - timedelta(days=1)).replace(hour=12, minute=0, second=0, microsecond=0)
+    log = LogClima(id=f"async-{uuid.uuid4()}", ciudad=f"Async{uuid.uuid4().hex[:6]}", pais="CL", aqi=2)
+    log.fecha_consulta = ayer
+    await AsyncLogClimaRepo().crear_muchos([log])
+    try:
+        guardado = LogClimaRepo().obtener_por_id(log.id)
+        if guardado and guardado['fecha_consulta'] == ayer and ayer.date() in rollups.dias_pendientes():
+            print("✓ Fecha de la lectura conservada y su día pendiente de recalcular")
+            return True
+        print(f"✗ Lectura inesperada: {guardado}")
+        return False
+    finally:
+        with Database.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM logs_clima WHERE id = %s", (log.id,))
+                cur.execute("DELETE FROM logs_clima_resumen_ciudad WHERE ciudad = %s", (log.ciudad,))
+        rollups.recalcular_pendientes()
+
+
+async def test_repos_catalogo():
+    """Test: departamentos, roles y usuarios asíncronos"""
+    print("\n" + "=" * 60)
+    print("TEST: Repositorios asíncronos de departamentos, roles y usuarios")
+    print("=" * 60)
+
+    departamentos, roles, usuarios = AsyncDepartamentoRepo(), AsyncRolRepo(), AsyncUsuarioRepo()
+    departamento = Departamento(id=str(uuid.uuid4()), nombre=f"Async {uuid.uuid4().hex[:6]}")
+    rol = Rol(id=str(uuid.uuid4()), nombre=f"Async {uuid.uuid4().hex[:6]}", nivel_permisos=3)
+    usuario = Usuario(id=str(uuid.uuid4()), nombre_usuario=f"async_{uuid.uuid4().hex[:8]}",
+                      contrasena_cifrada="x", salt="y", rol_id=rol.id)
+    await departamentos.crear(departamento)
+    await roles.crear(rol)
+    await usuarios.crear(usuario)
+    try:
+        await departamentos.actualizar(departamento.id, {'descripcion': "Actualizado"})
+        fila = await departamentos.obtener_por_id(departamento.id)
+        login = await usuarios.obtener_por_nombre_usuario(usuario.nombre_usuario)
+        if fila['descripcion'] == "Actualizado" and login and login['nombre_rol'] == rol.nombre:
+            print("✓ Alta, cambio y lecturas iguales a los repositorios síncronos")
+            return True
+        print(f"✗ Resultado inesperado: {fila}, {login}")
+        return False
+    finally:
+        await departamentos.eliminar(departamento.id)
+        with Database.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM usuarios WHERE id = %s", (usuario.id,))
+                cur.execute("DELETE FROM roles WHERE id = %s", (rol.id,))
+
+
+class _ClienteLento:
+    """AsyncEcoAPIClient de prueba: cada petición tarda y se cuenta cuántas hay en curso"""
+
+    def __init__(self):
+        self.en_curso = 0
+        self.maximo = 0
+
+    async def _peticion(self, resultado):
+        self.en_curso += 1
+        self.maximo = max(self.maximo, self.en_curso)
+        await asyncio.sleep(0.01)
+        self.en_curso -= 1
+        return resultado
+
+    async def geocodificar(self, ciudad, pais):
+        return await self._peticion({'lat': -33.45, 'lon': -70.66})
+
+    async def consultar_calidad_aire(self, lat, lon):
+        return await self._peticion({'aqi': 2, 'pm2_5': 8.0})
+
+
+async def test_ingesta_acotada():
+    """Test: la ingesta no tiene más de max_concurrentes ciudades en curso"""
+    print("\n" + "=" * 60)
+    print("TEST: Ingesta con límite de ciudades en curso")
+    print("=" * 60)
+
+    cliente = _ClienteLento()
+    prefijo = f"Acotada{uuid.uuid4().hex[:6]}"
+    ciudades = [(f"{prefijo}{i}", "CL") for i in range(40)]
+    resultados = await ProyectoService().ingerir_calidad_aire_async(ciudades, client=cliente, max_concurrentes=5)
+    try:
+        if cliente.maximo <= 5 and all(r['datos'] and r['error'] is None for r in resultados):
+            print(f"✓ {len(resultados)} ciudades con a lo sumo {cliente.maximo} peticiones en curso")
+            return True
+        print(f"✗ {cliente.maximo} peticiones en curso a la vez")
+        return False
+    finally:
+        with Database.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM logs_clima WHERE ciudad LIKE %s", (f"{prefijo}%",))
+                cur.execute("DELETE FROM logs_clima_resumen_ciudad WHERE ciudad LIKE %s", (f"{prefijo}%",))
+
+
+def test_pool_entre_loops():
+    """Test: el pool de un asyncio.run terminado queda cerrado y el siguiente crea otro"""
+    print("\n" + "=" * 60)
+    print("TEST: Pool asíncrono entre event loops")
+    print("=" * 60)
+
+    async def usar_pool():
+        await AsyncProyectoRepo().listar_pagina(tamano=1)
+        return await AsyncDatabase.pool()
+
+    anterior = asyncio.run(usar_pool())
+    siguiente = asyncio.run(usar_pool())
+    if anterior is not siguiente and anterior.size == 0 and siguiente.size == 0:
+        print("✓ Cada asyncio.run cierra su pool al terminar")
+        return True
+    print(f"✗ Conexiones abiertas: {anterior.size} y {siguiente.size}")
+    return False
+
+
+class _RespuestaFalsa:
+    def __init__(self, datos):
+        self.datos = datos
+        self.status = 200
+
+    async def __aenter__(self):
+        await asyncio.sleep(0.01)
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    async def json(self):
+        return self.datos
+
+
+class _SesionFalsa:
+    """Imita la sesión aiohttp de Geocoding y Air Pollution API; cuenta las peticiones"""
+    closed = False
+
+    def __init__(self):
+        self.peticiones = 0
+
+    def get(self, url, params=None):
+        self.peticiones += 1
+        if url.endswith('/direct'):
+            return _RespuestaFalsa([{"lat": -33.4489, "lon": -70.6693}])
+        return _RespuestaFalsa({"list": [{"main": {"aqi": 2}, "components": {"pm2_5": 8.16}}]})
+
+    async def close(self):
+        pass
+
+
+async def test_limite_compartido():
+    """Test: el cliente asíncrono cuenta sus peticiones en el límite y comparte las idénticas"""
+    print("\n" + "=" * 60)
+    print("TEST: Límite de peticiones del cliente asíncrono")
+    print("=" * 60)
+
+    limite = LimiteTasa(por_dia=2)
+    cliente = AsyncEcoAPIClient(api_key="prueba", limite_tasa=limite)
+    cliente._sesion = sesion = _SesionFalsa()
+    resultados = await asyncio.gather(*(cliente.consultar_calidad_aire_ciudad("Santiago", "CL") for _ in range(10)))
+    ok = (sesion.peticiones == 2 and limite.estado()['usadas_hoy'] == 2 and cliente.coalescidas == 18
+          and all(r == resultados[0] and r is not None for r in resultados))
+    print(f"{'✓' if ok else '✗'} 10 consultas de Santiago: {sesion.peticiones} peticiones HTTP,"
+          f" {limite.estado()['usadas_hoy']} de la cuota")
+
+    try:
+        await ProyectoService().obtener_calidad_aire_por_ciudad_async("Lima", "PE", guardar_log=False,
+                                                                     client=cliente)
+        print("✗ Con la cuota agotada no se lanzó CuotaAgotada")
+        return False
+    except CuotaAgotada as e:
+        agotada = e.reinicio is not None and sesion.peticiones == 2
+        print(f"{'✓' if agotada else '✗'} Cuota agotada: CuotaAgotada sin ir a la red")
+        return ok and agotada
+
+
+async def test_ingesta_api():
+    """Test: ingerir_calidad_aire_async consulta varias ciudades a la vez"""
+    print("\n" + "=" * 60)
+    print("TEST: Ingesta concurrente desde la API")
+    print("=" * 60)
+
+    if not os.getenv("API_KEY"):
+        print("- Omitido: API_KEY no configurada")
+        return True
+
+    servicio = ProyectoService()
+    inicio = time.perf_counter()
+    resultados = await servicio.ingerir_calidad_aire_async(CIUDADES)
+    duracion = time.perf_counter() - inicio
+    correctos = sum(1 for r in resultados if r['datos'])
+    print(f"  {correctos}/{len(CIUDADES)} ciudades en {duracion:.2f}s")
+    if correctos:
+        print("✓ Ingesta completada")
+        return True
+    print("✗ Ninguna ciudad retornó datos")
+    return False
+
+
+async def main():
+    try:
+        resultados = [
+            await test_lecturas_concurrentes(),
+            await test_escritura_en_lote(),
+            await test_fecha_y_dias_tardios(),
+            await test_repos_catalogo(),
+            await test_ingesta_acotada(),
+            await test_limite_compartido(),
+            await test_ingesta_api(),
+        ]
+    finally:
+        await AsyncDatabase.close_pool()
+    return all(resultados)
+
+
+if __name__ == "__main__":
+    print("\n🌱 ECOTECH SOLUTIONS - TEST DE CAPA ASÍNCRONA\n")
+
+    try:
+        ok = asyncio.run(main())
+        ok &= test_pool_entre_loops()
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        ok = False
+
+    print("\n" + "=" * 60)
+    print("TESTS COMPLETADOS" if ok else "TESTS CON FALLAS")
+    print("=" * 60 + "\n")
+    sys.exit(0 if ok else 1)
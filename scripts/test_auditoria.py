@@ -0,0 +1,216 @@
+"""
+Script de prueba de la auditoría en segundo plano (logs_auditoria).
+
+Corre sobre SQLite en memoria (no requiere MySQL): cada alta, modificación y
+baja de los servicios deja un evento, los eventos se escriben por lotes, una
+UnitOfWork revertida no deja eventos, las políticas de cola llena y el
+vaciado al detener.
+"""
+import sys
+import os
+import json
+import time
+import uuid
+from datetime import date
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistencia.db import Database
+from persistencia.sqlite_backend import BackendSQLite
+from persistencia.auditoria import auditoria, SQL_AUDITORIA
+from persistencia.escritor_lotes import EscritorLotes
+from persistencia.unit_of_work import UnitOfWork
+from persistencia.auth_repositorios import RolRepo
+from aplicacion.services import DepartamentoService, ProyectoService, EmpleadoService
+from aplicacion.auth_services import UsuarioService
+from dominio.models import Departamento, Proyecto, Empleado
+from dominio.auth_models import Usuario, Rol
+
+EVENTOS = 5000
+
+
+def _comprobar(descripcion, condicion):
+    print(f"{'✓' if condicion else '✗'} {descripcion}")
+    return condicion
+
+
+def _eventos(tabla=None):
+    sql = "SELECT * FROM logs_auditoria"
+    params = None
+    if tabla:
+        sql += " WHERE tabla_afectada = %s"
+        params = (tabla,)
+    with Database.lectura() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql + " ORDER BY fecha_evento", params)
+            return cur.fetchall()
+
+
+def _fila_prueba(usuario_id):
+    return (str(uuid.uuid4()), usuario_id, 'prueba', 'ninguna', None, None, None, None, None)
+
+
+def preparar_admin():
+    rol = Rol(id=str(uuid.uuid4()), nombre="Administrador", nivel_permisos=10)
+    RolRepo().crear_muchos([rol])
+    admin = Usuario(id=str(uuid.uuid4()), nombre_usuario="admin", contrasena_cifrada="", salt="", rol_id=rol.id)
+    UsuarioService().usuario_repo.crear_muchos([admin])
+    return admin, rol
+
+
+def test_servicios(admin, rol):
+    """Test: cada mutación de los servicios deja su evento"""
+    print("=" * 60)
+    print("TEST: Auditoría de los servicios")
+    print("=" * 60)
+
+    omitidos = auditoria.sin_usuario
+    DepartamentoService().crear(Departamento(id=str(uuid.uuid4()), nombre="Sin sesión"))
+    ok = _comprobar("Sin usuario el evento se omite y se cuenta", auditoria.sin_usuario == omitidos + 1)
+
+    auditoria.establecer_usuario(admin.id, "10.0.0.7")
+    departamentos, proyectos, empleados = DepartamentoService(), ProyectoService(), EmpleadoService()
+    usuarios = UsuarioService()
+    depto = Departamento(id=str(uuid.uuid4()), nombre="Operaciones")
+    departamentos.crear(depto)
+    departamentos.modificar(depto.id, {'nombre': "Operaciones Norte"})
+    proyecto = Proyecto(id=str(uuid.uuid4()), nombre="Huerto Urbano", fecha_inicio=date(2026, 2, 1))
+    proyectos.crear(proyecto)
+    proyectos.eliminar(proyecto.id)
+    usuario = Usuario(id=str(uuid.uuid4()), nombre_usuario="jperez", contrasena_cifrada="", salt="", rol_id=rol.id)
+    usuarios.crear_usuario(usuario, "Clave123!")
+    usuarios.cambiar_contrasena(usuario.id, "Nueva456!")
+    usuarios.activar_desactivar_usuario(usuario.id, False)
+    empleado = Empleado(id=str(uuid.uuid4()), usuario_id=usuario.id, nombre="Juan Pérez",
+                        email="jperez@ecotech.cl", fecha_inicio_contrato=date(2026, 1, 5), departamento_id=depto.id)
+    empleados.crear(empleado)
+    empleados.modificar(empleado.id, {'email': "juan.perez@ecotech.cl"})
+    empleados.eliminar(empleado.id)
+    auditoria.vaciar()
+
+    acciones = sorted((e['tabla_afectada'], e['accion']) for e in _eventos() if e['usuario_id'] == admin.id)
+    esperadas = sorted([
+        ('departamentos', 'crear'), ('departamentos', 'modificar'), ('proyectos', 'crear'), ('proyectos', 'eliminar'),
+        ('usuarios', 'crear'), ('usuarios', 'cambiar_contrasena'), ('usuarios', 'desactivar'),
+        ('empleados', 'crear'), ('empleados', 'modificar'), ('empleados', 'eliminar'),
+    ])
+    ok &= _comprobar(f"{len(acciones)} eventos: altas, modificaciones y bajas de los 4 servicios", acciones == esperadas)
+
+    modificacion = next(e for e in _eventos('departamentos') if e['accion'] == 'modificar')
+    ok &= _comprobar("Modificar guarda antes y después",
+                     json.loads(modificacion['datos_anteriores'])['nombre'] == "Operaciones"
+                     and json.loads(modificacion['datos_nuevos']) == {'nombre': "Operaciones Norte"}
+                     and modificacion['ip_address'] == "10.0.0.7")
+    alta_usuario = next(e for e in _eventos('usuarios') if e['accion'] == 'crear')
+    datos = json.loads(alta_usuario['datos_nuevos'])
+    ok &= _comprobar("Alta de usuario sin contraseña ni salt",
+                     datos['nombre_usuario'] == "jperez" and 'contrasena_cifrada' not in datos and 'salt' not in datos)
+    return ok
+
+
+def test_unidad_de_trabajo(admin):
+    """Test: los eventos dentro de una UnitOfWork se encolan solo al confirmar"""
+    print("\n" + "=" * 60)
+    print("TEST: Auditoría y UnitOfWork")
+    print("=" * 60)
+
+    servicio = DepartamentoService()
+    revertido = Departamento(id=str(uuid.uuid4()), nombre="Revertido")
+    with UnitOfWork() as uow:
+        servicio.crear(revertido)
+        uow.rollback()
+    confirmado = Departamento(id=str(uuid.uuid4()), nombre="Confirmado")
+    with UnitOfWork():
+        servicio.crear(confirmado)
+        encolados_antes_del_commit = auditoria.estado()['encolados']
+    encolados_despues = auditoria.estado()['encolados']
+    auditoria.vaciar()
+
+    registros = {e['registro_id'] for e in _eventos('departamentos')}
+    ok = _comprobar("Unidad revertida: sin evento", revertido.id not in registros)
+    ok &= _comprobar("Unidad confirmada: evento encolado al hacer commit",
+                     confirmado.id in registros and encolados_despues == encolados_antes_del_commit + 1)
+    return ok
+
+
+def test_lotes_y_latencia():
+    """Test: eventos agrupados en INSERT multi-fila y costo por operación"""
+    print("\n" + "=" * 60)
+    print(f"TEST: {EVENTOS} eventos")
+    print("=" * 60)
+
+    antes = auditoria.estado()
+    inicio = time.perf_counter()
+    for i in range(EVENTOS):
+        auditoria.registrar('modificar', 'departamentos', str(i), {'nombre': 'a'}, {'nombre': 'b'})
+    t_encolar = time.perf_counter() - inicio
+    auditoria.vaciar()
+    despues = auditoria.estado()
+    lotes = despues['lotes'] - antes['lotes']
+
+    print(f"  Encolar: {t_encolar / EVENTOS * 1e6:.1f} µs por evento (la operación no espera al INSERT)")
+    print(f"  Escritos en {lotes} lotes ({despues['filas_por_lote']:.0f} filas por lote en promedio,"
+          f" {despues['escritura_ms_promedio']:.2f} ms por lote)")
+    ok = _comprobar("Todos escritos, en pocos lotes",
+                    despues['escritos'] - antes['escritos'] == EVENTOS and 0 < lotes <= EVENTOS // 100)
+    ok &= _comprobar("Encolar un evento cuesta menos de 0,1 ms", t_encolar / EVENTOS < 1e-4)
+    return ok
+
+
+def test_politicas(admin):
+    """Test: cola llena con 'descartar' y 'bloquear', vaciado al detener"""
+    print("\n" + "=" * 60)
+    print("TEST: Cola llena y vaciado al detener")
+    print("=" * 60)
+
+    # Sin arrancar el hilo, nadie vacía la cola
+    descartar = EscritorLotes(SQL_AUDITORIA, capacidad=10, politica='descartar')
+    aceptados = sum(descartar.encolar(_fila_prueba(admin.id)) for _ in range(15))
+    ok = _comprobar(f"'descartar': {aceptados} aceptados y {descartar.estado()['descartados']} descartados",
+                    aceptados == 10 and descartar.estado()['descartados'] == 5)
+    descartar.detener()
+    ok &= _comprobar("detener() sin hilo escribe lo encolado", descartar.estado()['escritos'] == 10)
+
+    bloquear = EscritorLotes(SQL_AUDITORIA, capacidad=10, politica='bloquear', espera_maxima=0.05)
+    for _ in range(10):
+        bloquear.encolar(_fila_prueba(admin.id))
+    inicio = time.perf_counter()
+    aceptado = bloquear.encolar(_fila_prueba(admin.id))
+    espera = time.perf_counter() - inicio
+    ok &= _comprobar(f"'bloquear': espera {espera * 1000:.0f} ms y luego descarta",
+                     not aceptado and espera >= 0.05 and bloquear.estado()['descartados'] == 1)
+    bloquear.start()
+    ok &= _comprobar("'bloquear' con el hilo activo: encolar espera a que haya lugar",
+                     all(bloquear.encolar(_fila_prueba(admin.id)) for _ in range(100)))
+    bloquear.detener()
+
+    lento = EscritorLotes(SQL_AUDITORIA, intervalo=60, tamano_lote=1000)
+    lento.start()
+    for _ in range(50):
+        lento.encolar(_fila_prueba(admin.id))
+    lento.detener()
+    estado = lento.estado()
+    ok &= _comprobar("Al detener se escribe lo pendiente aunque no haya vencido el intervalo",
+                     estado['escritos'] == 50 and not estado['activo'] and not lento.encolar(_fila_prueba(admin.id)))
+    return ok
+
+
+if __name__ == "__main__":
+    print("\n🌱 ECOTECH SOLUTIONS - TEST DE AUDITORÍA\n")
+
+    Database.usar_backend(BackendSQLite(':memory:'))
+    try:
+        admin, rol = preparar_admin()
+        ok = all([test_servicios(admin, rol), test_unidad_de_trabajo(admin), test_lotes_y_latencia(),
+                  test_politicas(admin)])
+        print(f"\n  Estado: {auditoria.estado()}")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        ok = False
+    finally:
+        auditoria.detener()
+        Database.close_pool()
+
+    print("\n" + "=" * 60)
+    print("TESTS COMPLETADOS" if ok else "TESTS CON FALLAS")
+    print("=" * 60 + "\n")
+    sys.exit(0 if ok else 1)
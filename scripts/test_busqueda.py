@@ -0,0 +1,199 @@
+"""
+Script de prueba del índice de trigramas de la búsqueda global (aplicacion/busqueda.py).
+
+Corre sobre SQLite en memoria (no requiere MySQL): umbral de similitud,
+trigramas de prefijo, lápidas y compactación, y que los servicios actualicen
+el índice solo cuando la unidad de trabajo confirma.
+"""
+import sys
+import os
+import io
+import uuid
+from contextlib import redirect_stdout
+from datetime import date
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistencia.db import Database
+from persistencia.sqlite_backend import BackendSQLite
+from persistencia.auth_repositorios import RolRepo
+from persistencia.unit_of_work import UnitOfWork
+from aplicacion.busqueda import IndiceTrigramas, trigramas, normalizar
+from aplicacion.services import DepartamentoService, EmpleadoService
+from aplicacion.auth_services import UsuarioService
+from dominio.models import Departamento, Empleado
+from dominio.auth_models import Usuario, Rol
+
+
+def _comprobar(descripcion, condicion):
+    print(f"{'✓' if condicion else '✗'} {descripcion}")
+    return condicion
+
+
+def _ids(resultados):
+    return sorted(r['id'] for r in resultados)
+
+
+def test_trigramas():
+    """Test: normalización y trigramas con y sin prefijo"""
+    print("=" * 60)
+    print("TEST: Trigramas")
+    print("=" * 60)
+
+    ok = _comprobar("Sin tildes, minúsculas y signos como espacio", normalizar("Núñez-Pérez") == "nunez perez")
+    ok &= _comprobar("Palabra completa: incluye el trigrama de cierre",
+                     trigramas("mar") == {"  m", " ma", "mar", "ar "})
+    ok &= _comprobar("Prefijo: sin el cierre de la última palabra",
+                     trigramas("mar", prefijo=True) == {"  m", " ma", "mar"})
+    ok &= _comprobar("Prefijo: las palabras anteriores conservan su cierre",
+                     "na " in trigramas("ana mar", prefijo=True) and "ar " not in trigramas("ana mar", prefijo=True))
+
+    indice = IndiceTrigramas()
+    indice.agregar('empleado', 1, "Pedro Martínez", "pmartinez@ecotech.cl")
+    indice.agregar('empleado', 2, "Ana Marín")
+    ok &= _comprobar("'mar' mientras se escribe encuentra Martínez y Marín",
+                     _ids(indice.buscar("mar")) == ['1', '2'])
+    ok &= _comprobar("'martine' ya descarta Marín", _ids(indice.buscar("martine")) == ['1'])
+    return ok
+
+
+def test_umbral():
+    """Test: fracción mínima de trigramas comunes"""
+    print("\n" + "=" * 60)
+    print("TEST: Umbral de similitud")
+    print("=" * 60)
+
+    # "abcdef" con prefijo tiene 6 trigramas; con umbral 0.5 se exigen 3
+    indice = IndiceTrigramas(umbral=0.5)
+    indice.agregar('proyecto', 'tres', "abcxyz")      # "  a", " ab", "abc"
+    indice.agregar('proyecto', 'dos', "abxyzw")       # "  a", " ab"
+    indice.agregar('proyecto', 'todos', "abcdef")
+    resultados = indice.buscar("abcdef")
+    ok = _comprobar("La mitad exacta de los trigramas alcanza; uno menos no",
+                    _ids(resultados) == ['todos', 'tres'])
+    ok &= _comprobar("La coincidencia completa queda primero", resultados[0]['id'] == 'todos')
+
+    indice.umbral = 0.9
+    ok &= _comprobar("Con umbral 0.9 solo queda la coincidencia completa", _ids(indice.buscar("abcdef")) == ['todos'])
+
+    indice = IndiceTrigramas()
+    indice.agregar('empleado', 1, "Martínez")
+    ok &= _comprobar("Tolera un error de tipeo ('martines')", _ids(indice.buscar("martines")) == ['1'])
+    ok &= _comprobar("Filtra por tipo", indice.buscar("martines", tipos=['proyecto']) == [])
+    ok &= _comprobar("Consulta sin letras: sin resultados", indice.buscar(" ¿? ") == [])
+    return ok
+
+
+def test_lapidas():
+    """Test: bajas como lápidas y compactación al superar la mitad"""
+    print("\n" + "=" * 60)
+    print("TEST: Lápidas y compactación")
+    print("=" * 60)
+
+    indice = IndiceTrigramas()
+    for i in range(4):
+        indice.agregar('departamento', i, f"Bodega {i}")
+    indice.eliminar('departamento', 0)
+    estado = indice.estadisticas()
+    ok = _comprobar("Una baja deja una lápida y no aparece en la búsqueda",
+                    estado['lapidas'] == 1 and estado['filas'] == 3 and '0' not in _ids(indice.buscar("bodega")))
+
+    indice.actualizar('departamento', 1, "Almacén 1")
+    ok &= _comprobar("Reindexar reemplaza el registro (la versión vieja es otra lápida)",
+                     indice.estadisticas()['lapidas'] == 2 and _ids(indice.buscar("almacen")) == ['1']
+                     and '1' not in _ids(indice.buscar("bodega")))
+
+    indice.eliminar('departamento', 2)
+    estado = indice.estadisticas()
+    ok &= _comprobar("Con más lápidas que la mitad de los slots se compacta",
+                     estado['lapidas'] == 0 and estado['filas'] == 2)
+    ok &= _comprobar("Tras compactar las búsquedas siguen respondiendo",
+                     _ids(indice.buscar("bodega")) == ['3'] and _ids(indice.buscar("almacen")) == ['1'])
+
+    indice.eliminar('departamento', 99)
+    indice.actualizar('departamento', 99, "Nadie")
+    ok &= _comprobar("Bajas y cambios de registros no indexados se ignoran", indice.estadisticas()['filas'] == 2)
+
+    perezoso = IndiceTrigramas(lambda: [('proyecto', 1, "Huerto", None)])
+    perezoso.agregar('proyecto', 2, "Vivero")
+    ok &= _comprobar("Sin cargar, las altas se ignoran y la primera búsqueda carga",
+                     _ids(perezoso.buscar("huerto")) == ['1'] and perezoso.buscar("vivero") == [])
+    return ok
+
+
+def test_unidad_de_trabajo(rol):
+    """Test: los servicios indexan al confirmar y no tras un rollback"""
+    print("\n" + "=" * 60)
+    print("TEST: Índice y unidad de trabajo")
+    print("=" * 60)
+
+    indice = IndiceTrigramas()
+    departamentos = DepartamentoService()
+    departamentos.indice = indice
+    salida = io.StringIO()
+    with redirect_stdout(salida):
+        with UnitOfWork() as uow:
+            departamentos.crear(Departamento(id="d1", nombre="Reciclaje"))
+            revertida = indice.buscar("reciclaje")
+            uow.rollback()
+        with UnitOfWork():
+            departamentos.crear(Departamento(id="d2", nombre="Compostaje"))
+            confirmada = indice.buscar("compostaje")
+    ok = _comprobar("Dentro de la unidad el alta aún no está indexada", revertida == [] and confirmada == [])
+    ok &= _comprobar("Alta revertida: no queda en el índice; confirmada: sí",
+                     indice.buscar("reciclaje") == [] and _ids(indice.buscar("compostaje")) == ['d2'])
+
+    with redirect_stdout(salida):
+        with UnitOfWork() as uow:
+            departamentos.modificar("d2", {'nombre': "Biodigestión"})
+            uow.rollback()
+        with UnitOfWork() as uow:
+            departamentos.eliminar("d2")
+            uow.rollback()
+    ok &= _comprobar("Cambio y baja revertidos: el índice conserva el nombre original",
+                     _ids(indice.buscar("compostaje")) == ['d2'] and indice.buscar("biodigestion") == [])
+
+    with redirect_stdout(salida):
+        departamentos.modificar("d2", {'nombre': "Biodigestión"})
+    ok &= _comprobar("Sin unidad activa el cambio se indexa enseguida",
+                     _ids(indice.buscar("biodigestion")) == ['d2'])
+
+    empleados, usuarios = EmpleadoService(), UsuarioService()
+    empleados.indice = usuarios.indice = indice
+    usuario = Usuario(id=str(uuid.uuid4()), nombre_usuario="valentina", contrasena_cifrada="", salt="",
+                      rol_id=rol.id)
+    primero = Empleado(id=str(uuid.uuid4()), usuario_id=usuario.id, nombre="Valentina Fuentes",
+                       email="vfuentes@ecotech.cl", fecha_inicio_contrato=date(2026, 1, 5))
+    with redirect_stdout(salida):
+        empleados.crear_con_usuario(primero, usuario, "Clave123!", usuarios)
+    # Segundo alta con id de empleado repetido: el usuario se inserta y luego se revierte
+    huerfano = Usuario(id=str(uuid.uuid4()), nombre_usuario="joaquin", contrasena_cifrada="", salt="",
+                       rol_id=rol.id)
+    repetido = Empleado(id=primero.id, usuario_id=huerfano.id, nombre="Joaquín Herrera",
+                        email="jherrera@ecotech.cl", fecha_inicio_contrato=date(2026, 1, 5))
+    with redirect_stdout(salida):
+        creado = empleados.crear_con_usuario(repetido, huerfano, "Clave123!", usuarios)
+    ok &= _comprobar("crear_con_usuario confirmado: empleado y usuario indexados",
+                     len(indice.buscar("valentina", tipos=['empleado', 'usuario'])) == 2)
+    ok &= _comprobar("crear_con_usuario revertido: ni el usuario ni el empleado quedan en el índice",
+                     creado is False and indice.buscar("joaquin") == [] and indice.buscar("herrera") == [])
+    return ok
+
+
+if __name__ == "__main__":
+    print("\n🌱 ECOTECH SOLUTIONS - TEST DE BÚSQUEDA GLOBAL\n")
+
+    Database.usar_backend(BackendSQLite(':memory:'))
+    try:
+        rol = Rol(id=str(uuid.uuid4()), nombre="Empleado", nivel_permisos=3)
+        RolRepo().crear_muchos([rol])
+        ok = all([test_trigramas(), test_umbral(), test_lapidas(), test_unidad_de_trabajo(rol)])
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        ok = False
+    finally:
+        Database.close_pool()
+
+    print("\n" + "=" * 60)
+    print("TESTS COMPLETADOS" if ok else "TESTS CON FALLAS")
+    print("=" * 60 + "\n")
+    sys.exit(0 if ok else 1)
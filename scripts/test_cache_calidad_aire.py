@@ -0,0 +1,158 @@
+"""
+Script de prueba de la caché LRU + TTL de calidad del aire por celda de grilla.
+
+No requiere MySQL, API_KEY ni internet: celdas de la grilla, vigencia según
+el `dt` de la medición, desalojo LRU, nivel en disco que sobrevive a un
+reinicio y las peticiones a Air Pollution API de EcoAPIClient con y sin caché
+(con una sesión HTTP simulada que las cuenta).
+"""
+import sys
+import os
+import random
+import shutil
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from aplicacion.cache_calidad_aire import CacheCalidadAire
+from aplicacion.api_client import EcoAPIClient
+
+DATOS = {'aqi': 2, 'co': 250.34, 'no2': 15.46, 'o3': 68.66, 'pm2_5': 8.16, 'pm10': 9.43}
+PUNTOS = [(-33.4489, -70.6693), (-12.0464, -77.0428), (4.711, -74.0721)]
+
+
+def _comprobar(descripcion, condicion):
+    print(f"{'✓' if condicion else '✗'} {descripcion}")
+    return condicion
+
+
+class _Respuesta:
+    def __init__(self, datos):
+        self.datos = datos
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.datos
+
+
+class _SesionContadora:
+    """Imita Air Pollution API (medición de hace 10 minutos) y cuenta las peticiones"""
+
+    def __init__(self):
+        self.peticiones = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.peticiones += 1
+        return _Respuesta({"list": [{
+            "main": {"aqi": 2}, "components": {"pm2_5": 8.16, "pm10": 9.43}, "dt": int(time.time()) - 600,
+        }]})
+
+
+def test_grilla_y_vigencia():
+    """Test: celdas, vigencia desde dt y vigencia mínima"""
+    print("=" * 60)
+    print("TEST: Grilla y vigencia")
+    print("=" * 60)
+
+    cache = CacheCalidadAire(paso=0.05, ttl=1.0, ttl_minimo=0.2)
+    cache.guardar(-33.4489, -70.6693, DATOS, dt=time.time())
+    ok = _comprobar("Punto a ~1 km en la misma celda: acierto", cache.obtener(-33.4401, -70.6602) == DATOS)
+    ok &= _comprobar("Punto a ~10 km en otra celda: fallo", cache.obtener(-33.55, -70.6693) is None)
+
+    copia = cache.obtener(-33.4489, -70.6693)
+    copia['aqi'] = 5
+    ok &= _comprobar("Se entrega una copia", cache.obtener(-33.4489, -70.6693)['aqi'] == 2)
+
+    cache.guardar(-12.0464, -77.0428, DATOS, dt=time.time() - 3600)
+    ok &= _comprobar("Medición antigua: vigente al menos ttl_minimo", cache.obtener(-12.0464, -77.0428) == DATOS)
+    time.sleep(0.3)
+    ok &= _comprobar("... y vence después", cache.obtener(-12.0464, -77.0428) is None and cache.vencidos == 1)
+    ok &= _comprobar("La medición reciente sigue vigente hasta dt + ttl", cache.obtener(-33.4489, -70.6693) == DATOS)
+    time.sleep(0.8)
+    ok &= _comprobar("... y vence al pasar dt + ttl", cache.obtener(-33.4489, -70.6693) is None)
+    return ok
+
+
+def test_lru():
+    """Test: desalojo de la celda usada hace más tiempo"""
+    print("\n" + "=" * 60)
+    print("TEST: Desalojo LRU")
+    print("=" * 60)
+
+    cache = CacheCalidadAire(capacidad=3)
+    for i in range(3):
+        cache.guardar(i, i, dict(DATOS, aqi=i + 1))
+    cache.obtener(0, 0)                 # la celda 0 pasa a ser la más reciente
+    cache.guardar(3, 3, DATOS)          # desaloja la 1
+    estado = cache.estado()
+    ok = _comprobar("Capacidad 3: se desaloja la menos usada, no la más antigua",
+                    cache.obtener(1, 1) is None and cache.obtener(0, 0) is not None
+                    and estado['en_memoria'] == 3 and estado['desalojos'] == 1)
+    return ok
+
+
+def test_disco(directorio):
+    """Test: el nivel en disco sobrevive a un reinicio"""
+    print("\n" + "=" * 60)
+    print("TEST: Nivel en disco")
+    print("=" * 60)
+
+    ruta = os.path.join(directorio, "calidad_aire.db")
+    antes = CacheCalidadAire(ruta_disco=ruta, ttl=3600, ttl_minimo=0.1)
+    antes.guardar(-33.4489, -70.6693, DATOS, dt=time.time())
+    antes.guardar(-12.0464, -77.0428, DATOS, dt=time.time() - 7200)   # vence enseguida
+    antes.cerrar()
+    time.sleep(0.2)
+
+    despues = CacheCalidadAire(ruta_disco=ruta)
+    ok = _comprobar("Tras reiniciar: acierto desde disco", despues.obtener(-33.4489, -70.6693) == DATOS
+                    and despues.aciertos_disco == 1)
+    ok &= _comprobar("La entrada vuelve a la memoria", despues.obtener(-33.4489, -70.6693) == DATOS
+                     and despues.aciertos == 1)
+    ok &= _comprobar("Las entradas vencidas no se entregan", despues.obtener(-12.0464, -77.0428) is None)
+    despues.cerrar()
+    return ok
+
+
+def test_cliente():
+    """Test: peticiones de EcoAPIClient con y sin caché"""
+    print("\n" + "=" * 60)
+    print("TEST: Peticiones a Air Pollution API")
+    print("=" * 60)
+
+    azar = random.Random(3)
+    consultas = [(lat + azar.uniform(-0.01, 0.01), lon + azar.uniform(-0.01, 0.01))
+                 for lat, lon in PUNTOS for _ in range(100)]
+    sin_cache = EcoAPIClient(api_key="prueba")
+    cache = CacheCalidadAire(paso=0.05)
+    con_cache = EcoAPIClient(api_key="prueba", cache_calidad_aire=cache)
+    for cliente in (sin_cache, con_cache):
+        cliente.sesion = _SesionContadora()
+        for lat, lon in consultas:
+            cliente.obtener_calidad_aire(lat, lon)
+
+    celdas = len({cache.celda(lat, lon) for lat, lon in consultas})
+    print(f"  {len(consultas)} consultas en {celdas} celdas: {sin_cache.sesion.peticiones} peticiones sin caché,"
+          f" {con_cache.sesion.peticiones} con caché (tasa de aciertos {cache.estado()['tasa_aciertos']:.0%})")
+    return _comprobar("Una petición por celda", con_cache.sesion.peticiones == celdas
+                      and cache.aciertos == len(consultas) - celdas)
+
+
+if __name__ == "__main__":
+    print("\n🌱 ECOTECH SOLUTIONS - TEST DE CACHÉ DE CALIDAD DEL AIRE\n")
+
+    directorio = tempfile.mkdtemp(prefix="ecotech-cache-")
+    try:
+        ok = all([test_grilla_y_vigencia(), test_lru(), test_disco(directorio), test_cliente()])
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        ok = False
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    print("\n" + "=" * 60)
+    print("TESTS COMPLETADOS" if ok else "TESTS CON FALLAS")
+    print("=" * 60 + "\n")
+    sys.exit(0 if ok else 1)
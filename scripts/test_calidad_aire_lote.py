@@ -0,0 +1,178 @@
+"""
+Script de prueba de la consulta de calidad del aire por lotes.
+
+Corre sobre SQLite en memoria y con una sesión HTTP simulada con latencia (no
+requiere MySQL, API_KEY ni internet): tiempo de un lote frente a las mismas
+consultas una a una, orden de los resultados, fallos parciales por ciudad,
+un único insert para todos los logs y el límite de peticiones por minuto.
+"""
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+
+from persistencia.db import Database
+from persistencia.sqlite_backend import BackendSQLite
+from aplicacion.api_client import EcoAPIClient
+from aplicacion.limite_tasa import LimiteTasa
+from aplicacion.services import ProyectoService
+
+LATENCIA = 0.02
+CIUDADES = [(f"Ciudad {i}", "CL") for i in range(24)]
+
+
+def _comprobar(descripcion, condicion):
+    print(f"{'✓' if condicion else '✗'} {descripcion}")
+    return condicion
+
+
+class _Respuesta:
+    def __init__(self, datos):
+        self.datos = datos
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.datos
+
+
+class _SesionLenta:
+    """Imita Geocoding y Air Pollution API con latencia; 'Inventada' no existe, 'Caida' falla"""
+
+    def __init__(self, latencia=LATENCIA):
+        self.latencia = latencia
+        self.peticiones = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        with self._lock:
+            self.peticiones += 1
+        time.sleep(self.latencia)
+        if url.endswith('/direct'):
+            nombre = params['q'].split(',')[0]
+            if nombre.startswith('Inventada'):
+                return _Respuesta([])
+            if nombre.startswith('Caida'):
+                raise requests.exceptions.ConnectionError("sin red")
+            numero = int(nombre.split()[-1]) if nombre.split()[-1].isdigit() else 0
+            return _Respuesta([{"lat": -33.0 - numero, "lon": -70.0}])
+        if params['lat'] == -33.0 - 99:
+            return _Respuesta({"list": []})
+        return _Respuesta({"list": [{"main": {"aqi": 2}, "components": {"pm2_5": 8.16, "pm10": 9.43}}]})
+
+
+def _servicio(limite_tasa=None):
+    servicio = ProyectoService()
+    servicio._cliente_api = EcoAPIClient(api_key="prueba", limite_tasa=limite_tasa)
+    servicio._cliente_api.sesion = _SesionLenta()
+    return servicio
+
+
+def test_tiempo():
+    """Test: un lote frente a las mismas consultas una a una"""
+    print("=" * 60)
+    print("TEST: Lote concurrente vs consultas secuenciales")
+    print("=" * 60)
+
+    secuencial = _servicio()
+    inicio = time.perf_counter()
+    uno_a_uno = [secuencial.obtener_calidad_aire_por_ciudad(c, p, guardar_log=False) for c, p in CIUDADES]
+    t_secuencial = time.perf_counter() - inicio
+
+    lote = _servicio()
+    inicio = time.perf_counter()
+    resultados = lote.obtener_calidad_aire_lote(CIUDADES, guardar_log=False, max_hilos=8)
+    t_lote = time.perf_counter() - inicio
+
+    print(f"  {len(CIUDADES)} ciudades: {t_secuencial * 1000:.0f} ms una a una, {t_lote * 1000:.0f} ms en lote"
+          f" ({t_secuencial / t_lote:.1f}x)")
+    ok = _comprobar("Mismos datos y en el orden recibido",
+                    [r['datos'] for r in resultados] == uno_a_uno
+                    and [(r['ciudad'], r['pais']) for r in resultados] == CIUDADES)
+    ok &= _comprobar("El lote es al menos 4 veces más rápido", t_secuencial / t_lote >= 4)
+    return ok
+
+
+def test_fallos_parciales():
+    """Test: un fallo por ciudad no detiene el lote"""
+    print("\n" + "=" * 60)
+    print("TEST: Fallos parciales")
+    print("=" * 60)
+
+    servicio = _servicio()
+    ciudades = [("Ciudad 1", "CL"), ("Inventada", "CL"), ("Caida", "CL"), ("Ciudad 99", "CL"), ("Ciudad 2", "PE")]
+    resultados = servicio.obtener_calidad_aire_lote(ciudades, guardar_log=False)
+    for r in resultados:
+        print(f"  {r['ciudad']}, {r['pais']}: {r['error'] or 'aqi ' + str(r['datos']['aqi'])}")
+    errores = [r['error'] for r in resultados]
+    ok = _comprobar("Las ciudades válidas tienen datos",
+                    resultados[0]['datos'] is not None and resultados[4]['datos'] is not None)
+    ok &= _comprobar("Cada fallo queda en su ciudad con el motivo",
+                     errores[0] is None and errores[1] == "Ciudad no encontrada" and "sin red" in errores[2]
+                     and errores[3] == "Sin datos de calidad del aire" and errores[4] is None)
+    return ok
+
+
+def test_insert_unico():
+    """Test: todos los logs en un solo crear_muchos"""
+    print("\n" + "=" * 60)
+    print("TEST: Un único insert para el lote")
+    print("=" * 60)
+
+    servicio = _servicio()
+    llamadas = []
+    crear_muchos = servicio.log_clima_repo.crear_muchos
+    servicio.log_clima_repo.crear = lambda log: llamadas.append(('crear', 1))
+    servicio.log_clima_repo.crear_muchos = lambda logs: (llamadas.append(('crear_muchos', len(logs))),
+                                                         crear_muchos(logs))
+    antes = len(servicio.listar_logs_clima(limit=1000))
+    ciudades = CIUDADES[:10] + [("Inventada", "CL")]
+    servicio.obtener_calidad_aire_lote(ciudades, usuario_id=None)
+    despues = len(servicio.listar_logs_clima(limit=1000))
+    ok = _comprobar("Una llamada a crear_muchos con los 10 logs válidos", llamadas == [('crear_muchos', 10)])
+    ok &= _comprobar("Los 10 logs quedan en logs_clima", despues - antes == 10)
+    return ok
+
+
+def test_limite_tasa():
+    """Test: el lote no supera el límite de peticiones"""
+    print("\n" + "=" * 60)
+    print("TEST: Límite de peticiones por minuto")
+    print("=" * 60)
+
+    limite = LimiteTasa(por_minuto=1200, rafaga=5)      # 20 por segundo tras 5 seguidas
+    servicio = _servicio(limite)
+    inicio = time.perf_counter()
+    resultados = servicio.obtener_calidad_aire_lote(CIUDADES[:10], guardar_log=False, max_hilos=10)
+    transcurrido = time.perf_counter() - inicio
+    peticiones = servicio.cliente_api.sesion.peticiones
+    minimo = (peticiones - limite.rafaga) / (limite.por_minuto / 60)
+    estado = limite.estado()
+    print(f"  {peticiones} peticiones en {transcurrido * 1000:.0f} ms (mínimo permitido {minimo * 1000:.0f} ms),"
+          f" {estado['esperas']} esperas")
+    ok = _comprobar("Todas las ciudades responden", all(r['datos'] for r in resultados))
+    ok &= _comprobar("Las peticiones se espacian según el límite",
+                     transcurrido >= minimo * 0.95 and estado['adquiridas'] == peticiones)
+    return ok
+
+
+if __name__ == "__main__":
+    print("\n🌱 ECOTECH SOLUTIONS - TEST DE CALIDAD DEL AIRE POR LOTES\n")
+
+    Database.usar_backend(BackendSQLite(':memory:'))
+    try:
+        ok = all([test_tiempo(), test_fallos_parciales(), test_insert_unico(), test_limite_tasa()])
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        ok = False
+    finally:
+        Database.close_pool()
+
+    print("\n" + "=" * 60)
+    print("TESTS COMPLETADOS" if ok else "TESTS CON FALLAS")
+    print("=" * 60 + "\n")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,251 @@
+"""
+Script de prueba de la cuota diaria de la API y de la petición compartida.
+
+No requiere MySQL, API_KEY ni internet (sesión HTTP simulada con latencia):
+cuota diaria que sobrevive a un reinicio y se restablece al cambiar el día,
+`CuotaAgotada` explícita (sin mensajes impresos) por cuota o por HTTP 429,
+peticiones idénticas simultáneas que comparten una sola petición HTTP, y los
+menús de proyectos informando la hora de reinicio de la cuota.
+"""
+import sys
+import os
+import io
+import json
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from datetime import timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+
+from persistencia.db import Database
+from persistencia.sqlite_backend import BackendSQLite
+from aplicacion.api_client import EcoAPIClient
+from aplicacion.cache_calidad_aire import CacheCalidadAire
+from aplicacion.limite_tasa import LimiteTasa, CuotaAgotada, _hoy, _proxima_medianoche
+from aplicacion.services import ProyectoService
+from presentacion.menus import ProyectosMenu, ProyectosMenuSoloLectura
+from presentacion.ui_helpers import UI
+
+
+def _comprobar(descripcion, condicion):
+    print(f"{'✓' if condicion else '✗'} {descripcion}")
+    return condicion
+
+
+class _Respuesta:
+    def __init__(self, datos, estado=200):
+        self.datos = datos
+        self.status_code = estado
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"HTTP {self.status_code}", response=self)
+
+    def json(self):
+        return self.datos
+
+
+class _SesionLenta:
+    """Imita Geocoding y Air Pollution API con latencia; cuenta las peticiones"""
+
+    def __init__(self, latencia=0.05, estado=200, caida=False):
+        self.latencia = latencia
+        self.estado = estado
+        self.caida = caida
+        self.peticiones = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        with self._lock:
+            self.peticiones += 1
+        time.sleep(self.latencia)
+        if self.caida:
+            raise requests.exceptions.ConnectionError("sin red")
+        if url.endswith('/direct'):
+            return _Respuesta([{"lat": -33.4489, "lon": -70.6693}], self.estado)
+        return _Respuesta({"list": [{"main": {"aqi": 2}, "components": {"pm2_5": 8.16}}]}, self.estado)
+
+
+def _cliente(limite_tasa=None, **sesion):
+    cliente = EcoAPIClient(api_key="prueba", limite_tasa=limite_tasa)
+    cliente.sesion = _SesionLenta(**sesion)
+    return cliente
+
+
+def test_cuota_diaria(directorio):
+    """Test: cuota del día, reinicio del proceso y cambio de día"""
+    print("=" * 60)
+    print("TEST: Cuota diaria persistente")
+    print("=" * 60)
+
+    ruta = os.path.join(directorio, "cuota_api.json")
+    limite = LimiteTasa(por_dia=5, ruta_cuota=ruta)
+    for _ in range(5):
+        limite.adquirir()
+    try:
+        limite.adquirir()
+        agotada = None
+    except CuotaAgotada as e:
+        agotada = e
+    ok = _comprobar("La sexta petición del día lanza CuotaAgotada con la hora de reinicio",
+                    agotada is not None and agotada.reinicio is not None and limite.rechazadas == 1)
+
+    reiniciado = LimiteTasa(por_dia=5, ruta_cuota=ruta)
+    ok &= _comprobar("Tras reiniciar el proceso el conteo sigue en 5",
+                     reiniciado.disponibles_hoy() == 0 and reiniciado.estado()['usadas_hoy'] == 5)
+
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump({'dia': (_hoy() - timedelta(days=1)).isoformat(), 'usadas': 5}, archivo)
+    ok &= _comprobar("Un conteo de ayer no cuenta hoy", LimiteTasa(por_dia=5, ruta_cuota=ruta).disponibles_hoy() == 5)
+
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        archivo.write("{dañado")
+    ok &= _comprobar("Un archivo ilegible no impide arrancar", LimiteTasa(por_dia=5, ruta_cuota=ruta).adquirir() == 0.0)
+    return ok
+
+
+def test_resultado_explicito():
+    """Test: CuotaAgotada en vez de un error impreso"""
+    print("\n" + "=" * 60)
+    print("TEST: Cuota agotada como resultado explícito")
+    print("=" * 60)
+
+    cliente = _cliente(LimiteTasa(por_dia=2), latencia=0)
+    cliente.cache_calidad_aire = CacheCalidadAire()
+    ok = _comprobar("Dentro de la cuota la consulta responde", cliente.obtener_calidad_aire_ciudad("Santiago") is not None)
+
+    salida = io.StringIO()
+    with redirect_stdout(salida):
+        try:
+            cliente.obtener_coordenadas_ciudad("Lima", "PE")
+            agotada = False
+        except CuotaAgotada:
+            agotada = True
+    ok &= _comprobar("Sin cuota: obtener_coordenadas_ciudad lanza CuotaAgotada y no imprime nada",
+                     agotada and salida.getvalue() == "" and cliente.sesion.peticiones == 2)
+    ok &= _comprobar("Lo que está en caché sigue respondiendo sin cuota",
+                     cliente.obtener_calidad_aire(-33.4489, -70.6693) is not None)
+
+    limitado = _cliente(latencia=0, estado=429)
+    with redirect_stdout(io.StringIO()):
+        try:
+            limitado.obtener_calidad_aire(-33.4489, -70.6693)
+            agotada = False
+        except CuotaAgotada:
+            agotada = True
+    ok &= _comprobar("HTTP 429 de la API también es CuotaAgotada", agotada)
+
+    servicio = ProyectoService()
+    servicio._cliente_api = _cliente(LimiteTasa(por_dia=3), latencia=0)
+    resultados = servicio.obtener_calidad_aire_lote([("Santiago", "CL"), ("Lima", "PE"), ("Quito", "EC")],
+                                                    guardar_log=False, max_hilos=1)
+    print(f"  Lote con cuota de 3 peticiones: {[r['error'] or 'ok' for r in resultados]}")
+    ok &= _comprobar("En un lote, las ciudades sin cuota informan la cuota agotada",
+                     resultados[0]['datos'] is not None
+                     and all("Cuota diaria" in r['error'] for r in resultados[1:]))
+    return ok
+
+
+def _simultaneas(cliente, n, llamada):
+    barrera = threading.Barrier(n)
+    resultados, errores = [None] * n, [None] * n
+
+    def hilo(i):
+        barrera.wait()
+        try:
+            resultados[i] = llamada()
+        except Exception as e:
+            errores[i] = e
+
+    hilos = [threading.Thread(target=hilo, args=(i,)) for i in range(n)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    return resultados, errores
+
+
+def test_peticion_compartida():
+    """Test: consultas idénticas simultáneas comparten una petición HTTP"""
+    print("\n" + "=" * 60)
+    print("TEST: Petición compartida (single-flight)")
+    print("=" * 60)
+
+    limite = LimiteTasa(por_dia=1000)
+    cliente = _cliente(limite)
+    resultados, errores = _simultaneas(cliente, 20, lambda: cliente.obtener_calidad_aire_ciudad("Santiago", "CL"))
+    print(f"  20 consultas simultáneas de Santiago: {cliente.sesion.peticiones} peticiones HTTP,"
+          f" {cliente.coalescidas} compartidas, {limite.estado()['usadas_hoy']} de la cuota")
+    ok = _comprobar("Una petición por endpoint y todas reciben la respuesta",
+                    cliente.sesion.peticiones == 2 and limite.estado()['usadas_hoy'] == 2
+                    and all(r == resultados[0] and r is not None for r in resultados) and not any(errores))
+
+    cliente.sesion.caida = True
+    _, errores = _simultaneas(cliente, 10, lambda: cliente.geocodificar("Lima", "PE"))
+    ok &= _comprobar("Un error de red se entrega a todas las que esperaban",
+                     cliente.sesion.peticiones == 3
+                     and all(isinstance(e, requests.exceptions.ConnectionError) for e in errores))
+
+    cliente.sesion.caida = False
+    cliente.geocodificar("Lima", "PE")
+    ok &= _comprobar("Terminada la petición, la siguiente vuelve a la red", cliente.sesion.peticiones == 4)
+    return ok
+
+
+class _ServicioSinCuota:
+    def __init__(self, reinicio):
+        self.reinicio = reinicio
+
+    def obtener_calidad_aire_por_ciudad(self, *args, **kwargs):
+        raise CuotaAgotada("Cuota diaria de la API agotada (1000 peticiones)", self.reinicio)
+
+
+def test_menus_cuota_agotada():
+    """Test: ambos menús de proyectos muestran la hora de reinicio en vez de fallar"""
+    print("\n" + "=" * 60)
+    print("TEST: Menús con la cuota agotada")
+    print("=" * 60)
+
+    reinicio = _proxima_medianoche()
+    input_prompt, pause = UI.input_prompt, UI.pause
+    UI.input_prompt = staticmethod(lambda prompt, icon="▶": "Santiago" if "Ciudad" in prompt else "CL")
+    UI.pause = staticmethod(lambda *args, **kwargs: None)
+    ok = True
+    try:
+        for menu in (ProyectosMenu, ProyectosMenuSoloLectura):
+            salida = io.StringIO()
+            with redirect_stdout(salida):
+                menu(_ServicioSinCuota(reinicio))._evaluar_calidad_aire()
+            texto = salida.getvalue()
+            ok &= _comprobar(f"{menu.__name__}: avisa la cuota agotada y cuándo se restablece",
+                             "Cuota diaria de la API agotada" in texto
+                             and f"{reinicio:%Y-%m-%d %H:%M} UTC" in texto
+                             and "No se pudo obtener" not in texto)
+    finally:
+        UI.input_prompt, UI.pause = input_prompt, pause
+    return ok
+
+
+if __name__ == "__main__":
+    print("\n🌱 ECOTECH SOLUTIONS - TEST DE CUOTA DE LA API\n")
+
+    Database.usar_backend(BackendSQLite(':memory:'))
+    directorio = tempfile.mkdtemp(prefix="ecotech-cuota-")
+    try:
+        ok = all([test_cuota_diaria(directorio), test_resultado_explicito(), test_peticion_compartida(),
+                  test_menus_cuota_agotada()])
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        ok = False
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+        Database.close_pool()
+
+    print("\n" + "=" * 60)
+    print("TESTS COMPLETADOS" if ok else "TESTS CON FALLAS")
+    print("=" * 60 + "\n")
+    sys.exit(0 if ok else 1)
@@ -1,11 +1,14 @@
-"""Script de verificación de conexión a MySQL"""
+"""Script de verificación de conexión a la base de datos (MySQL o SQLite según DB_BACKEND)"""
 from persistencia.db import Database
 
 conn = Database.get_connection()
 cur = conn.cursor()
-cur.execute('SHOW TABLES')
+if Database.backend().nombre == 'sqlite':
+    cur.execute("SELECT name AS tabla FROM sqlite_master WHERE type = 'table' ORDER BY name")
+else:
+    cur.execute('SHOW TABLES')
 tables = cur.fetchall()
 print(f'✓ Conexión exitosa! Base de datos con {len(tables)} tablas')
 for t in tables:
-    print(f"  - {t['Tables_in_ecotech_management']}")
+    print(f"  - {next(iter(t.values()))}")
 conn.close()
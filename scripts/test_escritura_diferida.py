@@ -0,0 +1,367 @@
+"""
+Script de prueba de la escritura diferida de logs_clima (buffer + spool).
+
+Corre sobre un archivo SQLite temporal (no requiere MySQL): compara el costo
+de `crear` sincrónico con el diferido, comprueba que las lecturas quedan
+escritas en pocos lotes con su fecha de consulta y el resumen por ciudad al
+día, y simula una caída: el spool y los segmentos que quedan en disco se
+recuperan al crear el buffer de nuevo, sin duplicar lo ya confirmado, y un
+segmento con lecturas anteriores a la marca de los rollups llega a los rollups.
+Un segmento que la base rechaza siempre termina en `<spool>.fallido`, y uno
+ya confirmado se reconoce en el primario aunque la réplica esté atrasada.
+"""
+import sys
+import os
+import json
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistencia.db import Database, crear_pool
+from persistencia.replicas import Replica, ConjuntoReplicas
+from persistencia.sqlite_backend import BackendSQLite
+from persistencia.repositorios import LogClimaRepo
+from persistencia.escritura_diferida import BufferLogsClima, _serializar
+from persistencia.unit_of_work import UnitOfWork
+from persistencia import rollups
+from dominio.models import LogClima
+
+LECTURAS = 2000
+CIUDADES = [("Santiago", "CL"), ("Lima", "PE"), ("Quito", "EC")]
+
+
+def _comprobar(descripcion, condicion):
+    print(f"{'✓' if condicion else '✗'} {descripcion}")
+    return condicion
+
+
+def _lecturas(cantidad, ciudad="Santiago", pais="CL"):
+    return [LogClima(id=str(uuid.uuid4()), ciudad=ciudad, pais=pais, aqi=i % 5 + 1, pm2_5=float(i % 40))
+            for i in range(cantidad)]
+
+
+def _contar(ciudad=None):
+    sql = "SELECT COUNT(*) AS total FROM logs_clima"
+    params = None
+    if ciudad:
+        sql += " WHERE ciudad = %s"
+        params = (ciudad,)
+    with Database.lectura() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.fetchone()['total']
+
+
+class _RepoQueFalla:
+    """LogClimaRepo que falla las primeras `fallas` escrituras (base caída)"""
+
+    def __init__(self, fallas):
+        self.repo = LogClimaRepo(diferido=False)
+        self.fallas = fallas
+
+    def crear_muchos(self, logs, tamano_lote):
+        if self.fallas:
+            self.fallas -= 1
+            raise ConnectionError("base no disponible")
+        return self.repo.crear_muchos(logs, tamano_lote)
+
+    def obtener_por_ids(self, ids, primario=False):
+        return self.repo.obtener_por_ids(ids, primario)
+
+
+class _RepoQueRechaza(_RepoQueFalla):
+    """LogClimaRepo que rechaza las lecturas de `ciudad` (error que no es de conexión)"""
+
+    def __init__(self, ciudad):
+        super().__init__(fallas=0)
+        self.ciudad = ciudad
+
+    def crear_muchos(self, logs, tamano_lote):
+        if any(log.ciudad == self.ciudad for log in logs):
+            raise ValueError("valor fuera de rango")
+        return self.repo.crear_muchos(logs, tamano_lote)
+
+
+def test_latencia(directorio):
+    """Test: crear sincrónico frente a diferido y escritura por lotes"""
+    print("=" * 60)
+    print(f"TEST: {LECTURAS} lecturas, sincrónico frente a diferido")
+    print("=" * 60)
+
+    directo = LogClimaRepo(diferido=False)
+    inicio = time.perf_counter()
+    for log in _lecturas(LECTURAS, "Lima", "PE"):
+        directo.crear(log)
+    t_directo = time.perf_counter() - inicio
+
+    ok = True
+    for fsync in (True, False):
+        buffer = BufferLogsClima(LogClimaRepo(diferido=False), os.path.join(directorio, f"fsync{int(fsync)}.spool"),
+                                 tamano_lote=500, intervalo=0.2, fsync=fsync)
+        buffer.start()
+        ciudad = "Santiago" if fsync else "Quito"
+        inicio = time.perf_counter()
+        for log in _lecturas(LECTURAS, ciudad, "CL" if fsync else "EC"):
+            buffer.agregar(log)
+        t_diferido = time.perf_counter() - inicio
+        vaciado = buffer.vaciar()
+        estado = buffer.estado()
+        buffer.detener()
+        print(f"  fsync={fsync}: {t_diferido / LECTURAS * 1e6:.0f} µs por lectura"
+              f" (sincrónico {t_directo / LECTURAS * 1e6:.0f} µs); {estado['lotes']} lotes,"
+              f" {estado['escritura_ms_promedio']:.1f} ms por lote")
+        ok &= _comprobar(f"fsync={fsync}: todas escritas en pocos lotes y spool vacío",
+                         vaciado and _contar(ciudad) == LECTURAS and estado['lotes'] <= LECTURAS // 100
+                         and os.listdir(directorio).count(f"fsync{int(fsync)}.spool") == 1
+                         and os.path.getsize(buffer.ruta) == 0)
+        if not fsync:
+            ok &= _comprobar("Sin fsync, agregar cuesta menos que un INSERT con commit", t_diferido < t_directo)
+
+    resumen = directo.obtener_estadisticas_por_ciudad("Santiago", "CL")
+    ok &= _comprobar("Resumen por ciudad al día tras los lotes",
+                     [r['total_consultas'] for r in resumen] == [LECTURAS])
+    return ok
+
+
+def test_repositorio(directorio):
+    """Test: LogClimaRepo(diferido=True) usa el buffer compartido y conserva la fecha"""
+    print("\n" + "=" * 60)
+    print("TEST: LogClimaRepo en modo diferido")
+    print("=" * 60)
+
+    os.environ['LOGS_CLIMA_SPOOL'] = os.path.join(directorio, "repo.spool")
+    repo = LogClimaRepo(diferido=True)
+    log = _lecturas(1, "Valparaíso")[0]
+    antes = datetime.now()
+    repo.crear(log)
+    ok = _comprobar("crear retorna sin escribir en la base", _contar("Valparaíso") == 0)
+    time.sleep(0.2)
+    LogClimaRepo.detener_escritura_diferida()
+    guardado = LogClimaRepo(diferido=False, tipado=True).obtener_por_ids([log.id])[log.id]
+    fecha = guardado.fecha_consulta
+    if isinstance(fecha, str):
+        fecha = datetime.fromisoformat(fecha)
+    ok &= _comprobar("Al detener queda escrita con la fecha de la consulta, no la del lote",
+                     abs(fecha - antes) < timedelta(seconds=1) and LogClimaRepo.estado_escritura_diferida() is None)
+
+    revertida, confirmada = _lecturas(2, "Rancagua")
+    with UnitOfWork() as uow:
+        repo.crear(revertida)
+        dentro = LogClimaRepo.estado_escritura_diferida()
+        uow.rollback()
+    with UnitOfWork():
+        repo.crear(confirmada)
+    LogClimaRepo.detener_escritura_diferida()
+    guardadas = LogClimaRepo(diferido=False).obtener_por_ids([revertida.id, confirmada.id])
+    ok &= _comprobar("En una unidad de trabajo entra al spool solo si la unidad confirma",
+                     dentro is None and list(guardadas) == [confirmada.id])
+    return ok
+
+
+def test_recuperacion(directorio):
+    """Test: caída con lecturas en el spool, segmento ya confirmado y línea truncada"""
+    print("\n" + "=" * 60)
+    print("TEST: Recuperación tras una caída")
+    print("=" * 60)
+
+    ruta = os.path.join(directorio, "caida.spool")
+    caido = BufferLogsClima(LogClimaRepo(diferido=False), ruta)   # sin hilo: nadie escribe
+    perdidas = _lecturas(300, "Quito", "EC")
+    for log in perdidas:
+        caido.agregar(log)
+    caido._spool.close()   # el proceso muere aquí
+    with open(ruta, 'a', encoding='utf-8') as spool:
+        spool.write('{"id": "a-medio-escribir", "ciud')
+
+    # Segmento cuyo lote alcanzó a confirmarse antes de la caída
+    confirmadas = _lecturas(50, "Quito", "EC")
+    LogClimaRepo(diferido=False).crear_muchos(confirmadas)
+    with open(f"{ruta}.1-1", 'w', encoding='utf-8') as segmento:
+        for log in confirmadas:
+            datos = {c: getattr(log, c) for c in ('id', 'ciudad', 'pais', 'aqi', 'pm2_5')}
+            datos['fecha_consulta'] = datetime.now().isoformat()
+            segmento.write(json.dumps(datos) + '\n')
+
+    quito_antes = _contar("Quito")
+    buffer = BufferLogsClima(LogClimaRepo(diferido=False), ruta, intervalo=0.05)
+    ok = _comprobar("Al crear el buffer hay 2 segmentos por retomar", buffer.estado()['segmentos_pendientes'] == 2)
+    buffer.start()
+    buffer.vaciar()
+    estado = buffer.estado()
+    buffer.detener()
+    ok &= _comprobar(f"Recuperadas {estado['recuperados']}, omitidas {estado['duplicados_omitidos']} ya confirmadas,"
+                     f" {estado['lineas_invalidas']} línea truncada",
+                     estado['recuperados'] == 300 and estado['duplicados_omitidos'] == 50
+                     and estado['lineas_invalidas'] == 1 and _contar("Quito") == quito_antes + 300)
+    ok &= _comprobar("Sin segmentos en disco", not [a for a in os.listdir(directorio) if a.startswith("caida.spool.")])
+    return ok
+
+
+def test_reintento(directorio):
+    """Test: un lote que falla queda en disco y se reintenta"""
+    print("\n" + "=" * 60)
+    print("TEST: Reintento con la base caída")
+    print("=" * 60)
+
+    buffer = BufferLogsClima(_RepoQueFalla(fallas=2), os.path.join(directorio, "reintento.spool"), intervalo=0.05)
+    for log in _lecturas(100, "Bogotá", "CO"):
+        buffer.agregar(log)
+    ok = _comprobar("Sin hilo y con la base caída, vaciar() no alcanza a escribir", not buffer.vaciar(0.05))
+    ok &= _comprobar("El lote fallido queda como segmento", buffer.estado()['segmentos_pendientes'] == 1)
+    buffer.start()
+    vaciado = buffer.vaciar()
+    estado = buffer.estado()
+    buffer.detener()
+    ok &= _comprobar(f"Escrito tras {estado['errores']} errores ({estado['ultimo_error']})",
+                     vaciado and _contar("Bogotá") == 100 and estado['segmentos_pendientes'] == 0)
+    return ok
+
+
+def test_segmento_rechazado(directorio):
+    """Test: un segmento que la base rechaza pasa a <spool>.fallido tras max_intentos"""
+    print("\n" + "=" * 60)
+    print("TEST: Segmento rechazado por la base")
+    print("=" * 60)
+
+    ruta = os.path.join(directorio, "rechazo.spool")
+    buffer = BufferLogsClima(_RepoQueRechaza("Cusco"), ruta, max_intentos=3)
+    for log in _lecturas(20, "Cusco", "PE"):
+        buffer.agregar(log)
+    intentos = [buffer.vaciar(0) for _ in range(2)]
+    ok = _comprobar("Antes de max_intentos el segmento sigue pendiente",
+                    intentos == [False, False] and buffer.estado()['segmentos_pendientes'] == 1)
+    for log in _lecturas(5, "Arica"):
+        buffer.agregar(log)
+    vaciado = buffer.vaciar(0)
+    estado = buffer.estado()
+    with open(ruta + ".fallido", encoding='utf-8') as fallidos:
+        lineas = [json.loads(linea) for linea in fallidos]
+    ok &= _comprobar(f"Al tercer fallo se aparta ({estado['ultimo_error']}) y el resto se escribe",
+                     vaciado and estado['segmentos_fallidos'] == 1 and estado['lecturas_fallidas'] == 20
+                     and len(lineas) == 20 and {l['ciudad'] for l in lineas} == {"Cusco"} and _contar("Arica") == 5)
+    buffer.detener()
+
+    reanudado = BufferLogsClima(LogClimaRepo(diferido=False), ruta)
+    ok &= _comprobar("Al reiniciar, el archivo .fallido no se toma como segmento",
+                     reanudado.estado()['segmentos_pendientes'] == 0 and reanudado.vaciar(0))
+    reanudado.detener()
+
+    buffer = BufferLogsClima(_RepoQueFalla(fallas=3), os.path.join(directorio, "conexion.spool"), max_intentos=1)
+    for log in _lecturas(10, "Temuco"):
+        buffer.agregar(log)
+    for _ in range(4):
+        buffer.vaciar(0)
+    estado = buffer.estado()
+    buffer.detener()
+    ok &= _comprobar("Los errores de conexión no cuentan como intentos",
+                     estado['segmentos_fallidos'] == 0 and estado['errores'] == 3 and _contar("Temuco") == 10)
+    return ok
+
+
+def _lecturas_rollup(tabla, ciudad, periodo):
+    with Database.lectura() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT lecturas FROM {tabla} WHERE ciudad = %s AND periodo = %s", (ciudad, periodo))
+            fila = cur.fetchone()
+            return fila['lecturas'] if fila else 0
+
+
+def test_segmento_atrasado(directorio):
+    """Test: un segmento de ayer recuperado después de consolidar los rollups"""
+    print("\n" + "=" * 60)
+    print("TEST: Segmento anterior a la marca de los rollups")
+    print("=" * 60)
+
+    ayer = rollups.inicio_periodo('dia', datetime.now()) - timedelta(days=1)
+    hora = ayer + timedelta(hours=10)
+    consolidadas = _lecturas(10, "Cusco", "PE")
+    for log in consolidadas:
+        log.fecha_consulta = hora
+    LogClimaRepo(diferido=False).crear_muchos(consolidadas)
+    rollups.actualizar_rollups()
+    ok = _comprobar("Rollups de ayer consolidados y la marca diaria ya pasó ese día",
+                    _lecturas_rollup('logs_clima_dia', "Cusco", ayer) == 10
+                    and rollups.obtener_marca('dia') > ayer and rollups.dias_pendientes() == [])
+
+    # Segmento que dejó una caída ayer a las 10:30 y se retoma hoy
+    ruta = os.path.join(directorio, "atrasado.spool")
+    atrasadas = _lecturas(5, "Cusco", "PE")
+    with open(f"{ruta}.1-1", 'w', encoding='utf-8') as segmento:
+        for log in atrasadas:
+            log.fecha_consulta = hora + timedelta(minutes=30)
+            segmento.write(_serializar(log))
+    buffer = BufferLogsClima(LogClimaRepo(diferido=False), ruta)
+    vaciado = buffer.vaciar()
+    buffer.detener()
+    ok &= _comprobar("Al retomarlo, su día queda pendiente de recalcular",
+                     vaciado and _contar("Cusco") == 15 and rollups.dias_pendientes() == [ayer.date()])
+
+    rollups.actualizar_rollups()
+    ok &= _comprobar("La pasada siguiente lo suma a los rollups por hora y por día",
+                     _lecturas_rollup('logs_clima_hora', "Cusco", hora) == 15
+                     and _lecturas_rollup('logs_clima_dia', "Cusco", ayer) == 15
+                     and rollups.dias_pendientes() == [])
+    return ok
+
+
+def test_replica_atrasada(directorio):
+    """Test: la recuperación busca lo ya confirmado en el primario, no en una réplica"""
+    print("\n" + "=" * 60)
+    print("TEST: Recuperación con una réplica atrasada")
+    print("=" * 60)
+
+    # Réplica sana y al día según su estado, pero sin ninguna fila: atrasada respecto al primario
+    backend = BackendSQLite(os.path.join(directorio, "replica.db"))
+    replica = Replica('replica', backend, crear_pool(backend.conectar))
+    replica.sana, replica.retraso = True, 0.0
+    Database.usar_replicas(ConjuntoReplicas([replica], max_retraso=0.05))
+    try:
+        # El proceso murió tras el commit del lote y antes de borrar su segmento
+        confirmadas = _lecturas(40, "Coyhaique", "CL")
+        ahora = datetime.now().replace(microsecond=0)
+        for log in confirmadas:
+            log.fecha_consulta = ahora
+        LogClimaRepo(diferido=False).crear_muchos(confirmadas)
+        ruta = os.path.join(directorio, "replica.spool")
+        with open(f"{ruta}.1-1", 'w', encoding='utf-8') as segmento:
+            segmento.writelines(_serializar(log) for log in confirmadas)
+
+        time.sleep(0.1)
+        buffer = BufferLogsClima(LogClimaRepo(diferido=False), ruta, intervalo=0.05, max_intentos=2)
+        buffer.start()
+        buffer.vaciar()
+        estado = buffer.estado()
+        buffer.detener()
+    finally:
+        Database.usar_replicas(None)
+    ok = _comprobar(f"{estado['duplicados_omitidos']} lecturas reconocidas como ya confirmadas",
+                    estado['duplicados_omitidos'] == 40 and estado['recuperados'] == 0 and _contar("Coyhaique") == 40)
+    ok &= _comprobar("Nada apartado en .fallido",
+                     estado['segmentos_fallidos'] == 0 and not os.path.exists(f"{ruta}.fallido"))
+    return ok
+
+
+if __name__ == "__main__":
+    print("\n🌱 ECOTECH SOLUTIONS - TEST DE ESCRITURA DIFERIDA DE LOGS_CLIMA\n")
+
+    directorio = tempfile.mkdtemp(prefix="ecotech-spool-")
+    Database.usar_backend(BackendSQLite(os.path.join(directorio, "ecotech.db")))
+    try:
+        ok = all([test_latencia(directorio), test_repositorio(directorio), test_recuperacion(directorio),
+                  test_reintento(directorio), test_segmento_rechazado(directorio),
+                  test_segmento_atrasado(directorio), test_replica_atrasada(directorio)])
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        ok = False
+    finally:
+        LogClimaRepo.detener_escritura_diferida()
+        Database.close_pool()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    print("\n" + "=" * 60)
+    print("TESTS COMPLETADOS" if ok else "TESTS CON FALLAS")
+    print("=" * 60 + "\n")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,202 @@
+"""
+Script de prueba de la caché persistente de geocodificación.
+
+Corre sobre SQLite en memoria y con una sesión HTTP simulada que cuenta las
+peticiones (no requiere MySQL, API_KEY ni internet): aciertos en memoria y en
+la tabla tras un reinicio, claves normalizadas, caché negativa con TTL,
+errores de red que no se guardan, precarga desde logs_clima y el tráfico a la
+API de una ronda de consultas con y sin caché.
+"""
+import sys
+import os
+import uuid
+from datetime import timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+
+from persistencia.db import Database
+from persistencia.sqlite_backend import BackendSQLite
+from persistencia.geocodificacion import CacheGeocodificacion, GeocodificacionRepo
+from persistencia.repositorios import LogClimaRepo
+from aplicacion.api_client import EcoAPIClient
+from dominio.models import LogClima
+
+CIUDADES = {"santiago": (-33.4489, -70.6693), "lima": (-12.0464, -77.0428), "bogota": (4.711, -74.0721),
+            "quito": (-0.1807, -78.4678), "valparaiso": (-33.0472, -71.6127)}
+AIR_POLLUTION = {"list": [{"main": {"aqi": 2}, "components": {"pm2_5": 8.16, "pm10": 9.43}}]}
+
+
+def _comprobar(descripcion, condicion):
+    print(f"{'✓' if condicion else '✗'} {descripcion}")
+    return condicion
+
+
+class _Respuesta:
+    def __init__(self, datos):
+        self.datos = datos
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.datos
+
+
+class _SesionContadora:
+    """Imita Geocoding y Air Pollution API y cuenta las peticiones por endpoint"""
+
+    def __init__(self):
+        self.geocoding = 0
+        self.air_pollution = 0
+        self.caida = False
+
+    def get(self, url, params=None, timeout=None):
+        if self.caida:
+            raise requests.exceptions.ConnectionError("sin red")
+        if url.endswith('/direct'):
+            self.geocoding += 1
+            nombre = params['q'].split(',')[0].strip().lower().replace('á', 'a').replace('í', 'i')
+            coords = CIUDADES.get(nombre)
+            return _Respuesta([{"lat": coords[0], "lon": coords[1]}] if coords else [])
+        self.air_pollution += 1
+        return _Respuesta(AIR_POLLUTION)
+
+
+def _cliente(cache):
+    cliente = EcoAPIClient(api_key="prueba", cache_coordenadas=cache)
+    cliente.sesion = _SesionContadora()
+    return cliente
+
+
+def test_aciertos():
+    """Test: memoria, tabla tras reinicio y claves normalizadas"""
+    print("=" * 60)
+    print("TEST: Aciertos en memoria y en la tabla")
+    print("=" * 60)
+
+    cache = CacheGeocodificacion()
+    cliente = _cliente(cache)
+    primera = cliente.obtener_coordenadas_ciudad("Santiago", "CL")
+    segunda = cliente.obtener_coordenadas_ciudad("Santiago", "CL")
+    ok = _comprobar("Segunda consulta desde memoria, sin petición",
+                    primera == segunda == {'lat': -33.4489, 'lon': -70.6693}
+                    and cliente.sesion.geocoding == 1 and cache.aciertos_memoria == 1)
+
+    reiniciado = _cliente(CacheGeocodificacion())   # otro proceso: memoria vacía
+    variantes = [reiniciado.obtener_coordenadas_ciudad(c, p) for c, p in
+                 [("  SANTIAGO ", "cl"), ("santiago", "CL"), ("Santiago", " Cl")]]
+    ok &= _comprobar("Tras reiniciar: desde la tabla, con variantes de mayúsculas y espacios",
+                     all(v == primera for v in variantes) and reiniciado.sesion.geocoding == 0
+                     and reiniciado.cache_coordenadas.aciertos_bd == 1)
+
+    cliente.obtener_coordenadas_ciudad("Bogotá", "CO")
+    cliente.obtener_coordenadas_ciudad("bogota", "co")
+    ok &= _comprobar("'Bogotá' y 'bogota' comparten entrada", cliente.sesion.geocoding == 2)
+    return ok
+
+
+def test_negativa():
+    """Test: ciudades no encontradas, TTL negativo y errores de red"""
+    print("\n" + "=" * 60)
+    print("TEST: Caché negativa")
+    print("=" * 60)
+
+    cliente = _cliente(CacheGeocodificacion())
+    resultados = [cliente.obtener_coordenadas_ciudad("Ciudad Inventada", "CL") for _ in range(3)]
+    ok = _comprobar("No encontrada: una sola petición para 3 consultas",
+                    resultados == [None] * 3 and cliente.sesion.geocoding == 1)
+
+    vencida = _cliente(CacheGeocodificacion(ttl_negativo=timedelta(0)))
+    vencida.obtener_coordenadas_ciudad("Ciudad Inventada", "CL")
+    ok &= _comprobar("Con el TTL negativo vencido se vuelve a consultar", vencida.sesion.geocoding == 1)
+
+    sin_red = _cliente(CacheGeocodificacion())
+    sin_red.sesion.caida = True
+    sin_red.obtener_coordenadas_ciudad("Quito", "EC")
+    sin_red.sesion.caida = False
+    ok &= _comprobar("Un error de red no se guarda como 'no encontrada'",
+                     sin_red.obtener_coordenadas_ciudad("Quito", "EC") == {'lat': -0.1807, 'lon': -78.4678})
+
+    class _RepoCaido(GeocodificacionRepo):
+        def obtener(self, *clave):
+            raise ConnectionError("base no disponible")
+
+    caida = _cliente(CacheGeocodificacion(repo=_RepoCaido()))
+    ok &= _comprobar("Con la base caída se consulta la API y se cuenta el error",
+                     caida.obtener_coordenadas_ciudad("Lima", "PE") is not None
+                     and caida.cache_coordenadas.errores == 1)
+    return ok
+
+
+def test_precarga():
+    """Test: precarga desde logs_clima"""
+    print("\n" + "=" * 60)
+    print("TEST: Precarga desde logs_clima")
+    print("=" * 60)
+
+    LogClimaRepo(diferido=False).crear_muchos([
+        LogClima(id=str(uuid.uuid4()), ciudad="Valparaíso", pais="CL", aqi=2, latitud=-33.0472, longitud=-71.6127),
+        LogClima(id=str(uuid.uuid4()), ciudad="Valparaíso", pais="CL", aqi=3, latitud=-33.0472, longitud=-71.6127),
+        LogClima(id=str(uuid.uuid4()), ciudad="Concepción", pais="CL", aqi=1, latitud=-36.827, longitud=-73.0498),
+        LogClima(id=str(uuid.uuid4()), ciudad="Santiago", pais="CL", aqi=2, latitud=-33.4, longitud=-70.6),
+        LogClima(id=str(uuid.uuid4()), ciudad="Sin Coordenadas", pais="CL", aqi=2),
+    ])
+    cache = CacheGeocodificacion()
+    agregadas = cache.precargar_desde_logs_clima()
+    ok = _comprobar(f"{agregadas} ciudades agregadas (Santiago ya estaba y no se reemplaza)", agregadas == 2)
+
+    cliente = _cliente(cache)
+    valparaiso = cliente.obtener_coordenadas_ciudad("valparaiso", "CL")
+    santiago = cliente.obtener_coordenadas_ciudad("Santiago", "CL")
+    ok &= _comprobar("Ciudades precargadas sin petición a la API",
+                     valparaiso == {'lat': -33.0472, 'lon': -71.6127} and santiago['lat'] == -33.4489
+                     and cliente.sesion.geocoding == 0)
+    ok &= _comprobar("Segunda precarga no agrega nada", cache.precargar_desde_logs_clima() == 0)
+    return ok
+
+
+class _RepoVacio(GeocodificacionRepo):
+    """Tabla vacía al empezar (las pruebas anteriores ya guardaron estas ciudades)"""
+
+    def obtener(self, *clave):
+        return None
+
+    def guardar(self, *args, **kwargs):
+        pass
+
+
+def test_trafico():
+    """Test: peticiones a la API para 200 consultas de calidad del aire"""
+    print("\n" + "=" * 60)
+    print("TEST: Tráfico a la API con y sin caché")
+    print("=" * 60)
+
+    consultas = [list(CIUDADES)[i % len(CIUDADES)] for i in range(200)]
+    sin_cache = _cliente(None)
+    con_cache = _cliente(CacheGeocodificacion(repo=_RepoVacio()))
+    for cliente in (sin_cache, con_cache):
+        for ciudad in consultas:
+            cliente.obtener_calidad_aire_ciudad(ciudad, "CL")
+    antes = sin_cache.sesion.geocoding + sin_cache.sesion.air_pollution
+    despues = con_cache.sesion.geocoding + con_cache.sesion.air_pollution
+    print(f"  Sin caché: {antes} peticiones; con caché: {despues} ({despues / antes:.0%})")
+    return _comprobar("La caché deja el tráfico en poco más de la mitad", despues <= antes * 0.55)
+
+
+if __name__ == "__main__":
+    print("\n🌱 ECOTECH SOLUTIONS - TEST DE CACHÉ DE GEOCODIFICACIÓN\n")
+
+    Database.usar_backend(BackendSQLite(':memory:'))
+    try:
+        ok = all([test_aciertos(), test_negativa(), test_precarga(), test_trafico()])
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        ok = False
+    finally:
+        Database.close_pool()
+
+    print("\n" + "=" * 60)
+    print("TESTS COMPLETADOS" if ok else "TESTS CON FALLAS")
+    print("=" * 60 + "\n")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,263 @@
+"""
+Script de prueba de la instrumentación de consultas (persistencia/instrumentacion.py).
+
+No requiere MySQL: los cursores instrumentados de PyMySQL (CursorInstrumentado
+y SSCursorInstrumentado) corren sobre una conexión mínima respaldada por
+SQLite en memoria, y el resto del test usa el backend SQLite de Database.
+Cubre percentiles, umbral del log de consultas lentas y exportación a JSON.
+"""
+import sys
+import os
+import json
+import shutil
+import sqlite3
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistencia.db import Database, BackendMySQL
+from persistencia.sqlite_backend import BackendSQLite
+from persistencia.instrumentacion import (
+    MetricasConsultas, metricas, CursorInstrumentado, SSCursorInstrumentado, MUESTRAS_POR_SENTENCIA
+)
+from persistencia.repositorios import DepartamentoRepo
+
+
+def _comprobar(descripcion, condicion):
+    print(f"{'✓' if condicion else '✗'} {descripcion}")
+    return condicion
+
+
+class _Campo:
+    def __init__(self, nombre):
+        self.name = nombre
+        self.table_name = ''
+
+
+class _Resultado:
+    """Lo que los cursores de PyMySQL leen de `conn._result`"""
+
+    def __init__(self, cursor, sin_buffer):
+        self._cursor = cursor
+        self.description = cursor.description
+        self.fields = [_Campo(d[0]) for d in cursor.description or ()]
+        self.rows = None if sin_buffer or not cursor.description else tuple(cursor.fetchall())
+        self.affected_rows = len(self.rows) if self.rows is not None else cursor.rowcount
+        self.insert_id = cursor.lastrowid
+        self.warning_count = 0
+        self.has_next = False
+
+    def _read_rowdata_packet_unbuffered(self):
+        return self._cursor.fetchone()
+
+    def _finish_unbuffered_query(self):
+        self._cursor.fetchall()
+
+
+class _ConexionSQLite:
+    """Lo mínimo de pymysql.Connection que usan Cursor y SSCursor, sobre sqlite3"""
+
+    encoding = 'utf8'
+
+    def __init__(self):
+        self._db = sqlite3.connect(':memory:')
+        self._result = None
+
+    def escape(self, valor):
+        if valor is None:
+            return 'NULL'
+        if isinstance(valor, (int, float)):
+            return repr(valor)
+        return "'" + str(valor).replace("'", "''") + "'"
+
+    def query(self, sql, unbuffered=False):
+        if isinstance(sql, (bytes, bytearray)):
+            sql = bytes(sql).decode(self.encoding)
+        self._result = _Resultado(self._db.execute(sql), unbuffered)
+        return self._result.affected_rows
+
+
+def test_percentiles():
+    """Test: percentiles, promedio y máximo por plantilla"""
+    print("=" * 60)
+    print("TEST: Percentiles por sentencia")
+    print("=" * 60)
+
+    m = MetricasConsultas(activa=True, umbral_lenta_ms=10_000)
+    for ms in reversed(range(101)):
+        m.registrar("SELECT * FROM proyectos\n   WHERE id = %s", ms / 1000, 1)
+    m.registrar("SELECT * FROM proyectos WHERE id = %s", 0.05, 0)
+    m.registrar("SELECT 1", 0.5, 1)
+
+    sentencias = {s['sql']: s for s in m.sentencias()}
+    s = sentencias.get("SELECT * FROM proyectos WHERE id = %s", {})
+    ok = _comprobar("Los espacios y saltos de línea no separan plantillas",
+                    len(sentencias) == 2 and s.get('llamadas') == 102)
+    ok &= _comprobar("p50, p95 y p99 de 0..100 ms (más un 50): 50, 95 y 99 ms",
+                     (s['p50_ms'], s['p95_ms'], s['p99_ms']) == (50.0, 95.0, 99.0))
+    ok &= _comprobar("Total, promedio, máximo y filas",
+                     s['total_ms'] == 5100.0 and s['promedio_ms'] == 50.0 and s['max_ms'] == 100.0
+                     and s['filas'] == 101)
+
+    ok &= _comprobar("Orden por total, p95 y llamadas; límite",
+                     m.sentencias()[0]['sql'] == "SELECT * FROM proyectos WHERE id = %s"
+                     and m.sentencias(orden='p95')[0]['sql'] == "SELECT 1"
+                     and m.sentencias(orden='llamadas', limite=1)[0]['llamadas'] == 102)
+
+    m.reiniciar()
+    for _ in range(MUESTRAS_POR_SENTENCIA):
+        m.registrar("SELECT 2", 1.0, 0)
+    for _ in range(MUESTRAS_POR_SENTENCIA):
+        m.registrar("SELECT 2", 0.001, 0)
+    s = m.sentencias()[0]
+    ok &= _comprobar(f"Percentiles sobre las últimas {MUESTRAS_POR_SENTENCIA} muestras; el máximo es histórico",
+                     s['p99_ms'] == 1.0 and s['max_ms'] == 1000.0)
+    return ok
+
+
+def test_consultas_lentas(directorio):
+    """Test: umbral, forma de los parámetros y archivo JSON Lines"""
+    print("\n" + "=" * 60)
+    print("TEST: Log de consultas lentas")
+    print("=" * 60)
+
+    archivo = os.path.join(directorio, "lentas.jsonl")
+    m = MetricasConsultas(activa=True, umbral_lenta_ms=50, archivo_lentas=archivo)
+    m.registrar("SELECT * FROM empleados WHERE email = %s AND activo = %s", 0.049, 0,
+                ("secreto@ecotech.cl", 1))
+    m.registrar("SELECT * FROM empleados WHERE email = %s AND activo = %s", 0.050, 1,
+                ("secreto@ecotech.cl", 1))
+    m.registrar("INSERT INTO logs_clima (id) VALUES (%s)", 0.2, 500, ("x",), lote=500)
+    lentas = m.lentas()
+    ok = _comprobar("Bajo el umbral no se registra; igual o sobre él sí", len(lentas) == 2 and lentas[0]['ms'] == 50.0)
+    ok &= _comprobar("Los parámetros se guardan solo por tipo",
+                     lentas[0]['parametros'] == ['str', 'int'] and "secreto" not in json.dumps(lentas))
+    ok &= _comprobar("Los lotes informan cuántas filas agrupan", lentas[1].get('lote') == 500 and 'lote' not in lentas[0])
+
+    with open(archivo, encoding='utf-8') as f:
+        lineas = [json.loads(linea) for linea in f]
+    ok &= _comprobar("El archivo recibe una línea JSON por consulta lenta", lineas == lentas)
+
+    m.archivo_lentas = os.path.join(directorio, "no-existe", "lentas.jsonl")
+    m.registrar("SELECT 1", 1.0, 1)
+    ok &= _comprobar("Un archivo que no se puede escribir no interrumpe la consulta", len(m.lentas()) == 3)
+    return ok
+
+
+def test_exportar_json(directorio):
+    """Test: volcado del resumen completo"""
+    print("\n" + "=" * 60)
+    print("TEST: Exportación a JSON")
+    print("=" * 60)
+
+    m = MetricasConsultas(activa=True, umbral_lenta_ms=100)
+    m.registrar("SELECT 1", 0.2, 1)
+    m.registrar_adquisicion(0.004)
+    m.registrar_adquisicion(0.002)
+    ruta = m.volcar_json(os.path.join(directorio, "metricas.json"))
+    with open(ruta, encoding='utf-8') as f:
+        datos = json.load(f)
+    ok = _comprobar("Incluye período, umbral, sentencias y consultas lentas",
+                    {'desde', 'hasta', 'activa', 'umbral_lenta_ms', 'adquisicion_conexion',
+                     'sentencias', 'consultas_lentas'} <= set(datos)
+                    and datos['sentencias'][0]['sql'] == "SELECT 1" and len(datos['consultas_lentas']) == 1)
+    ok &= _comprobar("Tiempo de adquisición de conexiones",
+                     datos['adquisicion_conexion'] == {'adquisiciones': 2, 'total_ms': 6.0,
+                                                       'promedio_ms': 3.0, 'max_ms': 4.0})
+    return ok
+
+
+def test_cursores_pymysql():
+    """Test: CursorInstrumentado y SSCursorInstrumentado"""
+    print("\n" + "=" * 60)
+    print("TEST: Cursores instrumentados de PyMySQL")
+    print("=" * 60)
+
+    conn = _ConexionSQLite()
+    backend = BackendMySQL()
+    backend.preparar(conn, True)
+    ok = _comprobar("Con instrumentación el backend MySQL asigna los cursores medidos",
+                    conn.cursorclass is CursorInstrumentado
+                    and backend.cursor_stream(True) is SSCursorInstrumentado)
+
+    cur = CursorInstrumentado(conn)
+    cur.execute("CREATE TABLE ciudades (id INTEGER PRIMARY KEY, nombre TEXT)")
+    cur.executemany("INSERT INTO ciudades (id, nombre) VALUES (%s, %s)",
+                    [(1, "Santiago"), (2, "Valparaíso"), (3, "O'Higgins")])
+    cur.execute("SELECT id, nombre FROM ciudades WHERE id >= %s ORDER BY id", (2,))
+    filas = cur.fetchall()
+    cur.executemany("UPDATE ciudades SET nombre = %s WHERE id = %s", [("Stgo", 1), ("Valpo", 2)])
+    sentencias = {s['sql']: s for s in metricas.sentencias()}
+
+    insert = sentencias.get("INSERT INTO ciudades (id, nombre) VALUES (%s, %s)", {})
+    ok &= _comprobar("executemany multifila: una medición con las 3 filas (no una por sentencia enviada)",
+                     insert.get('llamadas') == 1 and insert.get('filas') == 3
+                     and not any(sql.startswith("INSERT INTO ciudades (id, nombre) VALUES (1") for sql in sentencias))
+    update = sentencias.get("UPDATE ciudades SET nombre = %s WHERE id = %s", {})
+    ok &= _comprobar("executemany sin VALUES: una medición aunque PyMySQL ejecute cada fila",
+                     update.get('llamadas') == 1 and update.get('filas') == 2)
+    select = sentencias.get("SELECT id, nombre FROM ciudades WHERE id >= %s ORDER BY id", {})
+    ok &= _comprobar("SELECT: filas como dict y contadas en el execute",
+                     list(filas) == [{'id': 2, 'nombre': "Valparaíso"}, {'id': 3, 'nombre': "O'Higgins"}]
+                     and select.get('llamadas') == 1 and select.get('filas') == 2)
+
+    ss = SSCursorInstrumentado(conn)
+    ss.execute("SELECT nombre FROM ciudades ORDER BY id")
+    leidas = [ss.fetchone()] + list(ss.fetchmany(5))
+    antes = {s['sql']: s for s in metricas.sentencias()}["SELECT nombre FROM ciudades ORDER BY id"]
+    ss.close()
+    despues = {s['sql']: s for s in metricas.sentencias()}["SELECT nombre FROM ciudades ORDER BY id"]
+    ok &= _comprobar("SSCursor: filas como dict leídas en streaming",
+                     [f['nombre'] for f in leidas] == ["Stgo", "Valpo", "O'Higgins"])
+    ok &= _comprobar("SSCursor: las filas se suman al cerrar (0 tras el execute, 3 al cerrar)",
+                     antes['filas'] == 0 and despues['filas'] == 3 and despues['llamadas'] == 1)
+    return ok
+
+
+def test_database_sqlite():
+    """Test: Database mide consultas y adquisiciones solo con la instrumentación activa"""
+    print("\n" + "=" * 60)
+    print("TEST: Instrumentación desde Database (SQLite)")
+    print("=" * 60)
+
+    Database.usar_backend(BackendSQLite(':memory:'))
+    metricas.desactivar()
+    metricas.reiniciar()
+    DepartamentoRepo().listar_todos()
+    ok = _comprobar("Desactivada: no se registra nada",
+                    metricas.sentencias() == [] and metricas.adquisicion()['adquisiciones'] == 0)
+
+    metricas.activar(umbral_lenta_ms=0)
+    DepartamentoRepo().listar_todos()
+    sentencias = metricas.sentencias()
+    ok &= _comprobar("Activada: la consulta del repositorio queda medida",
+                     any("FROM departamentos" in s['sql'] for s in sentencias))
+    ok &= _comprobar("... junto al tiempo de adquisición de la conexión",
+                     metricas.adquisicion()['adquisiciones'] >= 1)
+    ok &= _comprobar("Con umbral 0 ms toda consulta va al log de lentas",
+                     any("FROM departamentos" in l['sql'] for l in metricas.lentas()))
+    return ok
+
+
+if __name__ == "__main__":
+    print("\n🌱 ECOTECH SOLUTIONS - TEST DE INSTRUMENTACIÓN DE CONSULTAS\n")
+
+    directorio = tempfile.mkdtemp(prefix="ecotech-metricas-")
+    archivo_lentas, umbral = metricas.archivo_lentas, metricas.umbral_lenta_ms
+    metricas.archivo_lentas = None
+    metricas.reiniciar()
+    try:
+        ok = all([test_percentiles(), test_consultas_lentas(directorio), test_exportar_json(directorio),
+                  test_cursores_pymysql(), test_database_sqlite()])
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        ok = False
+    finally:
+        metricas.desactivar()
+        metricas.archivo_lentas, metricas.umbral_lenta_ms = archivo_lentas, umbral
+        shutil.rmtree(directorio, ignore_errors=True)
+        Database.close_pool()
+
+    print("\n" + "=" * 60)
+    print("TESTS COMPLETADOS" if ok else "TESTS CON FALLAS")
+    print("=" * 60 + "\n")
+    sys.exit(0 if ok else 1)
@@ -90,9 +90,9 @@ def test_estadisticas_ciudad():
     service = ProyectoService()
     
     try:
-        stats = service.obtener_estadisticas_ciudad("Santiago")
-        if stats:
-            print("\n✓ Estadísticas de Santiago:")
+        estadisticas = service.obtener_estadisticas_ciudad("Santiago")
+        for stats in estadisticas:
+            print(f"\n✓ Estadísticas de {stats.get('ciudad')}, {stats.get('pais')}:")
             print(f"   Total consultas: {stats.get('total_consultas')}")
             print(f"   AQI promedio: {stats.get('aqi_promedio', 0):.2f}/5")
             print(f"   AQI máximo: {stats.get('aqi_maximo')}/5")
@@ -100,7 +100,7 @@ def test_estadisticas_ciudad():
             print(f"   PM2.5 promedio: {stats.get('pm2_5_promedio', 0):.2f} μg/m³")
             print(f"   PM10 promedio: {stats.get('pm10_promedio', 0):.2f} μg/m³")
             print(f"   Última consulta: {stats.get('ultima_consulta')}")
-        else:
+        if not estadisticas:
             print("✗ No hay estadísticas disponibles")
     except Exception as e:
         print(f"✗ Error: {e}")
@@ -0,0 +1,219 @@
+"""
+Script de prueba de los modelos de dominio con __slots__ y `from_row`.
+
+Verifica que `from_row` construya lo mismo que el constructor, que los
+repositorios tipados retornen modelos (sobre SQLite en memoria, no requiere
+MySQL) y compara memoria y tiempo de construcción de N objetos LogClima
+(por defecto 1.000.000; se cambia con el primer argumento):
+
+    python scripts/test_modelos.py 200000
+"""
+import sys
+import os
+import gc
+import time
+import tracemalloc
+import uuid
+from datetime import date, datetime
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistencia.db import Database
+from persistencia.sqlite_backend import BackendSQLite
+from persistencia.repositorios import ProyectoRepo, LogClimaRepo
+from persistencia.auth_repositorios import RolRepo
+from dominio.models import Proyecto, LogClima
+from dominio.auth_models import Rol
+
+OBJETOS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+
+class LogClimaConDict:
+    """LogClima como era antes de __slots__ (un __dict__ por instancia), para comparar"""
+
+    def __init__(self, id, ciudad, pais, aqi, co=None, no2=None, o3=None, so2=None, pm2_5=None,
+                 pm10=None, nh3=None, usuario_id=None, proyecto_id=None, latitud=None, longitud=None):
+        self.id = id
+        self.ciudad = ciudad
+        self.pais = pais
+        self.aqi = aqi
+        self.co = co
+        self.no2 = no2
+        self.o3 = o3
+        self.so2 = so2
+        self.pm2_5 = pm2_5
+        self.pm10 = pm10
+        self.nh3 = nh3
+        self.usuario_id = usuario_id
+        self.proyecto_id = proyecto_id
+        self.latitud = latitud
+        self.longitud = longitud
+
+    @property
+    def ciudad(self):
+        return self._ciudad
+
+    @ciudad.setter
+    def ciudad(self, valor):
+        if not valor or len(valor.strip()) < 2:
+            raise ValueError("La ciudad debe tener al menos 2 caracteres")
+        self._ciudad = valor.strip()
+
+    @property
+    def aqi(self):
+        return self._aqi
+
+    @aqi.setter
+    def aqi(self, valor):
+        if valor < 1 or valor > 5:
+            raise ValueError("El AQI debe estar entre 1 y 5")
+        self._aqi = valor
+
+
+def _fila(i):
+    return {
+        'id': f"log-{i:07d}", 'ciudad': "Santiago", 'pais': "CL", 'aqi': i % 5 + 1,
+        'co': 201.9, 'no2': 0.8, 'o3': 68.7, 'so2': 0.6, 'pm2_5': 0.5, 'pm10': 0.5, 'nh3': 0.1,
+        'latitud': -33.45, 'longitud': -70.66, 'usuario_id': None, 'proyecto_id': None,
+        'fecha_consulta': datetime(2026, 1, 1),
+    }
+
+
+def _sin_fecha(fila):
+    fila = dict(fila)
+    del fila['fecha_consulta']
+    return fila
+
+
+def _medir(construir, filas):
+    """(segundos, bytes) de construir un objeto por fila; la memoria se mide aparte"""
+    # Sin el recolector de ciclos: con un millón de objetos vivos sus pasadas
+    # dominan el tiempo y ocultan el costo de construir cada objeto
+    gc.collect()
+    gc.disable()
+    try:
+        inicio = time.perf_counter()
+        objetos = [construir(f) for f in filas]
+        segundos = time.perf_counter() - inicio
+    finally:
+        gc.enable()
+    del objetos
+
+    tracemalloc.start()
+    objetos = [construir(f) for f in filas]
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objetos
+    return segundos, memoria
+
+
+def test_from_row():
+    """Test: from_row produce el mismo objeto que el constructor"""
+    print("=" * 60)
+    print("TEST: from_row frente al constructor")
+    print("=" * 60)
+
+    fila = _fila(1)
+    desde_fila = LogClima.from_row(fila)
+    construido = LogClima(**_sin_fecha(fila))
+    iguales = all(getattr(desde_fila, a) == getattr(construido, a)
+                  for a in LogClima.__slots__ if a != 'fecha_consulta')
+    ok = iguales and desde_fila.fecha_consulta == fila['fecha_consulta'] and construido.fecha_consulta is None
+    print(f"{'✓' if ok else '✗'} LogClima.from_row == LogClima(**fila)")
+
+    sin_dict = not hasattr(construido, '__dict__')
+    print(f"{'✓' if sin_dict else '✗'} Sin __dict__ por instancia")
+    try:
+        construido.atributo_inventado = 1
+        print("✗ Un atributo fuera de __slots__ debe fallar")
+        ok = False
+    except AttributeError:
+        print("✓ Atributos fuera de __slots__ rechazados")
+    try:
+        LogClima.from_row(dict(fila, aqi=9))
+        print("✓ from_row no revalida (camino confiable)")
+    except ValueError:
+        print("✗ from_row no debe validar")
+        ok = False
+    return ok and sin_dict
+
+
+def test_repositorios_tipados():
+    """Test: tipado=True retorna modelos en listados, páginas, iteración y por ids"""
+    print("\n" + "=" * 60)
+    print("TEST: Repositorios tipados")
+    print("=" * 60)
+
+    repo, tipado = ProyectoRepo(), ProyectoRepo(tipado=True)
+    proyectos = [Proyecto(id=str(uuid.uuid4()), nombre=f"Proyecto {i:02d}", fecha_inicio=date(2026, 1, 1))
+                 for i in range(30)]
+    repo.crear_muchos(proyectos)
+    RolRepo().crear_muchos([Rol(id=str(uuid.uuid4()), nombre="Analista", nivel_permisos=2)])
+    LogClimaRepo().crear(LogClima(id=str(uuid.uuid4()), ciudad="Santiago", pais="CL", aqi=2))
+
+    uno = tipado.obtener_por_id(proyectos[0].id)
+    resultados = [
+        ("obtener_por_id", isinstance(uno, Proyecto) and uno.fecha_inicio == date(2026, 1, 1)),
+        ("obtener_por_id inexistente", tipado.obtener_por_id("no-existe") is None),
+        ("listar_todos", all(isinstance(p, Proyecto) for p in tipado.listar_todos())),
+        ("listar_pagina", all(isinstance(p, Proyecto) for p in tipado.listar_pagina(10)['filas'])),
+        ("iterar_todos", sum(1 for p in tipado.iterar_todos(7) if isinstance(p, Proyecto)) == 30),
+        ("obtener_por_ids", all(isinstance(p, Proyecto)
+                                for p in tipado.obtener_por_ids(p.id for p in proyectos).values())),
+        ("RolRepo", all(isinstance(r, Rol) for r in RolRepo(tipado=True).listar_todos())),
+        ("LogClimaRepo con fecha_consulta",
+         all(isinstance(l, LogClima) and l.fecha_consulta is not None
+             for l in LogClimaRepo(tipado=True).listar_por_ciudad("Santiago"))),
+        ("sin tipado siguen siendo dict", isinstance(repo.obtener_por_id(proyectos[0].id), dict)),
+    ]
+    for descripcion, condicion in resultados:
+        print(f"{'✓' if condicion else '✗'} {descripcion}")
+    return all(c for _, c in resultados)
+
+
+def test_memoria_y_tiempo():
+    """Test: memoria y tiempo de construcción de N objetos LogClima"""
+    print("\n" + "=" * 60)
+    print(f"TEST: {OBJETOS:,} objetos LogClima".replace(',', '.'))
+    print("=" * 60)
+
+    filas = [_fila(i) for i in range(OBJETOS)]
+    sin_fecha = [_sin_fecha(f) for f in filas]
+    variantes = [
+        ("dict (fila del cursor)", filas, dict),
+        ("clase con __dict__", sin_fecha, lambda f: LogClimaConDict(**f)),
+        ("__slots__ + __init__", sin_fecha, lambda f: LogClima(**f)),
+        ("__slots__ + from_row", filas, LogClima.from_row),
+    ]
+    medidas = {}
+    print(f"  {'Variante':24s} {'Tiempo':>9s} {'Memoria':>10s} {'Por objeto':>11s}")
+    for nombre, entrada, construir in variantes:
+        segundos, memoria = _medir(construir, entrada)
+        medidas[nombre] = (segundos, memoria)
+        print(f"  {nombre:24s} {segundos:8.2f}s {memoria / 2**20:8.1f}MB {memoria / OBJETOS:9.0f} B")
+
+    _, m_dict = medidas["clase con __dict__"]
+    t_init, m_slots = medidas["__slots__ + __init__"]
+    t_from_row, _ = medidas["__slots__ + from_row"]
+    print(f"  __slots__ usa {m_slots / m_dict:.0%} de la memoria de la clase con __dict__;"
+          f" from_row tarda {t_from_row / t_init:.0%} de __init__")
+    ok = m_slots < m_dict and t_from_row < t_init
+    print(f"{'✓' if ok else '✗'} __slots__ ocupa menos y from_row construye más rápido")
+    return ok
+
+
+if __name__ == "__main__":
+    print("\n🌱 ECOTECH SOLUTIONS - TEST DE MODELOS DE DOMINIO\n")
+
+    Database.usar_backend(BackendSQLite(':memory:'))
+    try:
+        ok = all([test_from_row(), test_repositorios_tipados(), test_memoria_y_tiempo()])
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        ok = False
+    finally:
+        Database.close_pool()
+
+    print("\n" + "=" * 60)
+    print("TESTS COMPLETADOS" if ok else "TESTS CON FALLAS")
+    print("=" * 60 + "\n")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,132 @@
+"""
+Script de prueba de las lecturas por lote (obtener_por_ids) y del Cargador.
+
+Corre sobre SQLite en memoria (no requiere MySQL) y cuenta las sentencias
+con la instrumentación: mostrar una página de empleados con su departamento
+consultando uno por uno (N+1) frente a resolverlos con el cargador.
+"""
+import sys
+import os
+import time
+import uuid
+from datetime import date
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistencia.db import Database
+from persistencia.sqlite_backend import BackendSQLite
+from persistencia.instrumentacion import metricas
+from persistencia.lotes import TAMANO_LOTE_IDS
+from persistencia.repositorios import DepartamentoRepo, EmpleadoRepo
+from persistencia.auth_repositorios import UsuarioRepo, RolRepo
+from aplicacion.cargadores import Cargador
+from dominio.models import Departamento, Empleado
+from dominio.auth_models import Usuario, Rol
+
+EMPLEADOS = 1200
+DEPARTAMENTOS = 40
+PAGINA = 100
+
+
+def _sentencias():
+    return sum(s['llamadas'] for s in metricas.sentencias())
+
+
+def preparar_datos():
+    rol = Rol(id=str(uuid.uuid4()), nombre="Empleado", nivel_permisos=3)
+    RolRepo().crear_muchos([rol])
+    departamentos = [Departamento(id=str(uuid.uuid4()), nombre=f"Depto {i:02d}") for i in range(DEPARTAMENTOS)]
+    DepartamentoRepo().crear_muchos(departamentos)
+    usuarios = [Usuario(id=str(uuid.uuid4()), nombre_usuario=f"emp{i:05d}", contrasena_cifrada="x",
+                        salt="y", rol_id=rol.id) for i in range(EMPLEADOS)]
+    UsuarioRepo().crear_muchos(usuarios)
+    EmpleadoRepo().crear_muchos(
+        Empleado(id=str(uuid.uuid4()), usuario_id=u.id, nombre=f"Empleado {i:05d}",
+                 email=f"emp{i:05d}@ecotech.cl", fecha_inicio_contrato=date(2025, 1, 1),
+                 departamento_id=departamentos[i % DEPARTAMENTOS].id)
+        for i, u in enumerate(usuarios)
+    )
+
+
+def test_obtener_por_ids():
+    """Test: bloques de WHERE id IN, ids repetidos, None e inexistentes"""
+    print("=" * 60)
+    print("TEST: obtener_por_ids")
+    print("=" * 60)
+
+    repo = EmpleadoRepo()
+    ids = [e['id'] for e in repo.listar_todos()]
+    metricas.reiniciar()
+    encontrados = repo.obtener_por_ids(ids + ids[:10] + [None, "no-existe"])
+    consultas = _sentencias()
+    esperadas = -(-len(ids) // TAMANO_LOTE_IDS)
+    if len(encontrados) != len(ids) or consultas != esperadas:
+        print(f"✗ {len(encontrados)} filas en {consultas} consultas (esperado {len(ids)} en {esperadas})")
+        return False
+    print(f"✓ {len(encontrados)} empleados en {consultas} consultas de hasta {TAMANO_LOTE_IDS} ids")
+
+    if repo.obtener_por_ids([]) != {}:
+        print("✗ Una lista vacía debe retornar {}")
+        return False
+    usuario = next(iter(UsuarioRepo().obtener_por_ids(e['usuario_id'] for e in list(encontrados.values())[:1]).values()))
+    if 'contrasena_cifrada' in usuario:
+        print("✗ UsuarioRepo.obtener_por_ids no debe retornar contraseñas")
+        return False
+    print("✓ Sin ids no consulta; usuarios sin contraseñas")
+    return True
+
+
+def test_cargador():
+    """Test: página de empleados con departamento, N+1 frente al cargador"""
+    print("\n" + "=" * 60)
+    print(f"TEST: Página de {PAGINA} empleados con su departamento")
+    print("=" * 60)
+
+    repo, repo_departamentos = EmpleadoRepo(), DepartamentoRepo()
+    filas = repo.listar_pagina(PAGINA)['filas']
+
+    metricas.reiniciar()
+    inicio = time.perf_counter()
+    n_mas_1 = {f['id']: repo_departamentos.obtener_por_id(f['departamento_id']) for f in filas}
+    t_n_mas_1, consultas_n_mas_1 = time.perf_counter() - inicio, _sentencias()
+
+    metricas.reiniciar()
+    cargador = Cargador()
+    inicio = time.perf_counter()
+    cargador.adjuntar(filas, 'departamento_id', 'departamento')
+    t_cargador, consultas_cargador = time.perf_counter() - inicio, _sentencias()
+
+    print(f"  Uno por uno: {consultas_n_mas_1:4d} consultas  {t_n_mas_1 * 1000:7.2f} ms")
+    print(f"  Cargador:    {consultas_cargador:4d} consultas  {t_cargador * 1000:7.2f} ms")
+    ok = consultas_cargador == 1 and all(f['departamento'] == n_mas_1[f['id']] for f in filas)
+    print(f"{'✓' if ok else '✗'} Mismos departamentos con una sola consulta")
+
+    # Mapa de identidad: la siguiente página no vuelve a pedir los departamentos ya cargados
+    siguiente = repo.listar_pagina(PAGINA, repo.listar_pagina(PAGINA)['siguiente'])['filas']
+    metricas.reiniciar()
+    cargador.adjuntar(siguiente, 'departamento_id', 'departamento')
+    cargador.obtener('departamento', "no-existe")
+    cargador.obtener('departamento', "no-existe")
+    reutiliza = _sentencias() == 1 and cargador.en_mapa('departamento') == DEPARTAMENTOS + 1
+    print(f"{'✓' if reutiliza else '✗'} Mapa de identidad: página 2 sin consultas y un id inexistente consultado una vez")
+    return ok and reutiliza
+
+
+if __name__ == "__main__":
+    print("\n🌱 ECOTECH SOLUTIONS - TEST DE LECTURAS POR LOTE\n")
+
+    Database.usar_backend(BackendSQLite(':memory:'))
+    try:
+        preparar_datos()
+        metricas.activar()
+        ok = all([test_obtener_por_ids(), test_cargador()])
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        ok = False
+    finally:
+        metricas.desactivar()
+        Database.close_pool()
+
+    print("\n" + "=" * 60)
+    print("TESTS COMPLETADOS" if ok else "TESTS CON FALLAS")
+    print("=" * 60 + "\n")
+    sys.exit(0 if ok else 1)
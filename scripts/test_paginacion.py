@@ -0,0 +1,142 @@
+"""
+Script de prueba de la paginación keyset (persistencia/paginacion.py).
+
+Corre sobre SQLite en memoria (no requiere MySQL): ida y vuelta del token,
+empates en la columna de orden, orden descendente y última página sin token.
+"""
+import sys
+import os
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistencia.db import Database
+from persistencia.sqlite_backend import BackendSQLite
+from persistencia.paginacion import codificar_token, decodificar_token, consultar_pagina
+from persistencia.repositorios import ProyectoRepo, LogClimaRepo
+from dominio.models import Proyecto, LogClima
+
+
+def _comprobar(descripcion, condicion):
+    print(f"{'✓' if condicion else '✗'} {descripcion}")
+    return condicion
+
+
+def _recorrer(obtener_pagina):
+    """Todas las páginas: (filas en orden, tamaños de página, token final)"""
+    filas, tamanos, token = [], [], None
+    while True:
+        pagina = obtener_pagina(token)
+        filas.extend(pagina['filas'])
+        tamanos.append(len(pagina['filas']))
+        token = pagina['siguiente']
+        if token is None:
+            return filas, tamanos
+
+
+def test_token():
+    """Test: ida y vuelta del token y tokens inválidos"""
+    print("=" * 60)
+    print("TEST: Token de continuación")
+    print("=" * 60)
+
+    valores = [datetime(2026, 3, 1, 14, 30, 5), date(2026, 3, 1), Decimal("1234.50"), "Ñuñoa", 42]
+    token = codificar_token(valores)
+    ok = _comprobar("Los valores vuelven con su tipo (datetime, date, Decimal, str, int)",
+                    decodificar_token(token, len(valores)) == valores
+                    and [type(v) for v in decodificar_token(token, len(valores))] == [type(v) for v in valores])
+    ok &= _comprobar("El token es texto seguro para URL", all(c.isalnum() or c in '-_' for c in token))
+
+    invalidos = 0
+    for malo, cantidad in (("no-es-base64!!", 2), (codificar_token(["a"]), 2), ("e30", 1)):
+        try:
+            decodificar_token(malo, cantidad)
+        except ValueError:
+            invalidos += 1
+    ok &= _comprobar("Token corrupto, con otra cantidad de columnas o que no es lista: ValueError", invalidos == 3)
+    return ok
+
+
+def test_empates():
+    """Test: muchas filas con el mismo nombre se reparten sin repetir ni saltar"""
+    print("\n" + "=" * 60)
+    print("TEST: Empates en la columna de orden")
+    print("=" * 60)
+
+    repo = ProyectoRepo()
+    proyectos = [Proyecto(id=str(uuid.uuid4()), nombre=f"Huerto {i % 5}", fecha_inicio=date(2026, 1, 1))
+                 for i in range(25)]
+    repo.crear_muchos(proyectos)
+    filas, tamanos = _recorrer(lambda token: repo.listar_pagina(tamano=4, token=token))
+    esperado = sorted((p.nombre, p.id) for p in proyectos)
+    print(f"  25 proyectos con 5 nombres, páginas de 4: {tamanos}")
+    ok = _comprobar("Cada fila aparece una vez, en orden (nombre, id)",
+                    [(f['nombre'], f['id']) for f in filas] == esperado)
+    ok &= _comprobar("Páginas completas salvo la última", tamanos == [4] * 6 + [1])
+    return ok
+
+
+def test_descendente():
+    """Test: historial más reciente primero con fechas repetidas"""
+    print("\n" + "=" * 60)
+    print("TEST: Orden descendente")
+    print("=" * 60)
+
+    base = datetime.now().replace(microsecond=0) - timedelta(days=1)
+    logs = []
+    for i in range(20):
+        log = LogClima(id=str(uuid.uuid4()), ciudad="Santiago", pais="CL", aqi=2)
+        log.fecha_consulta = base - timedelta(hours=i // 3)     # de a 3 con la misma fecha
+        logs.append(log)
+    LogClimaRepo(diferido=False).crear_muchos(logs)
+    repo = LogClimaRepo(diferido=False)
+    filas, tamanos = _recorrer(lambda token: repo.listar_por_ciudad_pagina("Santiago", tamano=6, token=token))
+    claves = [(str(f['fecha_consulta']), f['id']) for f in filas]
+    ok = _comprobar("De la más reciente a la más antigua, con empates por id descendente",
+                    claves == sorted(claves, reverse=True))
+    ok &= _comprobar("Las 20 filas, sin repetir", len(claves) == 20 and len(set(claves)) == 20)
+
+    pagina = consultar_pagina("SELECT id, nombre FROM proyectos", ('nombre', 'id'), descendente=True, tamano=10)
+    ok &= _comprobar("consultar_pagina descendente empieza por el mayor",
+                     pagina['filas'][0]['nombre'] == "Huerto 4" and pagina['siguiente'] is not None)
+    return ok
+
+
+def test_ultima_pagina():
+    """Test: la última página no entrega token"""
+    print("\n" + "=" * 60)
+    print("TEST: Última página")
+    print("=" * 60)
+
+    select = "SELECT id, nombre FROM proyectos"
+    exacta = consultar_pagina(select, ('nombre', 'id'), tamano=25)
+    mayor = consultar_pagina(select, ('nombre', 'id'), tamano=100)
+    ok = _comprobar("Tamaño igual al total: todas las filas y siguiente=None",
+                    len(exacta['filas']) == 25 and exacta['siguiente'] is None)
+    ok &= _comprobar("Tamaño mayor al total: siguiente=None", len(mayor['filas']) == 25 and mayor['siguiente'] is None)
+
+    _, tamanos = _recorrer(lambda token: consultar_pagina(select, ('nombre', 'id'), tamano=5, token=token))
+    ok &= _comprobar("Total múltiplo del tamaño: sin página vacía al final", tamanos == [5] * 5)
+
+    vacia = consultar_pagina(select, ('nombre', 'id'), condiciones=("nombre = %s",), params=("Ninguna",))
+    ok &= _comprobar("Sin resultados: filas vacías y siguiente=None", vacia == {'filas': [], 'siguiente': None})
+    return ok
+
+
+if __name__ == "__main__":
+    print("\n🌱 ECOTECH SOLUTIONS - TEST DE PAGINACIÓN KEYSET\n")
+
+    Database.usar_backend(BackendSQLite(':memory:'))
+    try:
+        ok = all([test_token(), test_empates(), test_descendente(), test_ultima_pagina()])
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        ok = False
+    finally:
+        Database.close_pool()
+
+    print("\n" + "=" * 60)
+    print("TESTS COMPLETADOS" if ok else "TESTS CON FALLAS")
+    print("=" * 60 + "\n")
+    sys.exit(0 if ok else 1)
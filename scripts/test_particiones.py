@@ -0,0 +1,145 @@
+"""
+Script de prueba del mantenimiento de particiones de logs_clima (persistencia/particiones.py).
+
+Corre sobre SQLite en memoria (no requiere MySQL). SQLite no particiona:
+`listar_particiones` y `obtener_marca` se reemplazan por valores fijos y el
+DROP PARTITION por un DELETE del mismo rango de fechas. Comprueba qué meses se
+crean y cuáles se purgan según la retención, la marca del rollup diario y los
+días tardíos, y que el resumen por ciudad queda igual que reconstruido desde cero.
+"""
+import sys
+import os
+import uuid
+from datetime import date, datetime
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistencia.db import Database
+from persistencia.sqlite_backend import BackendSQLite
+from persistencia.repositorios import LogClimaRepo
+from persistencia import particiones, rollups
+from dominio.models import LogClima
+
+HOY = date(2026, 4, 10)
+
+
+def _comprobar(descripcion, condicion):
+    print(f"{'✓' if condicion else '✗'} {descripcion}")
+    return condicion
+
+
+def _particiones(*meses):
+    """Lo que listaría information_schema: un mes por partición más p_futuro"""
+    return ([{'nombre': particiones.nombre_particion(m), 'mes': m, 'filas': None} for m in meses]
+            + [{'nombre': particiones.PARTICION_FUTURO, 'mes': None, 'filas': None}])
+
+
+def _eliminar_con_delete(nombres):
+    """DROP PARTITION emulado: borra el mes de cada partición"""
+    with Database.connection() as conn:
+        with conn.cursor() as cur:
+            for nombre in nombres:
+                mes = date(int(nombre[1:5]), int(nombre[5:7]), 1)
+                cur.execute("DELETE FROM logs_clima WHERE fecha_consulta >= %s AND fecha_consulta < %s",
+                            (mes, particiones.sumar_meses(mes, 1)))
+
+
+def _lecturas(ciudad, pais, fecha, cantidad):
+    logs = []
+    for i in range(cantidad):
+        log = LogClima(id=str(uuid.uuid4()), ciudad=ciudad, pais=pais, aqi=i % 5 + 1, pm2_5=float(10 + i))
+        log.fecha_consulta = fecha.replace(hour=i % 24)
+        logs.append(log)
+    return logs
+
+
+def _resumen():
+    with Database.lectura() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT * FROM logs_clima_resumen_ciudad ORDER BY ciudad, pais")
+            return [dict(f) for f in cur.fetchall()]
+
+
+def test_crear_futuras():
+    """Test: meses por adelantado y definición de la partición"""
+    print("=" * 60)
+    print("TEST: Particiones futuras")
+    print("=" * 60)
+
+    particiones.listar_particiones = lambda: _particiones(date(2026, 3, 1), date(2026, 4, 1))
+    creadas = particiones.crear_particiones_futuras(3, hoy=HOY, simular=True)
+    ok = _comprobar(f"Con hasta abril y 3 meses por adelantado crea {creadas}",
+                    creadas == ['p202605', 'p202606', 'p202607'])
+    ok &= _comprobar("La partición de un mes termina al inicio del siguiente",
+                     particiones.definicion_particion(date(2026, 12, 1))
+                     == "PARTITION p202612 VALUES LESS THAN (UNIX_TIMESTAMP('2027-01-01 00:00:00'))")
+
+    particiones.listar_particiones = lambda: []
+    try:
+        particiones.crear_particiones_futuras(hoy=HOY, simular=True)
+        ok &= _comprobar("Tabla sin particionar: RuntimeError", False)
+    except RuntimeError:
+        ok &= _comprobar("Tabla sin particionar: RuntimeError", True)
+    return ok
+
+
+def test_purga():
+    """Test: retención, marca del rollup, días tardíos y resumen por ciudad"""
+    print("\n" + "=" * 60)
+    print("TEST: Purga por retención")
+    print("=" * 60)
+
+    repo = LogClimaRepo(diferido=False)
+    repo.crear_muchos(_lecturas("Osorno", "CL", datetime(2024, 1, 15), 30))      # solo en meses a purgar
+    repo.crear_muchos(_lecturas("Valdivia", "CL", datetime(2024, 2, 10), 20))
+    repo.crear_muchos(_lecturas("Valdivia", "CL", datetime(2026, 3, 5), 8))
+    rollups.recalcular_pendientes()
+    particiones.listar_particiones = lambda: _particiones(
+        date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1), date(2026, 3, 1), date(2026, 4, 1))
+
+    # Retención de 25 meses desde abril de 2026: fuera quedan enero y febrero de 2024
+    particiones.obtener_marca = lambda nivel: datetime(2024, 2, 20)
+    resultado = particiones.purgar_particiones(25, hoy=HOY, simular=True)
+    ok = _comprobar("Marca del rollup a mitad de febrero: se elimina enero y febrero espera",
+                    resultado['eliminadas'] == ['p202401'] and resultado['pendientes_rollup'] == ['p202402'])
+
+    particiones.obtener_marca = lambda nivel: datetime(2026, 4, 1)
+    rollups.registrar_pendientes([date(2024, 1, 20)])
+    resultado = particiones.purgar_particiones(25, hoy=HOY, simular=True)
+    ok &= _comprobar("Un día tardío de enero sin recalcular retiene el mes",
+                     resultado['eliminadas'] == ['p202402'] and resultado['pendientes_rollup'] == ['p202401'])
+    rollups.recalcular_pendientes()
+
+    particiones.obtener_marca = lambda nivel: None
+    resultado = particiones.purgar_particiones(25, hoy=HOY, simular=True, exigir_rollup=False)
+    ok &= _comprobar("Sin exigir el rollup se ignora la marca",
+                     resultado['eliminadas'] == ['p202401', 'p202402'])
+
+    particiones.obtener_marca = lambda nivel: datetime(2026, 4, 1)
+    particiones._eliminar_particiones = _eliminar_con_delete
+    resultado = particiones.purgar_particiones(25, hoy=HOY)
+    purgado = _resumen()
+    ok &= _comprobar(f"Purga {resultado['eliminadas']}: {resultado['ciudades_recalculadas']} ciudades recalculadas",
+                     resultado['eliminadas'] == ['p202401', 'p202402'] and resultado['ciudades_recalculadas'] == 2)
+    ok &= _comprobar("Osorno sale del resumen y Valdivia cuenta solo sus 8 lecturas retenidas",
+                     [(f['ciudad'], f['total_consultas']) for f in purgado] == [("Valdivia", 8)])
+    repo.reconstruir_resumen()
+    ok &= _comprobar("El resumen coincide con el reconstruido desde logs_clima", purgado == _resumen())
+    return ok
+
+
+if __name__ == "__main__":
+    print("\n🌱 ECOTECH SOLUTIONS - TEST DE PARTICIONES DE LOGS_CLIMA\n")
+
+    Database.usar_backend(BackendSQLite(':memory:'))
+    try:
+        ok = all([test_crear_futuras(), test_purga()])
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        ok = False
+    finally:
+        Database.close_pool()
+
+    print("\n" + "=" * 60)
+    print("TESTS COMPLETADOS" if ok else "TESTS CON FALLAS")
+    print("=" * 60 + "\n")
+    sys.exit(0 if ok else 1)
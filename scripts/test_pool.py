@@ -0,0 +1,131 @@
+"""
+Script de prueba para el pool de conexiones (no requiere MySQL)
+"""
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistencia.pool import ConnectionPool, PoolTimeoutError
+
+
+class ConexionFalsa:
+    """Conexión mínima con la interfaz que usa el pool"""
+
+    def __init__(self):
+        self.cerrada = False
+
+    def ping(self, reconnect=False):
+        if self.cerrada:
+            raise ConnectionError("conexión cerrada")
+
+    def close(self):
+        self.cerrada = True
+
+
+def test_reutilizacion():
+    """Test: Una conexión devuelta se reutiliza"""
+    print("=" * 60)
+    print("TEST: Reutilización de conexiones")
+    print("=" * 60)
+
+    pool = ConnectionPool(ConexionFalsa, min_size=1, max_size=2)
+    with pool.connection() as c1:
+        pass
+    with pool.connection() as c2:
+        pass
+
+    stats = pool.stats()
+    if c1 is c2 and stats['created'] == 1:
+        print("✓ Se reutilizó la misma conexión")
+    else:
+        print(f"✗ Se esperaban 1 conexión creada, hay {stats['created']}")
+
+
+def test_backpressure():
+    """Test: Con el pool lleno se espera y luego se lanza PoolTimeoutError"""
+    print("\n" + "=" * 60)
+    print("TEST: Espera y timeout con pool agotado")
+    print("=" * 60)
+
+    pool = ConnectionPool(ConexionFalsa, min_size=0, max_size=2, wait_timeout=0.2)
+    ocupadas = [pool.acquire(), pool.acquire()]
+
+    try:
+        pool.acquire()
+        print("✗ Se esperaba PoolTimeoutError")
+    except PoolTimeoutError:
+        print("✓ PoolTimeoutError tras esperar")
+
+    def liberar():
+        time.sleep(0.05)
+        pool.release(ocupadas[0])
+
+    threading.Thread(target=liberar).start()
+    conn = pool.acquire()
+    print(f"✓ Conexión obtenida al liberarse otra: {conn is ocupadas[0]}")
+    pool.release(conn)
+    pool.release(ocupadas[1])
+
+    stats = pool.stats()
+    print(f"   Esperas: {stats['waits']} | Timeouts: {stats['timeouts']} | "
+          f"Tiempo de espera: {stats['wait_time_total']:.3f}s")
+
+
+def test_conexion_caida():
+    """Test: Una conexión que falla el ping se reemplaza"""
+    print("\n" + "=" * 60)
+    print("TEST: Ping al entregar conexiones inactivas")
+    print("=" * 60)
+
+    pool = ConnectionPool(ConexionFalsa, min_size=1, max_size=1, ping_after=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.close()  # Simula que el servidor cerró la conexión
+
+    nueva = pool.acquire()
+    if nueva is not conn and not nueva.cerrada:
+        print("✓ La conexión caída fue descartada y reemplazada")
+    else:
+        print("✗ Se entregó una conexión caída")
+    pool.release(nueva)
+
+
+def test_concurrencia():
+    """Test: Nunca hay más conexiones abiertas que max_size"""
+    print("\n" + "=" * 60)
+    print("TEST: Límite de conexiones bajo concurrencia")
+    print("=" * 60)
+
+    pool = ConnectionPool(ConexionFalsa, min_size=0, max_size=4, wait_timeout=5)
+    maximo = [0]
+    lock = threading.Lock()
+
+    def trabajo():
+        for _ in range(50):
+            with pool.connection():
+                with lock:
+                    maximo[0] = max(maximo[0], pool.stats()['in_use'])
+
+    hilos = [threading.Thread(target=trabajo) for _ in range(16)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    stats = pool.stats()
+    print(f"✓ Máximo en uso: {maximo[0]} (límite {pool.max_size}), creadas: {stats['created']}")
+
+
+if __name__ == "__main__":
+    print("\n🌱 ECOTECH SOLUTIONS - TEST DEL POOL DE CONEXIONES\n")
+
+    test_reutilizacion()
+    test_backpressure()
+    test_conexion_caida()
+    test_concurrencia()
+
+    print("\n" + "=" * 60)
+    print("TESTS COMPLETADOS")
+    print("=" * 60 + "\n")
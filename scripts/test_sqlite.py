@@ -0,0 +1,168 @@
+"""
+Script de prueba del backend SQLite (no requiere MySQL).
+
+Ejecuta los repositorios sin cambios sobre una base SQLite en memoria:
+traducción de SQL, upsert del resumen por ciudad, paginación keyset,
+rollups, unidad de trabajo y latencia de lecturas locales.
+"""
+import sys
+import os
+import time
+import uuid
+from datetime import date, datetime, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistencia.db import Database
+from persistencia.sqlite_backend import BackendSQLite, traducir
+from persistencia.repositorios import ProyectoRepo, LogClimaRepo
+from persistencia.unit_of_work import UnitOfWork
+from persistencia import rollups
+from dominio.models import Proyecto, LogClima
+
+LECTURAS = 5000
+
+
+def test_traduccion():
+    """Test: %s, %% y ON DUPLICATE KEY UPDATE se traducen al dialecto de SQLite"""
+    print("=" * 60)
+    print("TEST: Traducción de SQL")
+    print("=" * 60)
+
+    casos = [
+        ("SELECT * FROM t WHERE a=%s AND b LIKE 'x%%'", True,
+         "SELECT * FROM t WHERE a=? AND b LIKE 'x%'"),
+        ("SELECT * FROM t WHERE b LIKE 'x%s'", False,
+         "SELECT * FROM t WHERE b LIKE 'x%s'"),
+        ("INSERT INTO t (a, b) VALUES (%s, %s) ON DUPLICATE KEY UPDATE b = b + VALUES(b)", True,
+         "INSERT INTO t (a, b) VALUES (?, ?) ON CONFLICT DO UPDATE SET b = b + excluded.b"),
+    ]
+    ok = True
+    for sql, con_parametros, esperado in casos:
+        obtenido = traducir(sql, con_parametros)
+        if obtenido == esperado:
+            print(f"✓ {esperado}")
+        else:
+            print(f"✗ {sql!r} -> {obtenido!r}")
+            ok = False
+    return ok
+
+
+def test_proyectos():
+    """Test: CRUD y paginación keyset de proyectos"""
+    print("\n" + "=" * 60)
+    print("TEST: ProyectoRepo sobre SQLite")
+    print("=" * 60)
+
+    repo = ProyectoRepo()
+    proyectos = [Proyecto(id=str(uuid.uuid4()), nombre=f"Proyecto {i:03d}", fecha_inicio=date(2026, 1, 1))
+                 for i in range(45)]
+    repo.crear_muchos(proyectos)
+    repo.actualizar(proyectos[0].id, {'nombre': 'Reforestación Norte'})
+
+    fila = repo.obtener_por_id(proyectos[0].id)
+    if fila['nombre'] != 'Reforestación Norte' or fila['fecha_inicio'] != date(2026, 1, 1):
+        print(f"✗ Fila inesperada: {fila}")
+        return False
+    print("✓ Alta, modificación y lectura (fecha como date)")
+
+    vistos, token = 0, None
+    while True:
+        pagina = repo.listar_pagina(20, token)
+        vistos += len(pagina['filas'])
+        token = pagina['siguiente']
+        if not token:
+            break
+    if vistos != len(proyectos):
+        print(f"✗ Paginación recorrió {vistos} de {len(proyectos)}")
+        return False
+    print(f"✓ Paginación keyset: {vistos} proyectos en 3 páginas")
+
+    if not repo.buscar_por_nombre("forest"):
+        print("✗ buscar_por_nombre no encontró el proyecto (LIKE)")
+        return False
+    print("✓ Búsqueda por nombre con LIKE (SQLite no tiene FULLTEXT)")
+
+    with UnitOfWork() as uow:
+        repo.eliminar(proyectos[0].id)
+        uow.rollback()
+    if repo.obtener_por_id(proyectos[0].id) is None:
+        print("✗ El rollback de la unidad de trabajo no restauró el proyecto")
+        return False
+    print("✓ Rollback de UnitOfWork")
+    return True
+
+
+def test_logs_clima():
+    """Test: resumen por ciudad (upsert) y rollups"""
+    print("\n" + "=" * 60)
+    print("TEST: LogClimaRepo y rollups sobre SQLite")
+    print("=" * 60)
+
+    repo = LogClimaRepo()
+    repo.crear(LogClima(id=str(uuid.uuid4()), ciudad="Santiago", pais="CL", aqi=5, pm2_5=20))
+    repo.crear_muchos([LogClima(id=str(uuid.uuid4()), ciudad="Santiago", pais="CL", aqi=1, pm2_5=10)
+                       for _ in range(99)])
+
+    por_ciudad = repo.obtener_estadisticas_por_ciudad("Santiago", "CL")
+    estadisticas = por_ciudad[0] if len(por_ciudad) == 1 else {}
+    if (estadisticas.get('total_consultas') != 100 or estadisticas['aqi_maximo'] != 5
+            or abs(estadisticas['aqi_promedio'] - 1.04) > 1e-9):
+        print(f"✗ Resumen inesperado: {estadisticas}")
+        return False
+    print(f"✓ Resumen: {estadisticas['total_consultas']} consultas, AQI promedio {estadisticas['aqi_promedio']:.2f}")
+
+    # Un nombre parcial abarca todas las ciudades que empiezan así, cada una con su fila
+    repo.crear_muchos([LogClima(id=str(uuid.uuid4()), ciudad="San Antonio", pais="CL", aqi=2),
+                       LogClima(id=str(uuid.uuid4()), ciudad="Santiago", pais="DO", aqi=3),
+                       LogClima(id=str(uuid.uuid4()), ciudad="Valparaíso", pais="CL", aqi=2)])
+    claves = [(e['ciudad'], e['pais']) for e in repo.obtener_estadisticas_por_ciudad("san")]
+    if claves != [("Santiago", "CL"), ("San Antonio", "CL"), ("Santiago", "DO")]:
+        print(f"✗ Estadísticas por nombre parcial inesperadas: {claves}")
+        return False
+    if ({(f['ciudad'], f['pais']) for f in repo.listar_por_ciudad("Sant")} != {("Santiago", "CL"), ("Santiago", "DO")}
+            or repo.listar_por_ciudad("tiago") or len(repo.obtener_estadisticas_por_ciudad("San", "CL")) != 2):
+        print("✗ La búsqueda por ciudad no filtra por prefijo")
+        return False
+    print(f"✓ Búsqueda por prefijo: 'san' abarca {len(claves)} ciudades; 'tiago' ninguna")
+
+    rollups.actualizar_rollups()
+    serie = repo.serie_temporal("Santiago", "CL", datetime.now() - timedelta(days=1), resolucion='hora')
+    if sum(f['lecturas'] for f in serie) != 100 or not isinstance(serie[0]['periodo'], datetime):
+        print(f"✗ Serie horaria inesperada: {serie}")
+        return False
+    print(f"✓ Serie horaria con {len(serie)} período(s) y 100 lecturas")
+    return True
+
+
+def test_latencia():
+    """Test: Lecturas por clave primaria en proceso"""
+    print("\n" + "=" * 60)
+    print("TEST: Latencia de lectura local")
+    print("=" * 60)
+
+    repo = ProyectoRepo()
+    id_ = repo.listar_todos()[0]['id']
+    inicio = time.perf_counter()
+    for _ in range(LECTURAS):
+        repo.obtener_por_id(id_)
+    promedio_us = (time.perf_counter() - inicio) / LECTURAS * 1e6
+    print(f"✓ obtener_por_id: {promedio_us:.1f} µs por lectura ({LECTURAS} lecturas)")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n🌱 ECOTECH SOLUTIONS - TEST DEL BACKEND SQLITE\n")
+
+    Database.usar_backend(BackendSQLite(':memory:'))
+    try:
+        ok = all([test_traduccion(), test_proyectos(), test_logs_clima(), test_latencia()])
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        ok = False
+    finally:
+        Database.close_pool()
+
+    print("\n" + "=" * 60)
+    print("TESTS COMPLETADOS" if ok else "TESTS CON FALLAS")
+    print("=" * 60 + "\n")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,148 @@
+"""
+Script de prueba de la búsqueda de texto (persistencia/texto.py).
+
+No requiere MySQL: el SQL de MATCH ... AGAINST de cada modo se comprueba con
+un backend marcado con FULLTEXT, y las búsquedas se ejecutan sobre SQLite en
+memoria, que usa LIKE igual que MySQL con términos más cortos que
+NGRAM_TOKEN_SIZE. También revisa que las migraciones creen los índices ngram
+sin stopwords ('a' e 'i' anularían los bigramas de "Maria" o "Ana").
+"""
+import sys
+import os
+import glob
+import uuid
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistencia.db import Database
+from persistencia.sqlite_backend import BackendSQLite
+from persistencia.texto import condicion_texto, buscar_texto, usa_fulltext, NGRAM_TOKEN_SIZE
+from persistencia.repositorios import EmpleadoRepo
+from persistencia.auth_repositorios import RolRepo, UsuarioRepo
+from dominio.models import Empleado
+from dominio.auth_models import Usuario, Rol
+
+NOMBRES = ["María José Rojas", "Ana Díaz", "Sofía Ruiz", "Mariano Soto", "Iván Aravena"]
+
+
+def _comprobar(descripcion, condicion):
+    print(f"{'✓' if condicion else '✗'} {descripcion}")
+    return condicion
+
+
+def test_sql_fulltext(backend):
+    """Test: SQL de cada modo con FULLTEXT y fallback a LIKE para términos cortos"""
+    print("=" * 60)
+    print("TEST: SQL con FULLTEXT")
+    print("=" * 60)
+
+    backend.fulltext = True
+    try:
+        condicion, params, relevancia, params_rel = condicion_texto("nombre", 'Ma"ría  ')
+        ok = _comprobar("frase: MATCH en modo booleano con la frase entre comillas (sin comillas internas)",
+                        condicion == "MATCH(nombre) AGAINST (%s IN BOOLEAN MODE)" and params == ('"Ma ría"',)
+                        and relevancia == condicion and params_rel == params)
+
+        condicion, params, _, _ = condicion_texto("nombre", "maria", 'natural')
+        ok &= _comprobar("natural: MATCH en lenguaje natural", "NATURAL LANGUAGE MODE" in condicion
+                         and params == ("maria",))
+
+        condicion, params, relevancia, _ = condicion_texto("nombre", "so", 'prefijo')
+        ok &= _comprobar("prefijo: MATCH acota y LIKE exige inicio de palabra",
+                         "BOOLEAN MODE" in condicion and "LIKE" in condicion
+                         and params == ('"so"', "so%", "% so%") and "MATCH" in relevancia)
+
+        corto = "a" * (NGRAM_TOKEN_SIZE - 1)
+        condicion, params, relevancia, _ = condicion_texto("nombre", corto)
+        ok &= _comprobar(f"Término de {len(corto)} carácter(es) (< NGRAM_TOKEN_SIZE={NGRAM_TOKEN_SIZE}): LIKE",
+                         not usa_fulltext(corto) and condicion == "nombre LIKE %s"
+                         and params == (f"%{corto}%",) and relevancia == "0")
+        condicion, params, _, _ = condicion_texto("nombre", corto, 'prefijo')
+        ok &= _comprobar("... y en modo prefijo, LIKE al inicio de palabra",
+                         "MATCH" not in condicion and params == (f"{corto}%", f"% {corto}%"))
+    finally:
+        del backend.fulltext
+
+    try:
+        condicion_texto("nombre", "x", 'regex')
+        ok &= _comprobar("Modo inválido: ValueError", False)
+    except ValueError:
+        ok &= _comprobar("Modo inválido: ValueError", True)
+    return ok
+
+
+def _preparar_empleados():
+    rol = Rol(id=str(uuid.uuid4()), nombre="Empleado", nivel_permisos=3)
+    RolRepo().crear_muchos([rol])
+    usuarios = [Usuario(id=str(uuid.uuid4()), nombre_usuario=f"usuario{i}", contrasena_cifrada="", salt="",
+                        rol_id=rol.id) for i in range(len(NOMBRES))]
+    UsuarioRepo().crear_muchos(usuarios)
+    EmpleadoRepo().crear_muchos([
+        Empleado(id=str(uuid.uuid4()), usuario_id=u.id, nombre=nombre, email=f"{u.nombre_usuario}@ecotech.cl",
+                 fecha_inicio_contrato="2026-01-05")
+        for u, nombre in zip(usuarios, NOMBRES)
+    ])
+
+
+def _buscar(termino, modo='frase', limite=50):
+    return [f['nombre'] for f in buscar_texto("id, nombre", "empleados", "nombre", termino, modo, limite)]
+
+
+def test_fallback_like():
+    """Test: búsquedas con LIKE (SQLite, o términos cortos en MySQL)"""
+    print("\n" + "=" * 60)
+    print("TEST: Búsquedas con LIKE")
+    print("=" * 60)
+
+    _preparar_empleados()
+    ok = _comprobar("frase: subcadena en cualquier parte",
+                    _buscar("ría") == ["María José Rojas"] and _buscar("ria") == ["Mariano Soto"])
+    ok &= _comprobar("Un carácter: todas las filas que lo contienen",
+                     sorted(_buscar("z")) == ["Ana Díaz", "Sofía Ruiz"])
+    ok &= _comprobar("prefijo: solo al inicio de una palabra",
+                     sorted(_buscar("so", 'prefijo')) == ["Mariano Soto", "Sofía Ruiz"]
+                     and _buscar("ano", 'prefijo') == [])
+    ok &= _comprobar("Las comillas del término no rompen la consulta", _buscar('"Ana"') == ["Ana Díaz"])
+    filas = buscar_texto("id, nombre", "empleados", "nombre", "a", limite=2)
+    ok &= _comprobar("Respeta el límite y agrega 'relevancia'", len(filas) == 2 and 'relevancia' in filas[0])
+    return ok
+
+
+def test_migraciones_sin_stopwords():
+    """Test: los índices ngram se crean con innodb_ft_enable_stopword = 0"""
+    print("\n" + "=" * 60)
+    print("TEST: Índices ngram sin stopwords")
+    print("=" * 60)
+
+    raiz = os.path.join(os.path.dirname(__file__), '..', 'alembic', 'versions')
+    ok = True
+    for ruta in sorted(glob.glob(os.path.join(raiz, '*.py'))):
+        with open(ruta, encoding='utf-8') as archivo:
+            codigo = archivo.read()
+        if "mysql_with_parser='ngram'" not in codigo:
+            continue
+        desactiva = codigo.find("innodb_ft_enable_stopword = 0")
+        if desactiva < 0:
+            desactiva = codigo.find("innodb_ft_enable_stopword = {1 if stopwords else 0}")
+        crea = codigo.find("op.create_index")
+        ok &= _comprobar(f"{os.path.basename(ruta)}: desactiva stopwords antes de crear el índice",
+                         0 <= desactiva < crea and "innodb_ft_enable_stopword = 1" in codigo)
+    return ok
+
+
+if __name__ == "__main__":
+    print("\n🌱 ECOTECH SOLUTIONS - TEST DE BÚSQUEDA DE TEXTO\n")
+
+    backend = BackendSQLite(':memory:')
+    Database.usar_backend(backend)
+    try:
+        ok = all([test_sql_fulltext(backend), test_fallback_like(), test_migraciones_sin_stopwords()])
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        ok = False
+    finally:
+        Database.close_pool()
+
+    print("\n" + "=" * 60)
+    print("TESTS COMPLETADOS" if ok else "TESTS CON FALLAS")
+    print("=" * 60 + "\n")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,136 @@
+"""
+Script de prueba de la unidad de trabajo en el alta de empleado con usuario.
+
+Corre sobre SQLite en memoria (no requiere MySQL): `crear_con_usuario` guarda
+ambos o ninguno, también cuando el usuario falla antes de llegar a la base, y
+los mensajes de éxito se muestran solo después del commit.
+"""
+import sys
+import os
+import io
+import uuid
+from contextlib import redirect_stdout
+from datetime import date
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistencia.db import Database
+from persistencia.sqlite_backend import BackendSQLite
+from persistencia.auth_repositorios import RolRepo, UsuarioRepo
+from persistencia.unit_of_work import UnitOfWork
+from aplicacion.services import EmpleadoService
+from aplicacion.auth_services import UsuarioService
+from dominio.models import Empleado
+from dominio.auth_models import Usuario, Rol
+
+
+def _comprobar(descripcion, condicion):
+    print(f"{'✓' if condicion else '✗'} {descripcion}")
+    return condicion
+
+
+class _UsuarioRepoInvalido(UsuarioRepo):
+    """Rechaza el usuario antes de abrir conexión (la unidad no se entera)"""
+
+    def crear(self, usuario):
+        raise ValueError("nombre de usuario inválido")
+
+
+def _usuario(rol, nombre):
+    return Usuario(id=str(uuid.uuid4()), nombre_usuario=nombre, contrasena_cifrada="", salt="", rol_id=rol.id)
+
+
+def _empleado(usuario, id_=None):
+    return Empleado(id=id_ or str(uuid.uuid4()), usuario_id=usuario.id, nombre=f"Empleado {usuario.nombre_usuario}",
+                    email=f"{usuario.nombre_usuario}@ecotech.cl", fecha_inicio_contrato=date(2026, 1, 5))
+
+
+def _existe(tabla, id_):
+    with Database.lectura() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT id FROM {tabla} WHERE id = %s", (id_,))
+            return cur.fetchone() is not None
+
+
+def _crear(empleados, usuarios, empleado, usuario, contrasena):
+    """crear_con_usuario capturando lo que imprime"""
+    salida = io.StringIO()
+    with redirect_stdout(salida):
+        creado = empleados.crear_con_usuario(empleado, usuario, contrasena, usuarios)
+    return creado, salida.getvalue()
+
+
+def test_crear_con_usuario(rol):
+    """Test: ambos o ninguno, y mensajes solo tras el commit"""
+    print("=" * 60)
+    print("TEST: Alta de empleado con usuario")
+    print("=" * 60)
+
+    empleados, usuarios = EmpleadoService(), UsuarioService()
+    usuario = _usuario(rol, "ana")
+    existente = _empleado(usuario)
+    creado, salida = _crear(empleados, usuarios, existente, usuario, "Clave123!")
+    ok = _comprobar("Sin fallos: True, ambos guardados y mensajes de éxito",
+                    creado and _existe('usuarios', usuario.id) and "creado exitosamente" in salida
+                    and "Empleado creado" in salida)
+
+    # Falla antes de tocar la base: nada marca la unidad para rollback
+    invalidos = UsuarioService()
+    invalidos.usuario_repo = _UsuarioRepoInvalido()
+    sofia = _usuario(rol, "sofia")
+    empleado = _empleado(sofia)
+    creado, salida = _crear(empleados, invalidos, empleado, sofia, "Clave123!")
+    ok &= _comprobar("Usuario que falla antes de la base: False y no se guarda el empleado",
+                     creado is False and not _existe('usuarios', sofia.id) and not _existe('empleados', empleado.id))
+
+    # El usuario se inserta y el empleado falla (id duplicado): se revierten ambos
+    huerfano = _usuario(rol, "maria")
+    creado, salida = _crear(empleados, usuarios, _empleado(huerfano, existente.id), huerfano, "Clave123!")
+    ok &= _comprobar("Empleado que falla: False y el usuario se revierte",
+                     creado is False and not _existe('usuarios', huerfano.id))
+    ok &= _comprobar("Sin mensaje de éxito para el usuario revertido",
+                     "creado exitosamente" not in salida and "revertida" in salida)
+    return ok
+
+
+def test_mensaje_tras_commit(rol):
+    """Test: el éxito se informa al confirmar, no al insertar"""
+    print("\n" + "=" * 60)
+    print("TEST: Mensajes diferidos al commit")
+    print("=" * 60)
+
+    usuarios = UsuarioService()
+    salida = io.StringIO()
+    with redirect_stdout(salida):
+        with UnitOfWork():
+            usuarios.crear_usuario(_usuario(rol, "ines"), "Clave123!")
+            dentro = salida.getvalue()
+    ok = _comprobar("Dentro de la unidad aún no se informa", "creado exitosamente" not in dentro)
+    ok &= _comprobar("Al confirmar se informa", "creado exitosamente" in salida.getvalue())
+
+    salida = io.StringIO()
+    with redirect_stdout(salida):
+        with UnitOfWork() as uow:
+            usuarios.crear_usuario(_usuario(rol, "lucia"), "Clave123!")
+            uow.rollback()
+    ok &= _comprobar("Si la unidad se revierte no se informa", "creado exitosamente" not in salida.getvalue())
+    return ok
+
+
+if __name__ == "__main__":
+    print("\n🌱 ECOTECH SOLUTIONS - TEST DE UNIDAD DE TRABAJO\n")
+
+    Database.usar_backend(BackendSQLite(':memory:'))
+    try:
+        rol = Rol(id=str(uuid.uuid4()), nombre="Empleado", nivel_permisos=3)
+        RolRepo().crear_muchos([rol])
+        ok = all([test_crear_con_usuario(rol), test_mensaje_tras_commit(rol)])
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        ok = False
+    finally:
+        Database.close_pool()
+
+    print("\n" + "=" * 60)
+    print("TESTS COMPLETADOS" if ok else "TESTS CON FALLAS")
+    print("=" * 60 + "\n")
+    sys.exit(0 if ok else 1)